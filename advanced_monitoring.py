@@ -16,9 +16,14 @@ from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Optional, Tuple
 import nmap
-import sqlite3
 from dataclasses import dataclass
 from config_advanced import MONITORING_CONFIG
+from storage import get_pool
+from batch_writer import BatchedWriter
+from async_service_checker import AsyncServiceChecker
+from monitoring_scheduler import AdaptiveScheduler
+from device_inventory import device_inventory
+from geolocation import IPGeolocator
 
 @dataclass
 class ServiceStatus:
@@ -29,6 +34,7 @@ class ServiceStatus:
     response_time: float
     last_check: datetime
     error_message: Optional[str] = None
+    device_ip: Optional[str] = None
 
 @dataclass
 class DeviceLocation:
@@ -58,21 +64,45 @@ class AdvancedMonitoring:
     
     def __init__(self, db_path: str = "network_monitor.db"):
         self.db_path = db_path
+        self.pool = get_pool(db_path)  # Connexions réglées (WAL, busy_timeout) réutilisées
         self.config = MONITORING_CONFIG
         self.nm = nmap.PortScanner()
         self.discovered_devices = set()
         self.service_cache = {}
-        self.location_cache = {}
         self.bandwidth_cache = {}
         self.running = False
         self.monitoring_thread = None
+        self.scheduler = AdaptiveScheduler(self.config['adaptive_scheduling'])
+        self.last_discovery = 0
+        
+        # Équipements surveillés : inventaire de la base principale (cache partagé)
+        self.inventory = device_inventory
+        self.inventory.subscribe(self._on_inventory_change)
         
         # Initialiser la base de données
         self.init_database()
         
+        # Géolocalisation : cache persistant dans la base de monitoring
+        self.geolocator = IPGeolocator(db_path, self.config['geolocation'])
+        
+        # Résultats de vérification (services et ports) écrits par lots
+        writer_config = self.config['batch_writer']
+        self.service_writer = BatchedWriter(
+            self.pool,
+            '''
+                INSERT INTO service_monitoring 
+                (device_ip, service_name, port, status, response_time, last_check, error_message)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''',
+            batch_size=writer_config['batch_size'],
+            flush_interval=writer_config['flush_interval'],
+            max_queue=writer_config['max_queue'],
+            name='service-monitoring-writer'
+        )
+        
     def init_database(self):
         """Initialiser les tables de base de données pour le monitoring avancé"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
             # Table pour les services
@@ -153,6 +183,10 @@ class AdvancedMonitoring:
     
     def _monitoring_loop(self):
         """Boucle principale de monitoring"""
+        if self.config['adaptive_scheduling']['enabled']:
+            self._adaptive_monitoring_loop()
+            return
+        
         while self.running:
             try:
                 # Vérifier les services
@@ -182,6 +216,77 @@ class AdvancedMonitoring:
                 print(f"❌ Erreur dans la boucle de monitoring: {e}")
                 time.sleep(60)  # Attendre 1 minute en cas d'erreur
     
+    def _scheduled_checks(self) -> List[str]:
+        """Vérifications planifiées par équipement (un service surveillé ou le scan de ports)"""
+        checks = []
+        if self.config['enable_service_monitoring']:
+            checks.extend(self.config['monitored_services'])
+        if self.config['enable_port_monitoring']:
+            checks.append('ports')
+        return checks
+    
+    def _adaptive_monitoring_loop(self):
+        """Boucle de monitoring pilotée par les échéances de l'ordonnanceur adaptatif"""
+        schedule_config = self.config['adaptive_scheduling']
+        self.scheduler.sync(self.get_all_devices(), self._scheduled_checks())
+        last_periodic = 0
+        while self.running:
+            try:
+                now = time.time()
+                # Lecture via le cache : un changement de la table device resynchronise la file
+                self.get_all_devices()
+                
+                due = self.scheduler.pop_due(now)
+                if due:
+                    self.run_scheduled_checks(due)
+                
+                # Tâches non planifiées par équipement : cadence fixe
+                if now - last_periodic >= self.config['discovery_interval']:
+                    if self.config['auto_discovery']:
+                        self.auto_discover_devices()
+                    if self.config['enable_geolocation']:
+                        self.update_device_locations()
+                    if self.config['enable_bandwidth_monitoring']:
+                        self.monitor_bandwidth()
+                    last_periodic = now
+                
+                wait = self.scheduler.seconds_until_next()
+                time.sleep(min(wait if wait is not None else schedule_config['max_sleep'],
+                               schedule_config['max_sleep']))
+                
+            except Exception as e:
+                print(f"❌ Erreur dans la boucle de monitoring: {e}")
+                time.sleep(60)  # Attendre 1 minute en cas d'erreur
+    
+    def _on_inventory_change(self, changes: Dict, devices: List[Dict]):
+        """Nouveaux équipements planifiés immédiatement, équipements retirés sortis de la file"""
+        for device in changes['added']:
+            print(f"🆕 Équipement ajouté à la surveillance: {device['ip']} ({device.get('device_type') or 'unknown'})")
+        self.scheduler.sync(devices, self._scheduled_checks())
+    
+    def run_scheduled_checks(self, due: List[Tuple[str, str]]):
+        """Exécute les couples (ip, vérification) échus et les replanifie selon leur résultat"""
+        services = self.config['monitored_services']
+        targets = [(ip, check, services[check]['port'], services[check]['timeout'])
+                   for ip, check in due if check in services]
+        port_checks = [ip for ip, check in due if check == 'ports']
+        results = {}
+        
+        try:
+            for service_status in (self._run_service_checks(targets) if targets else []):
+                results[(service_status.device_ip, service_status.service_name)] = service_status.status
+            for ip in port_checks:
+                results[(ip, 'ports')] = "up" if self.check_device_ports({'ip': ip}) else "down"
+            self.service_writer.flush()
+        finally:
+            # Un couple sans résultat est replanifié avec son intervalle courant
+            for key in due:
+                self.scheduler.record(key, results.get(key))
+    
+    def get_schedule_stats(self) -> Dict:
+        """État de l'ordonnanceur adaptatif"""
+        return self.scheduler.get_stats()
+    
     def check_service(self, host: str, service_name: str, port: int, timeout: int = 5) -> ServiceStatus:
         """Vérifier le statut d'un service spécifique"""
         start_time = time.time()
@@ -237,7 +342,8 @@ class AdvancedMonitoring:
             status=status,
             response_time=response_time,
             last_check=datetime.now(),
-            error_message=error_message
+            error_message=error_message,
+            device_ip=host
         )
         
         # Mettre en cache
@@ -375,6 +481,11 @@ class AdvancedMonitoring:
         # Récupérer tous les équipements de la base
         devices = self.get_all_devices()
         
+        if self.config['async_checks']['enabled']:
+            self._check_all_services_async(devices)
+            self.service_writer.flush()
+            return
+        
         with ThreadPoolExecutor(max_workers=10) as executor:
             futures = []
             
@@ -389,13 +500,62 @@ class AdvancedMonitoring:
                     )
                     futures.append(future)
             
-            # Collecter les résultats
+            # Collecter les résultats (mis en file, écrits par lots)
             for future in as_completed(futures):
                 try:
                     service_status = future.result()
                     self.save_service_status(service_status)
                 except Exception as e:
                     print(f"❌ Erreur lors de la vérification de service: {e}")
+        
+        # Résultats du cycle visibles avant le prochain résumé
+        self.service_writer.flush()
+    
+    def _check_all_services_async(self, devices: List[Dict]):
+        """Cycle de vérification asyncio : toutes les sondes en parallèle, délai global"""
+        targets = [
+            (device['ip'], service_name, service_config['port'], service_config['timeout'])
+            for device in devices
+            for service_name, service_config in self.config['monitored_services'].items()
+        ]
+        start_time = time.time()
+        statuses = self._run_service_checks(targets)
+        
+        up_count = sum(1 for s in statuses if s.status == 'up')
+        print(f"✅ {len(statuses)} services vérifiés en {time.time() - start_time:.1f}s ({up_count} actifs)")
+    
+    def _run_service_checks(self, targets: List[Tuple]) -> List[ServiceStatus]:
+        """Exécute des vérifications (hôte, service, port, timeout), met en cache et enregistre les statuts"""
+        if self.config['async_checks']['enabled']:
+            results = AsyncServiceChecker(self.config['async_checks']).check_all(targets)
+        else:
+            with ThreadPoolExecutor(max_workers=10) as executor:
+                results = []
+                for target, service_status in zip(targets, executor.map(lambda t: self.check_service(*t), targets)):
+                    results.append({
+                        'host': target[0],
+                        'service_name': service_status.service_name,
+                        'port': service_status.port,
+                        'status': service_status.status,
+                        'response_time': service_status.response_time,
+                        'error_message': service_status.error_message
+                    })
+        
+        statuses = []
+        for result in results:
+            service_status = ServiceStatus(
+                service_name=result['service_name'],
+                port=result['port'],
+                status=result['status'],
+                response_time=result['response_time'],
+                last_check=datetime.now(),
+                error_message=result['error_message'],
+                device_ip=result['host']
+            )
+            self.service_cache[f"{result['host']}:{result['port']}:{result['service_name']}"] = service_status
+            self.save_service_status(service_status)
+            statuses.append(service_status)
+        return statuses
     
     def check_all_ports(self):
         """Vérifier tous les ports configurés"""
@@ -404,57 +564,76 @@ class AdvancedMonitoring:
         devices = self.get_all_devices()
         
         for device in devices:
-            try:
-                # Utiliser nmap pour scanner les ports
-                scan_result = self.nm.scan(device['ip'], arguments='-sS -T4 -p ' + ','.join(map(str, self.config['monitored_ports'])))
-                
-                if device['ip'] in scan_result['scan']:
-                    host_result = scan_result['scan'][device['ip']]
+            self.check_device_ports(device)
+        
+        self.service_writer.flush()
+    
+    def check_device_ports(self, device: Dict) -> bool:
+        """
+        Scanner les ports surveillés d'un équipement
+        
+        Returns:
+            bool: True si l'équipement a répondu au scan
+        """
+        try:
+            # Utiliser nmap pour scanner les ports
+            scan_result = self.nm.scan(device['ip'], arguments='-sS -T4 -p ' + ','.join(map(str, self.config['monitored_ports'])))
+            
+            if device['ip'] not in scan_result['scan']:
+                return False
+            host_result = scan_result['scan'][device['ip']]
+            
+            for port in self.config['monitored_ports']:
+                port_str = str(port)
+                if 'tcp' in host_result and port_str in host_result['tcp']:
+                    port_status = host_result['tcp'][port_str]['state']
                     
-                    for port in self.config['monitored_ports']:
-                        port_str = str(port)
-                        if 'tcp' in host_result and port_str in host_result['tcp']:
-                            port_status = host_result['tcp'][port_str]['state']
-                            
-                            service_status = ServiceStatus(
-                                service_name=f"port_{port}",
-                                port=port,
-                                status="up" if port_status == "open" else "down",
-                                response_time=None,
-                                last_check=datetime.now()
-                            )
-                            
-                            self.save_service_status(service_status)
+                    service_status = ServiceStatus(
+                        service_name=f"port_{port}",
+                        port=port,
+                        status="up" if port_status == "open" else "down",
+                        response_time=None,
+                        last_check=datetime.now(),
+                        device_ip=device['ip']
+                    )
+                    
+                    self.save_service_status(service_status)
+            return True
                             
-            except Exception as e:
-                print(f"❌ Erreur lors du scan de ports pour {device['ip']}: {e}")
+        except Exception as e:
+            print(f"❌ Erreur lors du scan de ports pour {device['ip']}: {e}")
+            return False
     
     def auto_discover_devices(self):
-        """Détection automatique de nouveaux équipements"""
+        """Détection automatique de nouveaux équipements (résultats du scanner principal, sans nouveau balayage)"""
         print("🆕 Détection automatique d'équipements...")
         
         try:
-            # Scanner le réseau pour découvrir de nouveaux équipements
-            network_range = "192.168.1.0/24"  # À configurer
-            
-            scan_result = self.nm.scan(hosts=network_range, arguments='-sn')
-            
-            for host in scan_result['scan']:
-                if scan_result['scan'][host]['status']['state'] == 'up':
-                    # Vérifier si c'est un nouvel équipement
-                    if host not in self.discovered_devices:
-                        self.discovered_devices.add(host)
-                        
-                        # Récupérer les informations de l'équipement
-                        host_info = scan_result['scan'][host]
-                        
-                        # Détecter le type d'équipement
+            discoveries = self.inventory.get_discoveries(since=self.last_discovery)
+            self.last_discovery = max([d['discovered_at'] for d in discoveries] + [self.last_discovery])
+            
+            for device in discoveries:
+                host = device['ip']
+                # Vérifier si c'est un nouvel équipement
+                if host not in self.discovered_devices:
+                    self.discovered_devices.add(host)
+                    
+                    # Informations au format nmap attendu par la détection et la sauvegarde
+                    host_info = {
+                        'addresses': {'mac': device['mac']} if device.get('mac') else {},
+                        'hostnames': [{'name': device['hostname']}] if device.get('hostname') else [],
+                        'tcp': {port: {'state': 'open'} for port in device.get('ports', [])}
+                    }
+                    
+                    # Type déjà classifié par le scanner principal, sinon détection par les ports
+                    device_type = device.get('type')
+                    if not device_type or device_type.lower() == 'unknown':
                         device_type = self._detect_device_type(host, host_info)
-                        
-                        # Sauvegarder le nouvel équipement
-                        self.save_discovered_device(host, host_info, device_type)
-                        
-                        print(f"🆕 Nouvel équipement détecté: {host} ({device_type})")
+                    
+                    # Sauvegarder le nouvel équipement
+                    self.save_discovered_device(host, host_info, device_type)
+                    
+                    print(f"🆕 Nouvel équipement détecté: {host} ({device_type})")
         
         except Exception as e:
             print(f"❌ Erreur lors de la détection automatique: {e}")
@@ -491,53 +670,35 @@ class AdvancedMonitoring:
             return "unknown"
     
     def get_device_location(self, ip: str) -> Optional[DeviceLocation]:
-        """Obtenir la géolocalisation d'un équipement"""
-        # Vérifier le cache
-        if ip in self.location_cache:
-            return self.location_cache[ip]
-        
+        """Obtenir la géolocalisation d'un équipement (None pour une adresse privée ou inconnue)"""
         try:
-            # Utiliser un service de géolocalisation IP
-            response = requests.get(f"http://ip-api.com/json/{ip}", timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data['status'] == 'success':
-                    location = DeviceLocation(
-                        ip=ip,
-                        country=data.get('country'),
-                        region=data.get('regionName'),
-                        city=data.get('city'),
-                        latitude=data.get('lat'),
-                        longitude=data.get('lon'),
-                        isp=data.get('isp'),
-                        timezone=data.get('timezone')
-                    )
-                    
-                    # Mettre en cache
-                    self.location_cache[ip] = location
-                    
-                    # Sauvegarder en base
-                    self.save_device_location(location)
-                    
-                    return location
-            
+            location = self.geolocator.lookup(ip)
+            if location:
+                location = DeviceLocation(ip=ip, **location)
+                self.save_device_location(location)
+                return location
         except Exception as e:
             print(f"❌ Erreur lors de la géolocalisation de {ip}: {e}")
         
         return None
     
     def update_device_locations(self):
-        """Mettre à jour les géolocalisations de tous les équipements"""
+        """Mettre à jour les géolocalisations de tous les équipements (requêtes groupées)"""
         print("🌍 Mise à jour des géolocalisations...")
         
         devices = self.get_all_devices()
         
-        for device in devices:
-            location = self.get_device_location(device['ip'])
+        try:
+            locations = self.geolocator.lookup_many(device['ip'] for device in devices)
+        except Exception as e:
+            print(f"❌ Erreur lors de la géolocalisation des équipements: {e}")
+            return
+        
+        for ip, location in locations.items():
             if location:
-                print(f"📍 {device['ip']} -> {location.city}, {location.country}")
+                location = DeviceLocation(ip=ip, **location)
+                self.save_device_location(location)
+                print(f"📍 {ip} -> {location.city}, {location.country}")
     
     def monitor_bandwidth(self):
         """Monitorer l'utilisation de bande passante"""
@@ -598,43 +759,27 @@ class AdvancedMonitoring:
             print(f"❌ Erreur monitoring Linux: {e}")
     
     def get_all_devices(self) -> List[Dict]:
-        """Récupérer tous les équipements de la base de données"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT id, ip, mac, hostname, device_type FROM devices')
-            devices = []
-            for row in cursor.fetchall():
-                devices.append({
-                    'id': row[0],
-                    'ip': row[1],
-                    'mac': row[2],
-                    'hostname': row[3],
-                    'device_type': row[4]
-                })
-            return devices
+        """Récupérer tous les équipements de la base principale (table device, via le cache d'inventaire)"""
+        return self.inventory.get_devices()
     
     def save_service_status(self, service_status: ServiceStatus):
-        """Sauvegarder le statut d'un service"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO service_monitoring 
-                (device_ip, service_name, port, status, response_time, last_check, error_message)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                service_status.service_name.split(':')[0] if ':' in service_status.service_name else 'localhost',
-                service_status.service_name,
-                service_status.port,
-                service_status.status,
-                service_status.response_time,
-                service_status.last_check,
-                service_status.error_message
-            ))
-            conn.commit()
+        """Sauvegarder le statut d'un service (mis en file, écrit par lots)"""
+        device_ip = service_status.device_ip
+        if not device_ip:
+            device_ip = service_status.service_name.split(':')[0] if ':' in service_status.service_name else 'localhost'
+        self.service_writer.write((
+            device_ip,
+            service_status.service_name,
+            service_status.port,
+            service_status.status,
+            service_status.response_time,
+            service_status.last_check,
+            service_status.error_message
+        ))
     
     def save_discovered_device(self, ip: str, host_info: dict, device_type: str):
         """Sauvegarder un nouvel équipement découvert"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             
             # Récupérer le MAC address si disponible
@@ -657,7 +802,7 @@ class AdvancedMonitoring:
     
     def save_device_location(self, location: DeviceLocation):
         """Sauvegarder la géolocalisation d'un équipement"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT OR REPLACE INTO device_locations 
@@ -673,7 +818,7 @@ class AdvancedMonitoring:
     def save_bandwidth_usage(self, device_ip: str, interface: str, bytes_sent: int, 
                            bytes_received: int, packets_sent: int, packets_received: int):
         """Sauvegarder l'utilisation de bande passante"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO bandwidth_usage 
@@ -684,7 +829,7 @@ class AdvancedMonitoring:
     
     def get_service_status_summary(self) -> Dict:
         """Obtenir un résumé des statuts de services"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT service_name, status, COUNT(*) as count
@@ -704,7 +849,7 @@ class AdvancedMonitoring:
     
     def get_discovered_devices(self) -> List[Dict]:
         """Obtenir la liste des équipements découverts"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT ip_address, mac_address, hostname, device_type, 
@@ -729,7 +874,7 @@ class AdvancedMonitoring:
     
     def get_device_locations(self) -> List[DeviceLocation]:
         """Obtenir toutes les géolocalisations"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT device_ip, country, region, city, latitude, longitude, isp, timezone
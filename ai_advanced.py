@@ -10,8 +10,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from typing import List, Dict, Any, Optional
-import sqlite3
 import os
+from storage import get_pool
 
 @dataclass
 class Prediction:
@@ -64,71 +64,69 @@ class AdvancedAI:
     
     def __init__(self, db_path: str = "network_monitoring.db"):
         self.db_path = db_path
+        self.pool = get_pool(db_path)
         self.init_database()
     
     def init_database(self):
         """Initialise la base de données pour l'IA avancée"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Table des prédictions
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ai_predictions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                device_id INTEGER,
-                device_name TEXT,
-                prediction_type TEXT,
-                confidence REAL,
-                timestamp TEXT,
-                description TEXT,
-                severity TEXT
-            )
-        ''')
-        
-        # Table des intrusions
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ai_intrusions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_ip TEXT,
-                target_ip TEXT,
-                attack_type TEXT,
-                severity TEXT,
-                timestamp TEXT,
-                status TEXT,
-                description TEXT
-            )
-        ''')
-        
-        # Table des optimisations
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ai_optimizations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                category TEXT,
-                title TEXT,
-                description TEXT,
-                impact TEXT,
-                implementation_time TEXT,
-                status TEXT,
-                timestamp TEXT
-            )
-        ''')
-        
-        # Table des tendances
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS ai_trends (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                metric TEXT,
-                current_value REAL,
-                previous_value REAL,
-                change_percentage REAL,
-                trend_direction TEXT,
-                period TEXT,
-                timestamp TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Table des prédictions
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ai_predictions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    device_id INTEGER,
+                    device_name TEXT,
+                    prediction_type TEXT,
+                    confidence REAL,
+                    timestamp TEXT,
+                    description TEXT,
+                    severity TEXT
+                )
+            ''')
+            
+            # Table des intrusions
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ai_intrusions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    source_ip TEXT,
+                    target_ip TEXT,
+                    attack_type TEXT,
+                    severity TEXT,
+                    timestamp TEXT,
+                    status TEXT,
+                    description TEXT
+                )
+            ''')
+            
+            # Table des optimisations
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ai_optimizations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    category TEXT,
+                    title TEXT,
+                    description TEXT,
+                    impact TEXT,
+                    implementation_time TEXT,
+                    status TEXT,
+                    timestamp TEXT
+                )
+            ''')
+            
+            # Table des tendances
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ai_trends (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    metric TEXT,
+                    current_value REAL,
+                    previous_value REAL,
+                    change_percentage REAL,
+                    trend_direction TEXT,
+                    period TEXT,
+                    timestamp TEXT
+                )
+            ''')
     
     def generate_predictions(self) -> List[Dict[str, Any]]:
         """Génère des prédictions IA simulées"""
@@ -18,6 +18,10 @@ from typing import Dict, List, Tuple, Optional
 import warnings
 warnings.filterwarnings('ignore')
 
+from device_rules import get_device_rule_engine
+from ai_fast_inference import export_isolation_forest, export_forest_classifier, export_gradient_boosting, scale
+from config_advanced import AI_ADVANCED_CONFIG
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -81,57 +85,7 @@ class DeviceClassifier:
         """Classifie un équipement (version enrichie)"""
         try:
             features = self.extract_features(hostname, mac_vendor, ip)
-            hostname_lower = hostname.lower() if hostname else ''
-            mac_lower = mac_vendor.lower() if mac_vendor else ''
-
-            # Enrichissement des règles de détection
-            # Switch/Routeur
-            if any(word in hostname_lower for word in ['switch', 'sw', 'hub', 'aruba', 'juniper', 'procurve', 'zyxel', 'tenda', 'h3c', 'fortinet', 'alcatel', 'zte', 'mikrotik', 'ubiquiti', 'linksys']) or any(word in mac_lower for word in ['cisco', 'netgear', 'tplink', 'dlink', 'aruba', 'juniper', 'zyxel', 'tenda', 'h3c', 'fortinet', 'alcatel', 'zte', 'huawei', 'mikrotik', 'ubiquiti', 'linksys']):
-                device_type = 'switch'
-                confidence = 0.92
-            # Téléphone
-            elif any(word in hostname_lower for word in ['phone', 'voip', 'sip', 'polycom', 'yealink', 'avaya', 'iphone', 'android', 'samsung', 'huawei', 'xiaomi', 'oneplus', 'itel', 'ipad', 'tablet', 'oppo', 'vivo']) or any(word in mac_lower for word in ['apple', 'samsung', 'huawei', 'xiaomi', 'oneplus', 'itel', 'polycom', 'yealink', 'avaya', 'cisco', 'oppo', 'vivo']):
-                device_type = 'phone'
-                confidence = 0.91
-            # Imprimante
-            elif any(word in hostname_lower for word in ['printer', 'print', 'hp', 'canon', 'epson', 'brother', 'xerox', 'ricoh', 'lexmark', 'kyocera']) or any(word in mac_lower for word in ['hp', 'canon', 'epson', 'brother', 'xerox', 'ricoh', 'lexmark', 'kyocera']):
-                device_type = 'printer'
-                confidence = 0.90
-            # Box/Modem
-            elif any(word in hostname_lower for word in ['box', 'modem', 'livebox', 'bbox', 'freebox', 'sfrbox', 'zte', 'huawei', 'sagem', 'technicolor']) or any(word in mac_lower for word in ['zte', 'huawei', 'sagem', 'technicolor', 'livebox', 'bbox', 'freebox', 'sfrbox']):
-                device_type = 'box'
-                confidence = 0.90
-            # PLC/Automate
-            elif any(word in hostname_lower for word in ['plc', 'automation', 'automate', 'scada', 'hmi', 'control', 'abb', 'mitsubishi', 'omron']) or any(word in mac_lower for word in ['siemens', 'schneider', 'abb', 'mitsubishi', 'omron']):
-                device_type = 'plc'
-                confidence = 0.89
-            # Caméra
-            elif any(word in hostname_lower for word in ['camera', 'ipcam', 'surveillance', 'hikvision', 'dahua', 'foscam', 'arlo', 'axis']) or any(word in mac_lower for word in ['hikvision', 'dahua', 'foscam', 'arlo', 'axis']):
-                device_type = 'camera'
-                confidence = 0.88
-            # Serveur
-            elif any(word in hostname_lower for word in ['server', 'srv', 'dc', 'domain', 'exchange', 'sql', 'web', 'nas', 'synology', 'qnap']) or any(word in mac_lower for word in ['synology', 'qnap', 'nas', 'dell', 'hp', 'ibm', 'lenovo']):
-                device_type = 'server'
-                confidence = 0.95
-            # PC/Workstation
-            elif any(word in hostname_lower for word in ['pc', 'workstation', 'desktop', 'laptop', 'client', 'lenovo', 'dell', 'asus', 'acer', 'msi', 'hp', 'windows', 'macbook', 'imac']) or any(word in mac_lower for word in ['lenovo', 'dell', 'asus', 'acer', 'msi', 'hp', 'windows', 'macbook', 'imac']):
-                device_type = 'workstation'
-                confidence = 0.85
-            # Routeur (fallback)
-            elif any(word in hostname_lower for word in ['router', 'gateway', 'firewall', 'core']) or any(word in mac_lower for word in ['cisco', 'netgear', 'tplink', 'dlink', 'aruba', 'juniper', 'zyxel', 'tenda', 'h3c', 'fortinet', 'alcatel', 'zte', 'huawei', 'mikrotik', 'ubiquiti', 'linksys']):
-                device_type = 'router'
-                confidence = 0.90
-            # Fallback box sur IP .1 ou .254
-            elif ip.endswith('.1') or ip.endswith('.254'):
-                if any(word in mac_lower for word in ['zte', 'huawei', 'sagem', 'technicolor', 'livebox', 'bbox', 'freebox', 'sfrbox']):
-                    device_type = 'box'
-                    confidence = 0.88
-                else:
-                    device_type = 'router'
-                    confidence = 0.80
-            else:
-                device_type = 'unknown'
-                confidence = 0.60
+            device_type, confidence = get_device_rule_engine().classify(hostname, mac_vendor, ip)
             return {
                 'device_type': device_type,
                 'confidence': confidence,
@@ -152,7 +106,17 @@ class AnomalyDetector:
         )
         self.scaler = StandardScaler()
         self.is_fitted = False
+        self.training_metrics = {}
+        self.fast_model = None
         
+    def get_fast_model(self):
+        """Modèle aplati pour l'inférence rapide (exporté au premier appel), ou None"""
+        if not AI_ADVANCED_CONFIG.get('fast_inference', True) or not self.is_fitted:
+            return None
+        if self.fast_model is None:
+            self.fast_model = export_isolation_forest(self.isolation_forest) or False
+        return self.fast_model or None
+    
     def extract_anomaly_features(self, device_history: List[Dict]) -> np.ndarray:
         """Extrait les caractéristiques pour la détection d'anomalies"""
         if not device_history:
@@ -180,17 +144,29 @@ class AnomalyDetector:
                 if len(features) > 0:
                     all_features.extend(features)
             
-            if len(all_features) > 10:
-                features_array = np.array(all_features)
-                features_scaled = self.scaler.fit_transform(features_array)
-                self.isolation_forest.fit(features_scaled)
-                self.is_fitted = True
-                logger.info("Modèle d'anomalies entraîné avec succès")
-            else:
-                logger.warning("Données insuffisantes pour entraîner le modèle d'anomalies")
+            self.fit_features(np.array(all_features))
         except Exception as e:
             logger.error(f"Erreur entraînement modèle anomalies: {e}")
     
+    def fit_features(self, features_array: np.ndarray, scaler: Optional[StandardScaler] = None):
+        """Entraîne le modèle sur des caractéristiques déjà extraites (scaler pré-ajusté optionnel)"""
+        if len(features_array) > 10:
+            if scaler is not None:
+                self.scaler = scaler
+                features_scaled = self.scaler.transform(features_array)
+            else:
+                features_scaled = self.scaler.fit_transform(features_array)
+            self.isolation_forest.fit(features_scaled)
+            self.is_fitted = True
+            self.fast_model = None
+            self.training_metrics = {
+                'anomaly_training_rows': int(len(features_array)),
+                'anomaly_rate': float(np.mean(self.isolation_forest.predict(features_scaled) == -1))
+            }
+            logger.info("Modèle d'anomalies entraîné avec succès")
+        else:
+            logger.warning("Données insuffisantes pour entraîner le modèle d'anomalies")
+    
     def detect_anomalies(self, device_history: List[Dict]) -> Dict:
         """Détecte les anomalies pour un équipement"""
         try:
@@ -201,9 +177,14 @@ class AnomalyDetector:
             if len(features) == 0:
                 return {'is_anomaly': False, 'anomaly_score': 0.0, 'confidence': 0.0}
             
-            features_scaled = self.scaler.transform(features)
-            anomaly_scores = self.isolation_forest.decision_function(features_scaled)
-            predictions = self.isolation_forest.predict(features_scaled)
+            fast_model = self.get_fast_model()
+            if fast_model is not None:
+                anomaly_scores = fast_model.decision_function(scale(self.scaler, features))
+                predictions = np.where(anomaly_scores < 0, -1, 1)
+            else:
+                features_scaled = self.scaler.transform(features)
+                anomaly_scores = self.isolation_forest.decision_function(features_scaled)
+                predictions = self.isolation_forest.predict(features_scaled)
             
             # Calcul du score d'anomalie moyen
             avg_anomaly_score = np.mean(anomaly_scores)
@@ -227,7 +208,19 @@ class PredictiveMaintenance:
         self.uptime_predictor = GradientBoostingRegressor(n_estimators=100, random_state=42)
         self.scaler = StandardScaler()
         self.is_fitted = False
+        self.training_metrics = {}
+        self.fast_models = None
         
+    def get_fast_models(self):
+        """Modèles aplatis (panne, uptime) pour l'inférence rapide, ou None"""
+        if not AI_ADVANCED_CONFIG.get('fast_inference', True) or not self.is_fitted:
+            return None
+        if self.fast_models is None:
+            failure_model = export_forest_classifier(self.failure_predictor, class_index=1)
+            uptime_model = export_gradient_boosting(self.uptime_predictor)
+            self.fast_models = (failure_model, uptime_model) if failure_model and uptime_model else False
+        return self.fast_models or None
+    
     def extract_maintenance_features(self, device_history: List[Dict]) -> np.ndarray:
         """Extrait les caractéristiques pour la prédiction de maintenance"""
         if not device_history:
@@ -305,6 +298,12 @@ class PredictiveMaintenance:
                 self.uptime_predictor.fit(X_scaled, uptime_labels)
                 
                 self.is_fitted = True
+                self.fast_models = None
+                self.training_metrics = {
+                    'maintenance_training_devices': int(len(X)),
+                    'failure_accuracy': float(self.failure_predictor.score(X_scaled, y)),
+                    'failure_positive_ratio': float(np.mean(y))
+                }
                 logger.info("Modèle de maintenance prédictive entraîné avec succès")
             else:
                 logger.warning("Données insuffisantes pour entraîner le modèle de maintenance")
@@ -331,13 +330,19 @@ class PredictiveMaintenance:
                     'confidence': 0.0
                 }
             
-            features_scaled = self.scaler.transform(features.reshape(1, -1))
-            
-            # Prédiction de panne
-            failure_prob = self.failure_predictor.predict_proba(features_scaled)[0][1]
-            
-            # Prédiction d'uptime
-            uptime_pred = self.uptime_predictor.predict(features_scaled)[0]
+            fast_models = self.get_fast_models()
+            if fast_models is not None:
+                features_scaled = scale(self.scaler, features.reshape(1, -1))
+                failure_prob = fast_models[0].predict_proba(features_scaled)[0]
+                uptime_pred = fast_models[1].predict(features_scaled)[0]
+            else:
+                features_scaled = self.scaler.transform(features.reshape(1, -1))
+                
+                # Prédiction de panne
+                failure_prob = self.failure_predictor.predict_proba(features_scaled)[0][1]
+                
+                # Prédiction d'uptime
+                uptime_pred = self.uptime_predictor.predict(features_scaled)[0]
             
             # Détermination de l'urgence
             if failure_prob > 0.8:
@@ -492,6 +497,8 @@ class AIEnhancement:
         self.maintenance_predictor = PredictiveMaintenance()
         self.recommendation_system = SmartRecommendations()
         self.models_trained = False
+        # Incrémenté à chaque entraînement ou chargement (invalide les analyses en cache)
+        self.model_version = 0
         
     def train_all_models(self, network_data: List[Dict]):
         """Entraîne tous les modèles IA"""
@@ -505,6 +512,21 @@ class AIEnhancement:
             self.maintenance_predictor.train_maintenance_model(network_data)
             
             self.models_trained = True
+            self.model_version += 1
+            logger.info("Tous les modèles IA ont été entraînés avec succès")
+            
+        except Exception as e:
+            logger.error(f"Erreur lors de l'entraînement des modèles: {e}")
+    
+    def train_from_snapshot(self, snapshot: Dict):
+        """Entraîne les modèles à partir d'un instantané du buffer d'entraînement incrémental"""
+        try:
+            logger.info(f"Entraînement des modèles IA sur {len(snapshot['anomaly_rows'])} scans...")
+            self.anomaly_detector.fit_features(snapshot['anomaly_rows'], snapshot.get('anomaly_scaler'))
+            self.maintenance_predictor.train_maintenance_model(snapshot['device_histories'])
+            
+            self.models_trained = True
+            self.model_version += 1
             logger.info("Tous les modèles IA ont été entraînés avec succès")
             
         except Exception as e:
@@ -610,26 +632,50 @@ class AIEnhancement:
             logger.error(f"Erreur calcul confiance IA: {e}")
             return 0.0
     
+    def get_training_metrics(self) -> Dict:
+        """Métriques du dernier entraînement (anomalies + maintenance)"""
+        return {**self.anomaly_detector.training_metrics, **self.maintenance_predictor.training_metrics}
+    
+    def export_models(self) -> Dict:
+        """Dictionnaire des modèles entraînés (format des artefacts)"""
+        return {
+            'anomaly_detector': {
+                'isolation_forest': self.anomaly_detector.isolation_forest,
+                'scaler': self.anomaly_detector.scaler,
+                'is_fitted': self.anomaly_detector.is_fitted
+            },
+            'maintenance_predictor': {
+                'failure_predictor': self.maintenance_predictor.failure_predictor,
+                'uptime_predictor': self.maintenance_predictor.uptime_predictor,
+                'scaler': self.maintenance_predictor.scaler,
+                'is_fitted': self.maintenance_predictor.is_fitted
+            },
+            'models_trained': self.models_trained,
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def apply_models(self, models_data: Dict):
+        """Remplace à chaud les modèles : les analyses en cours gardent les anciens objets"""
+        anomaly_detector = AnomalyDetector()
+        anomaly_detector.isolation_forest = models_data['anomaly_detector']['isolation_forest']
+        anomaly_detector.scaler = models_data['anomaly_detector']['scaler']
+        anomaly_detector.is_fitted = models_data['anomaly_detector']['is_fitted']
+        
+        maintenance_predictor = PredictiveMaintenance()
+        maintenance_predictor.failure_predictor = models_data['maintenance_predictor']['failure_predictor']
+        maintenance_predictor.uptime_predictor = models_data['maintenance_predictor']['uptime_predictor']
+        maintenance_predictor.scaler = models_data['maintenance_predictor']['scaler']
+        maintenance_predictor.is_fitted = models_data['maintenance_predictor']['is_fitted']
+        
+        self.anomaly_detector = anomaly_detector
+        self.maintenance_predictor = maintenance_predictor
+        self.models_trained = models_data.get('models_trained', False)
+        self.model_version += 1
+    
     def save_models(self, filepath: str):
         """Sauvegarde les modèles IA"""
         try:
-            models_data = {
-                'anomaly_detector': {
-                    'isolation_forest': self.anomaly_detector.isolation_forest,
-                    'scaler': self.anomaly_detector.scaler,
-                    'is_fitted': self.anomaly_detector.is_fitted
-                },
-                'maintenance_predictor': {
-                    'failure_predictor': self.maintenance_predictor.failure_predictor,
-                    'uptime_predictor': self.maintenance_predictor.uptime_predictor,
-                    'scaler': self.maintenance_predictor.scaler,
-                    'is_fitted': self.maintenance_predictor.is_fitted
-                },
-                'models_trained': self.models_trained,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            joblib.dump(models_data, filepath)
+            joblib.dump(self.export_models(), filepath)
             logger.info(f"Modèles IA sauvegardés: {filepath}")
             
         except Exception as e:
@@ -638,24 +684,27 @@ class AIEnhancement:
     def load_models(self, filepath: str):
         """Charge les modèles IA"""
         try:
-            models_data = joblib.load(filepath)
-            
-            # Restauration du détecteur d'anomalies
-            self.anomaly_detector.isolation_forest = models_data['anomaly_detector']['isolation_forest']
-            self.anomaly_detector.scaler = models_data['anomaly_detector']['scaler']
-            self.anomaly_detector.is_fitted = models_data['anomaly_detector']['is_fitted']
-            
-            # Restauration du prédicteur de maintenance
-            self.maintenance_predictor.failure_predictor = models_data['maintenance_predictor']['failure_predictor']
-            self.maintenance_predictor.uptime_predictor = models_data['maintenance_predictor']['uptime_predictor']
-            self.maintenance_predictor.scaler = models_data['maintenance_predictor']['scaler']
-            self.maintenance_predictor.is_fitted = models_data['maintenance_predictor']['is_fitted']
-            
-            self.models_trained = models_data.get('models_trained', False)
+            self.apply_models(joblib.load(filepath))
             logger.info(f"Modèles IA chargés: {filepath}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erreur chargement modèles: {e}")
+            return False
+    
+    def load_from_registry(self, registry, version: Optional[str] = None) -> bool:
+        """Charge une version du registre de modèles"""
+        try:
+            models_data = registry.load(version)
+            if not models_data:
+                return False
+            self.apply_models(models_data)
+            logger.info(f"Modèles IA chargés depuis le registre: version {models_data['version']}")
+            return True
             
         except Exception as e:
             logger.error(f"Erreur chargement modèles: {e}")
+            return False
 
 # Instance globale du système IA
 ai_system = AIEnhancement() 
\ No newline at end of file
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Inférence rapide des ensembles d'arbres (IsolationForest, RandomForest, GradientBoosting)
+Les arbres entraînés sont exportés dans des tableaux NumPy plats (feature, seuil, enfants,
+valeur des feuilles) et évalués de façon vectorisée, sans la validation de scikit-learn
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+# Constante d'Euler-Mascheroni (longueur moyenne des chemins d'un arbre d'isolation)
+EULER_GAMMA = 0.5772156649015329
+
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Longueur moyenne d'un chemin non abouti dans un arbre binaire de recherche (Liu et al.)"""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n_samples)
+    result[n_samples == 2] = 1.0
+    mask = n_samples > 2
+    n = n_samples[mask]
+    result[mask] = 2.0 * (np.log(n - 1.0) + EULER_GAMMA) - 2.0 * (n - 1.0) / n
+    return result
+
+
+def _node_depths(children_left: np.ndarray, children_right: np.ndarray) -> np.ndarray:
+    depths = np.zeros(len(children_left), dtype=np.float64)
+    stack = [0]
+    while stack:
+        node = stack.pop()
+        for child in (children_left[node], children_right[node]):
+            if child >= 0:
+                depths[child] = depths[node] + 1
+                stack.append(child)
+    return depths
+
+
+class FlatTreeEnsemble:
+    """Ensemble d'arbres aplati : un seul jeu de tableaux pour tous les arbres"""
+
+    def __init__(self, trees: List[dict], n_features: int):
+        offsets = np.cumsum([0] + [len(t['feature']) for t in trees])
+        self.roots = offsets[:-1].astype(np.intp)
+        self.n_features = n_features
+
+        self.feature = np.concatenate([t['feature'] for t in trees]).astype(np.intp)
+        self.threshold = np.concatenate([t['threshold'] for t in trees]).astype(np.float64)
+        self.value = np.concatenate([t['value'] for t in trees]).astype(np.float64)
+        left, right = [], []
+        for offset, tree in zip(offsets, trees):
+            left.append(np.where(tree['left'] >= 0, tree['left'] + offset, -1))
+            right.append(np.where(tree['right'] >= 0, tree['right'] + offset, -1))
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        # Feuilles : feature quelconque (résultat masqué), évite les index négatifs
+        self.feature[self.left < 0] = 0
+        self.max_depth = max(t['max_depth'] for t in trees)
+
+    @classmethod
+    def from_sklearn_trees(cls, estimators, n_features: int, leaf_values, feature_maps=None):
+        """
+        Construit l'ensemble à partir d'arbres scikit-learn
+
+        Args:
+            estimators: Arbres (DecisionTree*, ExtraTree*) entraînés
+            n_features (int): Nombre de caractéristiques en entrée
+            leaf_values: Fonction (tree_, index_arbre) -> valeur par nœud
+            feature_maps: Sous-ensembles de caractéristiques par arbre (bagging), optionnel
+        """
+        trees = []
+        for index, estimator in enumerate(estimators):
+            tree = estimator.tree_
+            feature = tree.feature.copy()
+            if feature_maps is not None:
+                mapping = np.asarray(feature_maps[index])
+                feature = np.where(feature >= 0, mapping[np.maximum(feature, 0)], feature)
+            trees.append({
+                'feature': feature,
+                'threshold': tree.threshold,
+                'left': tree.children_left,
+                'right': tree.children_right,
+                'value': leaf_values(tree, index),
+                'max_depth': tree.max_depth
+            })
+        return cls(trees, n_features)
+
+    def leaf_values(self, X: np.ndarray) -> np.ndarray:
+        """Valeur de la feuille atteinte dans chaque arbre : tableau (n_lignes, n_arbres)"""
+        # Les arbres scikit-learn comparent des float32 aux seuils
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        rows = np.arange(X.shape[0])[:, None]
+        for _ in range(self.max_depth):
+            left = self.left[nodes]
+            internal = left >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.right[nodes]), nodes)
+        return self.value[nodes]
+
+
+def scale(scaler, X: np.ndarray) -> np.ndarray:
+    """Équivalent de StandardScaler.transform sans validation"""
+    X = np.asarray(X, dtype=np.float64)
+    if getattr(scaler, 'with_mean', True) and getattr(scaler, 'mean_', None) is not None:
+        X = X - scaler.mean_
+    if getattr(scaler, 'with_std', True) and getattr(scaler, 'scale_', None) is not None:
+        X = X / scaler.scale_
+    return X
+
+
+class FlatIsolationForest:
+    """IsolationForest exporté : decision_function et predict vectorisés"""
+
+    def __init__(self, model):
+        n_features = model.n_features_in_
+        feature_maps = None
+        if getattr(model, '_max_features', n_features) != n_features:
+            feature_maps = model.estimators_features_
+
+        def path_lengths(tree, _):
+            # Profondeur de la feuille + correction pour les échantillons non isolés
+            return _node_depths(tree.children_left, tree.children_right) + average_path_length(tree.n_node_samples)
+
+        self.ensemble = FlatTreeEnsemble.from_sklearn_trees(model.estimators_, n_features, path_lengths, feature_maps)
+        self.denominator = len(model.estimators_) * float(average_path_length([model.max_samples_])[0])
+        self.offset = float(model.offset_)
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        depths = self.ensemble.leaf_values(X).sum(axis=1)
+        if self.denominator == 0:
+            return -np.ones_like(depths)
+        return -(2.0 ** (-depths / self.denominator))
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return self.score_samples(X) - self.offset
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+class FlatForestClassifier:
+    """RandomForestClassifier exporté : probabilité d'une classe"""
+
+    def __init__(self, model, class_index: int = 1):
+        if len(model.classes_) <= class_index:
+            raise ValueError("Classe absente du modèle")
+
+        def class_probability(tree, _):
+            values = tree.value[:, 0, :]
+            totals = values.sum(axis=1)
+            totals[totals == 0] = 1.0
+            return values[:, class_index] / totals
+
+        self.ensemble = FlatTreeEnsemble.from_sklearn_trees(model.estimators_, model.n_features_in_, class_probability)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.ensemble.leaf_values(X).mean(axis=1)
+
+
+class FlatGradientBoostingRegressor:
+    """GradientBoostingRegressor (perte quadratique) exporté"""
+
+    def __init__(self, model):
+        if getattr(model, 'loss', 'squared_error') not in ('squared_error', 'ls'):
+            raise ValueError("Seule la perte quadratique est supportée")
+        learning_rate = model.learning_rate
+
+        def scaled_values(tree, _):
+            return tree.value[:, 0, 0] * learning_rate
+
+        estimators = [stage[0] for stage in model.estimators_]
+        self.ensemble = FlatTreeEnsemble.from_sklearn_trees(estimators, model.n_features_in_, scaled_values)
+        if model.init_ == 'zero':
+            self.baseline = 0.0
+        else:
+            self.baseline = float(np.ravel(model.init_.predict(np.zeros((1, model.n_features_in_))))[0])
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.baseline + self.ensemble.leaf_values(X).sum(axis=1)
+
+
+def export_isolation_forest(model) -> Optional[FlatIsolationForest]:
+    """Exporte un IsolationForest entraîné, None si impossible"""
+    try:
+        return FlatIsolationForest(model)
+    except Exception:
+        return None
+
+
+def export_forest_classifier(model, class_index: int = 1) -> Optional[FlatForestClassifier]:
+    """Exporte un RandomForestClassifier entraîné, None si impossible"""
+    try:
+        return FlatForestClassifier(model, class_index)
+    except Exception:
+        return None
+
+
+def export_gradient_boosting(model) -> Optional[FlatGradientBoostingRegressor]:
+    """Exporte un GradientBoostingRegressor entraîné, None si impossible"""
+    try:
+        return FlatGradientBoostingRegressor(model)
+    except Exception:
+        return None
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Entraînement incrémental des modèles IA
+Statistiques de normalisation glissantes (partial_fit), buffer d'entraînement borné
+persisté sur disque, et ré-entraînement uniquement sur dérive ou volume suffisant
+"""
+
+import copy
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from config_advanced import AI_ADVANCED_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Colonnes d'un enregistrement de scan dans le buffer (mêmes caractéristiques que AnomalyDetector)
+FEATURE_COLUMNS = ['response_time', 'packet_loss', 'is_online', 'scan_duration', 'error_count']
+
+
+class TrainingBuffer:
+    """Buffer d'entraînement glissant : anneau de scans récents + fenêtre par équipement"""
+
+    def __init__(self, path: str, max_rows: int = 20000, window_per_device: int = 100):
+        self.path = path
+        self.max_rows = max_rows
+        self.window_per_device = window_per_device
+        self.rows = np.zeros((max_rows, len(FEATURE_COLUMNS)), dtype=np.float64)
+        self.row_count = 0
+        self.write_pos = 0
+        self.device_windows: Dict[int, np.ndarray] = {}
+        self.last_scan_id = 0
+
+    def append(self, records: Sequence[Tuple]):
+        """
+        Ajoute des scans au buffer
+
+        Args:
+            records: tuples (scan_id, device_id, response_time, packet_loss, is_online, scan_duration, error_count)
+        """
+        if not records:
+            return
+        data = np.array([[float(v or 0) for v in record[2:]] for record in records], dtype=np.float64)
+
+        # Anneau global (détection d'anomalies)
+        for start in range(0, len(data), self.max_rows):
+            chunk = data[start:start + self.max_rows]
+            end = self.write_pos + len(chunk)
+            if end <= self.max_rows:
+                self.rows[self.write_pos:end] = chunk
+            else:
+                split = self.max_rows - self.write_pos
+                self.rows[self.write_pos:] = chunk[:split]
+                self.rows[:end - self.max_rows] = chunk[split:]
+            self.write_pos = end % self.max_rows
+            self.row_count = min(self.row_count + len(chunk), self.max_rows)
+
+        # Fenêtres par équipement (maintenance prédictive)
+        by_device: Dict[int, List[int]] = {}
+        for index, record in enumerate(records):
+            by_device.setdefault(int(record[1]), []).append(index)
+        for device_id, indexes in by_device.items():
+            window = self.device_windows.get(device_id)
+            new_rows = data[indexes]
+            window = new_rows if window is None else np.vstack([window, new_rows])
+            self.device_windows[device_id] = window[-self.window_per_device:]
+
+        self.last_scan_id = max(self.last_scan_id, max(int(record[0]) for record in records))
+
+    def anomaly_rows(self) -> np.ndarray:
+        """Scans du buffer, du plus ancien au plus récent"""
+        if self.row_count < self.max_rows:
+            return self.rows[:self.row_count].copy()
+        return np.vstack([self.rows[self.write_pos:], self.rows[:self.write_pos]])
+
+    def device_histories(self) -> List[Dict]:
+        """Historiques par équipement au format attendu par PredictiveMaintenance"""
+        network_data = []
+        for window in self.device_windows.values():
+            history = [dict(zip(FEATURE_COLUMNS, row)) for row in window.tolist()]
+            for record in history:
+                record['is_online'] = bool(record['is_online'])
+            network_data.append({'history': history})
+        return network_data
+
+    def save(self):
+        """Sauvegarde atomique du buffer"""
+        device_ids = np.array(list(self.device_windows.keys()), dtype=np.int64)
+        lengths = np.array([len(w) for w in self.device_windows.values()], dtype=np.int64)
+        windows = (np.vstack(list(self.device_windows.values())) if self.device_windows
+                   else np.zeros((0, len(FEATURE_COLUMNS))))
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, rows=self.rows, meta=np.array([self.row_count, self.write_pos, self.last_scan_id]),
+                     device_ids=device_ids, lengths=lengths, windows=windows)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> bool:
+        """Recharge le buffer depuis le disque"""
+        if not os.path.exists(self.path):
+            return False
+        with np.load(self.path) as data:
+            rows = data['rows']
+            if rows.shape == self.rows.shape:
+                self.rows = rows.copy()
+                self.row_count, self.write_pos, self.last_scan_id = (int(v) for v in data['meta'])
+            else:
+                # Taille du buffer modifiée : on ne conserve que les scans les plus récents
+                self.last_scan_id = int(data['meta'][2])
+                count, pos = int(data['meta'][0]), int(data['meta'][1])
+                ordered = rows[:count] if count < len(rows) else np.vstack([rows[pos:], rows[:pos]])
+                ordered = ordered[-self.max_rows:]
+                self.rows[:len(ordered)] = ordered
+                self.row_count, self.write_pos = len(ordered), len(ordered) % self.max_rows
+            offset = 0
+            for device_id, length in zip(data['device_ids'].tolist(), data['lengths'].tolist()):
+                self.device_windows[device_id] = data['windows'][offset:offset + length][-self.window_per_device:]
+                offset += length
+        return True
+
+
+class IncrementalTrainer:
+    """Met à jour les statistiques en continu et ne ré-entraîne les modèles que si nécessaire"""
+
+    def __init__(self, ai_system, config: Optional[Dict] = None):
+        self.ai_system = ai_system
+        self.config = config or AI_ADVANCED_CONFIG['incremental_training']
+        models_dir = self.config['models_dir']
+        os.makedirs(models_dir, exist_ok=True)
+
+        self.buffer = TrainingBuffer(
+            os.path.join(models_dir, 'training_buffer.npz'),
+            max_rows=self.config['buffer_max_rows'],
+            window_per_device=self.config['window_per_device']
+        )
+        self.state_path = os.path.join(models_dir, 'incremental_state.pkl')
+
+        # Statistiques globales (toutes les données vues) et depuis le dernier entraînement
+        self.running_scaler = StandardScaler()
+        self.recent_scaler = StandardScaler()
+        self.reference_mean = None
+        self.reference_scale = None
+        self.rows_since_fit = 0
+        self.last_fit = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            self.buffer.load()
+            if os.path.exists(self.state_path):
+                state = joblib.load(self.state_path)
+                self.running_scaler = state['running_scaler']
+                self.recent_scaler = state['recent_scaler']
+                self.reference_mean = state['reference_mean']
+                self.reference_scale = state['reference_scale']
+                self.rows_since_fit = state['rows_since_fit']
+                self.last_fit = state['last_fit']
+        except Exception as e:
+            logger.error(f"Erreur chargement état d'entraînement incrémental: {e}")
+
+    def save(self):
+        """Persiste le buffer et les statistiques glissantes"""
+        try:
+            self.buffer.save()
+            state = {
+                'running_scaler': self.running_scaler,
+                'recent_scaler': self.recent_scaler,
+                'reference_mean': self.reference_mean,
+                'reference_scale': self.reference_scale,
+                'rows_since_fit': self.rows_since_fit,
+                'last_fit': self.last_fit
+            }
+            tmp_path = f"{self.state_path}.tmp"
+            joblib.dump(state, tmp_path)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.error(f"Erreur sauvegarde état d'entraînement incrémental: {e}")
+
+    @property
+    def last_scan_id(self) -> int:
+        return self.buffer.last_scan_id
+
+    def ingest(self, records: Sequence[Tuple]):
+        """Ajoute de nouveaux scans : buffer + mise à jour partielle des statistiques"""
+        if not records:
+            return
+        with self._lock:
+            data = np.array([[float(v or 0) for v in record[2:]] for record in records], dtype=np.float64)
+            self.running_scaler.partial_fit(data)
+            self.recent_scaler.partial_fit(data)
+            self.buffer.append(records)
+            self.rows_since_fit += len(records)
+
+    def drift_score(self) -> float:
+        """Écart max (en écarts-types de référence) entre les scans récents et ceux du dernier entraînement"""
+        if self.reference_mean is None or not hasattr(self.recent_scaler, 'mean_'):
+            return 0.0
+        shift = np.abs(self.recent_scaler.mean_ - self.reference_mean) / self.reference_scale
+        return float(np.max(shift))
+
+    def retrain_reason(self, force: bool = False) -> Optional[str]:
+        """Raison du ré-entraînement, ou None si les modèles actuels restent valides"""
+        if self.buffer.row_count < self.config['min_rows']:
+            return None
+        if force:
+            return 'manual'
+        if not self.ai_system.models_trained or self.reference_mean is None:
+            return 'initial'
+        if self.rows_since_fit >= self.config['retrain_rows_threshold']:
+            return 'buffer'
+        if (self.rows_since_fit >= self.config['drift_min_rows']
+                and self.drift_score() >= self.config['drift_threshold']):
+            return 'drift'
+        return None
+
+    def training_snapshot(self) -> Dict:
+        """Données figées pour un entraînement (buffer + normalisation glissante)"""
+        with self._lock:
+            return {
+                'anomaly_rows': self.buffer.anomaly_rows(),
+                'device_histories': self.buffer.device_histories(),
+                'anomaly_scaler': copy.deepcopy(self.running_scaler),
+                'rows': self.buffer.row_count,
+                'rows_since_fit': self.rows_since_fit,
+                'created_at': datetime.now().isoformat()
+            }
+
+    def mark_fitted(self, snapshot: Optional[Dict] = None):
+        """
+        Réinitialise les statistiques de dérive après un entraînement (référence : l'instantané utilisé)
+
+        Les scans ingérés pendant l'entraînement (après l'instantané) restent comptés comme nouveaux
+        """
+        with self._lock:
+            reference = snapshot['anomaly_scaler'] if snapshot else self.running_scaler
+            self.reference_mean = reference.mean_.copy()
+            self.reference_scale = reference.scale_.copy()
+            trained_rows = snapshot.get('rows_since_fit', self.rows_since_fit) if snapshot else self.rows_since_fit
+            pending = max(0, self.rows_since_fit - trained_rows)
+            self.recent_scaler = StandardScaler()
+            recent = self.buffer.anomaly_rows()[-pending:] if pending else None
+            if recent is not None and len(recent):
+                self.recent_scaler.partial_fit(recent)
+            self.rows_since_fit = pending
+            self.last_fit = datetime.now().isoformat()
+
+    def maybe_retrain(self, force: bool = False) -> Optional[str]:
+        """Ré-entraîne les modèles dans le processus si un seuil est franchi"""
+        reason = self.retrain_reason(force=force)
+        if not reason:
+            logger.info(f"Modèles IA à jour ({self.rows_since_fit} nouveaux scans, dérive {self.drift_score():.2f})")
+            return None
+
+        snapshot = self.training_snapshot()
+        logger.info(f"Ré-entraînement incrémental ({reason}) sur {snapshot['rows']} scans")
+        self.ai_system.train_from_snapshot(snapshot)
+        if self.ai_system.models_trained:
+            self.mark_fitted(snapshot)
+        return reason
+
+    def status(self) -> Dict:
+        """État du mode incrémental"""
+        return {
+            'buffer_rows': self.buffer.row_count,
+            'devices': len(self.buffer.device_windows),
+            'last_scan_id': self.buffer.last_scan_id,
+            'rows_since_fit': self.rows_since_fit,
+            'drift_score': self.drift_score(),
+            'last_fit': self.last_fit
+        }
+
+
+def iter_scan_records(fetch_batch, last_scan_id: int, batch_size: int) -> Iterable[List[Tuple]]:
+    """Parcourt les nouveaux scans par lots (pagination par identifiant)"""
+    while True:
+        batch = fetch_batch(last_scan_id, batch_size)
+        if not batch:
+            return
+        yield batch
+        last_scan_id = batch[-1][0]
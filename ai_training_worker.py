@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Worker d'entraînement des modèles IA hors du processus web
+Lit un instantané d'entraînement, entraîne sur tous les cœurs, publie une version
+dans le registre de modèles puis signale le processus web (pointeur actif, ou dernière
+ligne de stdout avec --no-activate quand le worker est lancé par l'application)
+
+Usage : python ai_training_worker.py --snapshot ai_models/snapshots/<id>.pkl
+"""
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+import joblib
+
+from config_advanced import AI_ADVANCED_CONFIG
+from model_registry import get_model_registry
+
+logger = logging.getLogger(__name__)
+
+WORKER_CONFIG = AI_ADVANCED_CONFIG['training_worker']
+
+
+def run_training(snapshot_path: str, activate: bool = True) -> Dict:
+    """
+    Entraîne les modèles à partir d'un instantané (exécuté dans le processus worker)
+
+    Returns:
+        dict: manifeste de la version publiée (métriques, durée, nombre de lignes)
+    """
+    from ai_enhancement import AIEnhancement
+
+    start_time = time.time()
+    snapshot = joblib.load(snapshot_path)
+
+    ai = AIEnhancement()
+    # Entraînement parallélisé sur tous les cœurs
+    ai.anomaly_detector.isolation_forest.set_params(n_jobs=-1)
+    ai.maintenance_predictor.failure_predictor.set_params(n_jobs=-1)
+
+    if 'network_data' in snapshot:
+        ai.train_all_models(snapshot['network_data'])
+    else:
+        ai.train_from_snapshot(snapshot)
+
+    # Données insuffisantes : les modèles restent non entraînés, rien n'est publié
+    if not ai.models_trained or not ai.anomaly_detector.is_fitted:
+        raise RuntimeError("Entraînement incomplet")
+
+    # Inférence mono-ligne dans le processus web : pas de parallélisme
+    ai.anomaly_detector.isolation_forest.set_params(n_jobs=None)
+    ai.maintenance_predictor.failure_predictor.set_params(n_jobs=None)
+
+    registry = get_model_registry()
+    manifest = registry.publish(
+        ai.export_models(),
+        metrics=ai.get_training_metrics(),
+        training_duration=time.time() - start_time,
+        training_rows=int(snapshot.get('rows', 0))
+    )
+    if activate:
+        registry.activate(manifest['version'])
+        registry.prune()
+    return manifest
+
+
+class TrainingWorkerLauncher:
+    """Lance le worker dans un processus séparé et notifie le processus web à la fin"""
+
+    def __init__(self, on_complete: Callable[[Dict, Dict], None]):
+        self.on_complete = on_complete
+        self.snapshot_dir = WORKER_CONFIG['snapshot_dir']
+        self._process = None
+        self._lock = threading.Lock()
+
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def launch(self, snapshot: Dict) -> bool:
+        """Écrit l'instantané et démarre le worker (un seul à la fois)"""
+        with self._lock:
+            if self.is_running():
+                logger.info("Entraînement déjà en cours dans le worker")
+                return False
+
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            snapshot_path = os.path.join(self.snapshot_dir, f"snapshot_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.pkl")
+            joblib.dump(snapshot, snapshot_path)
+
+            # Publication seule : le processus web charge la version avant de basculer le pointeur actif
+            self._process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--snapshot', snapshot_path, '--no-activate'],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+            logger.info(f"Worker d'entraînement démarré (pid {self._process.pid})")
+
+        thread = threading.Thread(target=self._wait, args=(self._process, snapshot, snapshot_path))
+        thread.daemon = True
+        thread.start()
+        return True
+
+    def _wait(self, process, snapshot: Dict, snapshot_path: str):
+        try:
+            stdout, stderr = process.communicate(timeout=WORKER_CONFIG['timeout'])
+            if process.returncode != 0:
+                logger.error(f"Échec du worker d'entraînement ({process.returncode}): {stderr.strip()[-500:]}")
+                return
+            result = json.loads(stdout.strip().splitlines()[-1])
+            self.on_complete(result, snapshot)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            logger.error("Worker d'entraînement interrompu (délai dépassé)")
+        except Exception as e:
+            logger.error(f"Erreur suivi worker d'entraînement: {e}")
+        finally:
+            try:
+                os.remove(snapshot_path)
+            except OSError:
+                pass
+
+
+class ModelWatcher:
+    """Détecte un changement de version active (worker CLI/cron, rollback) pour le remplacement à chaud"""
+
+    def __init__(self, registry=None):
+        self.registry = registry or get_model_registry()
+        self.current_version = None
+
+    def check(self) -> Optional[str]:
+        """Retourne la nouvelle version active si elle a changé depuis le dernier appel"""
+        version = self.registry.active_version()
+        if version and version != self.current_version:
+            self.current_version = version
+            return version
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker d'entraînement des modèles IA")
+    parser.add_argument('--snapshot', required=True, help="Instantané d'entraînement (joblib)")
+    parser.add_argument('--no-activate', action='store_true', help="Publier sans basculer la version active")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    try:
+        result = run_training(args.snapshot, activate=not args.no_activate)
+    except Exception as e:
+        logger.error(f"Erreur entraînement worker: {e}")
+        sys.exit(1)
+    # Dernière ligne de stdout : résultat lu par le processus web
+    print(json.dumps(result))
+
+
+if __name__ == '__main__':
+    main()
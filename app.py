@@ -7,8 +7,9 @@ Système de supervision réseau intelligent
 from dotenv import load_dotenv
 load_dotenv()
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session
+from flask import Flask, render_template, jsonify, request, redirect, url_for, flash, session, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, select
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
@@ -18,11 +19,28 @@ import time
 import os
 import json
 import logging
+import mimetypes
 from network_scanner_production import ProductionNetworkScanner
-from report_generator import ReportGenerator
+from report_generator import ReportGenerator, FILE_EXTENSIONS
+from excel_writer import StreamingExcelWriter, iter_rows
 from ai_enhancement import ai_system, AIEnhancement
+from device_rules import get_device_rule_engine
 from advanced_monitoring import advanced_monitoring
-import numpy as np
+from device_inventory import device_inventory
+from ai_incremental import IncrementalTrainer, iter_scan_records
+from ai_training_worker import TrainingWorkerLauncher, ModelWatcher
+from model_registry import get_model_registry
+from config_advanced import AI_ADVANCED_CONFIG, PERFORMANCE_CONFIG
+import scan_rollups
+import storage
+import streaming_export
+import chat_context
+from retention_manager import RetentionManager, RETENTION_CONFIG, retention_summary
+from report_jobs import ReportJobPool
+from report_data import ReportDataBuilder, built_parts
+from parquet_export import ParquetExporter, PARQUET_CONFIG
+from report_catalog import ReportCatalog, CATALOG_CONFIG
+import report_delivery
 import pandas as pd
 import smtplib
 from email.mime.text import MIMEText
@@ -48,8 +66,9 @@ if os.environ.get('FLASK_ENV') != 'development':
 # Configuration de l'application
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'danone-central-2024-ai-enhanced'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///network_monitor_production.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///network_monitor_production.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = storage.sqlalchemy_engine_options()
 
 # Initialisation de Flask-Login
 login_manager = LoginManager()
@@ -65,6 +84,11 @@ def get_local_time():
 
 # Initialisation de la base de données
 db = SQLAlchemy(app)
+with app.app_context():
+    # WAL, synchronous=NORMAL, busy_timeout et mmap sur chaque connexion du pool
+    storage.configure_engine(db.engine)
+    # Le monitoring avancé lit les équipements dans cette base
+    device_inventory.bind(db.engine.url.database)
 
 # Modèle utilisateur pour l'authentification
 class User(UserMixin, db.Model):
@@ -125,6 +149,52 @@ class ScanHistory(db.Model):
     ai_analysis = db.Column(db.Text, default='{}')  # Analyse IA complète (JSON)
     timestamp = db.Column(db.DateTime, default=get_local_time)
 
+class ScanRollup(db.Model):
+    """Agrégats de l'historique des scans par équipement (device_id 0 = tout le parc) et par intervalle"""
+    __table_args__ = (db.UniqueConstraint('device_id', 'resolution', 'bucket_start', name='uq_scan_rollup_bucket'),)
+    id = db.Column(db.Integer, primary_key=True)
+    device_id = db.Column(db.Integer, nullable=False)
+    resolution = db.Column(db.String(4), nullable=False)  # '1m', '1h', '1d'
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    sample_count = db.Column(db.Integer, default=0)
+    online_count = db.Column(db.Integer, default=0)
+    rtt_sum = db.Column(db.Float, default=0.0)
+    rtt_count = db.Column(db.Integer, default=0)
+    rtt_min = db.Column(db.Float, nullable=True)
+    rtt_max = db.Column(db.Float, nullable=True)
+    # Histogramme des temps de réponse (bornes : scan_rollups.RTT_EDGES) pour le p95
+    hist_0 = db.Column(db.Integer, default=0)
+    hist_1 = db.Column(db.Integer, default=0)
+    hist_2 = db.Column(db.Integer, default=0)
+    hist_3 = db.Column(db.Integer, default=0)
+    hist_4 = db.Column(db.Integer, default=0)
+    hist_5 = db.Column(db.Integer, default=0)
+    hist_6 = db.Column(db.Integer, default=0)
+    hist_7 = db.Column(db.Integer, default=0)
+    hist_8 = db.Column(db.Integer, default=0)
+    hist_9 = db.Column(db.Integer, default=0)
+    hist_10 = db.Column(db.Integer, default=0)
+
+@event.listens_for(ScanHistory, 'after_insert')
+def update_scan_rollups(mapper, connection, target):
+    """Met à jour les agrégats dans la même transaction que le scan"""
+    if ROLLUP_CONFIG['enabled']:
+        scan_rollups.apply_scans(connection, ScanRollup.__table__, [
+            (target.device_id, target.timestamp or get_local_time(), target.is_online, target.response_time)
+        ])
+
+@event.listens_for(db.session, 'after_flush')
+def track_device_changes(db_session, flush_context):
+    """Repère les écritures dans la table device (pour invalider l'inventaire partagé)"""
+    if any(isinstance(obj, Device) for obj in list(db_session.new) + list(db_session.dirty) + list(db_session.deleted)):
+        db_session.info['device_changed'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_device_inventory(db_session):
+    """Inventaire relu au prochain accès une fois les changements d'équipements validés"""
+    if db_session.info.pop('device_changed', False):
+        device_inventory.invalidate()
+
 class Alert(db.Model):
     """Alertes intelligentes basées sur l'IA"""
     id = db.Column(db.Integer, primary_key=True)
@@ -137,6 +207,43 @@ class Alert(db.Model):
     created_at = db.Column(db.DateTime, default=get_local_time)
     resolved_at = db.Column(db.DateTime, nullable=True)
 
+@event.listens_for(db.session, 'after_flush')
+def track_chat_context_changes(db_session, flush_context):
+    """Équipements et alertes écrits par la transaction, appliqués au résumé du chatbot à la validation"""
+    devices, alerts = db_session.info.setdefault('chat_changes', ({}, {}))
+    for obj in list(db_session.new) + list(db_session.dirty):
+        if isinstance(obj, Device):
+            devices[obj.id] = chat_context.row_from(obj, chat_context.DEVICE_FIELDS)
+        elif isinstance(obj, Alert):
+            alerts[obj.id] = chat_context.row_from(obj, chat_context.ALERT_FIELDS)
+    for obj in db_session.deleted:
+        if isinstance(obj, Device):
+            devices[obj.id] = None
+        elif isinstance(obj, Alert):
+            alerts[obj.id] = None
+
+@event.listens_for(db.session, 'after_bulk_update')
+@event.listens_for(db.session, 'after_bulk_delete')
+def track_chat_context_bulk_changes(update_context):
+    """Mise à jour en masse (query.update / delete) : résumé du chatbot relu après validation"""
+    if update_context.mapper.class_ in (Device, Alert):
+        update_context.session.info['chat_context_stale'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def apply_chat_context_changes(db_session):
+    """Résumé du chatbot mis à jour avec les changements validés (sans relire l'inventaire)"""
+    changes = db_session.info.pop('chat_changes', None)
+    if db_session.info.pop('chat_context_stale', False):
+        chat_context_service.invalidate()
+    elif changes and (changes[0] or changes[1]):
+        chat_context_service.apply_changes(*changes)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_chat_context_changes(db_session):
+    """Changements annulés : rien à appliquer au résumé du chatbot"""
+    db_session.info.pop('chat_changes', None)
+    db_session.info.pop('chat_context_stale', None)
+
 class AIModel(db.Model):
     """Modèles IA entraînés"""
     id = db.Column(db.Integer, primary_key=True)
@@ -146,6 +253,10 @@ class AIModel(db.Model):
     training_date = db.Column(db.DateTime, default=get_local_time)
     model_path = db.Column(db.String(200), nullable=True)
     is_active = db.Column(db.Boolean, default=True)
+    version = db.Column(db.String(64), nullable=True, index=True)  # Version du registre de modèles
+    metrics = db.Column(db.Text, nullable=True)  # JSON des métriques d'entraînement
+    training_duration = db.Column(db.Float, default=0.0)  # Secondes
+    training_rows = db.Column(db.Integer, default=0)
 
 class Report(db.Model):
     """Modèle pour les rapports générés"""
@@ -160,6 +271,7 @@ class Report(db.Model):
     file_path = db.Column(db.String(500), nullable=True)
     file_size = db.Column(db.Integer, default=0)
     download_count = db.Column(db.Integer, default=0)
+    content_hash = db.Column(db.String(64), nullable=True, index=True)  # SHA-256 du fichier (dédoublonnage)
     
     # Paramètres de génération
     date_from = db.Column(db.DateTime, nullable=True)
@@ -199,6 +311,7 @@ class Report(db.Model):
 # Initialisation des modules
 network_scanner = ProductionNetworkScanner()
 report_generator = ReportGenerator()
+report_jobs = ReportJobPool()  # Rapports générés en tâche de fond
 
 # Variables globales
 scan_in_progress = False
@@ -212,6 +325,30 @@ AI_CONFIG = {
     'MAX_RECOMMENDATIONS': 10        # Nombre max de recommandations
 }
 
+# Instantanés de données des rapports, partagés entre formats (mémorisés par période, sections et version des données)
+report_data_builder = ReportDataBuilder({
+    'device': Device.__table__,
+    'alert': Alert.__table__,
+    'scan_history': ScanHistory.__table__,
+    'scan_rollup': ScanRollup.__table__
+}, ai_thresholds=AI_CONFIG)
+
+# Résumé réseau du chatbot, mis à jour à chaque validation d'équipements ou d'alertes
+chat_context_service = chat_context.NetworkContextService({
+    'device': Device.__table__,
+    'alert': Alert.__table__
+})
+
+# Catalogue des rapports (table Report), rapproché périodiquement du dossier reports/
+report_catalog = ReportCatalog(Report.__table__)
+
+# Agrégats temporels de l'historique des scans
+ROLLUP_CONFIG = PERFORMANCE_CONFIG['rollup_config']
+
+# Cache des analyses IA : {device_id: ((dernier ScanHistory.id, version des modèles), analyse)}
+AI_ANALYSIS_CACHE = {}
+ai_analysis_cache_lock = threading.Lock()
+
 # Fonction pour charger l'utilisateur (requis pour Flask-Login)
 @login_manager.user_loader
 def load_user(user_id):
@@ -403,30 +540,277 @@ def create_directories():
             os.makedirs(directory)
             logger.info(f"Répertoire créé: {directory}")
 
+def ensure_schema_columns():
+    """Ajoute les colonnes récentes aux tables existantes (create_all ne modifie pas les tables)"""
+    new_columns = {
+        'ai_model': {
+            'version': 'VARCHAR(64)',
+            'metrics': 'TEXT',
+            'training_duration': 'FLOAT DEFAULT 0.0',
+            'training_rows': 'INTEGER DEFAULT 0'
+        },
+        'report': {
+            'content_hash': 'VARCHAR(64)'
+        }
+    }
+    with db.engine.begin() as connection:
+        for table, columns in new_columns.items():
+            existing = {row[1] for row in connection.execute(db.text(f"PRAGMA table_info({table})"))}
+            for column, ddl in columns.items():
+                if column not in existing:
+                    connection.execute(db.text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+                    logger.info(f"Colonne ajoutée: {table}.{column}")
+
+def ensure_scan_rollups():
+    """Construit les agrégats depuis l'historique existant si la table vient d'être créée"""
+    if not ROLLUP_CONFIG['enabled']:
+        return
+    try:
+        if ScanRollup.query.first() is not None or ScanHistory.query.first() is None:
+            return
+        start_time = time.time()
+        with db.engine.begin() as connection:
+            total = scan_rollups.rebuild(connection, ScanRollup.__table__, ScanHistory.__table__,
+                                         batch_size=ROLLUP_CONFIG['backfill_batch_size'])
+        logger.info(f"Agrégats de scans reconstruits: {total} scans en {time.time() - start_time:.1f}s")
+    except Exception as e:
+        logger.error(f"Erreur reconstruction des agrégats de scans: {e}")
+
+_retention_manager = None
+
+def get_retention_manager():
+    """Gestionnaire de rétention des bases SQLite (application et monitoring avancé)"""
+    global _retention_manager
+    if _retention_manager is None:
+        with app.app_context():
+            main_db = db.engine.url.database
+        _retention_manager = RetentionManager({
+            'main': main_db,
+            'monitoring': os.path.abspath(advanced_monitoring.db_path)
+        })
+    return _retention_manager
+
+def run_retention(full_vacuum=None):
+    """Purge les historiques expirés et compacte les bases"""
+    try:
+        return get_retention_manager().run(full_vacuum=full_vacuum)
+    except Exception as e:
+        logger.error(f"Erreur rétention des données: {e}")
+        return None
+
+_parquet_exporter = None
+
+def get_parquet_exporter():
+    """Export Parquet incrémental des historiques (application et monitoring avancé)"""
+    global _parquet_exporter
+    if _parquet_exporter is None:
+        with app.app_context():
+            main_db = db.engine.url.database
+        _parquet_exporter = ParquetExporter({
+            'main': main_db,
+            'monitoring': os.path.abspath(advanced_monitoring.db_path)
+        })
+    return _parquet_exporter
+
+def run_parquet_export():
+    """Ajoute aux fichiers Parquet les lignes écrites depuis le dernier export"""
+    try:
+        report = get_parquet_exporter().run()
+        if report.get('success'):
+            rows = sum(d.get('rows', 0) for d in report['datasets'].values())
+            logger.info(f"Export Parquet terminé: {rows} nouvelles lignes en {report['duration']}s")
+        return report
+    except Exception as e:
+        logger.error(f"Erreur export Parquet: {e}")
+        return None
+
+def run_report_catalog_maintenance():
+    """Rapproche le catalogue des rapports du disque puis applique la rétention (paramètre report_retention)"""
+    try:
+        from settings_manager_production import get_production_settings_manager
+        retention_days = int(get_production_settings_manager().settings.get('report_retention', 30) or 0)
+        with app.app_context():
+            admin = User.query.filter_by(role='admin').order_by(User.id).first()
+            with db.engine.begin() as connection:
+                reconciled = report_catalog.reconcile(connection, owner_id=admin.id if admin else None)
+                cleaned = report_catalog.cleanup(connection, retention_days)
+        if any(reconciled.values()) or cleaned['deleted']:
+            logger.info(f"Catalogue des rapports: {reconciled}, rétention {retention_days} j: {cleaned}")
+        return {'reconciled': reconciled, 'cleanup': cleaned, 'retention_days': retention_days}
+    except Exception as e:
+        logger.error(f"Erreur maintenance du catalogue des rapports: {e}")
+        return None
+
+def get_rollup_summary(start, end=None, device_id=scan_rollups.FLEET_DEVICE_ID):
+    """Statistiques agrégées d'une période (équipement ou parc)"""
+    return scan_rollups.summarize(db.session.connection(), ScanRollup.__table__, start, end, device_id=device_id)
+
+def get_report_snapshot(report_type, date_from=None, date_to=None, sections=None):
+    """Instantané immuable des données d'un rapport (voir report_data)"""
+    return report_data_builder.get_snapshot(db.session.connection(), report_type, date_from, date_to, sections)
+
+def count_scans(start=None):
+    """Nombre de scans depuis une date, sans parcourir l'historique brut"""
+    return scan_rollups.total_samples(db.session.connection(), ScanRollup.__table__, start)
+
+def record_model_version(manifest):
+    """Enregistre une version du registre dans AIModel et la marque comme seule active"""
+    try:
+        registry = get_model_registry()
+        model = AIModel.query.filter_by(version=manifest['version']).first()
+        if not model:
+            metrics = manifest.get('metrics', {})
+            model = AIModel(
+                model_name='network_ai_models',
+                model_type='ensemble',
+                accuracy=metrics.get('failure_accuracy', 0.0),
+                model_path=registry.version_dir(manifest['version']),
+                version=manifest['version'],
+                metrics=json.dumps(metrics),
+                training_duration=manifest.get('training_duration', 0.0),
+                training_rows=manifest.get('training_rows', 0)
+            )
+            db.session.add(model)
+        AIModel.query.filter(AIModel.version != manifest['version']).update(
+            {AIModel.is_active: False}, synchronize_session=False
+        )
+        model.is_active = True
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Erreur enregistrement version de modèles: {e}")
+
+def activate_model_version(version):
+    """Charge une version du registre dans ai_system (bascule à chaud)"""
+    global ai_models_loaded
+    registry = get_model_registry()
+    if not ai_system.load_from_registry(registry, version):
+        return False
+    model_watcher.current_version = version
+    ai_models_loaded = True
+    manifest = registry.manifest(version)
+    if manifest:
+        record_model_version(manifest)
+    return True
+
 def load_ai_models():
-    """Charge les modèles IA sauvegardés"""
+    """Charge les modèles IA sauvegardés (version active du registre en priorité)"""
     global ai_models_loaded
     try:
-        model_path = 'ai_models/network_ai_models.pkl'
-        if os.path.exists(model_path):
-            ai_system.load_models(model_path)
-            ai_models_loaded = True
+        active_version = get_model_registry().active_version()
+        legacy_path = 'ai_models/network_ai_models.pkl'
+        if active_version and activate_model_version(active_version):
+            logger.info(f"Modèles IA chargés avec succès (version {active_version})")
+        elif os.path.exists(legacy_path):
+            ai_models_loaded = ai_system.load_models(legacy_path)
             logger.info("Modèles IA chargés avec succès")
         else:
             logger.info("Aucun modèle IA trouvé, entraînement nécessaire")
     except Exception as e:
         logger.error(f"Erreur chargement modèles IA: {e}")
 
-def save_ai_models():
-    """Sauvegarde les modèles IA"""
+def save_ai_models(training_duration=0.0, training_rows=0):
+    """Publie les modèles IA dans le registre et bascule la version active"""
     try:
-        model_path = 'ai_models/network_ai_models.pkl'
-        ai_system.save_models(model_path)
-        logger.info("Modèles IA sauvegardés")
+        registry = get_model_registry()
+        manifest = registry.publish(
+            ai_system.export_models(),
+            metrics=ai_system.get_training_metrics(),
+            training_duration=training_duration,
+            training_rows=training_rows
+        )
+        with model_switch_lock:
+            registry.activate(manifest['version'])
+            registry.prune()
+            model_watcher.current_version = manifest['version']
+        record_model_version(manifest)
+        logger.info(f"Modèles IA sauvegardés (version {manifest['version']})")
     except Exception as e:
         logger.error(f"Erreur sauvegarde modèles IA: {e}")
 
-def train_ai_models():
+def on_training_complete(manifest, snapshot):
+    """Remplace à chaud les modèles après un entraînement hors processus"""
+    with app.app_context():
+        # Worker lancé avec --no-activate : la version est chargée avant la bascule du pointeur actif,
+        # sous le verrou du watcher qui ne la recharge donc pas une seconde fois
+        with model_switch_lock:
+            loaded = activate_model_version(manifest['version'])
+            if loaded:
+                registry = get_model_registry()
+                registry.activate(manifest['version'])
+                registry.prune()
+        if loaded:
+            if 'anomaly_scaler' in snapshot:
+                trainer = get_incremental_trainer()
+                trainer.mark_fitted(snapshot)
+                trainer.save()
+            logger.info(f"Modèles IA remplacés à chaud: version {manifest['version']} "
+                        f"({manifest['training_rows']} lignes, {manifest['training_duration']}s)")
+
+def check_model_updates():
+    """Bascule sur la version active publiée hors de l'application (CLI, cron, rollback)"""
+    with model_switch_lock:
+        version = model_watcher.check()
+        if version:
+            with app.app_context():
+                if activate_model_version(version):
+                    logger.info(f"Nouvelle version IA détectée et chargée: {version}")
+
+training_launcher = TrainingWorkerLauncher(on_complete=on_training_complete)
+model_watcher = ModelWatcher()
+# Chargement d'une version et bascule du pointeur actif sérialisés (entraînement, worker, watcher, API)
+model_switch_lock = threading.Lock()
+incremental_trainer = None
+
+def get_incremental_trainer():
+    """Retourne l'entraîneur incrémental (buffer et statistiques rechargés depuis le disque)"""
+    global incremental_trainer
+    if incremental_trainer is None:
+        incremental_trainer = IncrementalTrainer(ai_system)
+    return incremental_trainer
+
+def fetch_scan_records(last_scan_id, batch_size):
+    """Lit un lot de scans postérieurs à last_scan_id (tuples, sans objets ORM)"""
+    return db.session.query(
+        ScanHistory.id, ScanHistory.device_id, ScanHistory.response_time, ScanHistory.packet_loss,
+        ScanHistory.is_online, ScanHistory.scan_duration, ScanHistory.error_count
+    ).filter(ScanHistory.id > last_scan_id).order_by(ScanHistory.id).limit(batch_size).all()
+
+def train_ai_models_incremental(force=False):
+    """Ingère les nouveaux scans et ne ré-entraîne que sur dérive ou buffer plein"""
+    trainer = get_incremental_trainer()
+    batch_size = AI_ADVANCED_CONFIG['incremental_training']['fetch_batch_size']
+    
+    new_rows = 0
+    for batch in iter_scan_records(fetch_scan_records, trainer.last_scan_id, batch_size):
+        trainer.ingest(batch)
+        new_rows += len(batch)
+    
+    if AI_ADVANCED_CONFIG['training_worker']['enabled']:
+        reason = trainer.retrain_reason(force=force)
+        if reason and training_launcher.launch(trainer.training_snapshot()):
+            logger.info(f"Entraînement incrémental délégué au worker ({reason}, {new_rows} nouveaux scans)")
+    else:
+        start_time = time.time()
+        reason = trainer.maybe_retrain(force=force)
+        if reason:
+            save_ai_models(time.time() - start_time, trainer.buffer.row_count)
+            logger.info(f"Entraînement incrémental terminé ({reason}, {new_rows} nouveaux scans)")
+    trainer.save()
+    return reason
+
+def train_ai_models(full=False, force=False):
+    """Entraîne les modèles IA (mode incrémental par défaut, complet si demandé)"""
+    with app.app_context():
+        if AI_ADVANCED_CONFIG['incremental_training']['enabled'] and not full:
+            try:
+                train_ai_models_incremental(force=force)
+            except Exception as e:
+                logger.error(f"Erreur entraînement incrémental IA: {e}")
+        else:
+            train_ai_models_full()
+
+def train_ai_models_full():
     """Entraîne les modèles IA avec les données existantes"""
     try:
         logger.info("Début de l'entraînement des modèles IA...")
@@ -458,18 +842,38 @@ def train_ai_models():
                 })
         
         if len(training_data) >= 5:
-            ai_system.train_all_models(training_data)
-            save_ai_models()
-            logger.info("Entraînement des modèles IA terminé")
+            if AI_ADVANCED_CONFIG['training_worker']['enabled']:
+                rows = sum(len(d['history']) for d in training_data)
+                training_launcher.launch({'network_data': training_data, 'rows': rows})
+                logger.info("Entraînement des modèles IA délégué au worker")
+            else:
+                start_time = time.time()
+                ai_system.train_all_models(training_data)
+                save_ai_models(time.time() - start_time, sum(len(d['history']) for d in training_data))
+                logger.info("Entraînement des modèles IA terminé")
         else:
             logger.warning("Données insuffisantes pour l'entraînement IA")
             
     except Exception as e:
         logger.error(f"Erreur entraînement modèles IA: {e}")
 
-def analyze_device_with_ai(device):
-    """Analyse un équipement avec l'IA"""
+def get_analysis_fingerprint(device):
+    """Empreinte de l'historique d'un équipement : (dernier scan, version des modèles IA)"""
+    last_scan_id = db.session.query(db.func.max(ScanHistory.id)).filter(
+        ScanHistory.device_id == device.id
+    ).scalar()
+    return (last_scan_id, ai_system.model_version)
+
+def analyze_device_with_ai(device, use_cache=True):
+    """Analyse un équipement avec l'IA (résultat mis en cache tant qu'aucun scan ni modèle nouveau n'arrive)"""
     try:
+        fingerprint = get_analysis_fingerprint(device)
+        if use_cache:
+            with ai_analysis_cache_lock:
+                cached = AI_ANALYSIS_CACHE.get(device.id)
+            if cached and cached[0] == fingerprint:
+                return cached[1]
+        
         # Récupération de l'historique
         history = ScanHistory.query.filter_by(device_id=device.id).order_by(ScanHistory.timestamp.desc()).limit(100).all()
         
@@ -508,6 +912,9 @@ def analyze_device_with_ai(device):
         # Génération d'alertes intelligentes
         generate_ai_alerts(device, ai_analysis)
         
+        with ai_analysis_cache_lock:
+            AI_ANALYSIS_CACHE[device.id] = (fingerprint, ai_analysis)
+        
         return ai_analysis
         
     except Exception as e:
@@ -672,6 +1079,7 @@ def perform_network_scan():
                 analyze_device_with_ai(device)
             
             db.session.commit()
+            device_inventory.record_discovery(devices_found)
             logger.info(f"Scan terminé: {len(devices_found)} équipements trouvés")
         
     except Exception as e:
@@ -737,6 +1145,7 @@ def perform_multi_network_scan():
                     analyze_device_with_ai(device)
             
             db.session.commit()
+            device_inventory.record_discovery(all_devices)
             logger.info(f"Scan multi-réseaux terminé: {total_devices_found} équipements trouvés")
         
     except Exception as e:
@@ -819,6 +1228,7 @@ def perform_production_scan(network_range, aggressive=False):
                 logger.info(f"Équipement traité: {device_info['ip']} ({device_info.get('type', 'Unknown')})")
             
             db.session.commit()
+            device_inventory.record_discovery(devices_found)
             logger.info(f"Scan production terminé: {len(devices_found)} équipements détectés")
         
     except Exception as e:
@@ -894,6 +1304,7 @@ def perform_complete_network_scan(aggressive=False):
                     analyze_device_with_ai(device)
             
             db.session.commit()
+            device_inventory.record_discovery(all_devices)
             logger.info(f"Scan complet terminé: {len(all_devices)} équipements détectés")
         
     except Exception as e:
@@ -1004,17 +1415,12 @@ def perform_universal_network_scan():
                         db.session.flush()
                     
                     # Détection spécialisée pour smartphones et TV
-                    if device_info.get('mac_vendor'):
-                        vendor = device_info['mac_vendor'].lower()
-                        if 'oppo' in vendor or 'oneplus' in vendor:
-                            device.device_type = 'smartphone'
-                            logger.info(f"📱 TÉLÉPHONE OPPO détecté: {device.ip}")
-                        elif 'samsung' in vendor and 'tv' in device_info.get('hostname', '').lower():
-                            device.device_type = 'smart_tv'
-                            logger.info(f"📺 TV SAMSUNG détectée: {device.ip}")
-                        elif 'samsung' in vendor:
-                            device.device_type = 'smartphone'
-                            logger.info(f"📱 SMARTPHONE SAMSUNG détecté: {device.ip}")
+                    override_type = get_device_rule_engine().vendor_override(
+                        device_info.get('hostname', ''), device_info.get('mac_vendor'))
+                    if override_type:
+                        device.device_type = override_type
+                        icon = '📺' if override_type == 'smart_tv' else '📱'
+                        logger.info(f"{icon} {override_type.upper()} {device_info['mac_vendor']} détecté: {device.ip}")
                     
                     # Enregistrement détaillé du scan
                     scan_record = ScanHistory(
@@ -1038,6 +1444,7 @@ def perform_universal_network_scan():
                     continue
             
             db.session.commit()
+            device_inventory.record_discovery(all_devices_found)
             
             # Étape 4: Notification des résultats avec détection spécialisée
             total_detected = len(all_devices_found)
@@ -1089,62 +1496,41 @@ def generate_ai_report():
     try:
         logger.info("Génération du rapport IA...")
         
-        # Données pour le rapport
-        devices = Device.query.all()
-        total_devices = len(devices)
-        online_devices = sum(1 for d in devices if d.is_online)
-        offline_devices = total_devices - online_devices
-        
-        # Statistiques IA
-        critical_devices = sum(1 for d in devices if d.maintenance_urgency == 'critical')
-        high_risk_devices = sum(1 for d in devices if d.failure_probability > AI_CONFIG['HIGH_RISK_THRESHOLD'])
-        anomaly_devices = sum(1 for d in devices if d.anomaly_score < AI_CONFIG['ANOMALY_THRESHOLD'])
-        
-        # Score de santé global
-        avg_health_score = np.mean([d.health_score for d in devices]) if devices else 0
-        
-        # Recommandations globales
-        global_recommendations = []
-        if critical_devices > 0:
-            global_recommendations.append(f"🚨 {critical_devices} équipements critiques nécessitent une intervention immédiate")
-        if high_risk_devices > 0:
-            global_recommendations.append(f"⚠️ {high_risk_devices} équipements à risque élevé")
-        if anomaly_devices > 0:
-            global_recommendations.append(f"🔍 {anomaly_devices} équipements présentent des comportements anormaux")
+        # Données pour le rapport (instantané partagé : résumé, équipements et indicateurs IA)
+        snapshot = get_report_snapshot('daily', sections=['device-inventory', 'ai-insights'])
+        summary, insights = snapshot.summary, snapshot.ai
         
         report_data = {
             'timestamp': datetime.now().isoformat(),
             'network_stats': {
-                'total_devices': total_devices,
-                'online_devices': online_devices,
-                'offline_devices': offline_devices,
-                'availability_percentage': (online_devices / total_devices * 100) if total_devices > 0 else 0
+                'total_devices': summary.total_devices,
+                'online_devices': summary.online_devices,
+                'offline_devices': summary.offline_devices,
+                'availability_percentage': (summary.online_devices / summary.total_devices * 100) if summary.total_devices > 0 else 0
             },
             'ai_insights': {
-                'avg_health_score': avg_health_score,
-                'critical_devices': critical_devices,
-                'high_risk_devices': high_risk_devices,
-                'anomaly_devices': anomaly_devices,
+                'avg_health_score': insights.avg_health_score,
+                'critical_devices': insights.critical_devices,
+                'high_risk_devices': insights.high_risk_devices,
+                'anomaly_devices': insights.anomaly_devices,
                 'ai_models_status': 'Trained' if ai_models_loaded else 'Training needed'
             },
-            'recommendations': global_recommendations,
-            'devices_details': []
+            'recommendations': list(insights.recommendations),
+            'devices_details': [
+                {
+                    'ip': device.ip,
+                    'hostname': device.hostname,
+                    'device_type': device.device_type,
+                    'is_online': device.is_online,
+                    'health_score': device.health_score,
+                    'failure_probability': device.failure_probability,
+                    'maintenance_urgency': device.maintenance_urgency,
+                    'ai_confidence': device.ai_confidence
+                }
+                for device in snapshot.devices
+            ]
         }
         
-        # Détails des équipements
-        for device in devices:
-            device_detail = {
-                'ip': device.ip,
-                'hostname': device.hostname,
-                'device_type': device.device_type,
-                'is_online': device.is_online,
-                'health_score': device.health_score,
-                'failure_probability': device.failure_probability,
-                'maintenance_urgency': device.maintenance_urgency,
-                'ai_confidence': device.ai_confidence
-            }
-            report_data['devices_details'].append(device_detail)
-        
         # Sauvegarde du rapport
         report_filename = f"ai_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         report_path = os.path.join('reports', report_filename)
@@ -1162,8 +1548,17 @@ def generate_ai_report():
 def schedule_tasks():
     """Planifie les tâches automatiques"""
     schedule.every(30).minutes.do(perform_network_scan)
+    schedule.every(1).minutes.do(check_model_updates)
+    if RETENTION_CONFIG['enabled']:
+        schedule.every().day.at(RETENTION_CONFIG['run_at']).do(run_retention)
+    if PARQUET_CONFIG['enabled']:
+        schedule.every(PARQUET_CONFIG['interval_minutes']).minutes.do(run_parquet_export)
+    schedule.every(CATALOG_CONFIG['reconcile_interval_minutes']).minutes.do(run_report_catalog_maintenance)
     schedule.every().day.at("08:00").do(generate_ai_report)
-    schedule.every().day.at("18:00").do(train_ai_models)
+    if AI_ADVANCED_CONFIG['incremental_training']['enabled']:
+        schedule.every(AI_ADVANCED_CONFIG['incremental_training']['update_interval']).minutes.do(train_ai_models)
+    else:
+        schedule.every().day.at("18:00").do(train_ai_models)
     
     while True:
         schedule.run_pending()
@@ -1510,7 +1905,7 @@ def api_device_ai_analysis(device_id):
 def api_train_ai():
     """API pour entraîner les modèles IA"""
     try:
-        thread = threading.Thread(target=train_ai_models)
+        thread = threading.Thread(target=train_ai_models, kwargs={'force': True})
         thread.daemon = True
         thread.start()
         
@@ -1519,6 +1914,54 @@ def api_train_ai():
         logger.error(f"Erreur API entraînement IA: {e}")
         return jsonify({'status': 'error', 'message': str(e)})
 
+@app.route('/api/ai/models')
+@login_required
+def api_ai_models():
+    """API listant les versions de modèles du registre"""
+    try:
+        registry = get_model_registry()
+        return jsonify({
+            'status': 'success',
+            'active_version': registry.active_version(),
+            'versions': registry.list_versions()
+        })
+    except Exception as e:
+        logger.error(f"Erreur API versions de modèles: {e}")
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/api/ai/models/activate', methods=['POST'])
+@login_required
+def api_ai_models_activate():
+    """API de bascule (ou retour arrière) de la version de modèles active"""
+    if current_user.role != 'admin':
+        return jsonify({'status': 'error', 'message': 'Accès réservé aux administrateurs'}), 403
+    try:
+        registry = get_model_registry()
+        version = (request.get_json(silent=True) or {}).get('version')
+        with model_switch_lock:
+            previous = registry.active_version()
+            if not version:
+                version = registry.previous_version()
+                if not version:
+                    return jsonify({'status': 'error', 'message': 'Aucune version précédente disponible'})
+            if not registry.manifest(version):
+                return jsonify({'status': 'error', 'message': f'Version de modèles inconnue: {version}'}), 404
+            
+            # Chargement validé avant la bascule : ACTIVE ne désigne jamais une version illisible
+            if not activate_model_version(version):
+                return jsonify({'status': 'error', 'message': f'Impossible de charger la version {version}'})
+            try:
+                registry.activate(version)
+            except Exception:
+                # Pointeur inchangé : on revient aux modèles de la version précédente
+                if previous:
+                    activate_model_version(previous)
+                raise
+        return jsonify({'status': 'success', 'message': f'Version {version} active', 'version': version})
+    except Exception as e:
+        logger.error(f"Erreur API bascule de modèles: {e}")
+        return jsonify({'status': 'error', 'message': str(e)})
+
 @app.route('/api/ai/high-risk-devices')
 @login_required
 def api_high_risk_devices():
@@ -1782,17 +2225,24 @@ def reports():
 @app.route('/api/reports/delete/<filename>', methods=['DELETE'])
 @login_required
 def api_delete_report(filename):
-    """API pour supprimer un rapport"""
+    """API pour supprimer un rapport (le fichier est conservé s'il est partagé avec un autre rapport)"""
     try:
-        from report_generator import ReportGenerator
-        report_gen = ReportGenerator()
-        success = report_gen.delete_report(filename)
+        report = Report.query.filter_by(filename=filename).first()
+        if report:
+            success = report_catalog.delete(db.session.connection(), report.id)
+            db.session.commit()
+        else:
+            # Fichier absent du catalogue (pas encore rapproché), sauf s'il est partagé par un autre rapport
+            path = os.path.join(report_generator.reports_dir, filename)
+            success = (not report_catalog.is_referenced(db.session.connection(), path)
+                       and report_generator.delete_report(filename))
         
         if success:
             return jsonify({'success': True, 'message': f'Rapport {filename} supprimé'})
         else:
             return jsonify({'success': False, 'message': f'Erreur lors de la suppression de {filename}'})
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Erreur suppression rapport: {e}")
         return jsonify({'success': False, 'message': str(e)})
 
@@ -1817,6 +2267,28 @@ def api_settings():
         logger.error(f"Erreur API settings: {e}")
         return jsonify({'error': str(e)})
 
+@app.route('/api/settings/retention')
+@login_required
+def api_settings_retention():
+    """API pour consulter les politiques de rétention et le dernier rapport"""
+    try:
+        return jsonify({'status': 'success', 'data': retention_summary()})
+    except Exception as e:
+        logger.error(f"Erreur API rétention: {e}")
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/api/settings/retention/run', methods=['POST'])
+@login_required
+def api_settings_retention_run():
+    """API pour lancer immédiatement la purge et le compactage"""
+    if current_user.role != 'admin':
+        return jsonify({'status': 'error', 'message': 'Accès réservé aux administrateurs'}), 403
+    data = request.get_json(silent=True) or {}
+    report = run_retention(full_vacuum=True if data.get('full_vacuum') else None)
+    if report is None:
+        return jsonify({'status': 'error', 'message': 'Échec de la purge des données'})
+    return jsonify({'status': 'success', 'data': report})
+
 @app.route('/api/settings', methods=['POST'])
 @login_required
 def api_update_settings():
@@ -1927,7 +2399,7 @@ def api_test_network():
 @app.route('/api/reports/generate', methods=['POST'])
 @login_required
 def api_generate_report():
-    """API pour générer un rapport avec sauvegarde en base de données"""
+    """API pour générer un rapport : enregistrement en base puis génération en tâche de fond"""
     try:
         data = request.get_json()
         report_type = data.get('type', 'daily')
@@ -1939,7 +2411,7 @@ def api_generate_report():
         
         # Générer un nom de fichier unique
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"rapport_{report_type}_{timestamp}.{report_format}"
+        filename = f"rapport_{report_type}_{timestamp}.{FILE_EXTENSIONS.get(report_format, report_format)}"
         
         # Créer l'entrée en base de données
         new_report = Report(
@@ -1958,161 +2430,157 @@ def api_generate_report():
         db.session.add(new_report)
         db.session.commit()
         
+        report_jobs.submit(new_report.id, run_report_job, date_from, date_to, sections)
+        
+        return jsonify({
+            'success': True,
+            'message': f'Génération du rapport {report_type} lancée',
+            'status': 'processing',
+            'filename': filename,
+            'report_id': new_report.id,
+            'status_url': f'/api/reports/{new_report.id}/status',
+            'report_url': f'/api/reports/download/{filename}'
+        }), 202
+            
+    except Exception as e:
+        logger.error(f"Erreur génération rapport: {e}")
+        return jsonify({'success': False, 'message': str(e)})
+
+def run_report_job(report_id, progress, date_from, date_to, sections):
+    """Génère le fichier d'un rapport (exécuté par le pool de workers, hors requête HTTP)"""
+    with app.app_context():
+        report = Report.query.get(report_id)
+        report_path = os.path.join('reports', report.filename)
         try:
-            # Simuler la génération du rapport (remplacer par vraie génération)
-            report_data = generate_real_report_data(report_type, date_from, date_to, sections)
+            progress(10, 'Collecte des données')
+            report_data = generate_real_report_data(report.type, date_from, date_to, sections)
             
             # Créer le dossier reports s'il n'existe pas
-            reports_dir = 'reports'
-            if not os.path.exists(reports_dir):
-                os.makedirs(reports_dir)
-            
-            report_path = os.path.join(reports_dir, filename)
+            os.makedirs('reports', exist_ok=True)
             
             # Générer le fichier selon le format
-            if report_format == 'pdf':
-                generate_pdf_report(report_path, report_data, report_type)
-            elif report_format == 'excel':
+            progress(50, 'Rendu du fichier')
+            if report.format == 'pdf':
+                generate_pdf_report(report_path, report_data, report.type)
+            elif report.format == 'excel':
                 generate_excel_report(report_path, report_data)
-            elif report_format == 'html':
-                generate_html_report(report_path, report_data, report_type)
-            elif report_format == 'csv':
+            elif report.format == 'html':
+                generate_html_report(report_path, report_data, report.type)
+            elif report.format == 'csv':
                 generate_csv_report(report_path, report_data)
             
-            # Mettre à jour le rapport avec les informations du fichier
-            file_size = os.path.getsize(report_path) if os.path.exists(report_path) else 0
-            new_report.status = 'completed'
-            new_report.file_path = report_path
-            new_report.file_size = file_size
-            new_report.generated_at = datetime.now()
-            
+            # Mettre à jour le rapport avec les informations du fichier (contenu identique : fichier existant réutilisé)
+            progress(90, 'Enregistrement')
+            report.status = 'completed'
+            if os.path.exists(report_path):
+                generated_path = report_path
+                report_path, report.content_hash = report_catalog.deduplicate(db.session.connection(), report.id, report_path)
+                if report_path == generated_path:
+                    # Variantes .gz / .br créées une fois ici plutôt qu'à chaque téléchargement
+                    report_delivery.precompress(report_path)
+            report.file_path = report_path
+            report.file_size = os.path.getsize(report_path) if os.path.exists(report_path) else 0
+            report.generated_at = datetime.now()
             db.session.commit()
             
-            return jsonify({
-                'success': True,
-                'message': f'Rapport {report_type} généré avec succès',
-                'filename': filename,
-                'report_url': f'/api/reports/download/{filename}',
-                'report_id': new_report.id
-            })
+            add_notification(f"📄 {report.name} prêt ({report.format.upper()}) : /api/reports/download/{report.filename}",
+                             'success', 'medium')
             
         except Exception as e:
             # Marquer le rapport comme échoué
-            new_report.status = 'failed'
+            db.session.rollback()
+            report.status = 'failed'
             db.session.commit()
-            raise e
-            
-    except Exception as e:
-        logger.error(f"Erreur génération rapport: {e}")
-        return jsonify({'success': False, 'message': str(e)})
+            add_notification(f"❌ Échec génération {report.name}: {e}", 'danger', 'high')
+            raise
 
-def generate_real_report_data(report_type, date_from, date_to, sections):
-    """Génère des données réelles pour le rapport"""
-    data = {
-        'metadata': {
-            'type': report_type,
-            'generated_at': datetime.now(),
-            'period': f"{date_from} à {date_to}" if date_from and date_to else "Données actuelles",
-            'sections': sections
-        }
-    }
-    
-    # Récupérer les données réelles depuis la base
-    devices = Device.query.all()
-    alerts = Alert.query.filter_by(is_resolved=False).all()
+@app.route('/api/reports/<int:report_id>/status')
+@login_required
+def api_report_status(report_id):
+    """API de suivi d'un rapport en cours de génération"""
+    report = Report.query.get_or_404(report_id)
+    job = report_jobs.get(report_id)
     
-    # Statistiques générales
-    data['summary'] = {
-        'total_devices': len(devices),
-        'online_devices': len([d for d in devices if d.is_online]),
-        'offline_devices': len([d for d in devices if not d.is_online]),
-        'active_alerts': len(alerts),
-        'health_score_avg': sum(d.health_score for d in devices) / len(devices) if devices else 0
+    status = {
+        'success': True,
+        'report_id': report.id,
+        'filename': report.filename,
+        'status': report.status,
+        'progress': 100 if report.status == 'completed' else 0,
+        'stage': None,
+        'error': None
     }
+    if job:
+        # La base fait foi pour l'état final (le suivi en mémoire est mis à jour juste après)
+        status.update({'progress': job['progress'], 'stage': job['stage'], 'error': job['error']})
+        if report.status == 'processing' and job['status'] == 'queued':
+            status['status'] = 'queued'
+        if report.status == 'completed':
+            status['progress'] = 100
+    if report.status == 'completed':
+        status['report_url'] = f'/api/reports/download/{report.filename}'
+        status['file_size'] = report.file_size
+    return jsonify(status)
+
+def generate_real_report_data(report_type, date_from, date_to, sections):
+    """Données du rapport pour les générateurs de fichiers, tirées de l'instantané partagé"""
+    return get_report_snapshot(report_type, date_from, date_to, sections).to_dict()
+
+def format_metric(value, unit=''):
+    """Formate une métrique agrégée (N/A sans données)"""
+    return f"{value:.1f}{unit}" if value is not None else 'N/A'
+
+def generate_pdf_report(file_path, data, report_type):
+    """Génère un rapport PDF (moteur de rendu de ReportGenerator, graphiques et documents en cache)"""
+    report_generator.generate_full_pdf_report(file_path, data, report_type)
+
+def generate_excel_report(file_path, data):
+    """Génère un rapport Excel en flux (classeur en écriture seule, historique des scans lu par lots)"""
+    writer = StreamingExcelWriter(file_path)
+    summary = data['summary']
     
-    # Données des équipements
-    data['devices'] = []
-    for device in devices:
-        data['devices'].append({
-            'ip': device.ip,
-            'hostname': device.hostname or 'N/A',
-            'type': device.device_type,
-            'status': 'En ligne' if device.is_online else 'Hors ligne',
-            'health_score': device.health_score,
-            'last_seen': device.last_seen.strftime('%Y-%m-%d %H:%M') if device.last_seen else 'N/A',
-            'response_time': device.response_time
-        })
+    # Feuille résumé
+    writer.add_key_values('Résumé', [
+        ('Période', data['metadata']['period']),
+        ('Généré le', data['metadata']['generated_at'], 'datetime'),
+        None,
+        ('Total équipements', summary['total_devices']),
+        ('Équipements en ligne', summary['online_devices']),
+        ('Équipements hors ligne', summary['offline_devices']),
+        ('Alertes actives', summary['active_alerts']),
+        ('Score de santé moyen (%)', round(summary['health_score_avg'], 1)),
+        ('Scans sur la période', summary['scans_count']),
+        ('Disponibilité mesurée (%)', summary['availability']),
+        ('Temps de réponse moyen (ms)', summary['avg_response_time']),
+        ('Temps de réponse p95 (ms)', summary['p95_response_time'])
+    ], heading=f"Rapport {data['metadata']['type']} - Central Danone")
     
-    # Données des alertes
-    data['alerts'] = []
-    for alert in alerts:
-        device = Device.query.get(alert.device_id)
-        data['alerts'].append({
-            'device_ip': device.ip if device else 'N/A',
-            'type': alert.alert_type,
-            'message': alert.message,
-            'priority': alert.priority,
-            'created_at': alert.created_at.strftime('%Y-%m-%d %H:%M')
-        })
+    # Parties non construites pour les sections demandées : feuilles omises
+    parts = built_parts(data)
     
-    return data
-
-def generate_pdf_report(file_path, data, report_type):
-    """Génère un rapport PDF"""
-    # Simuler la génération PDF avec un contenu simple
-    content = f"""
-RAPPORT {report_type.upper()} - CENTRAL DANONE
-===============================================
-
-Généré le: {data['metadata']['generated_at'].strftime('%Y-%m-%d %H:%M:%S')}
-Période: {data['metadata']['period']}
-
-RÉSUMÉ EXÉCUTIF
-===============
-- Total équipements: {data['summary']['total_devices']}
-- Équipements en ligne: {data['summary']['online_devices']}
-- Équipements hors ligne: {data['summary']['offline_devices']}
-- Alertes actives: {data['summary']['active_alerts']}
-- Score de santé moyen: {data['summary']['health_score_avg']:.1f}%
-
-ÉQUIPEMENTS
-===========
-"""
+    # Feuille équipements
+    if 'devices' in parts:
+        writer.add_table('Équipements', ['IP', 'Nom', 'Type', 'Statut', 'Santé (%)', 'Dernière vue', 'Temps de réponse (ms)'], (
+            (d['ip'], d['hostname'], d['type'], d['status'], d['health_score'], d['last_seen'], d['response_time'])
+            for d in data['devices']
+        ), widths=(16, 25, 14, 12, 10, 18, 20), row_style=lambda row: 'online' if row[3] == 'En ligne' else 'offline')
     
-    for device in data['devices'][:10]:  # Limiter à 10 pour l'exemple
-        content += f"- {device['ip']} ({device['hostname']}) - {device['status']} - Santé: {device['health_score']:.1f}%\n"
+    # Feuille alertes de la période (résolues ou non)
+    if 'alerts' in parts and data['alerts']:
+        writer.add_table('Alertes', ['IP', 'Type', 'Message', 'Priorité', 'Créée le', 'Résolue le'], (
+            (a['device_ip'], a['type'], a['message'], a['priority'], a['created_at'], a['resolved_at'] or 'Non résolue')
+            for a in data['alerts']
+        ), widths=(16, 18, 60, 10, 18, 18))
     
-    content += "\nALERTES ACTIVES\n===============\n"
-    for alert in data['alerts'][:5]:  # Limiter à 5 pour l'exemple
-        content += f"- {alert['device_ip']}: {alert['message']} ({alert['priority']})\n"
+    # Historique des scans de la période, lu en lots depuis la base sans tout charger en mémoire
+    metadata = data['metadata']
+    if 'period_start' in metadata:
+        columns, query, id_column = build_export_query('scans', metadata['period_start'], metadata['period_end'])
+        chunks = iter_export_chunks(query, id_column, PERFORMANCE_CONFIG['export_config']['chunk_size'])
+        writer.add_table('Historique des scans', columns, iter_rows(chunks),
+                         widths=[10, 10, 16, 10, 14, 12, 14, 12, 20])
     
-    # Écrire dans un fichier texte (simuler PDF)
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
-
-def generate_excel_report(file_path, data):
-    """Génère un rapport Excel"""
-    try:
-        import pandas as pd
-        
-        # Créer un fichier Excel avec plusieurs feuilles
-        with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-            # Feuille résumé
-            summary_df = pd.DataFrame([data['summary']])
-            summary_df.to_excel(writer, sheet_name='Résumé', index=False)
-            
-            # Feuille équipements
-            devices_df = pd.DataFrame(data['devices'])
-            devices_df.to_excel(writer, sheet_name='Équipements', index=False)
-            
-            # Feuille alertes
-            if data['alerts']:
-                alerts_df = pd.DataFrame(data['alerts'])
-                alerts_df.to_excel(writer, sheet_name='Alertes', index=False)
-                
-    except ImportError:
-        # Fallback si pandas n'est pas disponible
-        generate_csv_report(file_path.replace('.xlsx', '.csv'), data)
+    writer.save()
 
 def generate_html_report(file_path, data, report_type):
     """Génère un rapport HTML"""
@@ -2147,9 +2615,18 @@ def generate_html_report(file_path, data, report_type):
             <li>Équipements hors ligne: <strong class="offline">{data['summary']['offline_devices']}</strong></li>
             <li>Alertes actives: <strong>{data['summary']['active_alerts']}</strong></li>
             <li>Score de santé moyen: <strong>{data['summary']['health_score_avg']:.1f}%</strong></li>
+            <li>Scans sur la période: <strong>{data['summary']['scans_count']}</strong></li>
+            <li>Disponibilité mesurée: <strong>{format_metric(data['summary']['availability'], '%')}</strong></li>
+            <li>Temps de réponse moyen / p95: <strong>{format_metric(data['summary']['avg_response_time'], ' ms')} / {format_metric(data['summary']['p95_response_time'], ' ms')}</strong></li>
         </ul>
     </div>
     
+"""
+    
+    # Parties non construites pour les sections demandées : tableaux omis
+    parts = built_parts(data)
+    if 'devices' in parts:
+        html_content += """
     <h2>Équipements</h2>
     <table>
         <tr>
@@ -2161,10 +2638,9 @@ def generate_html_report(file_path, data, report_type):
             <th>Dernière vue</th>
         </tr>
 """
-    
-    for device in data['devices']:
-        status_class = 'online' if 'ligne' in device['status'] else 'offline'
-        html_content += f"""
+        for device in data['devices']:
+            status_class = 'online' if 'ligne' in device['status'] else 'offline'
+            html_content += f"""
         <tr>
             <td>{device['ip']}</td>
             <td>{device['hostname']}</td>
@@ -2174,11 +2650,13 @@ def generate_html_report(file_path, data, report_type):
             <td>{device['last_seen']}</td>
         </tr>
         """
-    
-    html_content += """
+        html_content += """
     </table>
+"""
     
-    <h2>Alertes Actives</h2>
+    if 'alerts' in parts:
+        html_content += """
+    <h2>Alertes de la période</h2>
     <table>
         <tr>
             <th>Équipement</th>
@@ -2186,22 +2664,25 @@ def generate_html_report(file_path, data, report_type):
             <th>Message</th>
             <th>Priorité</th>
             <th>Date</th>
+            <th>Résolue le</th>
         </tr>
     """
-    
-    for alert in data['alerts']:
-        html_content += f"""
+        for alert in data['alerts']:
+            html_content += f"""
         <tr>
             <td>{alert['device_ip']}</td>
             <td>{alert['type']}</td>
             <td>{alert['message']}</td>
             <td>{alert['priority']}</td>
             <td>{alert['created_at']}</td>
+            <td>{alert['resolved_at'] or 'Non résolue'}</td>
         </tr>
         """
+        html_content += """
+    </table>
+"""
     
     html_content += """
-    </table>
 </body>
 </html>
     """
@@ -2217,17 +2698,49 @@ def generate_csv_report(file_path, data):
     content += f"Hors Ligne,{data['summary']['offline_devices']}\n"
     content += f"Alertes Actives,{data['summary']['active_alerts']}\n"
     content += f"Score Santé Moyen,{data['summary']['health_score_avg']:.1f}\n"
+    content += f"Scans Période,{data['summary']['scans_count']}\n"
+    content += f"Disponibilité Mesurée,{format_metric(data['summary']['availability'])}\n"
+    content += f"Temps Réponse Moyen (ms),{format_metric(data['summary']['avg_response_time'])}\n"
+    content += f"Temps Réponse p95 (ms),{format_metric(data['summary']['p95_response_time'])}\n"
     
     with open(file_path, 'w', encoding='utf-8') as f:
         f.write(content)
 
+def send_report_file(report_path, filename, report=None):
+    """
+    Envoie un fichier de rapport : ETag / Last-Modified (réponse 304), requêtes Range (206) et variante
+    pré-compressée selon Accept-Encoding. Le compteur du rapport n'est incrémenté que pour un
+    téléchargement complet ou le premier segment d'un téléchargement par parties
+    """
+    from flask import send_file
+    
+    serve_path, encoding = report_delivery.choose_variant(report_path, request.headers.get('Accept-Encoding'))
+    etag = True
+    if report is not None and report.content_hash:
+        etag = f"{report.content_hash}-{encoding}" if encoding else report.content_hash
+    response = send_file(serve_path, mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+                         as_attachment=True, download_name=filename, conditional=True, etag=etag,
+                         last_modified=os.path.getmtime(report_path),
+                         max_age=report_delivery.DOWNLOAD_CONFIG['max_age'])
+    response.cache_control.public = None  # rapports réservés aux utilisateurs connectés
+    response.cache_control.private = True
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    
+    first_part = response.status_code == 206 and request.range is not None and request.range.ranges[0][0] == 0
+    if report is not None and (response.status_code == 200 or first_part):
+        # Incrément atomique (UPDATE ... SET download_count = download_count + 1)
+        Report.query.filter_by(id=report.id).update({Report.download_count: Report.download_count + 1},
+                                                    synchronize_session=False)
+        db.session.commit()
+    return response
+
 @app.route('/api/reports/download/<filename>')
 @login_required
 def api_download_report(filename):
     """API pour télécharger un rapport avec compteur"""
     try:
-        from flask import send_file
-        
         # Chercher le rapport en base de données
         report = Report.query.filter_by(filename=filename).first()
         if not report:
@@ -2237,14 +2750,10 @@ def api_download_report(filename):
         if not report.file_path or not os.path.exists(report.file_path):
             return jsonify({'success': False, 'message': 'Fichier physique non trouvé'}), 404
         
-        # Incrémenter le compteur de téléchargements
-        report.download_count += 1
-        db.session.commit()
-        
-        # Retourner le fichier
-        return send_file(report.file_path, as_attachment=True, download_name=filename)
+        return send_report_file(report.file_path, filename, report)
             
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Erreur téléchargement rapport: {e}")
         return jsonify({'success': False, 'message': str(e)})
 
@@ -2253,48 +2762,143 @@ def api_download_report(filename):
 def download_report(filename):
     """Route de téléchargement direct pour compatibilité frontend"""
     try:
-        from flask import send_file
-        report_path = os.path.join('reports', filename)
+        # Le fichier d'un rapport dédoublonné porte le nom du rapport d'origine
+        report = Report.query.filter_by(filename=filename).first()
+        report_path = report.file_path if report and report.file_path else os.path.join('reports', filename)
         
         if os.path.exists(report_path):
-            return send_file(report_path, as_attachment=True)
+            return send_report_file(report_path, filename, report)
         else:
             return jsonify({'success': False, 'message': 'Fichier non trouvé'}), 404
             
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Erreur téléchargement rapport: {e}")
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/export/parquet')
+@login_required
+def api_export_parquet_status():
+    """API pour consulter l'état de l'export Parquet (filigranes par jeu de données)"""
+    exporter = get_parquet_exporter()
+    return jsonify({
+        'success': True,
+        'enabled': PARQUET_CONFIG['enabled'],
+        'available': exporter.available(),
+        'output_dir': os.path.abspath(exporter.output_dir),
+        'watermarks': exporter.load_watermarks()
+    })
+
+@app.route('/api/export/parquet/run', methods=['POST'])
+@login_required
+def api_export_parquet_run():
+    """API pour lancer immédiatement l'export Parquet incrémental"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Accès réservé aux administrateurs'}), 403
+    report = run_parquet_export()
+    if report is None:
+        return jsonify({'success': False, 'message': "Échec de l'export Parquet"})
+    return jsonify(report)
+
+# Colonnes exportées par jeu de données (l'identifiant en premier, pour la pagination)
+EXPORT_COLUMNS = {
+    'devices': ['id', 'ip', 'mac', 'hostname', 'mac_vendor', 'device_type', 'is_online', 'last_seen',
+                'health_score', 'failure_probability', 'anomaly_score', 'maintenance_urgency',
+                'response_time', 'system_info', 'created_at'],
+    'alerts': ['id', 'device_id', 'alert_type', 'message', 'priority', 'ai_confidence',
+               'is_resolved', 'created_at', 'resolved_at'],
+    'scans': ['id', 'device_id', 'is_online', 'response_time', 'packet_loss', 'scan_duration',
+              'error_count', 'timestamp']
+}
+
+def build_export_query(dataset, date_from=None, date_to=None, device_id=None):
+    """Requête Core d'un export (colonnes du modèle + IP de l'équipement) et sa colonne identifiant"""
+    model, time_column = {
+        'devices': (Device, 'last_seen'),
+        'alerts': (Alert, 'created_at'),
+        'scans': (ScanHistory, 'timestamp')
+    }[dataset]
+    table = model.__table__
+    columns = [table.c[name] for name in EXPORT_COLUMNS[dataset]]
+    
+    if model is Device:
+        query = select(*columns)
+        device_column = table.c.id
+    else:
+        devices = Device.__table__
+        columns.insert(2, devices.c.ip.label('device_ip'))
+        query = select(*columns).select_from(table.outerjoin(devices, table.c.device_id == devices.c.id))
+        device_column = table.c.device_id
+    
+    if date_from:
+        query = query.where(table.c[time_column] >= date_from)
+    if date_to:
+        query = query.where(table.c[time_column] < date_to)
+    if device_id:
+        query = query.where(device_column == device_id)
+    return [column.name for column in columns], query, table.c.id
+
+def iter_export_chunks(query, id_column, chunk_size):
+    """Lots successifs d'une requête d'export, paginés par identifiant"""
+    def fetch_chunk(last_id, chunk_size):
+        # Une connexion courte par lot : pas de transaction de lecture ouverte pendant tout l'export
+        with db.engine.connect() as connection:
+            return connection.execution_options(stream_results=True).execute(
+                query.where(id_column > last_id).order_by(id_column).limit(chunk_size)
+            ).fetchall()
+    
+    return streaming_export.iter_chunks(fetch_chunk, chunk_size)
+
+@app.route('/api/export/<dataset>')
+@login_required
+def api_export(dataset):
+    """Export en flux (CSV ou NDJSON, gzip optionnel) : ?format=csv|ndjson&gzip=1&from=&to=&device_id="""
+    if dataset not in EXPORT_COLUMNS:
+        return jsonify({'success': False, 'message': f'Jeu de données inconnu: {dataset}'}), 404
+    
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in streaming_export.FORMATS:
+        return jsonify({'success': False, 'message': f"Format d'export non supporté: {fmt}"}), 400
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    try:
+        date_from = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+        if date_to and len(request.args['to']) == 10:
+            date_to += timedelta(days=1)  # date seule : journée incluse
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Dates invalides (format ISO attendu)'}), 400
+    
+    export_config = PERFORMANCE_CONFIG['export_config']
+    columns, query, id_column = build_export_query(dataset, date_from, date_to, request.args.get('device_id', type=int))
+    chunks = iter_export_chunks(query, id_column, export_config['chunk_size'])
+    body, mimetype, extension = streaming_export.export_stream(columns, chunks, fmt, compress,
+                                                               export_config['gzip_level'])
+    filename = f"export_{dataset}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return Response(stream_with_context(body), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+REPORT_TYPE_LABELS = {'daily': 'Journalier', 'weekly': 'Hebdomadaire', 'monthly': 'Mensuel', 'ai': 'IA'}
+REPORT_FORMAT_LABELS = {'pdf': 'PDF', 'excel': 'Excel', 'html': 'HTML', 'csv': 'CSV', 'json': 'JSON'}
+
+def format_file_size(size):
+    """Taille lisible (KB / MB)"""
+    size = size or 0
+    return f"{size / (1024 * 1024):.1f} MB" if size > 1024 * 1024 else f"{size / 1024:.1f} KB"
+
+def report_catalog_query():
+    """Filtres et pagination du catalogue depuis la requête (type, format, status, q, date_from, date_to, page, per_page)"""
+    filters = {key: request.args.get(key) for key in ('type', 'format', 'status', 'q')}
+    for key in ('date_from', 'date_to'):
+        value = request.args.get(key)
+        filters[key] = datetime.fromisoformat(value) if value else None
+    return filters, request.args.get('page', 1, type=int), request.args.get('per_page', type=int)
+
 @app.route('/api/reports/stats')
 @login_required
 def api_reports_stats():
-    """API pour les statistiques des rapports"""
-    try:
-        reports_dir = 'reports'
-        if not os.path.exists(reports_dir):
-            os.makedirs(reports_dir)
-        
-        report_files = []
-        for filename in os.listdir(reports_dir):
-            if filename.endswith(('.pdf', '.xlsx', '.json')):
-                filepath = os.path.join(reports_dir, filename)
-                stat = os.stat(filepath)
-                report_files.append({
-                    'filename': filename,
-                    'size': stat.st_size,
-                    'created': datetime.fromtimestamp(stat.st_ctime)
-                })
-        
-        total_reports = len(report_files)
-        current_month = datetime.now().month
-        reports_this_month = len([r for r in report_files if r['created'].month == current_month])
-        
-        return jsonify({
-            'total_reports': total_reports,
-            'reports_this_month': reports_this_month,
-            'total_size_mb': sum(r['size'] for r in report_files) / (1024 * 1024)
-        })
-        
+    """API pour les statistiques des rapports (catalogue en base)"""
+    try:
+        return jsonify(report_catalog.stats(db.session.connection()))
     except Exception as e:
         logger.error(f"Erreur statistiques rapports: {e}")
         return jsonify({'error': str(e)})
@@ -2302,32 +2906,35 @@ def api_reports_stats():
 @app.route('/api/reports')
 @login_required
 def api_reports():
-    """API pour récupérer la liste des rapports depuis la base de données"""
+    """API pour récupérer une page du catalogue des rapports depuis la base de données"""
     try:
-        # Récupérer tous les rapports depuis la base de données
-        reports = Report.query.order_by(Report.created_at.desc()).all()
+        filters, page, per_page = report_catalog_query()
+        connection = db.session.connection()
+        reports, pagination = report_catalog.list(connection, filters, page, per_page)
         
         # Convertir en format attendu par le frontend
         reports_data = []
         for report in reports:
             reports_data.append({
-                'id': report.id,
-                'name': report.name,
-                'filename': report.filename,
-                'type': report.format.upper(),  # PDF, EXCEL, etc.
-                'format': report.format,
-                'status': report.status,
-                'size': f"{report.file_size / (1024 * 1024):.1f} MB" if report.file_size > 1024*1024 else f"{report.file_size / 1024:.1f} KB",
-                'created': report.created_at.strftime('%Y-%m-%d %H:%M:%S') if report.created_at else '',
-                'created_at': report.created_at.isoformat() if report.created_at else None,
-                'description': report.description or 'Rapport automatisé',
-                'download_url': f'/api/reports/download/{report.filename}' if report.status == 'completed' else None,
-                'report_type': report.type.title()
+                'id': report['id'],
+                'name': report['name'],
+                'filename': report['filename'],
+                'type': report['format'].upper(),  # PDF, EXCEL, etc.
+                'format': report['format'],
+                'status': report['status'],
+                'size': format_file_size(report['file_size']),
+                'created': report['created_at'].strftime('%Y-%m-%d %H:%M:%S') if report['created_at'] else '',
+                'created_at': report['created_at'].isoformat() if report['created_at'] else None,
+                'description': report['description'] or 'Rapport automatisé',
+                'download_url': f"/api/reports/download/{report['filename']}" if report['status'] == 'completed' else None,
+                'report_type': report['type'].title()
             })
         
         return jsonify({
             'success': True,
-            'reports': reports_data
+            'reports': reports_data,
+            'pagination': pagination,
+            'stats': report_catalog.stats(connection)
         })
         
     except Exception as e:
@@ -2341,67 +2948,43 @@ def api_reports():
 @app.route('/api/reports/list')
 @login_required
 def api_reports_list():
-    """API pour récupérer la liste des rapports"""
+    """API pour récupérer la liste des rapports terminés (catalogue en base)"""
     try:
-        from report_generator import ReportGenerator
-        report_gen = ReportGenerator()
-        reports = report_gen.list_reports()
+        filters, page, per_page = report_catalog_query()
+        filters['status'] = filters['status'] or 'completed'
+        reports, pagination = report_catalog.list(db.session.connection(), filters, page, per_page)
         
         # Formater les données pour le frontend
-        formatted_reports = []
-        for report in reports:
-            # Déterminer le type de rapport basé sur le nom de fichier
-            filename = report['filename']
-            if 'journalier' in filename:
-                report_type = 'Journalier'
-            elif 'hebdomadaire' in filename:
-                report_type = 'Hebdomadaire'
-            elif 'mensuel' in filename:
-                report_type = 'Mensuel'
-            elif 'ai' in filename:
-                report_type = 'IA'
-            else:
-                report_type = 'Personnalisé'
-            
-            # Déterminer le format
-            if filename.endswith('.pdf'):
-                format_type = 'PDF'
-                format_class = 'pdf'
-            elif filename.endswith('.xlsx'):
-                format_type = 'Excel'
-                format_class = 'excel'
-            elif filename.endswith('.json'):
-                format_type = 'JSON'
-                format_class = 'json'
-            else:
-                format_type = 'Inconnu'
-                format_class = 'unknown'
-            
-            # Formater la taille
-            size_mb = report['size'] / (1024 * 1024)
-            if size_mb < 1:
-                size_str = f"{report['size'] / 1024:.1f} KB"
-            else:
-                size_str = f"{size_mb:.1f} MB"
-            
-            formatted_reports.append({
-                'filename': filename,
-                'type': format_type,
-                'size': size_str,
-                'created': report['created'].strftime('%Y-%m-%d %H:%M:%S'),
-                'format': format_class,
-                'report_type': report_type
-            })
+        formatted_reports = [{
+            'filename': report['filename'],
+            'type': REPORT_FORMAT_LABELS.get(report['format'], 'Inconnu'),
+            'size': format_file_size(report['file_size']),
+            'created': report['created_at'].strftime('%Y-%m-%d %H:%M:%S') if report['created_at'] else '',
+            'format': report['format'] if report['format'] in REPORT_FORMAT_LABELS else 'unknown',
+            'report_type': REPORT_TYPE_LABELS.get(report['type'], 'Personnalisé')
+        } for report in reports]
         
         return jsonify({
             'success': True,
-            'reports': formatted_reports
+            'reports': formatted_reports,
+            'pagination': pagination
         })
         
     except Exception as e:
         logger.error(f"Erreur liste rapports: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/reports/reconcile', methods=['POST'])
+@login_required
+def api_reports_reconcile():
+    """API pour lancer le rapprochement du catalogue avec le disque et la rétention (administrateurs)"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Accès réservé aux administrateurs'}), 403
+    result = run_report_catalog_maintenance()
+    if result is None:
+        return jsonify({'success': False, 'message': 'Erreur maintenance du catalogue'}), 500
+    return jsonify({'success': True, **result})
+
 @app.route('/api/reports/schedule', methods=['POST'])
 @login_required
 def api_reports_schedule():
@@ -2783,6 +3366,33 @@ def api_ai_chart_data():
         logger.error(f"Erreur API données graphiques IA: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/metrics/rollups')
+@login_required
+def api_metrics_rollups():
+    """API des séries agrégées (temps de réponse, disponibilité) pour les graphiques"""
+    try:
+        device_id = request.args.get('device_id', scan_rollups.FLEET_DEVICE_ID, type=int)
+        hours = min(max(request.args.get('hours', 24, type=int), 1), 24 * 365)
+        resolution = request.args.get('resolution')
+        if resolution and resolution not in scan_rollups.RESOLUTIONS:
+            return jsonify({'success': False, 'error': 'Résolution invalide'}), 400
+        
+        end = datetime.now()
+        start = end - timedelta(hours=hours)
+        resolution = resolution or scan_rollups.choose_resolution(start, end)
+        connection = db.session.connection()
+        
+        return jsonify({
+            'success': True,
+            'device_id': device_id,
+            'resolution': resolution,
+            'summary': scan_rollups.summarize(connection, ScanRollup.__table__, start, end, device_id, resolution),
+            'points': scan_rollups.series(connection, ScanRollup.__table__, start, end, device_id, resolution)
+        })
+    except Exception as e:
+        logger.error(f"Erreur API agrégats de scans: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ===== ROUTES POUR LE MONITORING AVANCÉ =====
 
 @app.route('/advanced-monitoring')
@@ -3181,39 +3791,44 @@ def api_ai_advanced_trends():
     try:
         trends = []
         
-        # Analyser les tendances de temps de réponse
-        recent_scans = ScanHistory.query.filter(
-            ScanHistory.timestamp >= datetime.now() - timedelta(days=7)
-        ).all()
-        
-        if recent_scans:
-            # Calculer les tendances de temps de réponse
-            response_times = [scan.response_time for scan in recent_scans if scan.response_time]
-            if response_times:
-                current_avg = sum(response_times) / len(response_times)
-                # Comparer avec la semaine précédente
-                old_scans = ScanHistory.query.filter(
-                    ScanHistory.timestamp >= datetime.now() - timedelta(days=14),
-                    ScanHistory.timestamp < datetime.now() - timedelta(days=7)
-                ).all()
-                
-                old_response_times = [scan.response_time for scan in old_scans if scan.response_time]
-                if old_response_times:
-                    previous_avg = sum(old_response_times) / len(old_response_times)
-                    change_percentage = ((current_avg - previous_avg) / previous_avg) * 100
-                    trend_direction = "Hausse" if change_percentage > 0 else "Baisse" if change_percentage < 0 else "Stable"
-                else:
-                    change_percentage = 0.0
-                    trend_direction = "Stable"
-                
+        # Analyser les tendances de temps de réponse (agrégats horaires du parc)
+        now = datetime.now()
+        current = get_rollup_summary(now - timedelta(days=7), now)
+        previous = get_rollup_summary(now - timedelta(days=14), now - timedelta(days=7))
+        
+        if current['avg_response_time'] is not None:
+            current_avg = current['avg_response_time']
+            # Comparer avec la semaine précédente
+            if previous['avg_response_time']:
+                previous_avg = previous['avg_response_time']
+                change_percentage = ((current_avg - previous_avg) / previous_avg) * 100
+                trend_direction = "Hausse" if change_percentage > 0 else "Baisse" if change_percentage < 0 else "Stable"
+            else:
+                previous_avg = current_avg
+                change_percentage = 0.0
+                trend_direction = "Stable"
+            
+            trends.append({
+                'metric': 'Temps de réponse moyen',
+                'current_value': round(current_avg, 1),
+                'previous_value': round(previous_avg, 1),
+                'change_percentage': round(change_percentage, 1),
+                'trend_direction': trend_direction,
+                'period': '24h',
+                'timestamp': now.strftime("%Y-%m-%d %H:%M:%S")
+            })
+            
+            if current['p95_response_time'] is not None:
+                previous_p95 = previous['p95_response_time'] or current['p95_response_time']
+                change_percentage = ((current['p95_response_time'] - previous_p95) / previous_p95 * 100) if previous_p95 else 0.0
                 trends.append({
-                    'metric': 'Temps de réponse moyen',
-                    'current_value': round(current_avg, 1),
-                    'previous_value': round(previous_avg, 1) if old_response_times else round(current_avg, 1),
+                    'metric': 'Temps de réponse p95',
+                    'current_value': round(current['p95_response_time'], 1),
+                    'previous_value': round(previous_p95, 1),
                     'change_percentage': round(change_percentage, 1),
-                    'trend_direction': trend_direction,
+                    'trend_direction': "Hausse" if change_percentage > 0 else "Baisse" if change_percentage < 0 else "Stable",
                     'period': '24h',
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    'timestamp': now.strftime("%Y-%m-%d %H:%M:%S")
                 })
         
         # Analyser les tendances de disponibilité
@@ -3222,10 +3837,9 @@ def api_ai_advanced_trends():
             online_count = sum(1 for d in devices if d.is_online)
             current_availability = (online_count / len(devices)) * 100
             
-            # Comparer avec les données historiques
-            total_scans = ScanHistory.query.count()
-            online_scans = ScanHistory.query.filter_by(is_online=True).count()
-            historical_availability = (online_scans / total_scans * 100) if total_scans > 0 else current_availability
+            # Comparer avec les données historiques (agrégats journaliers)
+            historical = get_rollup_summary(datetime(1970, 1, 1), now + timedelta(days=1))
+            historical_availability = historical['availability'] if historical['availability'] is not None else current_availability
             
             change_percentage = current_availability - historical_availability
             trend_direction = "Hausse" if change_percentage > 0 else "Baisse" if change_percentage < 0 else "Stable"
@@ -3300,7 +3914,7 @@ def api_ai_advanced_statistics():
         optimizations_applied = sum(1 for d in devices if d.health_score > 90)
         
         # Tendances analysées (basées sur l'historique des scans)
-        trends_analyzed = ScanHistory.query.count()
+        trends_analyzed = count_scans()
         
         # Modèles IA actifs
         ai_models_active = AIModel.query.filter_by(is_active=True).count()
@@ -3373,79 +3987,53 @@ def api_ai_advanced_run_trend_analysis():
 @app.route('/api/ai-advanced/chatbot', methods=['POST'])
 @login_required
 def api_ai_advanced_chatbot():
-    """API pour le chatbot IA avec DeepSeek"""
+    """API pour le chatbot IA (contexte réseau tiré du résumé en mémoire, dans le budget de tokens)"""
     try:
         data = request.get_json()
         message = data.get('message', '')
-        
-        # Récupérer les données réelles
-        devices = Device.query.all()
-        alerts = Alert.query.filter_by(is_resolved=False).all()
-        
-        # Convertir en dictionnaires pour DeepSeek
-        devices_data = []
-        for device in devices:
-            devices_data.append({
-                'ip': device.ip,
-                'hostname': device.hostname,
-                'is_online': device.is_online,
-                'health_score': device.health_score,
-                'maintenance_urgency': device.maintenance_urgency,
-                'device_type': device.device_type,
-                'last_seen': device.last_seen.strftime("%Y-%m-%d %H:%M:%S") if device.last_seen else None
-            })
-        
-        alerts_data = []
-        for alert in alerts:
-            alerts_data.append({
-                'message': alert.message,
-                'alert_type': alert.alert_type,
-                'priority': alert.priority,
-                'is_resolved': alert.is_resolved,
-                'created_at': alert.created_at.strftime("%Y-%m-%d %H:%M:%S") if alert.created_at else None
-            })
+        connection = db.session.connection()
         
         # Importer et utiliser Groq
         try:
             from groq_chatbot import groq_bot
-            
-            # Essayer Groq d'abord
-            result = groq_bot.chat(message, devices_data, alerts_data)
-            
-            if result.get('success'):
-                return jsonify({
-                    'success': True,
-                    'response': result['response'],
-                    'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'confidence': result['confidence'],
-                    'model': result.get('model', 'Groq'),
-                    'tokens_used': result.get('tokens_used', 0)
-                })
-            else:
-                # Fallback vers l'ancien système si Groq échoue
-                logger.warning(f"Groq échoué: {result.get('error')}, utilisation du fallback")
-                return _fallback_chatbot(message, devices, alerts)
-                
         except ImportError:
             logger.warning("Module Groq non disponible, utilisation du fallback")
-            return _fallback_chatbot(message, devices, alerts)
+            return _fallback_chatbot(message, chat_context_service.summary(connection))
+        
+        network_context, summary = chat_context_service.build_context(connection, groq_bot.system_prompt, message)
+        result = groq_bot.chat(message, network_context=network_context)
+        
+        if result.get('success') and result.get('model') != 'Fallback':
+            return jsonify({
+                'success': True,
+                'response': result['response'],
+                'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                'confidence': result['confidence'],
+                'model': result.get('model', 'Groq'),
+                'tokens_used': result.get('tokens_used', 0),
+                'cached': result.get('cached', False)
+            })
+        else:
+            # Fallback basé sur le résumé si Groq échoue
+            logger.warning(f"Groq échoué: {result.get('error', 'réponse de secours')}, utilisation du fallback")
+            return _fallback_chatbot(message, summary)
             
     except Exception as e:
         logger.error(f"Erreur chatbot: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
-def _fallback_chatbot(message: str, devices, alerts):
-    """Chatbot de fallback basé sur les données réelles"""
+def _fallback_chatbot(message: str, summary):
+    """Chatbot de fallback basé sur le résumé réseau (chat_context)"""
     try:
         message_lower = message.lower()
         
-        total_devices = len(devices)
-        online_devices = sum(1 for d in devices if d.is_online)
-        offline_devices = total_devices - online_devices
-        critical_devices = sum(1 for d in devices if d.maintenance_urgency == 'critical')
-        avg_health = sum(d.health_score for d in devices) / len(devices) if devices else 0
+        total_devices = summary['total_devices']
+        online_devices = summary['online_devices']
+        offline_devices = summary['offline_devices']
+        critical_devices = summary['critical_devices']
+        avg_health = summary['avg_health']
         
-        active_alerts = len(alerts)
+        active_alerts = summary['active_alerts']
         
         if any(word in message_lower for word in ['bonjour', 'salut', 'hello']):
             response = f"Bonjour ! Je suis l'assistant IA de Central Danone. Je surveille actuellement {total_devices} équipements. Comment puis-je vous aider ?"
@@ -3462,13 +4050,13 @@ def _fallback_chatbot(message: str, devices, alerts):
             else:
                 response = "✅ Aucune alerte active actuellement. Le système fonctionne normalement."
         elif any(word in message_lower for word in ['optimisation', 'optimiser']):
-            low_health_count = sum(1 for d in devices if d.health_score < 70)
+            low_health_count = summary['low_health_devices']
             if low_health_count > 0:
                 response = f"J'ai identifié {low_health_count} opportunité(s) d'optimisation. Voulez-vous les voir ?"
             else:
                 response = "Tous les équipements fonctionnent de manière optimale. Aucune optimisation nécessaire."
         elif any(word in message_lower for word in ['sécurité', 'intrusion']):
-            security_alerts = sum(1 for a in alerts if a.alert_type in ['intrusion', 'security', 'anomaly'])
+            security_alerts = summary['security_alerts']
             if security_alerts > 0:
                 response = f"🛡️ {security_alerts} menace(s) de sécurité détectée(s). Niveau de sécurité : Élevé."
             else:
@@ -3499,6 +4087,18 @@ def _fallback_chatbot(message: str, devices, alerts):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/ai-advanced/llm-stats')
+@login_required
+def api_llm_stats():
+    """API des métriques du client des chatbots (appels, cache, nouvelles tentatives, latence, tokens)"""
+    try:
+        from llm_client import llm_client
+        return jsonify({'success': True, 'stats': llm_client.get_stats(),
+                        'context': chat_context_service.get_stats()})
+    except Exception as e:
+        logger.error(f"Erreur métriques chatbot: {e}")
+        return jsonify({'success': False, 'error': str(e)})
+
 @app.route('/api/ai-advanced/test-deepseek', methods=['POST'])
 @login_required
 def api_test_deepseek():
@@ -3545,11 +4145,16 @@ def init_app():
         
         with app.app_context():
             db.create_all()
+            ensure_schema_columns()
+            ensure_scan_rollups()
             logger.info("Base de données initialisée")
             
             # Création des utilisateurs par défaut
             create_default_admin()
             
+            # Catalogue des rapports : fichiers ajoutés ou supprimés pendant l'arrêt, générations interrompues
+            run_report_catalog_maintenance()
+            
             # Chargement des modèles IA
             load_ai_models()
             
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Vérification asynchrone des services (asyncio)
+Sondes HTTP/HTTPS, FTP, SSH, SMTP, DNS et SNMP exécutées par milliers en parallèle,
+avec une limite de connexions par hôte et un délai global pour le cycle
+"""
+
+import asyncio
+import ssl
+import struct
+from collections import defaultdict
+from contextlib import suppress
+from typing import Dict, List, Sequence, Tuple
+
+from config_advanced import MONITORING_CONFIG
+
+# Requête DNS (type A, example.com), préfixée par sa longueur pour le transport TCP
+DNS_QUERY = b'\x00\x01\x01\x00\x00\x01\x00\x00\x00\x00\x00\x00\x07example\x03com\x00\x00\x01\x00\x01'
+
+# OID sysDescr.0 encodé en BER
+SYS_DESCR_OID = b'\x2b\x06\x01\x02\x01\x01\x01\x00'
+
+
+def _ber(tag: int, payload: bytes) -> bytes:
+    # Longueurs courtes uniquement (< 128 octets)
+    return bytes([tag, len(payload)]) + payload
+
+
+def snmp_get_request(community: str, request_id: int = 1) -> bytes:
+    """GetRequest SNMPv2c de sysDescr.0"""
+    varbind_list = _ber(0x30, _ber(0x30, _ber(0x06, SYS_DESCR_OID) + b'\x05\x00'))
+    pdu = _ber(0xa0, _ber(0x02, struct.pack('>I', request_id)) + b'\x02\x01\x00\x02\x01\x00' + varbind_list)
+    return _ber(0x30, b'\x02\x01\x01' + _ber(0x04, community.encode('ascii')) + pdu)
+
+
+class _DatagramProbe(asyncio.DatagramProtocol):
+    """Attend le premier datagramme reçu (ou une erreur ICMP)"""
+
+    def __init__(self):
+        self.response = asyncio.get_running_loop().create_future()
+
+    def datagram_received(self, data, addr):
+        if not self.response.done():
+            self.response.set_result(data)
+
+    def error_received(self, exc):
+        if not self.response.done():
+            self.response.set_exception(exc)
+
+
+class AsyncServiceChecker:
+    """Exécute un cycle de vérifications de services sur une boucle asyncio"""
+
+    def __init__(self, config: Dict = None):
+        self.config = config or MONITORING_CONFIG['async_checks']
+        self.snmp_community = MONITORING_CONFIG['snmp_config']['community']
+        self._ssl_context = ssl.create_default_context()
+        # Même comportement que requests(verify=False) : certificats non vérifiés
+        self._ssl_context.check_hostname = False
+        self._ssl_context.verify_mode = ssl.CERT_NONE
+
+    # ----- Sondes par protocole -----
+
+    async def _test_http(self, host: str, reader, writer) -> str:
+        writer.write(f"HEAD / HTTP/1.0\r\nHost: {host}\r\nConnection: close\r\n\r\n".encode('ascii'))
+        await writer.drain()
+        status_line = (await reader.readline()).decode('latin-1').split()
+        if len(status_line) >= 2 and status_line[0].startswith('HTTP/') and status_line[1].isdigit():
+            return "up" if int(status_line[1]) < 500 else "down"
+        return "down"
+
+    async def _test_banner(self, reader, expected: str, prefix: bool = True) -> str:
+        banner = (await reader.read(1024)).decode('utf-8', errors='ignore')
+        matched = banner.startswith(expected) if prefix else expected in banner
+        return "up" if matched else "down"
+
+    async def _test_dns(self, reader, writer) -> str:
+        writer.write(struct.pack('>H', len(DNS_QUERY)) + DNS_QUERY)
+        await writer.drain()
+        return "up" if await reader.read(1024) else "down"
+
+    async def _protocol_test(self, service_name: str, host: str, reader, writer) -> str:
+        if service_name in ('http', 'https'):
+            return await self._test_http(host, reader, writer)
+        if service_name in ('ftp', 'smtp'):
+            return await self._test_banner(reader, '220')
+        if service_name == 'ssh':
+            return await self._test_banner(reader, 'SSH', prefix=False)
+        if service_name == 'dns':
+            return await self._test_dns(reader, writer)
+        return "up"
+
+    async def _probe_snmp(self, host: str, port: int, timeout: float) -> Tuple[str, float, str]:
+        """SNMP est un protocole UDP : une réponse au GetRequest suffit"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        transport, protocol = await loop.create_datagram_endpoint(_DatagramProbe, remote_addr=(host, port))
+        try:
+            transport.sendto(snmp_get_request(self.snmp_community))
+            await asyncio.wait_for(protocol.response, timeout)
+            return "up", loop.time() - start, None
+        except asyncio.TimeoutError:
+            return "timeout", None, "Pas de réponse SNMP"
+        except OSError as e:
+            return "down", loop.time() - start, f"Connexion échouée (code: {e.errno})"
+        finally:
+            transport.close()
+
+    async def probe(self, host: str, service_name: str, port: int, timeout: float) -> Tuple[str, float, str]:
+        """
+        Vérifie un service
+
+        Returns:
+            tuple: (statut 'up'/'down'/'timeout', temps de connexion en secondes, message d'erreur)
+        """
+        if service_name == 'snmp':
+            return await self._probe_snmp(host, port, timeout)
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=self._ssl_context if service_name == 'https' else None),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            return "timeout", None, "Timeout de connexion"
+        except OSError as e:
+            return "down", loop.time() - start, f"Connexion échouée (code: {e.errno})"
+
+        response_time = loop.time() - start
+        try:
+            status = await asyncio.wait_for(self._protocol_test(service_name, host, reader, writer), timeout)
+        except Exception:
+            status = "down"
+        finally:
+            writer.close()
+            with suppress(Exception):
+                await asyncio.wait_for(writer.wait_closed(), 1)
+        return status, response_time, None
+
+    # ----- Cycle complet -----
+
+    async def _check_all(self, targets: Sequence[Tuple]) -> List[Dict]:
+        global_limit = asyncio.Semaphore(self.config['max_concurrency'])
+        host_limits = defaultdict(lambda: asyncio.Semaphore(self.config['per_host_limit']))
+
+        async def check(host, service_name, port, timeout):
+            async with global_limit, host_limits[host]:
+                return await self.probe(host, service_name, port, timeout)
+
+        tasks = [asyncio.ensure_future(check(*target)) for target in targets]
+        if not tasks:
+            return []
+        done, pending = await asyncio.wait(tasks, timeout=self.config['cycle_deadline'])
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+        results = []
+        for (host, service_name, port, _), task in zip(targets, tasks):
+            if task in done and task.exception() is None:
+                status, response_time, error_message = task.result()
+            elif task in done:
+                status, response_time, error_message = "down", None, str(task.exception())
+            else:
+                status, response_time, error_message = "timeout", None, "Délai global du cycle dépassé"
+            results.append({
+                'host': host,
+                'service_name': service_name,
+                'port': port,
+                'status': status,
+                'response_time': response_time,
+                'error_message': error_message
+            })
+        return results
+
+    def check_all(self, targets: Sequence[Tuple]) -> List[Dict]:
+        """
+        Exécute un cycle de vérifications (appel bloquant, depuis un thread sans boucle asyncio)
+
+        Args:
+            targets: tuples (hôte, nom du service, port, timeout)
+
+        Returns:
+            list: un résultat par cible, dans l'ordre des cibles
+        """
+        return asyncio.run(self._check_all(list(targets)))
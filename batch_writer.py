@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Écriture groupée dans SQLite
+Les lignes sont mises en file (bornée, contre-pression) et un thread dédié les insère
+par executemany, une transaction par lot ou par fenêtre de temps
+"""
+
+import atexit
+import queue
+import threading
+import time
+from typing import Dict, Sequence
+
+from storage import ConnectionPool
+
+
+class BatchedWriter:
+    """File d'insertions vidée par lots dans une seule transaction"""
+
+    def __init__(self, pool: ConnectionPool, statement: str, batch_size: int = 500,
+                 flush_interval: float = 1.0, max_queue: int = 10000, name: str = 'batch-writer'):
+        """
+        Args:
+            pool (ConnectionPool): Pool de connexions de la base cible
+            statement (str): Requête INSERT paramétrée (une ligne = un tuple de paramètres)
+            batch_size (int): Nombre maximal de lignes par transaction
+            flush_interval (float): Délai maximal (secondes) avant l'écriture d'un lot incomplet
+            max_queue (int): Taille de la file ; write() bloque quand elle est pleine
+        """
+        self.pool = pool
+        self.statement = statement
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.name = name
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        self.stats = {'rows_written': 0, 'batches': 0, 'rows_failed': 0, 'last_error': None}
+        # Les lignes encore en file sont écrites à l'arrêt du processus
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping = False
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+    def write(self, row: Sequence, timeout: float = None):
+        """Ajoute une ligne (bloque si la file est pleine, au plus `timeout` secondes)"""
+        self._ensure_started()
+        self._queue.put(tuple(row), timeout=timeout)
+
+    def write_many(self, rows):
+        """Ajoute plusieurs lignes"""
+        for row in rows:
+            self.write(row)
+
+    def _collect(self):
+        """Attend une première ligne puis complète le lot jusqu'à batch_size ou la fin de la fenêtre"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=max(remaining, 0)) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if not batch:
+                if self._stopping:
+                    return
+                continue
+            try:
+                with self.pool.connection() as conn:
+                    conn.executemany(self.statement, batch)
+                self.stats['rows_written'] += len(batch)
+                self.stats['batches'] += 1
+            except Exception as e:
+                self.stats['rows_failed'] += len(batch)
+                self.stats['last_error'] = str(e)
+                print(f"❌ Erreur écriture groupée ({self.name}, {len(batch)} lignes): {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self):
+        """Attend que toutes les lignes en file soient écrites"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self):
+        """Écrit les lignes restantes et arrête le thread d'écriture"""
+        self.flush()
+        self._stopping = True
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval * 2)
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats['pending'] = self._queue.qsize()
+        return stats
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Contexte réseau du chatbot
+Résumé du parc tenu en mémoire (compteurs, équipements à surveiller, alertes récentes) : il est lu une fois
+dans la base puis mis à jour avec les équipements et alertes modifiés à chaque validation (scan, alerte),
+et le contexte du prompt est assemblé dans un budget de tokens. Un message ne relit donc plus l'inventaire
+"""
+
+import heapq
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+
+from config_advanced import AI_ADVANCED_CONFIG
+
+CHAT_CONTEXT_CONFIG = AI_ADVANCED_CONFIG['chat_context']
+
+DEVICE_FIELDS = ('id', 'ip', 'hostname', 'device_type', 'is_online', 'health_score', 'maintenance_urgency', 'last_seen')
+ALERT_FIELDS = ('id', 'device_id', 'alert_type', 'message', 'priority', 'is_resolved', 'created_at')
+
+# Rang d'urgence (plus petit = plus urgent) pour le classement des équipements à surveiller
+URGENCY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+
+# Seuil de santé en dessous duquel un équipement est à surveiller (et compté comme optimisable)
+LOW_HEALTH_THRESHOLD = 70
+
+# Types d'alertes comptés comme menaces de sécurité
+SECURITY_ALERT_TYPES = ('intrusion', 'security', 'anomaly')
+
+
+def row_from(obj, fields: Iterable[str]) -> Dict:
+    """Copie des champs utiles d'un objet ORM (lue avant l'expiration des attributs à la validation)"""
+    return {field: getattr(obj, field, None) for field in fields}
+
+
+def estimate_tokens(text: str, chars_per_token: int = None) -> int:
+    """Estimation du nombre de tokens d'un texte (longueur / caractères par token)"""
+    return math.ceil(len(text) / (chars_per_token or CHAT_CONTEXT_CONFIG['chars_per_token']))
+
+
+def _needs_attention(device: Dict) -> bool:
+    health = device.get('health_score')
+    return (not device.get('is_online') or device.get('maintenance_urgency') in ('critical', 'high')
+            or (health is not None and health < LOW_HEALTH_THRESHOLD))
+
+
+def _device_counts(device: Dict) -> Dict:
+    health = device.get('health_score')
+    return {
+        'total': 1,
+        'online': 1 if device.get('is_online') else 0,
+        'critical': 1 if device.get('maintenance_urgency') == 'critical' else 0,
+        'low_health': 1 if health is not None and health < LOW_HEALTH_THRESHOLD else 0,
+        'attention': 1 if _needs_attention(device) else 0,
+        'health_sum': health or 0.0,
+        'health_count': 1 if health is not None else 0
+    }
+
+
+def _attention_key(device: Dict) -> Tuple:
+    health = device.get('health_score')
+    return (URGENCY_RANK.get(device.get('maintenance_urgency'), 4), bool(device.get('is_online')),
+            health if health is not None else 100.0, device.get('ip') or '')
+
+
+class NetworkContextService:
+    """Résumé incrémental du réseau pour les prompts du chatbot"""
+
+    def __init__(self, tables: Dict, config: Optional[Dict] = None):
+        self.tables = tables
+        self.config = config or CHAT_CONTEXT_CONFIG
+        self._lock = threading.RLock()
+        self._devices = {}   # id -> champs DEVICE_FIELDS
+        self._alerts = {}    # id -> alerte non résolue
+        self._counts = {}
+        self._loaded_at = None
+        self._stale = True
+        self._derived = None  # (version, équipements à surveiller, alertes récentes)
+        self.version = 0
+        self.stats = {'hits': 0, 'reloads': 0, 'updates': 0}
+
+    def invalidate(self):
+        """Relecture complète au prochain accès (mise à jour en masse hors des objets de session)"""
+        self._stale = True
+
+    def _reset_counts(self):
+        self._counts = {'total': 0, 'online': 0, 'critical': 0, 'low_health': 0, 'attention': 0, 'health_sum': 0.0,
+                        'health_count': 0, 'alerts': 0, 'by_priority': {}, 'by_type': {}}
+
+    def _add_device(self, device: Dict, sign: int):
+        for key, value in _device_counts(device).items():
+            self._counts[key] += sign * value
+
+    def _add_alert(self, alert: Dict, sign: int):
+        self._counts['alerts'] += sign
+        for key, field in (('by_priority', 'priority'), ('by_type', 'alert_type')):
+            counts = self._counts[key]
+            counts[alert.get(field)] = counts.get(alert.get(field), 0) + sign
+            if not counts[alert.get(field)]:
+                del counts[alert.get(field)]
+
+    def reload(self, connection):
+        """Lecture complète des équipements et des alertes non résolues"""
+        device_table, alert_table = self.tables['device'], self.tables['alert']
+        # Lecture sous verrou : une validation concurrente est appliquée après, jamais écrasée
+        with self._lock:
+            devices = connection.execute(select(*[device_table.c[f] for f in DEVICE_FIELDS])).mappings().all()
+            alerts = connection.execute(
+                select(*[alert_table.c[f] for f in ALERT_FIELDS]).where(alert_table.c.is_resolved.isnot(True))
+            ).mappings().all()
+            self._reset_counts()
+            self._devices = {row['id']: dict(row) for row in devices}
+            self._alerts = {row['id']: dict(row) for row in alerts}
+            for device in self._devices.values():
+                self._add_device(device, 1)
+            for alert in self._alerts.values():
+                self._add_alert(alert, 1)
+            self._loaded_at = time.time()
+            self._stale = False
+            self.version += 1
+            self.stats['reloads'] += 1
+
+    def apply_changes(self, devices: Optional[Dict[int, Optional[Dict]]] = None,
+                      alerts: Optional[Dict[int, Optional[Dict]]] = None):
+        """
+        Applique les équipements et alertes modifiés par une transaction validée
+
+        Args:
+            devices: {id: champs DEVICE_FIELDS, ou None si supprimé}
+            alerts: {id: champs ALERT_FIELDS, ou None si supprimée}
+        """
+        with self._lock:
+            if self._loaded_at is None:
+                return  # pas encore chargé : la première lecture verra ces changements
+            for device_id, device in (devices or {}).items():
+                previous = self._devices.pop(device_id, None)
+                if previous is not None:
+                    self._add_device(previous, -1)
+                if device is not None:
+                    self._devices[device_id] = device
+                    self._add_device(device, 1)
+            for alert_id, alert in (alerts or {}).items():
+                previous = self._alerts.pop(alert_id, None)
+                if previous is not None:
+                    self._add_alert(previous, -1)
+                if alert is not None and not alert.get('is_resolved'):
+                    self._alerts[alert_id] = alert
+                    self._add_alert(alert, 1)
+            self.version += 1
+            self.stats['updates'] += 1
+
+    def _ensure_loaded(self, connection):
+        expired = self._loaded_at is None or time.time() - self._loaded_at >= self.config['resync_interval']
+        if self._stale or expired:
+            self.reload(connection)
+        else:
+            self.stats['hits'] += 1
+
+    def summary(self, connection) -> Dict:
+        """
+        Résumé courant du réseau
+
+        Returns:
+            dict: compteurs, équipements à surveiller (top k) et alertes récentes ; les listes ne sont
+                recalculées qu'après un changement
+        """
+        with self._lock:
+            self._ensure_loaded(connection)
+            if self._derived is None or self._derived[0] != self.version:
+                attention = heapq.nsmallest(self.config['top_devices'],
+                                            filter(_needs_attention, self._devices.values()), key=_attention_key)
+                recent = heapq.nlargest(self.config['recent_alerts'], self._alerts.values(),
+                                        key=lambda a: (a.get('created_at') or datetime.min, a['id']))
+                self._derived = (self.version, attention, recent)
+            counts = self._counts
+            return {
+                'total_devices': counts['total'],
+                'online_devices': counts['online'],
+                'offline_devices': counts['total'] - counts['online'],
+                'critical_devices': counts['critical'],
+                'low_health_devices': counts['low_health'],
+                'attention_count': counts['attention'],
+                'avg_health': counts['health_sum'] / counts['health_count'] if counts['health_count'] else 0.0,
+                'active_alerts': counts['alerts'],
+                'alerts_by_priority': dict(counts['by_priority']),
+                'security_alerts': sum(counts['by_type'].get(t, 0) for t in SECURITY_ALERT_TYPES),
+                'attention_devices': [dict(d) for d in self._derived[1]],
+                'recent_alerts': [dict(a) for a in self._derived[2]],
+                'version': self.version
+            }
+
+    def _clip(self, text: str) -> str:
+        limit = self.config['max_line_chars']
+        text = ' '.join(str(text or '').split())
+        return text if len(text) <= limit else text[:limit - 1] + '…'
+
+    def render(self, summary: Dict, budget_tokens: int) -> str:
+        """
+        Contexte texte dans un budget de tokens : les compteurs d'abord, puis les équipements et les alertes
+        (budget restant partagé entre les deux listes, la part inutilisée de l'une profitant à l'autre)
+        """
+        chars_per_token = self.config['chars_per_token']
+        priorities = ', '.join(f"{p}: {n}" for p, n in sorted(summary['alerts_by_priority'].items(), key=str))
+        lines = [
+            "DONNÉES RÉSEAU ACTUELLES :",
+            f"- Équipements surveillés : {summary['total_devices']} (en ligne : {summary['online_devices']}, "
+            f"hors ligne : {summary['offline_devices']})",
+            f"- Score de santé moyen : {summary['avg_health']:.1f}%",
+            f"- Équipements critiques : {summary['critical_devices']}",
+            f"- Alertes actives : {summary['active_alerts']}" + (f" ({priorities})" if priorities else "")
+        ]
+        remaining = budget_tokens - estimate_tokens('\n'.join(lines), chars_per_token)
+
+        sections = [
+            ("ÉQUIPEMENTS À SURVEILLER :", summary['attention_devices'], summary['attention_count'], lambda d: (
+                f"  * {d.get('hostname') or 'N/A'} ({d.get('ip')}) - {d.get('device_type') or 'inconnu'}, "
+                f"{'en ligne' if d.get('is_online') else 'hors ligne'}, santé {d.get('health_score') or 0:.0f}%, "
+                f"urgence {d.get('maintenance_urgency') or 'n/a'}")),
+            ("ALERTES RÉCENTES :", summary['recent_alerts'], summary['active_alerts'], lambda a: self._clip(
+                f"  * [{a.get('priority')}] {a.get('message')}"
+                + (f" ({a['created_at']:%d/%m %H:%M})" if isinstance(a.get('created_at'), datetime) else "")))
+        ]
+        for index, (title, items, total, format_line) in enumerate(sections):
+            share = remaining // (len(sections) - index)
+            if not items or share <= 0:
+                continue
+            block = ['', title]
+            used = estimate_tokens('\n'.join(block), chars_per_token)
+            for item in items:
+                line = format_line(item)
+                cost = estimate_tokens(line + '\n', chars_per_token)
+                if used + cost > share:
+                    break
+                block.append(line)
+                used += cost
+            if len(block) == 2:
+                continue
+            omitted = total - (len(block) - 2)
+            if omitted > 0:
+                block.append(f"  (+{omitted} autres)")
+                used += estimate_tokens(block[-1], chars_per_token)
+            lines.extend(block)
+            remaining -= used
+        return '\n'.join(lines)
+
+    def build_context(self, connection, system_prompt: str = '', message: str = '',
+                      budget_tokens: Optional[int] = None) -> Tuple[str, Dict]:
+        """
+        Contexte réseau pour un message : le budget total moins le prompt système et la question
+
+        Returns:
+            tuple: (contexte, résumé)
+        """
+        summary = self.summary(connection)
+        budget = (budget_tokens or self.config['token_budget']) - estimate_tokens(system_prompt + message)
+        return self.render(summary, budget), summary
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats.update({'devices': len(self._devices), 'active_alerts': len(self._alerts), 'version': self.version})
+        return stats
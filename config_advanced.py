@@ -51,6 +51,72 @@ MONITORING_CONFIG = {
         3389, 5900, 8080, 8443, 9000, 9090  # Services additionnels
     ],
     
+    # Vérification asynchrone des services (asyncio)
+    'async_checks': {
+        'enabled': True,
+        'max_concurrency': 1000,  # sondes simultanées (limité aussi par le nombre de descripteurs)
+        'per_host_limit': 4,      # connexions simultanées par équipement
+        'cycle_deadline': 120     # secondes pour l'ensemble du cycle
+    },
+    
+    # Inventaire partagé : table `device` de la base principale (cache en lecture)
+    'inventory': {
+        'db_path': 'instance/network_monitor_production.db',  # remplacé par le chemin réel au démarrage de l'app
+        'ttl': 60  # secondes avant de revérifier si la table a changé
+    },
+    
+    # Ordonnancement adaptatif des vérifications (une échéance par couple équipement/vérification)
+    'adaptive_scheduling': {
+        'enabled': True,
+        'priority_by_type': {
+            'plc': 'critical',
+            'automation': 'critical',
+            'server': 'high',
+            'router': 'high',
+            'switch': 'medium',
+            'nas': 'medium',
+            'box': 'medium',
+            'printer': 'medium',
+            'camera': 'low',
+            'phone': 'low',
+            'workstation': 'low'
+        },
+        'core_keywords': ['core', 'coeur', 'backbone'],  # hostname -> priorité relevée d'un niveau
+        'intervals': {            # secondes, selon la priorité
+            'critical': 60,
+            'high': 300,
+            'medium': 900,
+            'low': 1800
+        },
+        'min_interval': 30,       # plancher après échecs répétés
+        'failure_factor': 0.5,    # intervalle divisé par 2 à chaque échec
+        'stable_after': 3,        # résultats stables consécutifs avant allongement
+        'stable_factor': 1.5,
+        'max_stretch': 4,         # intervalle maximal = intervalle de base x 4
+        'max_sleep': 5            # la boucle se réveille au plus tard toutes les 5 s
+    },
+    
+    # Écriture groupée des résultats de vérification (services et ports)
+    'batch_writer': {
+        'batch_size': 500,       # lignes par transaction
+        'flush_interval': 1.0,   # secondes avant écriture d'un lot incomplet
+        'max_queue': 10000       # lignes en attente avant blocage des vérifications
+    },
+    
+    # Géolocalisation IP (plages privées ignorées, cache SQLite, base locale puis API par lots)
+    'geolocation': {
+        'provider_url': 'http://ip-api.com/batch',
+        'fields': 'status,message,query,country,regionName,city,lat,lon,isp,timezone',
+        'batch_size': 100,          # adresses par requête (maximum ip-api)
+        'rate_limit': 15,           # requêtes par période (limite ip-api du point d'accès batch)
+        'rate_period': 60,          # secondes
+        'timeout': 10,
+        'cache_ttl': 30 * 86400,    # secondes de validité d'une position trouvée
+        'negative_ttl': 86400,      # secondes avant de redemander une adresse inconnue du fournisseur
+        'local_db_path': None,      # base MaxMind (.mmdb) hors ligne, consultée avant l'API (module maxminddb)
+        'use_provider': True
+    },
+    
     # Configuration SNMP
     'snmp_config': {
         'community': 'public',
@@ -89,6 +155,37 @@ AI_ADVANCED_CONFIG = {
         }
     },
     
+    # Entraînement incrémental (buffer glissant + ré-entraînement sur seuil)
+    'incremental_training': {
+        'enabled': True,
+        'models_dir': 'ai_models',
+        'update_interval': 30,           # minutes entre deux ingestions
+        'fetch_batch_size': 5000,        # scans lus par requête
+        'buffer_max_rows': 20000,        # taille de l'anneau (détection d'anomalies)
+        'window_per_device': 100,        # scans conservés par équipement
+        'min_rows': 11,                  # minimum pour entraîner
+        'retrain_rows_threshold': 5000,  # nouveaux scans avant ré-entraînement
+        'drift_min_rows': 200,           # nouveaux scans avant évaluation de la dérive
+        'drift_threshold': 0.5           # écart de moyenne (en écarts-types)
+    },
+    
+    # Inférence par arbres aplatis (NumPy) au lieu des appels scikit-learn
+    'fast_inference': True,
+    
+    # Worker d'entraînement hors du processus web
+    'training_worker': {
+        'enabled': True,
+        'snapshot_dir': 'ai_models/snapshots',
+        'timeout': 3600                  # secondes
+    },
+    
+    # Registre versionné des modèles (répertoires adressés par contenu + pointeur actif)
+    'model_registry': {
+        'root': 'ai_models/registry',
+        'keep_versions': 5,
+        'mmap_mode': 'r'
+    },
+    
     # Chatbot IA
     'chatbot_config': {
         'model': 'gpt-3.5-turbo',
@@ -96,6 +193,28 @@ AI_ADVANCED_CONFIG = {
         'temperature': 0.7,
         'context_window': 10,
         'enable_learning': True
+    },
+    
+    # Contexte réseau du chatbot (résumé en mémoire mis à jour à chaque validation de scan)
+    'chat_context': {
+        'token_budget': 1500,    # tokens du prompt complet (système + contexte + question)
+        'chars_per_token': 4,    # estimation du nombre de tokens
+        'top_devices': 10,       # équipements à surveiller au plus
+        'recent_alerts': 10,     # alertes récentes au plus
+        'max_line_chars': 160,   # message d'alerte tronqué au-delà
+        'resync_interval': 600   # secondes ; relecture complète de secours (mises à jour en masse)
+    },
+    
+    # Client HTTP partagé des chatbots (Groq, DeepSeek)
+    'llm_client': {
+        'pool_size': 10,         # connexions conservées (keep-alive) par hôte
+        'max_concurrency': 4,    # appels simultanés au plus ; les suivants attendent
+        'max_retries': 3,        # nouvelles tentatives sur 429 / 5xx / erreur réseau
+        'backoff_base': 0.5,     # secondes ; attente aléatoire entre 0 et base * 2^tentative
+        'backoff_max': 8.0,
+        'cache_ttl': 120,        # secondes ; même question, même contexte : réponse réutilisée
+        'cache_size': 256,
+        'latency_samples': 500   # derniers temps de réponse gardés pour le p95
     }
 }
 
@@ -135,6 +254,45 @@ REPORTS_ADVANCED_CONFIG = {
             'format': 'pdf',
             'include_charts': True
         }
+    },
+    
+    # Génération des rapports en tâche de fond (pool de workers)
+    'report_jobs': {
+        'max_workers': 2,        # rapports générés en parallèle
+        'keep_finished': 200     # suivis de progression conservés en mémoire
+    },
+    
+    # Rendu PDF (graphiques et documents mis en cache par empreinte des données)
+    'pdf_reports': {
+        'cache_dir': 'reports/.cache',
+        'max_cache_entries': 200,   # fichiers conservés par type (graphiques, documents)
+        'chart_dpi': 110
+    },
+    
+    # Données des rapports (instantanés partagés entre formats et sections)
+    'report_data': {
+        'cache_size': 16,        # instantanés conservés en mémoire
+        'snapshot_ttl': 300,     # secondes ; au-delà, une période « jusqu'à maintenant » est recalculée
+        'default_days': {'daily': 1, 'weekly': 7, 'monthly': 30}
+    },
+    
+    # Catalogue des rapports (table Report, rapprochée périodiquement avec le dossier reports/)
+    'report_catalog': {
+        'reports_dir': 'reports',
+        'extensions': ['.pdf', '.xlsx', '.html', '.csv', '.json'],
+        'reconcile_interval_minutes': 30,
+        'stale_processing_hours': 6,   # rapport « en cours » depuis plus longtemps : tâche perdue, marqué en échec
+        'per_page': 20,
+        'max_per_page': 100
+    },
+    
+    # Téléchargement des rapports (requêtes conditionnelles, Range, variantes pré-compressées)
+    'report_downloads': {
+        'compressed_extensions': ['.html', '.csv', '.json'],  # formats texte : variantes .gz / .br créées à la génération
+        'min_size': 1024,        # octets ; en dessous, pas de variante compressée
+        'gzip_level': 9,
+        'brotli_quality': 11,    # si le module brotli est installé
+        'max_age': 3600          # Cache-Control (privé) en secondes, revalidé ensuite par ETag
     }
 }
 
@@ -198,12 +356,64 @@ PERFORMANCE_CONFIG = {
     # Optimisation base de données
     'database_config': {
         'connection_pool_size': 10,
-        'query_timeout': 30,
+        'pool_max_overflow': 10,
+        'query_timeout': 30,           # secondes (busy_timeout et attente du pool)
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 268435456,        # 256 Mo d'E/S mappées en mémoire
+        'cache_size': -16000,          # 16 Mo de cache de pages par connexion
+        'temp_store': 'MEMORY',
         'enable_indexing': True,
         'vacuum_interval': 24,  # heures
         'backup_interval': 24   # heures
     },
-    
+
+    # Agrégats temporels de l'historique des scans (scan_rollup)
+    'rollup_config': {
+        'enabled': True,
+        'backfill_batch_size': 5000
+    },
+
+    # Rétention et compactage des historiques (retention_manager)
+    'retention_config': {
+        'enabled': True,
+        'run_at': '03:00',
+        'batch_size': 2000,            # lignes supprimées par transaction
+        'batch_pause': 0.05,           # secondes entre deux lots
+        'create_indexes': True,        # index sur les colonnes de date purgées
+        'incremental_vacuum_pages': 10000,
+        'full_vacuum_days': 7,
+        'analysis_limit': 1000,
+        'report_file': 'logs/retention_report.json',
+        # Bases : 'main' (Flask-SQLAlchemy), 'monitoring' (AdvancedMonitoring)
+        'policies': [
+            {'database': 'main', 'table': 'scan_history', 'column': 'timestamp', 'days': 14},
+            {'database': 'main', 'table': 'scan_rollup', 'column': 'bucket_start', 'days': 2,
+             'where': "resolution = '1m'"},
+            {'database': 'main', 'table': 'scan_rollup', 'column': 'bucket_start', 'days': 365,
+             'where': "resolution = '1h'"},
+            {'database': 'monitoring', 'table': 'service_monitoring', 'column': 'last_check', 'days': 30},
+            {'database': 'monitoring', 'table': 'bandwidth_usage', 'column': 'timestamp', 'days': 30}
+        ]
+    },
+
+    # Exports en flux (CSV / NDJSON, gzip) de l'inventaire, des alertes et de l'historique
+    'export_config': {
+        'chunk_size': 5000,            # lignes lues par requête (pagination par identifiant)
+        'gzip_level': 6
+    },
+
+    # Export Parquet incrémental de l'historique (analyse hors ligne DuckDB / pandas, module pyarrow)
+    'parquet_export': {
+        'enabled': True,
+        'output_dir': 'exports/parquet',
+        'interval_minutes': 60,
+        'chunk_size': 50000,           # lignes lues par requête
+        'network_prefix': 24,          # partition réseau : préfixe IPv4 de l'équipement
+        'compression': 'zstd',
+        'datasets': ['scan_history', 'service_monitoring', 'bandwidth_usage']
+    },
+
     # Scan parallèle
     'parallel_scan_config': {
         'max_workers': 10,
@@ -5,11 +5,12 @@ Module d'intégration DeepSeek API pour le chatbot intelligent
 
 import os
 import json
-import requests
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import logging
 
+from llm_client import llm_client, cache_key
+
 logger = logging.getLogger(__name__)
 
 class DeepSeekChatbot:
@@ -107,7 +108,8 @@ CONTEXTE RÉSEAU ACTUEL (Données en temps réel) :
         
         return context
     
-    def chat(self, message: str, devices: List[Dict] = None, alerts: List[Dict] = None) -> Dict[str, Any]:
+    def chat(self, message: str, devices: List[Dict] = None, alerts: List[Dict] = None,
+             network_context: str = None) -> Dict[str, Any]:
         """
         Envoie un message au chatbot DeepSeek
         
@@ -115,6 +117,7 @@ CONTEXTE RÉSEAU ACTUEL (Données en temps réel) :
             message: Message de l'utilisateur
             devices: Données des équipements (optionnel)
             alerts: Données des alertes (optionnel)
+            network_context: Contexte déjà assemblé (chat_context), prioritaire sur devices / alerts
             
         Returns:
             Réponse du chatbot
@@ -128,17 +131,11 @@ CONTEXTE RÉSEAU ACTUEL (Données en temps réel) :
         
         try:
             # Préparer le contexte réseau
-            network_context = self.get_network_context(devices or [], alerts or [])
+            network_context = network_context or self.get_network_context(devices or [], alerts or [])
             
             # Construire le message complet
             full_message = f"{network_context}\n\nQuestion utilisateur : {message}"
             
-            # Préparer la requête API
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
             data = {
                 'model': self.model,
                 'messages': [
@@ -150,28 +147,22 @@ CONTEXTE RÉSEAU ACTUEL (Données en temps réel) :
                 'stream': False
             }
             
-            # Appel API
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=data,
-                timeout=30
-            )
+            # Appel API (session partagée, nouvelles tentatives, réponse en cache si déjà posée)
+            result = llm_client.chat_completion(self.api_url, self.api_key, data, timeout=30,
+                                                key=cache_key(self.model, message, self.system_prompt + network_context))
             
-            if response.status_code == 200:
-                result = response.json()
-                ai_response = result['choices'][0]['message']['content']
-                
+            if result['success']:
                 return {
                     'success': True,
-                    'response': ai_response,
+                    'response': result['content'],
                     'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                     'confidence': 0.95,
                     'model': self.model,
-                    'tokens_used': result.get('usage', {}).get('total_tokens', 0)
+                    'tokens_used': result['tokens_used'],
+                    'cached': result['cached']
                 }
             else:
-                error_msg = f"Erreur API DeepSeek: {response.status_code} - {response.text}"
+                error_msg = f"Erreur API DeepSeek: {result['error']}"
                 logger.error(error_msg)
                 return {
                     'success': False,
@@ -179,22 +170,6 @@ CONTEXTE RÉSEAU ACTUEL (Données en temps réel) :
                     'fallback': True
                 }
                 
-        except requests.exceptions.Timeout:
-            error_msg = "Timeout de l'API DeepSeek"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg,
-                'fallback': True
-            }
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Erreur de connexion DeepSeek: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg,
-                'fallback': True
-            }
         except Exception as e:
             error_msg = f"Erreur inattendue: {str(e)}"
             logger.error(error_msg)
@@ -213,11 +188,6 @@ CONTEXTE RÉSEAU ACTUEL (Données en temps réel) :
             }
         
         try:
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json'
-            }
-            
             data = {
                 'model': self.model,
                 'messages': [
@@ -226,14 +196,10 @@ CONTEXTE RÉSEAU ACTUEL (Données en temps réel) :
                 'max_tokens': 10
             }
             
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=data,
-                timeout=10
-            )
+            # Sans cache : la connexion est réellement testée
+            result = llm_client.chat_completion(self.api_url, self.api_key, data, timeout=10)
             
-            if response.status_code == 200:
+            if result['success']:
                 return {
                     'success': True,
                     'message': 'Connexion DeepSeek réussie'
@@ -241,7 +207,7 @@ CONTEXTE RÉSEAU ACTUEL (Données en temps réel) :
             else:
                 return {
                     'success': False,
-                    'error': f'Erreur {response.status_code}: {response.text}'
+                    'error': result['error']
                 }
                 
         except Exception as e:
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Inventaire partagé des équipements
+Cache en lecture de la table `device` de la base principale, avec notification des changements
+(ajouts, retraits, modifications) et mise à disposition des résultats de découverte du scanner principal
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, List
+
+from config_advanced import MONITORING_CONFIG
+from storage import get_pool
+
+DEVICE_COLUMNS = ['id', 'ip', 'mac', 'hostname', 'device_type', 'is_online', 'maintenance_urgency', 'last_seen']
+
+
+class DeviceInventory:
+    """Cache de la liste des équipements surveillés, rechargé à la demande"""
+
+    def __init__(self, db_path: str = None, ttl: float = None):
+        config = MONITORING_CONFIG['inventory']
+        self.db_path = db_path or config['db_path']
+        self.ttl = config['ttl'] if ttl is None else ttl
+        self._devices = []
+        self._by_ip = {}
+        self._signature = None
+        self._checked_at = 0
+        self._dirty = True
+        self._lock = threading.RLock()
+        self._subscribers = []
+        self._discoveries = {}  # ip -> dernier résultat du scanner principal
+        self.version = 0
+        self.stats = {'hits': 0, 'reloads': 0, 'signature_checks': 0, 'errors': 0}
+
+    def bind(self, db_path: str):
+        """Pointe l'inventaire vers la base principale effectivement utilisée par l'application"""
+        with self._lock:
+            if db_path != self.db_path:
+                self.db_path = db_path
+                self._signature = None
+                self._dirty = True
+
+    def invalidate(self):
+        """Force la relecture au prochain accès (appelé après une écriture dans la table device)"""
+        self._dirty = True
+
+    def subscribe(self, callback: Callable[[Dict, List[Dict]], None]):
+        """
+        Abonne une fonction aux changements de l'inventaire
+
+        Args:
+            callback: appelée avec ({'added', 'removed', 'updated'}, liste complète des équipements)
+        """
+        self._subscribers.append(callback)
+
+    def _read_signature(self, conn):
+        # Le nombre de lignes, le plus grand id et la dernière mise à jour suffisent à détecter un changement
+        return tuple(conn.execute('SELECT COUNT(*), MAX(id), MAX(updated_at) FROM device').fetchone())
+
+    def _load(self) -> List[Dict]:
+        """Relit la table si elle a changé ; retourne les changements détectés (ou None)"""
+        if not os.path.exists(self.db_path):
+            return None
+        with get_pool(self.db_path).connection() as conn:
+            self.stats['signature_checks'] += 1
+            signature = self._read_signature(conn)
+            if signature == self._signature and not self._dirty:
+                return None
+            rows = conn.execute(f"SELECT {', '.join(DEVICE_COLUMNS)} FROM device ORDER BY ip").fetchall()
+
+        devices = [dict(zip(DEVICE_COLUMNS, row)) for row in rows]
+        by_ip = {device['ip']: device for device in devices}
+        changes = {
+            'added': [by_ip[ip] for ip in by_ip.keys() - self._by_ip.keys()],
+            'removed': [self._by_ip[ip] for ip in self._by_ip.keys() - by_ip.keys()],
+            'updated': [device for ip, device in by_ip.items() if ip in self._by_ip and self._by_ip[ip] != device]
+        }
+        self._devices, self._by_ip, self._signature = devices, by_ip, signature
+        self.stats['reloads'] += 1
+        return changes if any(changes.values()) else None
+
+    def get_devices(self) -> List[Dict]:
+        """Liste des équipements (relue si le cache a expiré ou a été invalidé et que la table a changé)"""
+        changes = None
+        with self._lock:
+            now = time.time()
+            if self._dirty or now - self._checked_at >= self.ttl:
+                try:
+                    changes = self._load()
+                    self._dirty = False
+                    self._checked_at = now
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"❌ Erreur lecture de l'inventaire des équipements: {e}")
+            else:
+                self.stats['hits'] += 1
+            if changes:
+                self.version += 1
+            devices = list(self._devices)
+
+        if changes:
+            for callback in list(self._subscribers):
+                try:
+                    callback(changes, devices)
+                except Exception as e:
+                    print(f"❌ Erreur notification inventaire: {e}")
+        return devices
+
+    def get_device(self, ip: str) -> Dict:
+        """Équipement par adresse IP (None si inconnu)"""
+        self.get_devices()
+        return self._by_ip.get(ip)
+
+    def record_discovery(self, devices: List[Dict]):
+        """Enregistre les équipements trouvés par un scan du scanner principal"""
+        now = time.time()
+        with self._lock:
+            for device in devices:
+                if device.get('ip') and device.get('is_online', True):
+                    self._discoveries[device['ip']] = dict(device, discovered_at=now)
+        self.invalidate()
+
+    def get_discoveries(self, since: float = 0) -> List[Dict]:
+        """Résultats de découverte du scanner principal reçus depuis `since` (timestamp)"""
+        with self._lock:
+            return [device for device in self._discoveries.values() if device['discovered_at'] > since]
+
+    def get_stats(self) -> Dict:
+        stats = dict(self.stats)
+        stats.update({'devices': len(self._devices), 'version': self.version, 'discoveries': len(self._discoveries)})
+        return stats
+
+
+# Instance globale
+device_inventory = DeviceInventory()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Moteur de règles de classification des équipements
+Toutes les listes de mots-clés (hostname / vendor MAC) sont compilées dans un
+automate Aho-Corasick unique par champ : une seule passe par chaîne, résultats mémoïsés
+"""
+
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Règles du classifieur IA (évaluées dans l'ordre, la première qui correspond l'emporte)
+CLASSIFIER_RULES = [
+    {
+        'type': 'switch', 'confidence': 0.92,
+        'hostnames': ['switch', 'sw', 'hub', 'aruba', 'juniper', 'procurve', 'zyxel', 'tenda', 'h3c', 'fortinet', 'alcatel', 'zte', 'mikrotik', 'ubiquiti', 'linksys'],
+        'vendors': ['cisco', 'netgear', 'tplink', 'dlink', 'aruba', 'juniper', 'zyxel', 'tenda', 'h3c', 'fortinet', 'alcatel', 'zte', 'huawei', 'mikrotik', 'ubiquiti', 'linksys']
+    },
+    {
+        'type': 'phone', 'confidence': 0.91,
+        'hostnames': ['phone', 'voip', 'sip', 'polycom', 'yealink', 'avaya', 'iphone', 'android', 'samsung', 'huawei', 'xiaomi', 'oneplus', 'itel', 'ipad', 'tablet', 'oppo', 'vivo'],
+        'vendors': ['apple', 'samsung', 'huawei', 'xiaomi', 'oneplus', 'itel', 'polycom', 'yealink', 'avaya', 'cisco', 'oppo', 'vivo']
+    },
+    {
+        'type': 'printer', 'confidence': 0.90,
+        'hostnames': ['printer', 'print', 'hp', 'canon', 'epson', 'brother', 'xerox', 'ricoh', 'lexmark', 'kyocera'],
+        'vendors': ['hp', 'canon', 'epson', 'brother', 'xerox', 'ricoh', 'lexmark', 'kyocera']
+    },
+    {
+        'type': 'box', 'confidence': 0.90,
+        'hostnames': ['box', 'modem', 'livebox', 'bbox', 'freebox', 'sfrbox', 'zte', 'huawei', 'sagem', 'technicolor'],
+        'vendors': ['zte', 'huawei', 'sagem', 'technicolor', 'livebox', 'bbox', 'freebox', 'sfrbox']
+    },
+    {
+        'type': 'plc', 'confidence': 0.89,
+        'hostnames': ['plc', 'automation', 'automate', 'scada', 'hmi', 'control', 'abb', 'mitsubishi', 'omron'],
+        'vendors': ['siemens', 'schneider', 'abb', 'mitsubishi', 'omron']
+    },
+    {
+        'type': 'camera', 'confidence': 0.88,
+        'hostnames': ['camera', 'ipcam', 'surveillance', 'hikvision', 'dahua', 'foscam', 'arlo', 'axis'],
+        'vendors': ['hikvision', 'dahua', 'foscam', 'arlo', 'axis']
+    },
+    {
+        'type': 'server', 'confidence': 0.95,
+        'hostnames': ['server', 'srv', 'dc', 'domain', 'exchange', 'sql', 'web', 'nas', 'synology', 'qnap'],
+        'vendors': ['synology', 'qnap', 'nas', 'dell', 'hp', 'ibm', 'lenovo']
+    },
+    {
+        'type': 'workstation', 'confidence': 0.85,
+        'hostnames': ['pc', 'workstation', 'desktop', 'laptop', 'client', 'lenovo', 'dell', 'asus', 'acer', 'msi', 'hp', 'windows', 'macbook', 'imac'],
+        'vendors': ['lenovo', 'dell', 'asus', 'acer', 'msi', 'hp', 'windows', 'macbook', 'imac']
+    },
+    {
+        'type': 'router', 'confidence': 0.90,
+        'hostnames': ['router', 'gateway', 'firewall', 'core'],
+        'vendors': ['cisco', 'netgear', 'tplink', 'dlink', 'aruba', 'juniper', 'zyxel', 'tenda', 'h3c', 'fortinet', 'alcatel', 'zte', 'huawei', 'mikrotik', 'ubiquiti', 'linksys']
+    },
+]
+
+# Repli sur les adresses de passerelle (.1 / .254)
+GATEWAY_SUFFIXES = ('.1', '.254')
+GATEWAY_BOX_CONFIDENCE = 0.88
+GATEWAY_ROUTER_CONFIDENCE = 0.80
+UNKNOWN_CONFIDENCE = 0.60
+
+# Signatures du scanner de production (score : hostname +30, vendor +25, port +15)
+DEVICE_SIGNATURES = {
+    'router': {
+        'hostnames': ['router', 'rt-', 'gw-', 'gateway', 'firewall', 'fw-', 'pfsense', 'opnsense'],
+        'vendors': ['cisco', 'netgear', 'linksys', 'asus', 'tp-link', 'dlink', 'ubiquiti'],
+        'ports': [22, 23, 80, 443, 8080, 8443]
+    },
+    'switch': {
+        'hostnames': ['switch', 'sw-', 'hub'],
+        'vendors': ['cisco', 'hp', 'dell', 'netgear', 'tp-link'],
+        'ports': [22, 23, 80, 443, 161, 8080]
+    },
+    'server': {
+        'hostnames': ['server', 'srv', 'dc-', 'ad-', 'dns-', 'dhcp-', 'web-', 'mail-', 'db-'],
+        'vendors': ['dell', 'hp', 'lenovo', 'supermicro', 'intel'],
+        'ports': [22, 80, 443, 3389, 5985, 5986, 25, 993, 1433, 3306]
+    },
+    'printer': {
+        'hostnames': ['printer', 'print', 'hp-', 'canon-', 'epson-', 'brother-'],
+        'vendors': ['hewlett packard', 'canon', 'epson', 'brother', 'lexmark', 'xerox'],
+        'ports': [80, 443, 515, 631, 9100]
+    },
+    'nas': {
+        'hostnames': ['nas-', 'storage-', 'synology-', 'qnap-'],
+        'vendors': ['synology', 'qnap', 'netgear', 'buffalo'],
+        'ports': [80, 443, 22, 21, 139, 445, 5000, 5001]
+    },
+    'camera': {
+        'hostnames': ['camera', 'cam-', 'ipcam-', 'cctv-'],
+        'vendors': ['hikvision', 'dahua', 'axis', 'bosch', 'samsung'],
+        'ports': [80, 443, 554, 8080, 8000]
+    },
+    'phone': {
+        'hostnames': ['phone-', 'voip-', 'sip-', 'tel-'],
+        'vendors': ['cisco', 'polycom', 'yealink', 'grandstream', 'avaya'],
+        'ports': [80, 443, 5060, 5061, 8080]
+    },
+    'automation': {
+        'hostnames': ['plc-', 'hmi-', 'scada-', 'automate-'],
+        'vendors': ['siemens', 'schneider', 'allen bradley', 'omron'],
+        'ports': [80, 443, 102, 502, 44818]
+    },
+    'workstation': {
+        'hostnames': ['pc-', 'ws-', 'desktop-', 'laptop-', 'poste-'],
+        'vendors': ['dell', 'hp', 'lenovo', 'asus', 'acer'],
+        'ports': [135, 139, 445, 3389, 5985]
+    }
+}
+
+SIGNATURE_HOSTNAME_SCORE = 30
+SIGNATURE_VENDOR_SCORE = 25
+SIGNATURE_PORT_SCORE = 15
+SIGNATURE_MIN_SCORE = 20
+
+# Corrections spécialisées par vendor (scan universel) : toutes les conditions d'une règle doivent correspondre
+VENDOR_OVERRIDES = [
+    {'type': 'smartphone', 'vendors': ['oppo', 'oneplus']},
+    {'type': 'smart_tv', 'vendors': ['samsung'], 'hostnames': ['tv']},
+    {'type': 'smartphone', 'vendors': ['samsung']},
+]
+
+
+class KeywordAutomaton:
+    """Automate Aho-Corasick : trouve toutes les occurrences de sous-chaînes en une passe"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for keyword in dict.fromkeys(keywords):
+            self._insert(keyword, len(self.keywords))
+            self.keywords.append(keyword)
+        self._build_failure_links()
+
+    def _insert(self, keyword: str, keyword_id: int):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = self._output[state] + (keyword_id,)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> FrozenSet[int]:
+        """Retourne les identifiants des mots-clés présents dans le texte"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return frozenset(found)
+
+
+class DeviceRuleEngine:
+    """Classification des équipements par règles compilées (classifieur IA, signatures scanner, corrections vendor)"""
+
+    def __init__(self, classifier_rules=None, signatures=None, vendor_overrides=None, cache_size: int = 4096):
+        self.classifier_rules = classifier_rules if classifier_rules is not None else CLASSIFIER_RULES
+        self.signatures = signatures if signatures is not None else DEVICE_SIGNATURES
+        self.vendor_overrides = vendor_overrides if vendor_overrides is not None else VENDOR_OVERRIDES
+
+        # Étiquettes (ensemble de règles, identifiant) associées à chaque mot-clé, par champ
+        hostname_tags: Dict[str, List[Tuple[str, object]]] = {}
+        vendor_tags: Dict[str, List[Tuple[str, object]]] = {}
+
+        def register(tags, keywords, tag):
+            for keyword in keywords:
+                tags.setdefault(keyword, []).append(tag)
+
+        for index, rule in enumerate(self.classifier_rules):
+            register(hostname_tags, rule.get('hostnames', []), ('classifier', index))
+            register(vendor_tags, rule.get('vendors', []), ('classifier', index))
+        for device_type, signature in self.signatures.items():
+            register(hostname_tags, signature.get('hostnames', []), ('signature', device_type))
+            register(vendor_tags, signature.get('vendors', []), ('signature', device_type))
+        for index, rule in enumerate(self.vendor_overrides):
+            register(hostname_tags, rule.get('hostnames', []), ('override_hostname', index))
+            register(vendor_tags, rule.get('vendors', []), ('override_vendor', index))
+
+        self._hostname_automaton = KeywordAutomaton(hostname_tags)
+        self._vendor_automaton = KeywordAutomaton(vendor_tags)
+        self._hostname_tags = [frozenset(hostname_tags[k]) for k in self._hostname_automaton.keywords]
+        self._vendor_tags = [frozenset(vendor_tags[k]) for k in self._vendor_automaton.keywords]
+        self._signature_ports = {t: frozenset(s.get('ports', [])) for t, s in self.signatures.items()}
+
+        self._match = lru_cache(maxsize=cache_size)(self._compute_match)
+        self._score = lru_cache(maxsize=cache_size)(self._compute_signature_score)
+
+    # ----- Correspondance -----
+
+    def _compute_match(self, hostname: str, vendor: str) -> Tuple[FrozenSet, FrozenSet]:
+        hostname_hits = set()
+        for keyword_id in self._hostname_automaton.find(hostname.lower()):
+            hostname_hits.update(self._hostname_tags[keyword_id])
+        vendor_hits = set()
+        for keyword_id in self._vendor_automaton.find(vendor.lower()):
+            vendor_hits.update(self._vendor_tags[keyword_id])
+        return frozenset(hostname_hits), frozenset(vendor_hits)
+
+    def match(self, hostname: Optional[str], vendor: Optional[str]) -> Tuple[FrozenSet, FrozenSet]:
+        """
+        Une passe sur le hostname et une sur le vendor (mémoïsé)
+
+        Returns:
+            tuple: (étiquettes trouvées dans le hostname, étiquettes trouvées dans le vendor)
+        """
+        return self._match(hostname or '', vendor or '')
+
+    # ----- Classifieur IA -----
+
+    def classify(self, hostname: Optional[str], mac_vendor: Optional[str], ip: Optional[str] = '') -> Tuple[str, float]:
+        """Type d'équipement et confiance selon les règles du classifieur IA"""
+        hostname_hits, vendor_hits = self.match(hostname, mac_vendor)
+        for index, rule in enumerate(self.classifier_rules):
+            tag = ('classifier', index)
+            if tag in hostname_hits or tag in vendor_hits:
+                return rule['type'], rule['confidence']
+
+        ip = ip or ''
+        if ip.endswith(GATEWAY_SUFFIXES):
+            box_tags = {('classifier', i) for i, r in enumerate(self.classifier_rules) if r['type'] == 'box'}
+            if box_tags & vendor_hits:
+                return 'box', GATEWAY_BOX_CONFIDENCE
+            return 'router', GATEWAY_ROUTER_CONFIDENCE
+        return 'unknown', UNKNOWN_CONFIDENCE
+
+    # ----- Signatures du scanner -----
+
+    def _compute_signature_score(self, hostname: str, vendor: str, ports: FrozenSet[int]) -> Tuple[str, int]:
+        hostname_hits, vendor_hits = self._match(hostname, vendor)
+        best_type, best_score = None, -1
+        for device_type in self.signatures:
+            tag = ('signature', device_type)
+            score = 0
+            if tag in hostname_hits:
+                score += SIGNATURE_HOSTNAME_SCORE
+            if tag in vendor_hits:
+                score += SIGNATURE_VENDOR_SCORE
+            score += len(ports & self._signature_ports[device_type]) * SIGNATURE_PORT_SCORE
+            if score > best_score:
+                best_type, best_score = device_type, score
+
+        confidence = min(best_score, 100)
+        if best_type is not None and confidence > SIGNATURE_MIN_SCORE:
+            return best_type, confidence
+        return 'Unknown', 0
+
+    def score_signatures(self, hostname: Optional[str], mac_vendor: Optional[str], ports=None) -> Tuple[str, int]:
+        """Meilleur type selon les signatures (mémoïsé par hostname, vendor et ensemble de ports)"""
+        return self._score(hostname or '', mac_vendor or '', frozenset(ports or ()))
+
+    # ----- Corrections vendor -----
+
+    def vendor_override(self, hostname: Optional[str], mac_vendor: Optional[str]) -> Optional[str]:
+        """Type imposé par un vendor spécifique (smartphones, TV), ou None"""
+        if not mac_vendor:
+            return None
+        hostname_hits, vendor_hits = self.match(hostname, mac_vendor)
+        for index, rule in enumerate(self.vendor_overrides):
+            if rule.get('vendors') and ('override_vendor', index) not in vendor_hits:
+                continue
+            if rule.get('hostnames') and ('override_hostname', index) not in hostname_hits:
+                continue
+            return rule['type']
+        return None
+
+    def cache_info(self) -> Dict:
+        """Statistiques des caches de mémoïsation"""
+        return {'match': self._match.cache_info()._asdict(), 'signatures': self._score.cache_info()._asdict()}
+
+
+# Instance globale
+_rule_engine = None
+_rule_engine_lock = threading.Lock()
+
+
+def get_device_rule_engine() -> DeviceRuleEngine:
+    """Retourne le moteur de règles partagé (compilé au premier appel)"""
+    global _rule_engine
+    if _rule_engine is None:
+        with _rule_engine_lock:
+            if _rule_engine is None:
+                _rule_engine = DeviceRuleEngine()
+    return _rule_engine
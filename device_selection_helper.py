@@ -8,6 +8,7 @@ import json
 import time
 from datetime import datetime
 from network_scanner_production import ProductionNetworkScanner
+from monitoring_scheduler import get_base_interval, get_priority_level
 
 class DeviceSelectionHelper:
     """Assistant pour faciliter la sélection des équipements à surveiller"""
@@ -134,22 +135,8 @@ class DeviceSelectionHelper:
         return f"{parts[0]}.{parts[1]}.{parts[2]}.0/24"
     
     def _get_priority_level(self, device):
-        """Détermine le niveau de priorité"""
-        device_type = device.get('type', 'Unknown').lower()
-        
-        priority_map = {
-            'server': 'high',
-            'router': 'high',
-            'automation': 'critical',
-            'switch': 'medium',
-            'nas': 'medium',
-            'printer': 'medium',
-            'camera': 'low',
-            'phone': 'low',
-            'workstation': 'low'
-        }
-        
-        return priority_map.get(device_type, 'low')
+        """Détermine le niveau de priorité (type, équipement de cœur, urgence)"""
+        return get_priority_level(device)
     
     def _get_threshold_by_type(self, device_type):
         """Seuil de temps de réponse par type d'équipement"""
@@ -181,17 +168,8 @@ class DeviceSelectionHelper:
         return notification_map.get(priority, 'normal')
     
     def _get_scan_interval(self, device):
-        """Intervalle de scan selon la criticité"""
-        priority = self._get_priority_level(device)
-        
-        interval_map = {
-            'critical': 60,    # 1 minute
-            'high': 300,       # 5 minutes
-            'medium': 900,     # 15 minutes
-            'low': 1800        # 30 minutes
-        }
-        
-        return interval_map.get(priority, 900)
+        """Intervalle de scan selon la criticité (même barème que l'ordonnanceur de monitoring)"""
+        return get_base_interval(device)
     
     def save_configuration(self, config, filename="monitoring_config.json"):
         """Sauvegarde la configuration"""
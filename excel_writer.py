@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Écriture Excel en flux
+Classeur openpyxl en mode write_only : les lignes sont fournies par un générateur et sérialisées
+au fur et à mesure, la mémoire ne dépend donc pas du nombre de lignes. Les styles sont des
+styles nommés enregistrés une seule fois dans le classeur et partagés par toutes les cellules
+"""
+
+import os
+from itertools import islice
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+
+# Limite d'une feuille Excel (en-tête compris) : au-delà, la suite va sur une feuille de continuation
+MAX_SHEET_ROWS = 1048576
+
+
+def _fill(color: str) -> PatternFill:
+    return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+
+# Styles nommés réutilisables (nom -> (police, remplissage, format de nombre))
+NAMED_STYLES = {
+    'title': (Font(size=16, bold=True), None, None),
+    'subtitle': (Font(size=14, bold=True), None, None),
+    'section': (Font(size=12, bold=True), None, None),
+    'header': (Font(bold=True), _fill("CCCCCC"), None),
+    'online': (None, _fill("90EE90"), None),
+    'offline': (None, _fill("FFB6C1"), None),
+    'excellent': (None, _fill("90EE90"), None),
+    'good': (None, _fill("FFFF99"), None),
+    'average': (None, _fill("FFB366"), None),
+    'critical': (None, _fill("FF6666"), None),
+    'datetime': (None, None, 'yyyy-mm-dd hh:mm:ss')
+}
+
+
+class StreamingExcelWriter:
+    """Classeur en écriture seule, une feuille écrite d'un bloc à partir d'un itérable de lignes"""
+
+    def __init__(self, file_path: str, max_sheet_rows: int = MAX_SHEET_ROWS):
+        self.file_path = file_path
+        self.max_sheet_rows = max_sheet_rows
+        self.workbook = Workbook(write_only=True)
+        self.rows_written = {}  # titre de feuille -> lignes de données écrites
+        for name, (font, fill, number_format) in NAMED_STYLES.items():
+            style = NamedStyle(name=name)
+            if font:
+                style.font = font
+            if fill:
+                style.fill = fill
+            if number_format:
+                style.number_format = number_format
+            self.workbook.add_named_style(style)
+
+    def cell(self, sheet, value, style: Optional[str] = None) -> WriteOnlyCell:
+        cell = WriteOnlyCell(sheet, value=value)
+        if style:
+            cell.style = style
+        return cell
+
+    def _create_sheet(self, title: str, widths: Optional[Sequence[int]]):
+        sheet = self.workbook.create_sheet(title[:31])  # 31 caractères maximum pour un nom de feuille
+        # Les largeurs doivent être fixées avant la première ligne en mode write_only
+        for index, width in enumerate(widths or [], start=1):
+            sheet.column_dimensions[get_column_letter(index)].width = width
+        return sheet
+
+    def add_key_values(self, title: str, items: Iterable, heading: Optional[str] = None,
+                       widths: Sequence[int] = (30, 20)):
+        """
+        Feuille de type fiche : titre, puis lignes (libellé, valeur[, style de la valeur[, style du libellé]])
+
+        Une ligne None insère une ligne vide, une ligne (libellé,) un intertitre
+        """
+        sheet = self._create_sheet(title, widths)
+        if heading:
+            sheet.append([self.cell(sheet, heading, 'title')])
+            sheet.append([])
+        for item in items:
+            if item is None:
+                sheet.append([])
+            elif len(item) == 1:
+                sheet.append([self.cell(sheet, item[0], 'section')])
+            else:
+                value_style = item[2] if len(item) > 2 else None
+                label_style = item[3] if len(item) > 3 else None
+                sheet.append([self.cell(sheet, item[0], label_style) if label_style else item[0],
+                              self.cell(sheet, item[1], value_style) if value_style else item[1]])
+        return sheet
+
+    def add_table(self, title: str, headers: Sequence[str], rows: Iterable[Sequence],
+                  widths: Optional[Sequence[int]] = None, heading: Optional[str] = None,
+                  row_style: Optional[Callable[[Sequence], Optional[str]]] = None) -> int:
+        """
+        Écrit un tableau à partir d'un itérable de lignes consommé au fil de l'eau
+
+        Args:
+            rows: lignes (séquences de valeurs), typiquement un générateur alimenté par lots depuis la base
+            row_style: row_style(ligne) -> nom du style nommé appliqué à toute la ligne (ou None) ;
+                sans style, les valeurs sont écrites brutes (les dates reçoivent le format par défaut)
+
+        Returns:
+            int: nombre de lignes de données écrites (toutes feuilles de continuation comprises)
+        """
+        rows = iter(rows)
+        total = 0
+        part = 1
+        while True:
+            sheet_title = title if part == 1 else f"{title[:26]} ({part})"
+            sheet = self._create_sheet(sheet_title, widths)
+            used = 0
+            if heading and part == 1:
+                sheet.append([self.cell(sheet, heading, 'subtitle')])
+                sheet.append([])
+                used = 2
+            sheet.append([self.cell(sheet, header, 'header') for header in headers])
+            used += 1
+
+            written = 0
+            for row in islice(rows, self.max_sheet_rows - used):
+                style = row_style(row) if row_style else None
+                if style:
+                    sheet.append([self.cell(sheet, value, style) for value in row])
+                else:
+                    sheet.append(list(row))
+                written += 1
+            self.rows_written[sheet_title] = written
+            total += written
+            # Feuille pleine : s'il reste des lignes, elles continuent sur une nouvelle feuille
+            if written < self.max_sheet_rows - used:
+                return total
+            try:
+                first = next(rows)
+            except StopIteration:
+                return total
+            rows = _prepend(first, rows)
+            part += 1
+
+    def save(self) -> str:
+        """Écrit le classeur (fichier temporaire puis renommage : pas de fichier partiel visible)"""
+        tmp_path = self.file_path + '.tmp'
+        self.workbook.save(tmp_path)
+        os.replace(tmp_path, self.file_path)
+        return self.file_path
+
+
+def _prepend(first, rows):
+    yield first
+    yield from rows
+
+
+def iter_rows(chunks: Iterable[List[Sequence]]) -> Iterable[Sequence]:
+    """Aplatit des lots de lignes (voir streaming_export.iter_chunks) en un flux de lignes"""
+    for chunk in chunks:
+        yield from chunk
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Géolocalisation IP
+Les adresses privées et réservées sont résolues localement (aucun appel réseau), les résultats
+sont conservés dans un cache SQLite avec TTL, une base MaxMind locale est consultée si elle
+est disponible, et le reste est demandé au fournisseur par lots sous une limite de débit
+"""
+
+import ipaddress
+import json
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+import requests
+
+from config_advanced import MONITORING_CONFIG
+from storage import get_pool
+
+try:
+    import maxminddb
+except ImportError:
+    maxminddb = None
+
+
+def is_local_address(ip: str) -> bool:
+    """Adresse privée (RFC1918), de bouclage, lien-local, multicast ou réservée : non géolocalisable"""
+    try:
+        return not ipaddress.ip_address(ip).is_global
+    except ValueError:
+        return True
+
+
+class RateLimiter:
+    """Seau à jetons : au plus `rate` acquisitions par période de `period` secondes"""
+
+    def __init__(self, rate: int, period: float):
+        self.capacity = rate
+        self.tokens = float(rate)
+        self.fill_rate = rate / period
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloque jusqu'à obtention d'un jeton"""
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.fill_rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                time.sleep((1 - self.tokens) / self.fill_rate)
+
+    def pause(self, seconds: float):
+        """Vide le seau : le fournisseur signale que le quota est épuisé pour `seconds` secondes"""
+        with self._lock:
+            self.tokens = -seconds * self.fill_rate + 1
+            self.updated = time.monotonic()
+
+
+class IPGeolocator:
+    """Résolution d'adresses IP en positions, avec cache persistant et appels groupés"""
+
+    def __init__(self, db_path: str, config: Dict = None):
+        self.config = config or MONITORING_CONFIG['geolocation']
+        self.pool = get_pool(db_path)
+        self.limiter = RateLimiter(self.config['rate_limit'], self.config['rate_period'])
+        self.session = requests.Session()
+        self.stats = {'local': 0, 'cache_hits': 0, 'local_db_hits': 0, 'provider_requests': 0,
+                      'provider_hits': 0, 'provider_misses': 0, 'errors': 0}
+        self._reader = None
+        local_db_path = self.config.get('local_db_path')
+        if local_db_path and maxminddb is not None:
+            try:
+                self._reader = maxminddb.open_database(local_db_path)
+            except Exception as e:
+                print(f"⚠️ Base de géolocalisation locale indisponible ({local_db_path}): {e}")
+        elif local_db_path:
+            print("⚠️ Module maxminddb non installé, base de géolocalisation locale ignorée")
+        self.init_cache()
+
+    def init_cache(self):
+        with self.pool.connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS geolocation_cache (
+                    ip TEXT PRIMARY KEY,
+                    found INTEGER NOT NULL,
+                    data TEXT,
+                    source TEXT,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+
+    # ----- Cache persistant -----
+
+    def _cache_get(self, ips, now):
+        results = {}
+        ips = list(ips)
+        with self.pool.connection() as conn:
+            for start in range(0, len(ips), 500):
+                chunk = ips[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT ip, found, data FROM geolocation_cache WHERE expires_at > ? "
+                    f"AND ip IN ({','.join('?' * len(chunk))})", [now] + chunk
+                ).fetchall()
+                for ip, found, data in rows:
+                    results[ip] = json.loads(data) if found else None
+        return results
+
+    def _cache_put(self, entries, now):
+        rows = []
+        for ip, (location, source) in entries.items():
+            ttl = self.config['cache_ttl'] if location else self.config['negative_ttl']
+            rows.append((ip, 1 if location else 0, json.dumps(location) if location else None, source, now + ttl))
+        if rows:
+            with self.pool.connection() as conn:
+                conn.executemany('INSERT OR REPLACE INTO geolocation_cache VALUES (?, ?, ?, ?, ?)', rows)
+
+    # ----- Sources -----
+
+    def _lookup_local_db(self, ip: str) -> Optional[Dict]:
+        record = self._reader.get(ip)
+        if not record:
+            return None
+        subdivisions = record.get('subdivisions') or [{}]
+        location = record.get('location', {})
+        return {
+            'country': record.get('country', {}).get('names', {}).get('en'),
+            'region': subdivisions[0].get('names', {}).get('en'),
+            'city': record.get('city', {}).get('names', {}).get('en'),
+            'latitude': location.get('latitude'),
+            'longitude': location.get('longitude'),
+            'isp': (record.get('traits') or {}).get('isp'),
+            'timezone': location.get('time_zone')
+        }
+
+    def _lookup_provider(self, ips) -> Dict[str, Optional[Dict]]:
+        """Une requête par lot de batch_size adresses, sous la limite de débit"""
+        results = {}
+        batch_size = self.config['batch_size']
+        for start in range(0, len(ips), batch_size):
+            batch = ips[start:start + batch_size]
+            self.limiter.acquire()
+            self.stats['provider_requests'] += 1
+            try:
+                response = self.session.post(
+                    self.config['provider_url'],
+                    params={'fields': self.config['fields']},
+                    json=batch,
+                    timeout=self.config['timeout']
+                )
+                # ip-api indique le quota restant (X-Rl) et le délai avant sa remise à zéro (X-Ttl)
+                if response.headers.get('X-Rl') == '0':
+                    self.limiter.pause(float(response.headers.get('X-Ttl', self.config['rate_period'])))
+                if response.status_code == 429:
+                    self.stats['errors'] += 1
+                    continue
+                response.raise_for_status()
+                for data in response.json():
+                    if data.get('status') == 'success':
+                        results[data['query']] = {
+                            'country': data.get('country'),
+                            'region': data.get('regionName'),
+                            'city': data.get('city'),
+                            'latitude': data.get('lat'),
+                            'longitude': data.get('lon'),
+                            'isp': data.get('isp'),
+                            'timezone': data.get('timezone')
+                        }
+                    elif data.get('query'):
+                        results[data['query']] = None
+            except Exception as e:
+                # Adresses non résolues : redemandées au prochain passage (pas de cache négatif)
+                self.stats['errors'] += 1
+                print(f"❌ Erreur géolocalisation par lot ({len(batch)} adresses): {e}")
+        return results
+
+    # ----- API -----
+
+    def lookup_many(self, ips: Iterable[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Géolocalise plusieurs adresses
+
+        Returns:
+            dict: ip -> position (country, region, city, latitude, longitude, isp, timezone)
+                  ou None (adresse locale ou inconnue)
+        """
+        results = {}
+        pending = []
+        for ip in dict.fromkeys(ips):
+            if is_local_address(ip):
+                self.stats['local'] += 1
+                results[ip] = None
+            else:
+                pending.append(ip)
+        if not pending:
+            return results
+
+        now = time.time()
+        cached = self._cache_get(pending, now)
+        self.stats['cache_hits'] += len(cached)
+        results.update(cached)
+        pending = [ip for ip in pending if ip not in cached]
+
+        resolved = {}
+        if self._reader is not None:
+            for ip in list(pending):
+                location = self._lookup_local_db(ip)
+                if location:
+                    self.stats['local_db_hits'] += 1
+                    resolved[ip] = (location, 'local_db')
+                    pending.remove(ip)
+
+        if pending and self.config['use_provider']:
+            for ip, location in self._lookup_provider(pending).items():
+                self.stats['provider_hits' if location else 'provider_misses'] += 1
+                resolved[ip] = (location, 'provider')
+
+        self._cache_put(resolved, now)
+        for ip in pending:
+            results.setdefault(ip, None)
+        results.update({ip: location for ip, (location, _) in resolved.items()})
+        return results
+
+    def lookup(self, ip: str) -> Optional[Dict]:
+        """Géolocalise une adresse"""
+        return self.lookup_many([ip])[ip]
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
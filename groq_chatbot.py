@@ -3,12 +3,11 @@
 Chatbot Groq pour Central Danone
 """
 
-import requests
 import json
 import logging
-from datetime import datetime
 from typing import List, Dict, Any
 from config_groq import GroqConfig
+from llm_client import llm_client, cache_key
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -59,8 +58,8 @@ STYLE :
                     'error': 'API Groq non configurée. Veuillez définir GROQ_API_KEY.'
                 }
             
-            # Test simple avec une question basique
-            test_response = self._call_api("Test de connexion")
+            # Test simple avec une question basique (sans cache : la connexion est réellement testée)
+            test_response = self._call_api("Test de connexion", use_cache=False)
             
             if test_response['success']:
                 return {
@@ -117,8 +116,9 @@ STYLE :
         
         return context
 
-    def _call_api(self, message: str, devices: List[Dict] = None, alerts: List[Dict] = None) -> Dict[str, Any]:
-        """Appelle l'API Groq"""
+    def _call_api(self, message: str, devices: List[Dict] = None, alerts: List[Dict] = None,
+                  network_context: str = None, use_cache: bool = True) -> Dict[str, Any]:
+        """Appelle l'API Groq (network_context : contexte déjà assemblé, prioritaire sur devices / alerts)"""
         try:
             if not self.api_key:
                 return {
@@ -128,7 +128,9 @@ STYLE :
             
             # Préparer le contexte
             context = self.system_prompt
-            if devices and alerts:
+            if network_context:
+                context += "\n\n" + network_context
+            elif devices and alerts:
                 context += self._generate_network_context(devices, alerts)
             
             # Préparer les messages
@@ -137,12 +139,6 @@ STYLE :
                 {"role": "user", "content": message}
             ]
             
-            # Préparer la requête
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             data = {
                 "model": self.model,
                 "messages": messages,
@@ -150,51 +146,28 @@ STYLE :
                 "temperature": self.temperature
             }
             
-            # Appel API
-            start_time = datetime.now()
-            response = requests.post(
-                self.api_url,
-                headers=headers,
-                json=data,
-                timeout=self.timeout
-            )
-            response_time = (datetime.now() - start_time).total_seconds()
+            # Appel API (session partagée, nouvelles tentatives, réponse en cache si déjà posée)
+            key = cache_key(self.model, message, context) if use_cache else None
+            result = llm_client.chat_completion(self.api_url, self.api_key, data, timeout=self.timeout, key=key)
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result['choices'][0]['message']['content']
-                tokens_used = result.get('usage', {}).get('total_tokens', 0)
-                
+            if result['success']:
                 return {
                     'success': True,
-                    'response': content,
+                    'response': result['content'],
                     'confidence': 0.95,  # Groq est très fiable
                     'model': 'Groq',
-                    'tokens_used': tokens_used,
-                    'response_time': response_time
+                    'tokens_used': result['tokens_used'],
+                    'response_time': result['response_time'],
+                    'cached': result['cached']
                 }
             else:
-                error_msg = f"Erreur {response.status_code}: {response.text}"
+                error_msg = result['error']
                 logger.error(f"Erreur API Groq: {error_msg}")
                 return {
                     'success': False,
                     'error': error_msg
                 }
                 
-        except requests.exceptions.Timeout:
-            error_msg = "Timeout de l'API Groq"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg
-            }
-        except requests.exceptions.RequestException as e:
-            error_msg = f"Erreur requête Groq: {str(e)}"
-            logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg
-            }
         except Exception as e:
             error_msg = f"Erreur inattendue Groq: {str(e)}"
             logger.error(error_msg)
@@ -203,11 +176,12 @@ STYLE :
                 'error': error_msg
             }
 
-    def chat(self, message: str, devices: List[Dict] = None, alerts: List[Dict] = None) -> Dict[str, Any]:
+    def chat(self, message: str, devices: List[Dict] = None, alerts: List[Dict] = None,
+             network_context: str = None) -> Dict[str, Any]:
         """Chat avec l'IA Groq"""
         try:
             # Appel API Groq
-            result = self._call_api(message, devices, alerts)
+            result = self._call_api(message, devices, alerts, network_context)
             
             if result['success']:
                 logger.info(f"Groq réussi: {result['response'][:100]}...")
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Client HTTP partagé des chatbots (API compatibles OpenAI : Groq, DeepSeek)
+Session requests unique (connexions conservées), nombre d'appels simultanés borné, nouvelles tentatives
+avec attente exponentielle aléatoire sur 429 / 5xx, cache des réponses par (question normalisée,
+empreinte du contexte) et métriques de latence et de tokens
+"""
+
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config_advanced import AI_ADVANCED_CONFIG
+
+LLM_CLIENT_CONFIG = AI_ADVANCED_CONFIG['llm_client']
+
+# Statuts HTTP pour lesquels une nouvelle tentative a un sens
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def normalize_question(question: str) -> str:
+    """Question normalisée pour le cache : casse, espaces et ponctuation finale ignorés"""
+    return re.sub(r'\s+', ' ', (question or '').strip().lower()).rstrip(' ?!.')
+
+
+def cache_key(model: str, question: str, context: str = '') -> str:
+    """Clé de cache d'une réponse : modèle, question normalisée et empreinte du contexte"""
+    context_digest = hashlib.sha256((context or '').encode('utf-8')).hexdigest()
+    return hashlib.sha256(f"{model}\n{normalize_question(question)}\n{context_digest}".encode('utf-8')).hexdigest()
+
+
+class LLMClient:
+    """Appels aux API de chat partagés par les chatbots"""
+
+    def __init__(self, config: Optional[Dict] = None, sleep=time.sleep):
+        self.config = config or LLM_CLIENT_CONFIG
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.config['pool_size'], pool_maxsize=self.config['pool_size'])
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._slots = threading.BoundedSemaphore(self.config['max_concurrency'])
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # clé -> (instant, résultat)
+        self._key_locks = {}
+        self._latencies = deque(maxlen=self.config['latency_samples'])
+        self.stats = {'requests': 0, 'api_calls': 0, 'cache_hits': 0, 'retries': 0, 'errors': 0,
+                      'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Attente avant la tentative suivante : Retry-After s'il est donné, sinon exponentielle aléatoire"""
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.config['backoff_max'])
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.config['backoff_max'], self.config['backoff_base'] * 2 ** attempt))
+
+    def _cached(self, key: str) -> Optional[Dict]:
+        entry = self._cache.get(key)
+        if entry and time.time() - entry[0] < self.config['cache_ttl']:
+            self._cache.move_to_end(key)
+            return entry[1]
+        return None
+
+    def chat_completion(self, url: str, api_key: str, payload: Dict, timeout: float = 30,
+                        key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Appel d'une API de chat (format OpenAI)
+
+        Args:
+            key: clé de cache (voir cache_key) ; None pour toujours appeler l'API
+
+        Returns:
+            dict: success, content, tokens_used, response_time, cached, attempts, error
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+            if key is None:
+                key_lock = None
+            else:
+                cached = self._cached(key)
+                if cached is not None:
+                    self.stats['cache_hits'] += 1
+                    return dict(cached, cached=True)
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        if key_lock is None:
+            return self._call(url, api_key, payload, timeout)
+        # Questions identiques simultanées : un seul appel, les autres reprennent sa réponse
+        with key_lock:
+            with self._lock:
+                cached = self._cached(key)
+                if cached is not None:
+                    self.stats['cache_hits'] += 1
+                    return dict(cached, cached=True)
+            result = self._call(url, api_key, payload, timeout)
+            if result['success']:
+                with self._lock:
+                    self._cache[key] = (time.time(), result)
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.config['cache_size']:
+                        old_key, _ = self._cache.popitem(last=False)
+                        self._key_locks.pop(old_key, None)
+            return result
+
+    def _call(self, url: str, api_key: str, payload: Dict, timeout: float) -> Dict[str, Any]:
+        headers = {'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'}
+        start_time = time.time()
+        error = None
+        for attempt in range(self.config['max_retries'] + 1):
+            retry_after = None
+            # Place libérée pendant l'attente entre deux tentatives
+            with self._slots:
+                with self._lock:
+                    self.stats['api_calls'] += 1
+                try:
+                    response = self.session.post(url, headers=headers, json=payload, timeout=timeout)
+                except requests.exceptions.Timeout:
+                    response, error = None, "Timeout de l'API"
+                except requests.exceptions.ConnectionError as e:
+                    response, error = None, f"Erreur de connexion: {e}"
+                except requests.exceptions.RequestException as e:
+                    return self._failure(f"Erreur requête: {e}", start_time, attempt + 1)
+
+            if response is not None:
+                if response.status_code == 200:
+                    try:
+                        result = response.json()
+                        content = result['choices'][0]['message']['content']
+                    except (ValueError, KeyError, IndexError) as e:
+                        return self._failure(f"Réponse invalide: {e}", start_time, attempt + 1)
+                    return self._success(content, result.get('usage') or {}, start_time, attempt + 1)
+                error = f"Erreur {response.status_code}: {response.text[:500]}"
+                if response.status_code not in RETRY_STATUSES:
+                    return self._failure(error, start_time, attempt + 1)
+                retry_after = response.headers.get('Retry-After')
+
+            if attempt < self.config['max_retries']:
+                with self._lock:
+                    self.stats['retries'] += 1
+                self._sleep(self.backoff_delay(attempt, retry_after))
+        return self._failure(error, start_time, self.config['max_retries'] + 1)
+
+    def _success(self, content: str, usage: Dict, start_time: float, attempts: int) -> Dict[str, Any]:
+        response_time = time.time() - start_time
+        with self._lock:
+            self._latencies.append(response_time)
+            for name in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+                self.stats[name] += int(usage.get(name) or 0)
+        return {'success': True, 'content': content, 'tokens_used': int(usage.get('total_tokens') or 0),
+                'response_time': response_time, 'cached': False, 'attempts': attempts}
+
+    def _failure(self, error: str, start_time: float, attempts: int) -> Dict[str, Any]:
+        with self._lock:
+            self.stats['errors'] += 1
+        return {'success': False, 'error': error, 'response_time': time.time() - start_time,
+                'cached': False, 'attempts': attempts}
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+            self._key_locks.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+            latencies = sorted(self._latencies)
+            stats['cached_responses'] = len(self._cache)
+        stats['avg_latency'] = round(sum(latencies) / len(latencies), 3) if latencies else None
+        stats['p95_latency'] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3) if latencies else None
+        stats['cache_hit_rate'] = round(stats['cache_hits'] / stats['requests'], 3) if stats['requests'] else 0.0
+        return stats
+
+
+# Instance globale
+llm_client = LLMClient()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Base des constructeurs MAC (OUI) - index binaire compilé
+Recherche par préfixe 24/28/36 bits (MA-L / MA-M / MA-S) partagée par tout le processus
+"""
+
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Fichiers CSV publiés par l'IEEE (https://standards-oui.ieee.org/)
+DEFAULT_CSV_FILES = ['oui.csv', 'mam.csv', 'oui36.csv']
+DEFAULT_INDEX_PATH = 'oui_vendors.idx'
+LEGACY_JSON_PATH = 'oui_vendors.json'
+
+# Longueurs de préfixe supportées (en chiffres hexadécimaux), de la plus précise à la plus large
+PREFIX_LENGTHS = (9, 7, 6)  # 36, 28 et 24 bits
+
+# Base minimale utilisée quand aucun fichier IEEE n'est disponible
+FALLBACK_VENDORS = {
+    "00:00:5E": "IANA",
+    "00:50:56": "VMware",
+    "08:00:27": "Oracle VirtualBox",
+    "00:0C:29": "VMware",
+    "00:1B:21": "Intel",
+    "00:E0:4C": "Realtek",
+    "00:90:F5": "Cisco",
+    "00:1F:45": "Netgear",
+    "B8:27:EB": "Raspberry Pi",
+    "DC:A6:32": "Raspberry Pi",
+    "28:C6:8E": "TP-Link",
+    "F4:F2:6D": "Samsung",
+}
+
+_MAGIC = b'OUIX'
+_VERSION = 1
+# magic, version, ordre des octets, 3 compteurs de préfixes, nb de noms, taille du bloc de noms
+_HEADER = struct.Struct('<4sHHQQQQQ')
+_HEX_DIGITS = set('0123456789ABCDEF')
+
+
+def _normalize_hex(value: str) -> str:
+    """Ne conserve que les chiffres hexadécimaux (majuscules) d'une adresse ou d'un préfixe"""
+    return ''.join(c for c in value.upper() if c in _HEX_DIGITS)
+
+
+def parse_ieee_csv(path: str) -> Iterable[Tuple[str, str]]:
+    """
+    Lit un fichier CSV IEEE (MA-L, MA-M, MA-S, IAB, CID)
+
+    Yields:
+        tuple: (préfixe hexadécimal, nom de l'organisation)
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            prefix = _normalize_hex(row.get('Assignment', '') or '')
+            vendor = (row.get('Organization Name', '') or '').strip()
+            if len(prefix) in PREFIX_LENGTHS and vendor:
+                yield prefix, vendor
+
+
+def build_index(entries: Iterable[Tuple[str, str]], index_path: str = DEFAULT_INDEX_PATH) -> int:
+    """
+    Compile les préfixes en un index binaire trié, écrit de façon atomique
+
+    Format : en-tête, puis pour chaque longueur de préfixe un tableau trié de clés (uint64)
+    et un tableau d'identifiants de noms (uint64), puis la table des offsets et le bloc
+    des noms en UTF-8 (dédupliqués).
+
+    Returns:
+        int: Nombre de préfixes indexés
+    """
+    tables: Dict[int, Dict[int, int]] = {length: {} for length in PREFIX_LENGTHS}
+    names: List[bytes] = []
+    name_ids: Dict[str, int] = {}
+
+    for prefix, vendor in entries:
+        prefix = _normalize_hex(prefix)
+        if len(prefix) not in tables:
+            continue
+        if vendor not in name_ids:
+            name_ids[vendor] = len(names)
+            names.append(vendor.encode('utf-8'))
+        tables[len(prefix)][int(prefix, 16)] = name_ids[vendor]
+
+    name_offsets = array('Q', [0])
+    for encoded in names:
+        name_offsets.append(name_offsets[-1] + len(encoded))
+    names_blob = b''.join(names)
+
+    counts = [len(tables[length]) for length in PREFIX_LENGTHS]
+    byteorder = 0 if sys.byteorder == 'little' else 1
+
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, byteorder, *counts, len(names), len(names_blob)))
+        for length in PREFIX_LENGTHS:
+            keys = sorted(tables[length])
+            f.write(array('Q', keys).tobytes())
+            f.write(array('Q', (tables[length][k] for k in keys)).tobytes())
+        f.write(name_offsets.tobytes())
+        f.write(names_blob)
+    os.replace(tmp_path, index_path)
+
+    return sum(counts)
+
+
+class OUIVendorDatabase:
+    """Index des constructeurs MAC chargé à la demande via mmap (lecture seule, sans copie)"""
+
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH, csv_files: Optional[List[str]] = None):
+        self.index_path = index_path
+        self.csv_files = csv_files if csv_files is not None else DEFAULT_CSV_FILES
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._mmap = None
+        self._tables: List[Tuple[int, memoryview, memoryview]] = []
+        self._name_offsets = None
+        self._names = None
+        self.source = 'none'
+
+    # ----- Chargement -----
+
+    def _sources_newer_than_index(self, sources: List[str]) -> bool:
+        if not os.path.exists(self.index_path):
+            return True
+        index_mtime = os.path.getmtime(self.index_path)
+        return any(os.path.getmtime(path) > index_mtime for path in sources)
+
+    def _rebuild_if_needed(self):
+        """(Re)construit l'index si les CSV IEEE ou le JSON historique sont plus récents"""
+        csv_sources = [path for path in self.csv_files if os.path.exists(path)]
+        if csv_sources:
+            if self._sources_newer_than_index(csv_sources):
+                entries = (entry for path in csv_sources for entry in parse_ieee_csv(path))
+                count = build_index(entries, self.index_path)
+                print(f"✅ Index vendors MAC compilé: {count} préfixes ({', '.join(csv_sources)})")
+            self.source = 'ieee'
+            return
+
+        if os.path.exists(LEGACY_JSON_PATH):
+            if self._sources_newer_than_index([LEGACY_JSON_PATH]):
+                with open(LEGACY_JSON_PATH, 'r', encoding='utf-8') as f:
+                    count = build_index(json.load(f).items(), self.index_path)
+                print(f"✅ Index vendors MAC compilé: {count} préfixes ({LEGACY_JSON_PATH})")
+            self.source = 'json'
+            return
+
+        if os.path.exists(self.index_path):
+            self.source = 'index'
+
+    def _map_index(self) -> bool:
+        with open(self.index_path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, byteorder, *header = _HEADER.unpack_from(mapped, 0)
+        native = 0 if sys.byteorder == 'little' else 1
+        if magic != _MAGIC or version != _VERSION or byteorder != native:
+            mapped.close()
+            return False
+
+        counts, (n_names, blob_size) = header[:3], header[3:]
+        view = memoryview(mapped)
+        offset = _HEADER.size
+        tables = []
+        for length, count in zip(PREFIX_LENGTHS, counts):
+            keys = view[offset:offset + count * 8].cast('Q')
+            offset += count * 8
+            ids = view[offset:offset + count * 8].cast('Q')
+            offset += count * 8
+            tables.append((length, keys, ids))
+        self._name_offsets = view[offset:offset + (n_names + 1) * 8].cast('Q')
+        offset += (n_names + 1) * 8
+        self._names = view[offset:offset + blob_size]
+        self._tables = tables
+        self._mmap = mapped
+        return True
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                self._rebuild_if_needed()
+                if os.path.exists(self.index_path) and self._map_index():
+                    print(f"✅ Base vendors MAC chargée (index {self.index_path})")
+                else:
+                    self._load_fallback()
+            except Exception as e:
+                print(f"⚠️ Erreur chargement vendors MAC: {e}")
+                self._load_fallback()
+            self._loaded = True
+
+    def _load_fallback(self):
+        """Index en mémoire construit à partir de la base simplifiée"""
+        tables: Dict[int, List[Tuple[int, str]]] = {length: [] for length in PREFIX_LENGTHS}
+        for prefix, vendor in FALLBACK_VENDORS.items():
+            prefix = _normalize_hex(prefix)
+            tables[len(prefix)].append((int(prefix, 16), vendor))
+
+        names = sorted(set(FALLBACK_VENDORS.values()))
+        name_ids = {name: i for i, name in enumerate(names)}
+        encoded = [name.encode('utf-8') for name in names]
+        offsets = array('Q', [0])
+        for item in encoded:
+            offsets.append(offsets[-1] + len(item))
+
+        self._tables = []
+        for length in PREFIX_LENGTHS:
+            pairs = sorted(tables[length])
+            keys = memoryview(array('Q', (k for k, _ in pairs)))
+            ids = memoryview(array('Q', (name_ids[v] for _, v in pairs)))
+            self._tables.append((length, keys, ids))
+        self._name_offsets = memoryview(offsets)
+        self._names = memoryview(b''.join(encoded))
+        self.source = 'fallback'
+        print("✅ Base vendors MAC simplifiée chargée")
+
+    # ----- Recherche -----
+
+    def _name(self, name_id: int) -> str:
+        start, end = self._name_offsets[name_id], self._name_offsets[name_id + 1]
+        return bytes(self._names[start:end]).decode('utf-8')
+
+    def lookup(self, mac: str) -> Optional[str]:
+        """
+        Recherche le constructeur d'une adresse MAC (préfixe le plus long d'abord)
+
+        Args:
+            mac (str): Adresse MAC, tous séparateurs acceptés
+
+        Returns:
+            str: Nom du constructeur ou None si inconnu
+        """
+        digits = _normalize_hex(mac or '')
+        if len(digits) < 6:
+            return None
+
+        self._ensure_loaded()
+        for length, keys, ids in self._tables:
+            if len(digits) < length or not len(keys):
+                continue
+            key = int(digits[:length], 16)
+            pos = bisect_left(keys, key)
+            if pos < len(keys) and keys[pos] == key:
+                return self._name(ids[pos])
+        return None
+
+    def get(self, mac: str, default: Optional[str] = None) -> Optional[str]:
+        """Compatibilité avec l'ancien dictionnaire `mac_vendors`"""
+        vendor = self.lookup(mac)
+        return vendor if vendor is not None else default
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return sum(len(keys) for _, keys, _ in self._tables)
+
+
+# Instance partagée par tout le processus
+_vendor_database = None
+_vendor_database_lock = threading.Lock()
+
+
+def get_vendor_database() -> OUIVendorDatabase:
+    """Retourne l'instance partagée de la base des constructeurs (chargée à la première recherche)"""
+    global _vendor_database
+    if _vendor_database is None:
+        with _vendor_database_lock:
+            if _vendor_database is None:
+                _vendor_database = OUIVendorDatabase()
+    return _vendor_database
+
+
+def lookup_vendor(mac: str) -> Optional[str]:
+    """Raccourci : constructeur d'une adresse MAC via l'index partagé"""
+    return get_vendor_database().lookup(mac)
+
+
+if __name__ == '__main__':
+    # Usage : python mac_vendors.py oui.csv mam.csv oui36.csv
+    sources = sys.argv[1:] or [path for path in DEFAULT_CSV_FILES if os.path.exists(path)]
+    if not sources:
+        print("❌ Aucun fichier CSV IEEE fourni (oui.csv, mam.csv, oui36.csv)")
+        sys.exit(1)
+    total = build_index((entry for path in sources for entry in parse_ieee_csv(path)), DEFAULT_INDEX_PATH)
+    print(f"✅ {total} préfixes indexés dans {DEFAULT_INDEX_PATH}")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Registre versionné des modèles IA
+Chaque entraînement produit un répertoire d'artefacts adressé par contenu (sha256)
+et un pointeur "actif" mis à jour atomiquement
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import joblib
+
+from config_advanced import AI_ADVANCED_CONFIG
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_CONFIG = AI_ADVANCED_CONFIG['model_registry']
+MANIFEST_FILE = 'manifest.json'
+ACTIVE_POINTER = 'ACTIVE'
+
+# Nom d'une version : 16 premiers caractères hexadécimaux du sha256 des artefacts
+VERSION_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+
+# Fichier d'artefact par estimateur : (section, clé) dans le dictionnaire des modèles
+ARTIFACT_FILES = {
+    'anomaly_isolation_forest.joblib': ('anomaly_detector', 'isolation_forest'),
+    'anomaly_scaler.joblib': ('anomaly_detector', 'scaler'),
+    'maintenance_failure_predictor.joblib': ('maintenance_predictor', 'failure_predictor'),
+    'maintenance_uptime_predictor.joblib': ('maintenance_predictor', 'uptime_predictor'),
+    'maintenance_scaler.joblib': ('maintenance_predictor', 'scaler'),
+}
+
+
+class ModelRegistry:
+    """Registre des versions de modèles (répertoires immuables + pointeur actif)"""
+
+    def __init__(self, root: str = REGISTRY_CONFIG['root']):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    # ----- Publication -----
+
+    def publish(self, models_data: Dict, metrics: Optional[Dict] = None,
+                training_duration: float = 0.0, training_rows: int = 0) -> Dict:
+        """
+        Écrit une nouvelle version (contenu identique = même version)
+
+        Args:
+            models_data (dict): Modèles au format de AIEnhancement.export_models()
+            metrics (dict): Métriques d'entraînement
+            training_duration (float): Durée de l'entraînement en secondes
+            training_rows (int): Nombre de lignes d'entraînement
+
+        Returns:
+            dict: Manifeste de la version
+        """
+        tmp_dir = os.path.join(self.root, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        try:
+            digest = hashlib.sha256()
+            for filename, (section, key) in sorted(ARTIFACT_FILES.items()):
+                path = os.path.join(tmp_dir, filename)
+                # Sans compression : les tableaux NumPy simples restent mappables en mémoire
+                joblib.dump(models_data[section][key], path)
+                digest.update(filename.encode('utf-8'))
+                with open(path, 'rb') as f:
+                    for block in iter(lambda: f.read(1024 * 1024), b''):
+                        digest.update(block)
+
+            version = digest.hexdigest()[:16]
+            manifest = {
+                'version': version,
+                'created_at': datetime.now().isoformat(),
+                'metrics': metrics or {},
+                'training_duration': round(float(training_duration), 3),
+                'training_rows': int(training_rows),
+                'is_fitted': {
+                    'anomaly_detector': bool(models_data['anomaly_detector']['is_fitted']),
+                    'maintenance_predictor': bool(models_data['maintenance_predictor']['is_fitted'])
+                },
+                'models_trained': bool(models_data.get('models_trained', False)),
+                'files': sorted(ARTIFACT_FILES)
+            }
+            with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+
+            final_dir = self.version_dir(version)
+            if os.path.exists(final_dir):
+                logger.info(f"Version de modèles {version} déjà présente (contenu identique)")
+                with open(os.path.join(final_dir, MANIFEST_FILE), 'r') as f:
+                    return json.load(f)
+            os.replace(tmp_dir, final_dir)
+            logger.info(f"Version de modèles publiée: {version}")
+            return manifest
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # ----- Pointeur actif -----
+
+    def activate(self, version: str):
+        """Bascule atomique du pointeur actif vers une version existante"""
+        if not os.path.exists(os.path.join(self.version_dir(version), MANIFEST_FILE)):
+            raise ValueError(f"Version de modèles inconnue: {version}")
+        pointer = os.path.join(self.root, ACTIVE_POINTER)
+        tmp_path = f"{pointer}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': version, 'activated_at': datetime.now().isoformat()}, f)
+        os.replace(tmp_path, pointer)
+        logger.info(f"Version de modèles active: {version}")
+
+    def active_version(self) -> Optional[str]:
+        """Version pointée comme active, ou None"""
+        try:
+            with open(os.path.join(self.root, ACTIVE_POINTER), 'r') as f:
+                version = json.load(f).get('version')
+            return version if version and os.path.isdir(self.version_dir(version)) else None
+        except (OSError, ValueError):
+            return None
+
+    def previous_version(self) -> Optional[str]:
+        """Version publiée juste avant la version active, ou None"""
+        versions = [m['version'] for m in self.list_versions()]
+        active = self.active_version()
+        if active not in versions:
+            return None
+        index = versions.index(active)
+        return versions[index + 1] if index + 1 < len(versions) else None
+
+    def rollback(self) -> Optional[str]:
+        """Réactive la version publiée juste avant la version active"""
+        previous = self.previous_version()
+        if previous:
+            self.activate(previous)
+        return previous
+
+    # ----- Lecture -----
+
+    def version_dir(self, version: str) -> str:
+        """Répertoire d'une version (nom validé : pas de chemin hors du registre)"""
+        if not isinstance(version, str) or not VERSION_PATTERN.match(version):
+            raise ValueError(f"Version de modèles invalide: {version!r}")
+        return os.path.join(self.root, version)
+
+    def manifest(self, version: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.version_dir(version), MANIFEST_FILE), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list_versions(self) -> List[Dict]:
+        """Manifestes de toutes les versions, de la plus récente à la plus ancienne"""
+        manifests = []
+        for name in os.listdir(self.root):
+            if not VERSION_PATTERN.match(name) or not os.path.isdir(self.version_dir(name)):
+                continue
+            manifest = self.manifest(name)
+            if manifest:
+                manifests.append(manifest)
+        return sorted(manifests, key=lambda m: m.get('created_at', ''), reverse=True)
+
+    def load(self, version: Optional[str] = None, mmap_mode: Optional[str] = REGISTRY_CONFIG['mmap_mode']) -> Optional[Dict]:
+        """
+        Charge une version (active par défaut)
+
+        mmap_mode='r' ne mappe que les tableaux NumPy simples (statistiques des scalers,
+        estimators_features_) : les nœuds des arbres (IsolationForest, RandomForest, GradientBoosting)
+        sont recopiés par Tree.__setstate__ et restent privés à chaque processus
+
+        Returns:
+            dict: Modèles au format de AIEnhancement.apply_models(), ou None
+        """
+        version = version or self.active_version()
+        if not version:
+            return None
+        manifest = self.manifest(version)
+        if not manifest:
+            return None
+
+        models_data = {
+            'anomaly_detector': {'is_fitted': manifest['is_fitted']['anomaly_detector']},
+            'maintenance_predictor': {'is_fitted': manifest['is_fitted']['maintenance_predictor']},
+            'models_trained': manifest.get('models_trained', True),
+            'timestamp': manifest.get('created_at'),
+            'version': version
+        }
+        for filename, (section, key) in ARTIFACT_FILES.items():
+            path = os.path.join(self.version_dir(version), filename)
+            models_data[section][key] = joblib.load(path, mmap_mode=mmap_mode)
+        return models_data
+
+    def prune(self, keep: int = REGISTRY_CONFIG['keep_versions']):
+        """Supprime les anciennes versions (la version active est toujours conservée)"""
+        active = self.active_version()
+        for manifest in self.list_versions()[keep:]:
+            if manifest['version'] != active:
+                shutil.rmtree(self.version_dir(manifest['version']), ignore_errors=True)
+
+
+# Instance globale
+_model_registry = None
+
+
+def get_model_registry() -> ModelRegistry:
+    """Retourne le registre de modèles partagé"""
+    global _model_registry
+    if _model_registry is None:
+        _model_registry = ModelRegistry()
+    return _model_registry
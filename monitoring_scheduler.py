@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Ordonnancement adaptatif des vérifications de monitoring
+Chaque couple (équipement, vérification) a sa propre échéance, tirée d'une file de priorité :
+l'intervalle dépend du type et de l'urgence de l'équipement, raccourcit après un échec
+et s'allonge tant que l'équipement reste stable
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from config_advanced import MONITORING_CONFIG
+
+PRIORITY_LEVELS = ['low', 'medium', 'high', 'critical']
+
+
+def _bump(priority: str) -> str:
+    index = PRIORITY_LEVELS.index(priority) if priority in PRIORITY_LEVELS else 0
+    return PRIORITY_LEVELS[min(index + 1, len(PRIORITY_LEVELS) - 1)]
+
+
+def get_priority_level(device: Dict, config: Dict = None) -> str:
+    """
+    Priorité d'un équipement : son type, relevée d'un niveau pour un équipement de cœur
+    de réseau (hostname) et d'un niveau pour une urgence de maintenance haute ou critique
+    """
+    config = config or MONITORING_CONFIG['adaptive_scheduling']
+    device_type = (device.get('device_type') or device.get('type') or 'unknown').lower()
+    priority = config['priority_by_type'].get(device_type, 'low')
+
+    hostname = (device.get('hostname') or '').lower()
+    if any(keyword in hostname for keyword in config['core_keywords']):
+        priority = _bump(priority)
+    if (device.get('maintenance_urgency') or 'low') in ('high', 'critical'):
+        priority = _bump(priority)
+    return priority
+
+
+def get_base_interval(device: Dict, config: Dict = None) -> float:
+    """Intervalle de vérification de base (secondes) selon la priorité"""
+    config = config or MONITORING_CONFIG['adaptive_scheduling']
+    return config['intervals'].get(get_priority_level(device, config), config['intervals']['medium'])
+
+
+class AdaptiveScheduler:
+    """File de priorité des prochaines vérifications (tas trié par échéance)"""
+
+    def __init__(self, config: Dict = None):
+        self.config = config or MONITORING_CONFIG['adaptive_scheduling']
+        self.entries = {}   # (ip, vérification) -> état de l'échéance
+        self._heap = []     # (échéance, numéro, clé) ; les entrées périmées sont ignorées au dépilage
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _push(self, key: Tuple[str, str], due: float):
+        entry = self.entries[key]
+        entry['due'] = due
+        entry['seq'] = next(self._counter)
+        heapq.heappush(self._heap, (due, entry['seq'], key))
+
+    def sync(self, devices: Iterable[Dict], checks: Iterable[str], now: float = None):
+        """
+        Aligne la file sur la liste des équipements : ajoute les nouveaux couples (dus tout de suite),
+        retire les équipements disparus et recalcule l'intervalle de base des autres
+        """
+        now = time.time() if now is None else now
+        checks = list(checks)
+        with self._lock:
+            wanted = set()
+            for device in devices:
+                base = get_base_interval(device, self.config)
+                for check in checks:
+                    key = (device['ip'], check)
+                    wanted.add(key)
+                    entry = self.entries.get(key)
+                    if entry is None:
+                        self.entries[key] = {
+                            'base': base, 'interval': base, 'priority': get_priority_level(device, self.config),
+                            'streak': 0, 'failures': 0, 'seen_up': False, 'last_status': None
+                        }
+                        self._push(key, now)
+                    elif entry['base'] != base:
+                        entry['interval'] = entry['interval'] * base / entry['base']
+                        entry['base'] = base
+                        entry['priority'] = get_priority_level(device, self.config)
+            for key in set(self.entries) - wanted:
+                del self.entries[key]
+
+    def pop_due(self, now: float = None) -> List[Tuple[str, str]]:
+        """Retire et retourne les couples dont l'échéance est passée (à replanifier via record)"""
+        now = time.time() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, seq, key = heapq.heappop(self._heap)
+                entry = self.entries.get(key)
+                if entry is not None and entry['seq'] == seq:
+                    entry['seq'] = None
+                    due.append(key)
+        return due
+
+    def record(self, key: Tuple[str, str], status: str = None, now: float = None) -> float:
+        """
+        Enregistre le résultat d'une vérification et replanifie le couple
+
+        Un échec ('down'/'timeout' d'une vérification déjà vue active) divise l'intervalle ;
+        des résultats identiques consécutifs l'allongent, jusqu'à max_stretch x la base.
+        Sans statut (vérification non exécutée), l'intervalle courant est conservé.
+
+        Returns:
+            float: intervalle retenu (secondes)
+        """
+        now = time.time() if now is None else now
+        config = self.config
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return 0
+            if status is not None:
+                failed = status != 'up' and entry['seen_up']
+                if failed:
+                    entry['failures'] += 1
+                    entry['streak'] = 0
+                    entry['interval'] = max(entry['interval'] * config['failure_factor'], config['min_interval'])
+                else:
+                    if status == entry['last_status']:
+                        entry['streak'] += 1
+                    else:
+                        entry['streak'] = 1
+                    if entry['streak'] >= config['stable_after']:
+                        entry['interval'] = min(entry['interval'] * config['stable_factor'],
+                                                entry['base'] * config['max_stretch'])
+                    elif status == 'up' and entry['interval'] < entry['base']:
+                        # Rétablissement : retour progressif vers l'intervalle de base
+                        entry['interval'] = min(entry['interval'] / config['failure_factor'], entry['base'])
+                entry['seen_up'] = entry['seen_up'] or status == 'up'
+                entry['last_status'] = status
+            self._push(key, now + entry['interval'])
+            return entry['interval']
+
+    def seconds_until_next(self, now: float = None) -> float:
+        """Délai avant la prochaine échéance (None si la file est vide)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            while self._heap:
+                due, seq, key = self._heap[0]
+                entry = self.entries.get(key)
+                if entry is not None and entry['seq'] == seq:
+                    return max(due - now, 0)
+                heapq.heappop(self._heap)
+        return None
+
+    def get_stats(self, now: float = None) -> Dict:
+        """Résumé de la planification (par priorité et couples les plus proches)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            by_priority = {}
+            for entry in self.entries.values():
+                by_priority[entry['priority']] = by_priority.get(entry['priority'], 0) + 1
+            scheduled = sorted((e['due'], key) for key, e in self.entries.items() if e['seq'] is not None)
+            return {
+                'pairs': len(self.entries),
+                'by_priority': by_priority,
+                'shortened': sum(1 for e in self.entries.values() if e['interval'] < e['base']),
+                'stretched': sum(1 for e in self.entries.values() if e['interval'] > e['base']),
+                'next_due': [
+                    {'ip': key[0], 'check': key[1], 'in_seconds': round(max(due - now, 0), 1),
+                     'interval': round(self.entries[key]['interval'], 1)}
+                    for due, key in scheduled[:10]
+                ]
+            }
@@ -11,12 +11,14 @@ import platform
 import re
 import threading
 import time
-import json
 import requests
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 
+from mac_vendors import get_vendor_database
+from device_rules import DEVICE_SIGNATURES, get_device_rule_engine
+
 # Configuration du PATH pour Nmap sur Windows
 if platform.system() == "Windows":
     nmap_paths = [
@@ -48,89 +50,16 @@ class ProductionNetworkScanner:
             print(f"❌ Erreur initialisation Nmap: {e}")
             print("⚠️ Mode fallback activé")
         
-        # Base de données des types d'équipements (étendue)
-        self.device_signatures = {
-            'router': {
-                'hostnames': ['router', 'rt-', 'gw-', 'gateway', 'firewall', 'fw-', 'pfsense', 'opnsense'],
-                'vendors': ['cisco', 'netgear', 'linksys', 'asus', 'tp-link', 'dlink', 'ubiquiti'],
-                'ports': [22, 23, 80, 443, 8080, 8443]
-            },
-            'switch': {
-                'hostnames': ['switch', 'sw-', 'hub'],
-                'vendors': ['cisco', 'hp', 'dell', 'netgear', 'tp-link'],
-                'ports': [22, 23, 80, 443, 161, 8080]
-            },
-            'server': {
-                'hostnames': ['server', 'srv', 'dc-', 'ad-', 'dns-', 'dhcp-', 'web-', 'mail-', 'db-'],
-                'vendors': ['dell', 'hp', 'lenovo', 'supermicro', 'intel'],
-                'ports': [22, 80, 443, 3389, 5985, 5986, 25, 993, 1433, 3306]
-            },
-            'printer': {
-                'hostnames': ['printer', 'print', 'hp-', 'canon-', 'epson-', 'brother-'],
-                'vendors': ['hewlett packard', 'canon', 'epson', 'brother', 'lexmark', 'xerox'],
-                'ports': [80, 443, 515, 631, 9100]
-            },
-            'nas': {
-                'hostnames': ['nas-', 'storage-', 'synology-', 'qnap-'],
-                'vendors': ['synology', 'qnap', 'netgear', 'buffalo'],
-                'ports': [80, 443, 22, 21, 139, 445, 5000, 5001]
-            },
-            'camera': {
-                'hostnames': ['camera', 'cam-', 'ipcam-', 'cctv-'],
-                'vendors': ['hikvision', 'dahua', 'axis', 'bosch', 'samsung'],
-                'ports': [80, 443, 554, 8080, 8000]
-            },
-            'phone': {
-                'hostnames': ['phone-', 'voip-', 'sip-', 'tel-'],
-                'vendors': ['cisco', 'polycom', 'yealink', 'grandstream', 'avaya'],
-                'ports': [80, 443, 5060, 5061, 8080]
-            },
-            'automation': {
-                'hostnames': ['plc-', 'hmi-', 'scada-', 'automate-'],
-                'vendors': ['siemens', 'schneider', 'allen bradley', 'omron'],
-                'ports': [80, 443, 102, 502, 44818]
-            },
-            'workstation': {
-                'hostnames': ['pc-', 'ws-', 'desktop-', 'laptop-', 'poste-'],
-                'vendors': ['dell', 'hp', 'lenovo', 'asus', 'acer'],
-                'ports': [135, 139, 445, 3389, 5985]
-            }
-        }
+        # Base de données des types d'équipements (étendue), compilée par le moteur de règles
+        self.device_signatures = DEVICE_SIGNATURES
+        self.rule_engine = get_device_rule_engine()
         
         # Charger la base des vendors MAC (OUI)
         self._load_mac_vendors()
     
     def _load_mac_vendors(self):
-        """Charge la base de données des vendors MAC"""
-        try:
-            # Essayer de charger depuis un fichier local
-            if os.path.exists('oui_vendors.json'):
-                with open('oui_vendors.json', 'r') as f:
-                    self.mac_vendors = json.load(f)
-                print("✅ Base vendors MAC chargée (fichier local)")
-                return
-                
-            # Sinon, utiliser une base simplifiée
-            self.mac_vendors = {
-                "00:00:5E": "IANA",
-                "00:50:56": "VMware",
-                "08:00:27": "Oracle VirtualBox",
-                "00:0C:29": "VMware",
-                "00:1B:21": "Intel",
-                "00:E0:4C": "Realtek",
-                "00:90:F5": "Cisco",
-                "00:1F:45": "Netgear",
-                "B8:27:EB": "Raspberry Pi",
-                "DC:A6:32": "Raspberry Pi",
-                "28:C6:8E": "TP-Link",
-                "F4:F2:6D": "Samsung",
-                # Ajouter plus si nécessaire
-            }
-            print("✅ Base vendors MAC simplifiée chargée")
-            
-        except Exception as e:
-            print(f"⚠️ Erreur chargement vendors MAC: {e}")
-            self.mac_vendors = {}
+        """Attache l'index partagé des vendors MAC (chargé à la première recherche)"""
+        self.mac_vendors = get_vendor_database()
     
     def discover_local_networks(self):
         """Découvre automatiquement les réseaux locaux"""
@@ -291,8 +220,7 @@ class ProductionNetworkScanner:
                 
                 # Vendor MAC
                 if device_info['mac']:
-                    mac_prefix = device_info['mac'][:8].upper()
-                    device_info['mac_vendor'] = self.mac_vendors.get(mac_prefix, 'Unknown')
+                    device_info['mac_vendor'] = self.mac_vendors.get(device_info['mac'], 'Unknown')
             
             # 3. Scan de ports (si mode agressif)
             if aggressive:
@@ -349,43 +277,7 @@ class ProductionNetworkScanner:
     
     def _detect_device_type_advanced(self, hostname, mac_vendor, ports):
         """Détection avancée du type d'équipement"""
-        scores = {}
-        hostname_lower = hostname.lower()
-        vendor_lower = mac_vendor.lower() if mac_vendor else ''
-        
-        # Analyser chaque type d'équipement
-        for device_type, signatures in self.device_signatures.items():
-            score = 0
-            
-            # Score basé sur le hostname
-            for pattern in signatures['hostnames']:
-                if pattern in hostname_lower:
-                    score += 30
-                    break
-            
-            # Score basé sur le vendor MAC
-            for vendor in signatures['vendors']:
-                if vendor in vendor_lower:
-                    score += 25
-                    break
-            
-            # Score basé sur les ports ouverts
-            if ports:
-                matching_ports = set(ports) & set(signatures['ports'])
-                if matching_ports:
-                    score += len(matching_ports) * 15
-            
-            scores[device_type] = score
-        
-        # Déterminer le type avec le meilleur score
-        if scores:
-            best_type = max(scores.keys(), key=lambda k: scores[k])
-            confidence = min(scores[best_type], 100)
-            
-            if confidence > 20:
-                return best_type, confidence
-        
-        return 'Unknown', 0
+        return self.rule_engine.score_signatures(hostname, mac_vendor, ports)
     
     def _guess_os(self, hostname, ports):
         """Estimation de l'OS basée sur les indices"""
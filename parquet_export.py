@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Export Parquet incrémental de l'historique
+Les lignes ajoutées depuis le dernier export (filigrane par identifiant) sont écrites en fichiers
+Parquet typés, partitionnés par jour et par réseau (dataset/day=AAAA-MM-JJ/network=10.0.1.0_24/),
+lisibles directement par DuckDB ou pandas sans toucher aux bases en production
+"""
+
+import ipaddress
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import storage
+from config_advanced import PERFORMANCE_CONFIG
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+PARQUET_CONFIG = PERFORMANCE_CONFIG['parquet_export']
+
+# Jeux de données : base source, requête paginée (id > ? ... LIMIT ?), colonnes typées,
+# colonne de date (partition jour) et colonne d'adresse IP (partition réseau)
+DATASETS = {
+    'scan_history': {
+        'database': 'main',
+        'query': '''
+            SELECT s.id, s.device_id, d.ip, s.is_online, s.response_time, s.packet_loss,
+                   s.scan_duration, s.error_count, s.timestamp
+            FROM scan_history s LEFT JOIN device d ON d.id = s.device_id
+            WHERE s.id > ? ORDER BY s.id LIMIT ?
+        ''',
+        'columns': [('id', 'int64'), ('device_id', 'int64'), ('device_ip', 'string'), ('is_online', 'bool'),
+                    ('response_time', 'float64'), ('packet_loss', 'float64'), ('scan_duration', 'float64'),
+                    ('error_count', 'int64'), ('timestamp', 'timestamp')],
+        'time_column': 'timestamp',
+        'ip_column': 'device_ip'
+    },
+    'service_monitoring': {
+        'database': 'monitoring',
+        'query': '''
+            SELECT id, device_ip, service_name, port, status, response_time, last_check, error_message
+            FROM service_monitoring WHERE id > ? ORDER BY id LIMIT ?
+        ''',
+        'columns': [('id', 'int64'), ('device_ip', 'string'), ('service_name', 'string'), ('port', 'int64'),
+                    ('status', 'string'), ('response_time', 'float64'), ('last_check', 'timestamp'),
+                    ('error_message', 'string')],
+        'time_column': 'last_check',
+        'ip_column': 'device_ip'
+    },
+    'bandwidth_usage': {
+        'database': 'monitoring',
+        'query': '''
+            SELECT id, device_ip, interface, bytes_sent, bytes_received, packets_sent, packets_received, timestamp
+            FROM bandwidth_usage WHERE id > ? ORDER BY id LIMIT ?
+        ''',
+        'columns': [('id', 'int64'), ('device_ip', 'string'), ('interface', 'string'), ('bytes_sent', 'int64'),
+                    ('bytes_received', 'int64'), ('packets_sent', 'int64'), ('packets_received', 'int64'),
+                    ('timestamp', 'timestamp')],
+        'time_column': 'timestamp',
+        'ip_column': 'device_ip'
+    }
+}
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """Dates SQLite (texte ISO, avec espace ou 'T') vers datetime"""
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def network_partition(ip: Optional[str], prefix: int = 24) -> str:
+    """Réseau de l'adresse pour le nom de partition (10.0.1.0_24), 'other' si ce n'est pas une IPv4"""
+    try:
+        network = ipaddress.ip_network(f"{ip}/{prefix}", strict=False)
+    except (ValueError, TypeError):
+        return 'other'
+    if network.version != 4:
+        return 'other'
+    return f"{network.network_address}_{prefix}"
+
+
+class ParquetExporter:
+    """Exporte de façon incrémentale les tables d'historique en Parquet partitionné"""
+
+    def __init__(self, databases: Dict[str, str], config: Optional[Dict] = None):
+        """
+        Args:
+            databases (dict): nom logique de la base ('main', 'monitoring') -> chemin du fichier SQLite
+            config (dict): configuration de l'export (PARQUET_CONFIG par défaut)
+        """
+        self.databases = databases
+        self.config = config or PARQUET_CONFIG
+        self.output_dir = self.config['output_dir']
+        self.watermark_file = os.path.join(self.output_dir, '_watermarks.json')
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        return pa is not None
+
+    def load_watermarks(self) -> Dict:
+        try:
+            with open(self.watermark_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_watermarks(self, watermarks: Dict):
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.watermark_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(watermarks, f, indent=2)
+        os.replace(tmp_path, self.watermark_file)
+
+    def _schema(self, dataset: Dict):
+        types = {'int64': pa.int64(), 'float64': pa.float64(), 'string': pa.string(),
+                 'bool': pa.bool_(), 'timestamp': pa.timestamp('us')}
+        return pa.schema([(name, types[kind]) for name, kind in dataset['columns']])
+
+    def _write_partitions(self, name: str, dataset: Dict, rows: List, schema) -> List[str]:
+        """Répartit un lot par (jour, réseau) et écrit un fichier par partition"""
+        columns = [column for column, _ in dataset['columns']]
+        time_index = columns.index(dataset['time_column'])
+        ip_index = columns.index(dataset['ip_column'])
+        timestamp_indexes = [i for i, (_, kind) in enumerate(dataset['columns']) if kind == 'timestamp']
+        bool_indexes = [i for i, (_, kind) in enumerate(dataset['columns']) if kind == 'bool']
+
+        partitions = defaultdict(list)
+        for row in rows:
+            row = list(row)
+            for index in timestamp_indexes:
+                row[index] = parse_timestamp(row[index])
+            # SQLite stocke les booléens en 0/1
+            for index in bool_indexes:
+                row[index] = None if row[index] is None else bool(row[index])
+            day = row[time_index].strftime('%Y-%m-%d') if row[time_index] else 'unknown'
+            partitions[(day, network_partition(row[ip_index], self.config['network_prefix']))].append(row)
+
+        written = []
+        for (day, network), partition_rows in partitions.items():
+            directory = os.path.join(self.output_dir, name, f"day={day}", f"network={network}")
+            os.makedirs(directory, exist_ok=True)
+            # Nommé d'après le premier identifiant : une reprise après interruption réécrit le même fichier
+            path = os.path.join(directory, f"part-{partition_rows[0][0]:012d}.parquet")
+            table = pa.Table.from_arrays(
+                [pa.array([row[i] for row in partition_rows], type=schema.field(i).type) for i in range(len(columns))],
+                schema=schema
+            )
+            tmp_path = path + '.tmp'
+            pq.write_table(table, tmp_path, compression=self.config['compression'])
+            os.replace(tmp_path, path)
+            written.append(path)
+        return written
+
+    def export_dataset(self, name: str, last_id: int) -> Dict:
+        """Exporte les lignes d'identifiant > last_id ; retourne le nombre de lignes, fichiers et le filigrane"""
+        dataset = DATASETS[name]
+        path = self.databases.get(dataset['database'])
+        result = {'rows': 0, 'files': 0, 'watermark': last_id}
+        if not path or not os.path.exists(path):
+            return result
+
+        schema = self._schema(dataset)
+        conn = storage.connect(path)
+        try:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                (name,)).fetchone():
+                return result
+            while True:
+                rows = conn.execute(dataset['query'], (result['watermark'], self.config['chunk_size'])).fetchall()
+                if not rows:
+                    break
+                result['files'] += len(self._write_partitions(name, dataset, rows, schema))
+                result['rows'] += len(rows)
+                result['watermark'] = rows[-1][0]
+                # Filigrane enregistré après chaque lot écrit : un export interrompu reprend au lot suivant
+                watermarks = self.load_watermarks()
+                watermarks[name] = result['watermark']
+                self._save_watermarks(watermarks)
+                if len(rows) < self.config['chunk_size']:
+                    break
+        finally:
+            conn.close()
+        return result
+
+    def run(self) -> Dict:
+        """
+        Exporte les nouvelles lignes de chaque jeu de données configuré
+
+        Returns:
+            dict: rapport par jeu de données (lignes, fichiers, filigrane) et durée
+        """
+        if not self.available():
+            logger.warning("pyarrow non installé : export Parquet ignoré")
+            return {'success': False, 'error': 'pyarrow non installé'}
+
+        with self._lock:
+            start_time = time.time()
+            watermarks = self.load_watermarks()
+            report = {'success': True, 'datasets': {}}
+            for name in self.config['datasets']:
+                try:
+                    report['datasets'][name] = self.export_dataset(name, watermarks.get(name, 0))
+                except Exception as e:
+                    logger.error(f"Erreur export Parquet {name}: {e}")
+                    report['datasets'][name] = {'error': str(e)}
+                    report['success'] = False
+            report['duration'] = round(time.time() - start_time, 3)
+            return report
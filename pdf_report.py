@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Rendu PDF des rapports
+Les tableaux (équipements, alertes) sont écrits ligne à ligne avec saut de page et répétition
+des en-têtes. Les graphiques et les documents sont mis en cache par empreinte des données :
+une génération planifiée dont les données n'ont pas changé réutilise le rendu précédent
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+from config_advanced import REPORTS_ADVANCED_CONFIG
+from report_data import built_parts
+
+try:
+    from matplotlib.figure import Figure
+except ImportError:
+    Figure = None
+
+PDF_CONFIG = REPORTS_ADVANCED_CONFIG['pdf_reports']
+
+# À incrémenter quand la mise en page change : invalide les documents en cache
+LAYOUT_VERSION = 1
+
+# Couleurs de remplissage des lignes selon l'état
+ROW_FILLS = {
+    'online': (200, 255, 200),
+    'offline': (255, 200, 200),
+    'high': (255, 220, 200),
+    'critical': (255, 190, 190)
+}
+
+
+def data_hash(payload) -> str:
+    """Empreinte stable d'une structure de données (clés triées, dates en texte)"""
+    encoded = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def pdf_text(value) -> str:
+    """Texte compatible avec les polices PDF standard (latin-1)"""
+    return str(value if value is not None else 'N/A').encode('latin-1', 'replace').decode('latin-1')
+
+
+class RenderCache:
+    """Fichiers rendus (graphiques, documents) indexés par empreinte des données"""
+
+    def __init__(self, cache_dir: str, max_entries: int = 200):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, kind: str, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, kind, f"{key}{suffix}")
+
+    def get(self, kind: str, key: str, suffix: str) -> Optional[str]:
+        path = self.path(kind, key, suffix)
+        if os.path.exists(path):
+            os.utime(path)  # Dernière utilisation : les entrées les plus anciennes sont purgées en premier
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def get_or_render(self, kind: str, key: str, render: Callable[[str], None], suffix: str = '.png') -> str:
+        """
+        Chemin du fichier rendu pour cette empreinte, rendu seulement s'il est absent du cache
+
+        Args:
+            key: empreinte des données (voir data_hash)
+            render: render(chemin) écrit le fichier
+        """
+        cached = self.get(kind, key, suffix)
+        if cached:
+            return cached
+        path = self.path(kind, key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp{suffix}"
+        render(tmp_path)
+        os.replace(tmp_path, path)
+        self._prune(kind)
+        return path
+
+    def _prune(self, kind: str):
+        directory = os.path.join(self.cache_dir, kind)
+        with self._lock:
+            try:
+                entries = [os.path.join(directory, name) for name in os.listdir(directory) if '.tmp' not in name]
+                entries.sort(key=os.path.getmtime, reverse=True)
+                for path in entries[self.max_entries:]:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+class ReportPDF(FPDF):
+    """Document FPDF avec bandeau et pied de page répétés sur chaque page"""
+
+    def __init__(self, title: str, fingerprint: str):
+        super().__init__(orientation='P', unit='mm', format='A4')
+        self.report_title = pdf_text(title)
+        self.fingerprint = fingerprint
+        self.set_auto_page_break(auto=True, margin=18)
+
+    def header(self):
+        if self.page_no() == 1:
+            return
+        self.set_font('helvetica', 'I', 8)
+        self.set_text_color(100, 100, 100)
+        self.cell(0, 6, self.report_title, align='R', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        self.set_text_color(0, 0, 0)
+        self.ln(2)
+
+    def footer(self):
+        self.set_y(-14)
+        self.set_font('helvetica', 'I', 8)
+        self.set_text_color(100, 100, 100)
+        self.cell(0, 5, pdf_text(f"Central Danone - supervision réseau - données {self.fingerprint[:12]}"))
+        self.cell(0, 5, f"Page {self.page_no()}/{{nb}}", align='R')
+        self.set_text_color(0, 0, 0)
+
+
+class PDFReportEngine:
+    """Rendu complet d'un rapport (résumé, graphiques de tendance, tous les équipements et alertes)"""
+
+    def __init__(self, cache_dir: Optional[str] = None, config: Optional[Dict] = None):
+        self.config = config or PDF_CONFIG
+        self.cache = RenderCache(cache_dir or self.config['cache_dir'], self.config['max_cache_entries'])
+        self._chart_lock = threading.Lock()
+
+    @staticmethod
+    def charts_available() -> bool:
+        return Figure is not None
+
+    def fingerprint(self, data: Dict, report_type: str) -> str:
+        """Empreinte de ce qui est affiché (l'heure de génération et les bornes exactes n'y figurent pas)"""
+        content = {k: v for k, v in data.items() if k != 'metadata'}
+        return data_hash([LAYOUT_VERSION, report_type, data.get('metadata', {}).get('period'), content])
+
+    def render(self, file_path: str, data: Dict, report_type: str) -> Dict:
+        """
+        Écrit le rapport PDF
+
+        Returns:
+            dict: empreinte des données, nombre de pages (None si repris du cache) et utilisation du cache
+        """
+        fingerprint = self.fingerprint(data, report_type)
+        pages = {}
+
+        def build(path):
+            pdf = self._build(data, report_type, fingerprint)
+            pdf.output(path)
+            pages['count'] = pdf.pages_count
+
+        document = self.cache.get_or_render('documents', fingerprint, build, '.pdf')
+        shutil.copyfile(document, file_path)
+        return {'fingerprint': fingerprint, 'cached': 'count' not in pages, 'pages': pages.get('count')}
+
+    def _build(self, data: Dict, report_type: str, fingerprint: str) -> ReportPDF:
+        metadata = data['metadata']
+        summary = data['summary']
+        pdf = ReportPDF(f"Rapport {report_type} - {metadata['period']}", fingerprint)
+        pdf.add_page()
+
+        pdf.set_font('helvetica', 'B', 18)
+        pdf.cell(0, 14, pdf_text(f"RAPPORT {report_type.upper()} - CENTRAL DANONE"), align='C',
+                 new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_font('helvetica', '', 11)
+        pdf.cell(0, 7, pdf_text(f"Période : {metadata['period']}"), align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(6)
+
+        self._section_title(pdf, 'RÉSUMÉ EXÉCUTIF')
+        self._key_values(pdf, [
+            ('Total équipements', summary['total_devices']),
+            ('Équipements en ligne', summary['online_devices']),
+            ('Équipements hors ligne', summary['offline_devices']),
+            ('Alertes actives', summary['active_alerts']),
+            ('Score de santé moyen', _metric(summary.get('health_score_avg'), '%')),
+            ('Scans sur la période', summary.get('scans_count')),
+            ('Disponibilité mesurée', _metric(summary.get('availability'), '%')),
+            ('Temps de réponse moyen / p95', f"{_metric(summary.get('avg_response_time'), ' ms')} / "
+                                             f"{_metric(summary.get('p95_response_time'), ' ms')}")
+        ])
+
+        charts = self._charts(data)
+        if charts:
+            self._section_title(pdf, 'TENDANCES')
+            for chart in charts:
+                if pdf.will_page_break(70):
+                    pdf.add_page()
+                pdf.image(chart, w=pdf.epw)
+                pdf.ln(4)
+
+        # Parties non construites (sections demandées) : omises plutôt que présentées vides
+        parts = built_parts(data)
+        if 'devices' in parts:
+            devices = data.get('devices', [])
+            self._section_title(pdf, f"ÉQUIPEMENTS ({len(devices)})")
+            self.stream_table(
+                pdf,
+                ['Adresse IP', "Nom d'hôte", 'Type', 'Statut', 'Santé', 'Dernière vue'],
+                [28, 50, 28, 24, 18, 32],
+                ((d['ip'], d['hostname'], d.get('type'), d['status'], _metric(d.get('health_score'), '%'),
+                  d['last_seen']) for d in devices),
+                row_fill=lambda row: 'online' if row[3] in ('En ligne', 'online') else 'offline'
+            )
+
+        if 'alerts' in parts:
+            alerts = data.get('alerts', [])
+            self._section_title(pdf, f"ALERTES DE LA PÉRIODE ({len(alerts)})")
+            if alerts:
+                self.stream_table(
+                    pdf,
+                    ['Équipement', 'Type', 'Message', 'Priorité', 'Créée le', 'Résolue le'],
+                    [26, 22, 56, 16, 30, 30],
+                    ((a['device_ip'], a['type'], a['message'], a['priority'], a['created_at'],
+                      a.get('resolved_at') or 'Non résolue') for a in alerts),
+                    row_fill=lambda row: row[3] if row[3] in ROW_FILLS else None
+                )
+            else:
+                pdf.set_font('helvetica', '', 10)
+                pdf.cell(0, 7, pdf_text('Aucune alerte sur la période.'), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        return pdf
+
+    def _section_title(self, pdf: FPDF, title: str):
+        if pdf.will_page_break(20):
+            pdf.add_page()
+        pdf.ln(2)
+        pdf.set_font('helvetica', 'B', 13)
+        pdf.cell(0, 9, pdf_text(title), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    def _key_values(self, pdf: FPDF, items: List):
+        pdf.set_font('helvetica', '', 10)
+        for label, value in items:
+            pdf.cell(70, 7, pdf_text(label), border=1)
+            pdf.cell(60, 7, pdf_text(value), border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(4)
+
+    def stream_table(self, pdf: FPDF, headers: Sequence[str], widths: Sequence[float], rows: Iterable[Sequence],
+                     row_fill: Optional[Callable[[Sequence], Optional[str]]] = None, line_height: float = 6) -> int:
+        """
+        Tableau écrit ligne à ligne : en-têtes répétés à chaque nouvelle page, cellules tronquées à leur largeur
+
+        Returns:
+            int: nombre de lignes écrites
+        """
+        def draw_headers():
+            pdf.set_font('helvetica', 'B', 9)
+            pdf.set_fill_color(204, 204, 204)
+            for header, width in zip(headers, widths):
+                pdf.cell(width, line_height + 1, pdf_text(header), border=1, fill=True)
+            pdf.ln()
+            pdf.set_font('helvetica', '', 8)
+
+        draw_headers()
+        count = 0
+        for row in rows:
+            if pdf.will_page_break(line_height):
+                pdf.add_page()
+                draw_headers()
+            fill = ROW_FILLS.get(row_fill(row)) if row_fill else None
+            if fill:
+                pdf.set_fill_color(*fill)
+            for value, width in zip(row, widths):
+                pdf.cell(width, line_height, _fit(pdf, pdf_text(value), width), border=1, fill=bool(fill))
+            pdf.ln()
+            count += 1
+        pdf.ln(4)
+        return count
+
+    def _charts(self, data: Dict) -> List[str]:
+        """Images des graphiques (rendues une seule fois par jeu de données)"""
+        if not self.charts_available():
+            return []
+        charts = []
+        points = [p for p in data.get('trends', []) if p.get('samples')]
+        if len(points) >= 2:
+            series = [(p['timestamp'], p.get('availability'), p.get('avg_response_time'), p.get('p95_response_time'))
+                      for p in points]
+            charts.append(self.cache.get_or_render('charts', data_hash(['trend', self.config['chart_dpi'], series]),
+                                                   lambda path: self._render_trend_chart(series, path)))
+        counts = {}
+        for device in data.get('devices', []):
+            online = device['status'] in ('En ligne', 'online')
+            entry = counts.setdefault(device.get('type') or 'inconnu', [0, 0])
+            entry[0 if online else 1] += 1
+        if counts:
+            by_type = sorted(counts.items())
+            charts.append(self.cache.get_or_render('charts', data_hash(['types', self.config['chart_dpi'], by_type]),
+                                                   lambda path: self._render_types_chart(by_type, path)))
+        return charts
+
+    def _render_trend_chart(self, series: List, path: str):
+        labels = [timestamp[5:16].replace('T', ' ') for timestamp, _, _, _ in series]
+        positions = range(len(series))
+        with self._chart_lock:
+            figure = Figure(figsize=(8, 3.6), dpi=self.config['chart_dpi'])
+            availability, latency = figure.subplots(2, 1, sharex=True)
+            availability.plot(positions, [s[1] for s in series], color='#2e7d32')
+            availability.set_ylabel('Disponibilité (%)')
+            availability.set_ylim(0, 105)
+            availability.grid(alpha=0.3)
+            latency.plot(positions, [s[2] for s in series], label='moyen', color='#1565c0')
+            latency.plot(positions, [s[3] for s in series], label='p95', color='#ef6c00', linestyle='--')
+            latency.set_ylabel('Réponse (ms)')
+            latency.legend(loc='upper left', fontsize=7)
+            latency.grid(alpha=0.3)
+            step = max(len(labels) // 8, 1)
+            latency.set_xticks(list(positions)[::step])
+            latency.set_xticklabels(labels[::step], rotation=30, fontsize=7, ha='right')
+            figure.tight_layout()
+            figure.savefig(path, format='png')
+
+    def _render_types_chart(self, by_type: List, path: str):
+        names = [name for name, _ in by_type]
+        with self._chart_lock:
+            figure = Figure(figsize=(8, 3), dpi=self.config['chart_dpi'])
+            axes = figure.subplots()
+            axes.bar(names, [online for _, (online, _) in by_type], color='#66bb6a', label='En ligne')
+            axes.bar(names, [offline for _, (_, offline) in by_type], bottom=[online for _, (online, _) in by_type],
+                     color='#ef5350', label='Hors ligne')
+            axes.set_ylabel('Équipements')
+            axes.legend(fontsize=7)
+            axes.tick_params(axis='x', labelsize=7, rotation=30)
+            figure.tight_layout()
+            figure.savefig(path, format='png')
+
+
+def _metric(value, unit: str = '') -> str:
+    return f"{value:.1f}{unit}" if isinstance(value, (int, float)) else 'N/A'
+
+
+def _fit(pdf: FPDF, text: str, width: float) -> str:
+    """Tronque le texte pour qu'il tienne dans la cellule"""
+    if pdf.get_string_width(text) <= width - 2:
+        return text
+    while text and pdf.get_string_width(text + '...') > width - 2:
+        text = text[:-1]
+    return text + '...'
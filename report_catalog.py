@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Catalogue des rapports
+Les listes et statistiques sont lues dans la table `report` (pagination, filtres) au lieu de parcourir
+le dossier des rapports à chaque requête. Un rapprochement périodique garde la table cohérente avec
+le disque, les fichiers identiques (empreinte SHA-256) ne sont stockés qu'une fois et les rapports
+plus anciens que la durée de rétention sont supprimés
+"""
+
+import hashlib
+import math
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+
+from config_advanced import REPORTS_ADVANCED_CONFIG
+from report_delivery import remove_variants
+
+CATALOG_CONFIG = REPORTS_ADVANCED_CONFIG['report_catalog']
+
+# Extension -> format enregistré dans Report.format
+FORMATS_BY_EXTENSION = {'.pdf': 'pdf', '.xlsx': 'excel', '.html': 'html', '.csv': 'csv', '.json': 'json'}
+
+# Statuts dont le fichier peut être supprimé par la rétention
+FINISHED_STATUSES = ('completed', 'failed', 'missing')
+
+REPORT_NAME = re.compile(r'^rapport_(?P<type>[a-z]+)_\d{8}_\d{6}')
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Empreinte SHA-256 d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def describe_file(filename: str) -> Tuple[str, str]:
+    """(type, format) d'un fichier de rapport d'après son nom (rapport_<type>_<horodatage>.<ext>, ai_report_...)"""
+    extension = os.path.splitext(filename)[1].lower()
+    match = REPORT_NAME.match(filename)
+    if match:
+        report_type = match.group('type')
+    elif filename.startswith('ai_report_'):
+        report_type = 'ai'
+    else:
+        report_type = 'custom'
+    return report_type, FORMATS_BY_EXTENSION.get(extension, extension.lstrip('.'))
+
+
+def _same_path(a: Optional[str], b: Optional[str]) -> bool:
+    return bool(a and b) and os.path.abspath(a) == os.path.abspath(b)
+
+
+class ReportCatalog:
+    """Requêtes et maintenance du catalogue (table Report)"""
+
+    def __init__(self, table, config: Optional[Dict] = None):
+        self.table = table
+        self.config = config or CATALOG_CONFIG
+        self.reports_dir = self.config['reports_dir']
+
+    def _filtered(self, query, filters: Dict):
+        t = self.table
+        for column in ('type', 'format', 'status'):
+            if filters.get(column):
+                query = query.where(t.c[column] == filters[column])
+        if filters.get('q'):
+            pattern = f"%{filters['q']}%"
+            query = query.where(or_(t.c.name.ilike(pattern), t.c.filename.ilike(pattern), t.c.description.ilike(pattern)))
+        if filters.get('date_from'):
+            query = query.where(t.c.created_at >= filters['date_from'])
+        if filters.get('date_to'):
+            query = query.where(t.c.created_at < filters['date_to'])
+        return query
+
+    def list(self, connection, filters: Optional[Dict] = None, page: int = 1,
+             per_page: Optional[int] = None) -> Tuple[List[Dict], Dict]:
+        """
+        Page du catalogue, du plus récent au plus ancien
+
+        Args:
+            filters (dict): type, format, status, q (recherche dans le nom, le fichier et la description),
+                date_from / date_to (date de création)
+
+        Returns:
+            tuple: (lignes, pagination {page, per_page, total, pages})
+        """
+        filters = filters or {}
+        per_page = max(1, min(per_page or self.config['per_page'], self.config['max_per_page']))
+        page = max(1, page)
+        total = connection.execute(self._filtered(select(func.count()).select_from(self.table), filters)).scalar()
+        rows = connection.execute(
+            self._filtered(select(self.table), filters)
+            .order_by(self.table.c.created_at.desc(), self.table.c.id.desc())
+            .limit(per_page).offset((page - 1) * per_page)
+        ).mappings().all()
+        pages = math.ceil(total / per_page) if total else 0
+        return [dict(row) for row in rows], {'page': page, 'per_page': per_page, 'total': total, 'pages': pages}
+
+    def stats(self, connection, now: Optional[datetime] = None) -> Dict:
+        """Compteurs du catalogue ; la taille totale compte une seule fois les fichiers partagés"""
+        t = self.table
+        now = now or datetime.now()
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        by_status = dict(connection.execute(select(t.c.status, func.count()).group_by(t.c.status)).all())
+        by_format = dict(connection.execute(select(t.c.format, func.count()).group_by(t.c.format)).all())
+        files = select(t.c.file_path, func.max(t.c.file_size).label('size')).where(
+            t.c.status == 'completed', t.c.file_path.isnot(None)
+        ).group_by(t.c.file_path).subquery()
+        total_size = connection.execute(select(func.coalesce(func.sum(files.c.size), 0))).scalar()
+        return {
+            'total_reports': sum(by_status.values()),
+            'reports_this_month': connection.execute(
+                select(func.count()).select_from(t).where(t.c.created_at >= month_start)
+            ).scalar(),
+            'scheduled': by_status.get('scheduled', 0),
+            'processing': by_status.get('processing', 0),
+            'by_status': by_status,
+            'by_format': by_format,
+            'total_size_mb': round(total_size / (1024 * 1024), 3)
+        }
+
+    def deduplicate(self, connection, report_id: int, path: str) -> Tuple[str, str]:
+        """
+        Empreinte du fichier généré ; si un rapport terminé a déjà exactement ce contenu, le nouveau
+        fichier est supprimé et le rapport pointe vers le fichier existant
+
+        Returns:
+            tuple: (chemin à enregistrer, empreinte)
+        """
+        t = self.table
+        digest = file_digest(path)
+        rows = connection.execute(
+            select(t.c.file_path).where(t.c.content_hash == digest, t.c.id != report_id,
+                                        t.c.status == 'completed', t.c.file_path.isnot(None))
+        ).all()
+        for (existing,) in rows:
+            if not _same_path(existing, path) and os.path.exists(existing):
+                os.remove(path)
+                return existing, digest
+        return path, digest
+
+    def is_referenced(self, connection, path: str) -> bool:
+        """Vrai si un rapport du catalogue pointe vers ce fichier"""
+        t = self.table
+        for (other_path,) in connection.execute(select(t.c.file_path).where(t.c.file_path.isnot(None))):
+            if _same_path(other_path, path):
+                return True
+        return False
+
+    def delete(self, connection, report_id: int) -> bool:
+        """Supprime un rapport ; le fichier n'est effacé que s'il n'est plus référencé"""
+        t = self.table
+        row = connection.execute(select(t.c.id, t.c.file_path).where(t.c.id == report_id)).first()
+        if row is None:
+            return False
+        connection.execute(t.delete().where(t.c.id == report_id))
+        if row.file_path and os.path.exists(row.file_path) and not self.is_referenced(connection, row.file_path):
+            os.remove(row.file_path)
+            remove_variants(row.file_path)
+        return True
+
+    def _disk_files(self) -> Dict[str, os.stat_result]:
+        files = {}
+        if not os.path.isdir(self.reports_dir):
+            return files
+        extensions = tuple(self.config['extensions'])
+        with os.scandir(self.reports_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(extensions):
+                    files[os.path.abspath(entry.path)] = entry.stat()
+        return files
+
+    def reconcile(self, connection, owner_id: Optional[int] = None, now: Optional[datetime] = None) -> Dict:
+        """
+        Rapproche la table du dossier des rapports (un seul parcours du dossier)
+
+        - rapport terminé dont le fichier a disparu : statut 'missing' (et inversement si le fichier revient)
+        - taille modifiée ou empreinte absente : taille et empreinte recalculées
+        - rapport « en cours » depuis trop longtemps (tâche perdue au redémarrage) : statut 'failed'
+        - fichier sans rapport : ajouté au catalogue au nom de owner_id (ignoré si owner_id est None)
+        """
+        t = self.table
+        now = now or datetime.now()
+        disk = self._disk_files()
+        result = {'missing': 0, 'restored': 0, 'updated': 0, 'stale': 0, 'added': 0}
+        known_paths = set()
+
+        rows = connection.execute(
+            select(t.c.id, t.c.file_path, t.c.file_size, t.c.status, t.c.content_hash, t.c.created_at)
+        ).all()
+        stale_before = now - timedelta(hours=self.config['stale_processing_hours'])
+        for row in rows:
+            path = os.path.abspath(row.file_path) if row.file_path else None
+            if path:
+                known_paths.add(path)
+            stat = disk.get(path) if path else None
+            if row.status == 'processing' and row.created_at and row.created_at < stale_before:
+                connection.execute(t.update().where(t.c.id == row.id).values(status='failed'))
+                result['stale'] += 1
+            elif row.status == 'completed' and stat is None:
+                connection.execute(t.update().where(t.c.id == row.id).values(status='missing'))
+                result['missing'] += 1
+            elif row.status in ('completed', 'missing') and stat is not None:
+                values = {}
+                if row.status == 'missing':
+                    values['status'] = 'completed'
+                    result['restored'] += 1
+                if stat.st_size != row.file_size or not row.content_hash:
+                    values.update(file_size=stat.st_size, content_hash=file_digest(path))
+                    result['updated'] += 1
+                if values:
+                    connection.execute(t.update().where(t.c.id == row.id).values(**values))
+
+        if owner_id is not None:
+            known_names = {name for (name,) in connection.execute(select(t.c.filename))}
+            for path, stat in sorted(disk.items()):
+                filename = os.path.basename(path)
+                if path in known_paths or filename in known_names:
+                    continue
+                report_type, report_format = describe_file(filename)
+                created = datetime.fromtimestamp(stat.st_mtime)
+                connection.execute(t.insert().values(
+                    name=f"Rapport {report_type.title()} - {created.strftime('%d/%m/%Y %H:%M')}",
+                    filename=filename, type=report_type, format=report_format, status='completed',
+                    description='Fichier retrouvé dans le dossier des rapports',
+                    file_path=os.path.join(self.reports_dir, filename), file_size=stat.st_size,
+                    content_hash=file_digest(path), download_count=0, generated_by=owner_id,
+                    created_at=created, generated_at=created, updated_at=now
+                ))
+                result['added'] += 1
+        return result
+
+    def cleanup(self, connection, retention_days: Optional[int], now: Optional[datetime] = None) -> Dict:
+        """
+        Supprime les rapports terminés plus anciens que la rétention (jours ; 0 ou None : aucune suppression)
+        et leurs fichiers (et variantes compressées) s'ils ne sont plus référencés. Les rapports programmés sont conservés
+        """
+        result = {'deleted': 0, 'files_removed': 0}
+        if not retention_days:
+            return result
+        t = self.table
+        cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+        expired = connection.execute(
+            select(t.c.id, t.c.file_path).where(
+                t.c.created_at < cutoff, t.c.status.in_(FINISHED_STATUSES),
+                or_(t.c.is_scheduled.is_(None), ~t.c.is_scheduled)
+            )
+        ).all()
+        if not expired:
+            return result
+        connection.execute(t.delete().where(t.c.id.in_([row.id for row in expired])))
+        result['deleted'] = len(expired)
+        for path in {row.file_path for row in expired if row.file_path}:
+            if os.path.exists(path) and not self.is_referenced(connection, path):
+                os.remove(path)
+                remove_variants(path)
+                result['files_removed'] += 1
+        return result
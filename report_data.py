@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Données des rapports
+Un instantané immuable (période, résumé, équipements, alertes, tendances, indicateurs IA) est construit
+en une passe sur les agrégats et l'état courant, en ne lisant que les parties utiles aux sections
+demandées. Les instantanés sont mémorisés par (période, parties, version des données) : générer le même
+rapport en plusieurs formats ne coûte qu'une construction
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from sqlalchemy import and_, case, func, or_, select
+
+import scan_rollups
+from config_advanced import REPORTS_ADVANCED_CONFIG
+
+REPORT_DATA_CONFIG = REPORTS_ADVANCED_CONFIG['report_data']
+
+# Parties de l'instantané ; le résumé est toujours calculé
+ALL_PARTS = frozenset({'summary', 'devices', 'alerts', 'trends', 'ai'})
+
+# Sections proposées par l'interface -> parties de l'instantané nécessaires
+SECTION_PARTS = {
+    'executive-summary': {'summary'},
+    'network-health': {'devices', 'trends'},
+    'device-inventory': {'devices'},
+    'performance-metrics': {'trends'},
+    'alerts-analysis': {'alerts'},
+    'ai-insights': {'ai'},
+    'recommendations': {'ai'},
+    'trends-forecast': {'trends'},
+    'bandwidth-usage': {'trends'},
+    'latency-analysis': {'trends'},
+    'throughput-metrics': {'trends'},
+    'bottlenecks': {'devices'},
+    'performance-trends': {'trends'},
+    'security-alerts': {'alerts'},
+    'threat-analysis': {'alerts'},
+    'compliance-status': {'devices'},
+    'access-logs': set()
+}
+
+
+def parts_for_sections(sections: Optional[Iterable[str]]) -> FrozenSet[str]:
+    """Parties à construire pour les sections demandées (toutes si aucune section n'est précisée)"""
+    if not sections:
+        return ALL_PARTS
+    parts = {'summary'}
+    for section in sections:
+        parts |= SECTION_PARTS.get(section, ALL_PARTS)  # section inconnue : tout construire
+    return frozenset(parts)
+
+
+def built_parts(data: Dict) -> FrozenSet[str]:
+    """Parties construites d'un rapport déjà converti en dictionnaire (toutes pour les anciens formats)"""
+    parts = data.get('metadata', {}).get('parts')
+    return ALL_PARTS if parts is None else frozenset(parts)
+
+
+def _format_time(value, pattern: str = '%Y-%m-%d %H:%M') -> str:
+    return value.strftime(pattern) if value else 'N/A'
+
+
+@dataclass(frozen=True)
+class DeviceRow:
+    id: int
+    ip: str
+    hostname: Optional[str]
+    device_type: Optional[str]
+    is_online: bool
+    health_score: float
+    last_seen: Optional[datetime]
+    response_time: Optional[float]
+    failure_probability: float
+    anomaly_score: float
+    maintenance_urgency: Optional[str]
+    ai_confidence: float
+    availability: Optional[float]        # disponibilité mesurée sur la période
+    avg_response_time: Optional[float]   # temps de réponse moyen sur la période
+
+    def to_dict(self) -> Dict:
+        return {
+            'ip': self.ip,
+            'hostname': self.hostname or 'N/A',
+            'type': self.device_type,
+            'status': 'En ligne' if self.is_online else 'Hors ligne',
+            'health_score': self.health_score,
+            'last_seen': _format_time(self.last_seen),
+            'response_time': self.response_time,
+            'availability': self.availability,
+            'avg_response_time': self.avg_response_time
+        }
+
+
+@dataclass(frozen=True)
+class AlertRow:
+    id: int
+    device_ip: Optional[str]
+    alert_type: str
+    message: str
+    priority: str
+    created_at: Optional[datetime]
+    resolved_at: Optional[datetime]
+
+    def to_dict(self) -> Dict:
+        return {
+            'device_ip': self.device_ip or 'N/A',
+            'type': self.alert_type,
+            'message': self.message,
+            'priority': self.priority,
+            'created_at': _format_time(self.created_at),
+            'resolved_at': _format_time(self.resolved_at) if self.resolved_at else None
+        }
+
+
+@dataclass(frozen=True)
+class TrendPoint:
+    timestamp: str
+    samples: int
+    availability: Optional[float]
+    avg_response_time: Optional[float]
+    p95_response_time: Optional[float]
+
+    def to_dict(self) -> Dict:
+        return {'timestamp': self.timestamp, 'samples': self.samples, 'availability': self.availability,
+                'avg_response_time': self.avg_response_time, 'p95_response_time': self.p95_response_time}
+
+
+@dataclass(frozen=True)
+class ReportSummary:
+    total_devices: int
+    online_devices: int
+    offline_devices: int
+    active_alerts: int
+    health_score_avg: float
+    scans_count: int
+    availability: Optional[float]
+    avg_response_time: Optional[float]
+    p95_response_time: Optional[float]
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+@dataclass(frozen=True)
+class AIInsights:
+    avg_health_score: float
+    critical_devices: int
+    high_risk_devices: int
+    anomaly_devices: int
+    recommendations: Tuple[str, ...]
+
+    def to_dict(self) -> Dict:
+        return dict(self.__dict__, recommendations=list(self.recommendations))
+
+
+@dataclass(frozen=True)
+class ReportSnapshot:
+    report_type: str
+    period_start: datetime
+    period_end: datetime
+    period_label: str
+    sections: Tuple[str, ...]
+    parts: FrozenSet[str]
+    data_version: str
+    built_at: datetime
+    summary: ReportSummary
+    devices: Tuple[DeviceRow, ...] = ()
+    alerts: Tuple[AlertRow, ...] = ()
+    trends: Tuple[TrendPoint, ...] = ()
+    ai: Optional[AIInsights] = None
+
+    def to_dict(self, generated_at: Optional[datetime] = None) -> Dict:
+        """Structure attendue par les générateurs de fichiers (PDF, Excel, HTML, CSV) ; nouvelle à chaque appel"""
+        data = {
+            'metadata': {
+                'type': self.report_type,
+                'generated_at': generated_at or datetime.now(),
+                'period': self.period_label,
+                'period_start': self.period_start,
+                'period_end': self.period_end,
+                'sections': list(self.sections),
+                'parts': sorted(self.parts),
+                'data_version': self.data_version
+            },
+            'summary': self.summary.to_dict(),
+            'devices': [device.to_dict() for device in self.devices],
+            'alerts': [alert.to_dict() for alert in self.alerts],
+            'trends': [point.to_dict() for point in self.trends]
+        }
+        if self.ai is not None:
+            data['ai_insights'] = self.ai.to_dict()
+        return data
+
+
+class ReportDataBuilder:
+    """Construit et mémorise les instantanés de données des rapports"""
+
+    def __init__(self, tables: Dict, ai_thresholds: Optional[Dict] = None, config: Optional[Dict] = None):
+        """
+        Args:
+            tables (dict): tables SQLAlchemy 'device', 'alert', 'scan_history' et 'scan_rollup'
+            ai_thresholds (dict): seuils HIGH_RISK_THRESHOLD / ANOMALY_THRESHOLD (AI_CONFIG de l'application)
+        """
+        self.tables = tables
+        self.ai_thresholds = ai_thresholds or {'HIGH_RISK_THRESHOLD': 0.6, 'ANOMALY_THRESHOLD': -0.5}
+        self.config = config or REPORT_DATA_CONFIG
+        self._snapshots = OrderedDict()  # clé -> (instant de construction, instantané)
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.stats = {'hits': 0, 'builds': 0}
+
+    def data_version(self, connection) -> str:
+        """Signature des données sources : change à chaque équipement modifié, alerte ou scan enregistré"""
+        device, alert, scans = self.tables['device'], self.tables['alert'], self.tables['scan_history']
+        signature = (
+            tuple(connection.execute(select(func.count(), func.max(device.c.updated_at))).one()),
+            tuple(connection.execute(select(func.count(), func.max(alert.c.id), func.max(alert.c.resolved_at))).one()),
+            connection.execute(select(func.max(scans.c.id))).scalar()
+        )
+        return hashlib.sha1(repr(signature).encode()).hexdigest()[:16]
+
+    def resolve_period(self, report_type: str, date_from=None, date_to=None,
+                       now: Optional[datetime] = None) -> Tuple[datetime, datetime, str]:
+        """
+        Bornes de la période : dates demandées (date de fin seule incluse), sinon durée par défaut du type
+        de rapport jusqu'à maintenant
+
+        Returns:
+            tuple: (début, fin exclue, libellé)
+        """
+        now = now or datetime.now()
+        end = _parse_date(date_to) or now
+        if date_to and end == scan_rollups.bucket_start(end, '1d'):
+            end += timedelta(days=1)  # Date de fin incluse
+        days = self.config['default_days'].get(report_type, 1)
+        start = _parse_date(date_from) or end - timedelta(days=days)
+        if date_from and date_to:
+            label = f"{date_from} à {date_to}"
+        else:
+            label = f"{start.strftime('%d/%m/%Y %H:%M')} à {end.strftime('%d/%m/%Y %H:%M')}"
+        return start, end, label
+
+    def get_snapshot(self, connection, report_type: str, date_from=None, date_to=None,
+                     sections: Optional[Iterable[str]] = None) -> ReportSnapshot:
+        """Instantané mémorisé (reconstruit si les données ont changé ou s'il a expiré)"""
+        sections = tuple(sections or ())
+        parts = parts_for_sections(sections)
+        key = (report_type, str(date_from or ''), str(date_to or ''), parts, self.data_version(connection))
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Un seul calcul par clé : les générations simultanées du même rapport attendent le premier
+        with key_lock:
+            with self._lock:
+                entry = self._snapshots.get(key)
+                if entry and time.time() - entry[0] < self.config['snapshot_ttl']:
+                    self._snapshots.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry[1]
+
+            snapshot = self.build(connection, report_type, date_from, date_to, sections, data_version=key[-1])
+            with self._lock:
+                self._snapshots[key] = (time.time(), snapshot)
+                self._snapshots.move_to_end(key)
+                while len(self._snapshots) > self.config['cache_size']:
+                    old_key, _ = self._snapshots.popitem(last=False)
+                    self._key_locks.pop(old_key, None)
+                self.stats['builds'] += 1
+            return snapshot
+
+    def build(self, connection, report_type: str, date_from=None, date_to=None,
+              sections: Tuple[str, ...] = (), data_version: Optional[str] = None) -> ReportSnapshot:
+        """Construit un instantané sans passer par le cache"""
+        parts = parts_for_sections(sections)
+        start, end, label = self.resolve_period(report_type, date_from, date_to)
+        device = self.tables['device']
+        rollup = self.tables['scan_rollup']
+
+        counts = connection.execute(select(
+            func.count(),
+            func.coalesce(func.sum(case((device.c.is_online, 1), else_=0)), 0),
+            func.coalesce(func.avg(device.c.health_score), 0)
+        )).one()
+        active_alerts = connection.execute(
+            select(func.count()).select_from(self.tables['alert']).where(~self.tables['alert'].c.is_resolved)
+        ).scalar()
+        network = scan_rollups.summarize(connection, rollup, start, end)
+        summary = ReportSummary(
+            total_devices=counts[0],
+            online_devices=int(counts[1]),
+            offline_devices=counts[0] - int(counts[1]),
+            active_alerts=active_alerts,
+            health_score_avg=float(counts[2]),
+            scans_count=network['samples'],
+            availability=network['availability'],
+            avg_response_time=network['avg_response_time'],
+            p95_response_time=network['p95_response_time']
+        )
+
+        return ReportSnapshot(
+            report_type=report_type,
+            period_start=start,
+            period_end=end,
+            period_label=label,
+            sections=tuple(sections),
+            parts=parts,
+            data_version=data_version or self.data_version(connection),
+            built_at=datetime.now(),
+            summary=summary,
+            devices=self._devices(connection, start, end) if 'devices' in parts else (),
+            alerts=self._alerts(connection, start, end) if 'alerts' in parts else (),
+            trends=tuple(
+                TrendPoint(p['timestamp'], p['samples'], p['availability'], p['avg_response_time'], p['p95_response_time'])
+                for p in scan_rollups.series(connection, rollup, start, end)
+            ) if 'trends' in parts else (),
+            ai=self._ai_insights(connection, summary) if 'ai' in parts else None
+        )
+
+    def _devices(self, connection, start: datetime, end: datetime) -> Tuple[DeviceRow, ...]:
+        device = self.tables['device']
+        period_stats = scan_rollups.summarize_devices(connection, self.tables['scan_rollup'], start, end)
+        rows = connection.execute(select(
+            device.c.id, device.c.ip, device.c.hostname, device.c.device_type, device.c.is_online,
+            device.c.health_score, device.c.last_seen, device.c.response_time, device.c.failure_probability,
+            device.c.anomaly_score, device.c.maintenance_urgency, device.c.ai_confidence
+        ).order_by(device.c.ip)).all()
+        devices = []
+        for row in rows:
+            stats = period_stats.get(row.id, {})
+            devices.append(DeviceRow(
+                id=row.id, ip=row.ip, hostname=row.hostname, device_type=row.device_type,
+                is_online=bool(row.is_online), health_score=row.health_score or 0.0, last_seen=row.last_seen,
+                response_time=row.response_time, failure_probability=row.failure_probability or 0.0,
+                anomaly_score=row.anomaly_score or 0.0, maintenance_urgency=row.maintenance_urgency,
+                ai_confidence=row.ai_confidence or 0.0, availability=stats.get('availability'),
+                avg_response_time=stats.get('avg_response_time')
+            ))
+        return tuple(devices)
+
+    def _alerts(self, connection, start: datetime, end: datetime) -> Tuple[AlertRow, ...]:
+        """Alertes de la période : créées avant la fin, non résolues avant le début (résolues ou non depuis)"""
+        alert, device = self.tables['alert'], self.tables['device']
+        rows = connection.execute(
+            select(alert.c.id, device.c.ip, alert.c.alert_type, alert.c.message, alert.c.priority,
+                   alert.c.created_at, alert.c.resolved_at)
+            .select_from(alert.outerjoin(device, alert.c.device_id == device.c.id))
+            .where(and_(alert.c.created_at < end,
+                        or_(~alert.c.is_resolved, alert.c.resolved_at >= start)))
+            .order_by(alert.c.created_at.desc())
+        ).all()
+        return tuple(AlertRow(*row) for row in rows)
+
+    def _ai_insights(self, connection, summary: ReportSummary) -> AIInsights:
+        device = self.tables['device']
+        critical, high_risk, anomalies = connection.execute(select(
+            func.coalesce(func.sum(case((device.c.maintenance_urgency == 'critical', 1), else_=0)), 0),
+            func.coalesce(func.sum(case((device.c.failure_probability > self.ai_thresholds['HIGH_RISK_THRESHOLD'], 1),
+                                        else_=0)), 0),
+            func.coalesce(func.sum(case((device.c.anomaly_score < self.ai_thresholds['ANOMALY_THRESHOLD'], 1),
+                                        else_=0)), 0)
+        )).one()
+        recommendations = []
+        if critical > 0:
+            recommendations.append(f"🚨 {critical} équipements critiques nécessitent une intervention immédiate")
+        if high_risk > 0:
+            recommendations.append(f"⚠️ {high_risk} équipements à risque élevé")
+        if anomalies > 0:
+            recommendations.append(f"🔍 {anomalies} équipements présentent des comportements anormaux")
+        return AIInsights(summary.health_score_avg, int(critical), int(high_risk), int(anomalies), tuple(recommendations))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return dict(self.stats, cached=len(self._snapshots))
+
+
+def _parse_date(value) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
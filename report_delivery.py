@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Téléchargement des rapports
+Les rapports texte (HTML, CSV, JSON) sont compressés une seule fois, à la génération (variantes .gz et
+.br à côté du fichier) ; au téléchargement, la variante acceptée par le client est servie telle quelle
+"""
+
+import gzip
+import os
+import shutil
+from typing import List, Optional, Tuple
+
+from werkzeug.http import parse_accept_header
+
+from config_advanced import REPORTS_ADVANCED_CONFIG
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DOWNLOAD_CONFIG = REPORTS_ADVANCED_CONFIG['report_downloads']
+
+# Encodages proposés, par ordre de préférence à qualité égale : (Content-Encoding, suffixe du fichier)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _write_atomic(path: str, write):
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def precompress(path: str, config: Optional[dict] = None) -> List[str]:
+    """
+    Crée les variantes compressées d'un rapport texte
+
+    Returns:
+        list: Encodages créés ('gzip', 'br')
+    """
+    config = config or DOWNLOAD_CONFIG
+    if not path.endswith(tuple(config['compressed_extensions'])) or os.path.getsize(path) < config['min_size']:
+        return []
+
+    def write_gzip(f):
+        # mtime=0 : variante identique pour un même contenu (ETag stable)
+        with open(path, 'rb') as source, gzip.GzipFile(fileobj=f, mode='wb',
+                                                       compresslevel=config['gzip_level'], mtime=0) as target:
+            shutil.copyfileobj(source, target, 1024 * 1024)
+
+    _write_atomic(path + '.gz', write_gzip)
+    created = ['gzip']
+    if brotli is not None:
+        with open(path, 'rb') as source:
+            compressed = brotli.compress(source.read(), quality=config['brotli_quality'])
+        _write_atomic(path + '.br', lambda f: f.write(compressed))
+        created.append('br')
+    return created
+
+
+def variant_paths(path: str) -> List[str]:
+    """Variantes compressées existantes d'un rapport"""
+    return [path + suffix for _, suffix in ENCODINGS if os.path.exists(path + suffix)]
+
+
+def remove_variants(path: str) -> int:
+    """Supprime les variantes compressées d'un rapport"""
+    variants = variant_paths(path)
+    for variant in variants:
+        os.remove(variant)
+    return len(variants)
+
+
+def choose_variant(path: str, accept_encoding: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Fichier à servir selon l'en-tête Accept-Encoding
+
+    Returns:
+        tuple: (chemin, Content-Encoding ou None pour le fichier d'origine)
+    """
+    accepted = parse_accept_header(accept_encoding or '')
+    modified = os.path.getmtime(path)
+    best = (0, path, None)
+    for encoding, suffix in ENCODINGS:
+        quality = accepted.quality(encoding)
+        # Variante plus ancienne que le fichier d'origine (fichier remplacé) : ignorée
+        if quality > best[0] and os.path.exists(path + suffix) and os.path.getmtime(path + suffix) >= modified:
+            best = (quality, path + suffix, encoding)
+    return best[1], best[2]
@@ -1,14 +1,19 @@
 from fpdf import FPDF
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
 from datetime import datetime, timedelta
 import os
 
+from excel_writer import StreamingExcelWriter
+from pdf_report import PDFReportEngine
+from config_advanced import REPORTS_ADVANCED_CONFIG
+
+# Extension des fichiers par format de rapport
+FILE_EXTENSIONS = {'excel': 'xlsx'}
+
 class ReportGenerator:
     def __init__(self):
         self.reports_dir = 'reports'
         os.makedirs(self.reports_dir, exist_ok=True)
+        self.pdf_engine = PDFReportEngine()
     
     def generate_pdf_report(self, data, filename):
         """
@@ -43,29 +48,46 @@ class ReportGenerator:
         except Exception as e:
             print(f"❌ Erreur lors de la génération du rapport PDF: {str(e)}")
     
+    def generate_full_pdf_report(self, file_path, data, report_type):
+        """
+        Génère le rapport PDF complet (tous les équipements et alertes, graphiques de tendance)
+        
+        Args:
+            file_path (str): Chemin du fichier PDF
+            data (dict): Données du rapport (metadata, summary, devices, alerts, trends)
+            report_type (str): Type de rapport ('daily', 'weekly', ...)
+            
+        Returns:
+            dict: Empreinte des données, nombre de pages et réutilisation du cache
+        """
+        result = self.pdf_engine.render(file_path, data, report_type)
+        origin = "repris du cache" if result['cached'] else f"{result['pages']} pages"
+        print(f"📄 Rapport PDF généré: {file_path} ({origin})")
+        return result
+    
     def generate_excel_report(self, data, filename):
         """
-        Génère un rapport Excel
+        Génère un rapport Excel (classeur en écriture seule, styles nommés partagés)
         
         Args:
-            data (dict): Données du rapport
+            data (dict): Données du rapport ; data['devices'] peut être un générateur
             filename (str): Nom du fichier Excel
         """
         try:
-            wb = openpyxl.Workbook()
+            filepath = os.path.join(self.reports_dir, filename)
+            writer = StreamingExcelWriter(filepath)
             
             # Feuille de statistiques
-            self._add_excel_statistics_sheet(wb, data)
+            self._add_excel_statistics_sheet(writer, data)
             
             # Feuille des appareils
-            self._add_excel_devices_sheet(wb, data)
+            self._add_excel_devices_sheet(writer, data)
             
             # Feuille de résumé
-            self._add_excel_summary_sheet(wb, data)
+            self._add_excel_summary_sheet(writer, data)
             
             # Sauvegarder le fichier
-            filepath = os.path.join(self.reports_dir, filename)
-            wb.save(filepath)
+            writer.save()
             
             print(f"📊 Rapport Excel généré: {filepath}")
             
@@ -153,169 +175,77 @@ class ReportGenerator:
         pdf.cell(0, 10, 'Rapport généré automatiquement par le système de supervision Central Danone', ln=True, align='C')
         pdf.cell(0, 10, 'Pour toute question, contactez l\'équipe IT', ln=True, align='C')
     
-    def _add_excel_statistics_sheet(self, wb, data):
+    def _add_excel_statistics_sheet(self, writer, data):
         """Ajoute la feuille de statistiques au rapport Excel"""
-        ws = wb.active
-        ws.title = "Statistiques"
-        
-        # Titre
-        ws['A1'] = 'CENTRAL DANONE - RAPPORT DE SUPERVISION RÉSEAU'
-        ws['A1'].font = Font(size=16, bold=True)
-        ws.merge_cells('A1:D1')
-        
-        # Date
-        ws['A3'] = f'Date du rapport: {data["date"]}'
-        ws['A4'] = f'Généré le: {datetime.now().strftime("%d/%m/%Y à %H:%M")}'
-        
-        # Statistiques
-        ws['A6'] = 'STATISTIQUES GÉNÉRALES'
-        ws['A6'].font = Font(size=14, bold=True)
-        
         stats = data['statistics']
-        row = 8
-        
-        # Tableau des statistiques
-        headers = ['Métrique', 'Valeur']
-        for i, header in enumerate(headers):
-            cell = ws.cell(row=row, column=i+1, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-        
-        row += 1
-        ws.cell(row=row, column=1, value='Total des appareils')
-        ws.cell(row=row, column=2, value=stats['total_devices'])
-        
-        row += 1
-        ws.cell(row=row, column=1, value='Appareils en ligne')
-        ws.cell(row=row, column=2, value=stats['online_devices'])
-        
-        row += 1
-        ws.cell(row=row, column=1, value='Appareils hors ligne')
-        ws.cell(row=row, column=2, value=stats['offline_devices'])
-        
+        items = [
+            (f'Date du rapport: {data["date"]}', None),
+            (f'Généré le: {datetime.now().strftime("%d/%m/%Y à %H:%M")}', None),
+            None,
+            ('STATISTIQUES GÉNÉRALES',),
+            None,
+            ('Métrique', 'Valeur', 'header', 'header'),
+            ('Total des appareils', stats['total_devices']),
+            ('Appareils en ligne', stats['online_devices']),
+            ('Appareils hors ligne', stats['offline_devices'])
+        ]
         if 'scans_today' in stats:
-            row += 1
-            ws.cell(row=row, column=1, value='Scans effectués aujourd\'hui')
-            ws.cell(row=row, column=2, value=stats['scans_today'])
+            items.append(('Scans effectués aujourd\'hui', stats['scans_today']))
         
         # Taux de disponibilité
         if stats['total_devices'] > 0:
-            row += 1
             uptime_percentage = (stats['online_devices'] / stats['total_devices']) * 100
-            ws.cell(row=row, column=1, value='Taux de disponibilité')
-            ws.cell(row=row, column=2, value=f"{uptime_percentage:.1f}%")
+            items.append(('Taux de disponibilité', f"{uptime_percentage:.1f}%"))
         
-        # Ajuster la largeur des colonnes
-        ws.column_dimensions['A'].width = 25
-        ws.column_dimensions['B'].width = 15
+        writer.add_key_values("Statistiques", items, heading='CENTRAL DANONE - RAPPORT DE SUPERVISION RÉSEAU',
+                              widths=(25, 15))
     
-    def _add_excel_devices_sheet(self, wb, data):
-        """Ajoute la feuille des appareils au rapport Excel"""
-        ws = wb.create_sheet("Appareils")
-        
-        # Titre
-        ws['A1'] = 'LISTE DES APPAREILS'
-        ws['A1'].font = Font(size=14, bold=True)
-        ws.merge_cells('A1:D1')
-        
-        # En-têtes
-        headers = ['Adresse IP', 'Nom d\'hôte', 'Statut', 'Dernière vue']
-        for i, header in enumerate(headers):
-            cell = ws.cell(row=3, column=i+1, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-        
-        # Données
-        row = 4
-        for device in data['devices']:
-            ws.cell(row=row, column=1, value=device['ip'])
-            ws.cell(row=row, column=2, value=device['hostname'])
-            ws.cell(row=row, column=3, value=device['status'])
-            ws.cell(row=row, column=4, value=device['last_seen'])
-            
+    def _add_excel_devices_sheet(self, writer, data):
+        """Ajoute la feuille des appareils au rapport Excel (lignes écrites au fil de l'eau)"""
+        rows = (
+            (device['ip'], device['hostname'], device['status'], device['last_seen'])
+            for device in data['devices']
+        )
+        writer.add_table(
+            "Appareils",
+            ['Adresse IP', 'Nom d\'hôte', 'Statut', 'Dernière vue'],
+            rows,
+            widths=(15, 25, 12, 20),
+            heading='LISTE DES APPAREILS',
             # Couleur selon le statut
-            if device['status'] == 'online':
-                fill = PatternFill(start_color="90EE90", end_color="90EE90", fill_type="solid")
-            else:
-                fill = PatternFill(start_color="FFB6C1", end_color="FFB6C1", fill_type="solid")
-            
-            for col in range(1, 5):
-                ws.cell(row=row, column=col).fill = fill
-            
-            row += 1
-        
-        # Ajuster la largeur des colonnes
-        ws.column_dimensions['A'].width = 15
-        ws.column_dimensions['B'].width = 25
-        ws.column_dimensions['C'].width = 12
-        ws.column_dimensions['D'].width = 20
+            row_style=lambda row: 'online' if row[2] == 'online' else 'offline'
+        )
     
-    def _add_excel_summary_sheet(self, wb, data):
+    def _add_excel_summary_sheet(self, writer, data):
         """Ajoute la feuille de résumé au rapport Excel"""
-        ws = wb.create_sheet("Résumé")
-        
-        # Titre
-        ws['A1'] = 'RÉSUMÉ EXÉCUTIF'
-        ws['A1'].font = Font(size=16, bold=True)
-        ws.merge_cells('A1:C1')
-        
-        # Informations générales
-        ws['A3'] = 'Informations générales'
-        ws['A3'].font = Font(size=12, bold=True)
-        
-        row = 5
-        ws.cell(row=row, column=1, value='Date du rapport')
-        ws.cell(row=row, column=2, value=data['date'])
-        row += 1
-        
-        ws.cell(row=row, column=1, value='Heure de génération')
-        ws.cell(row=row, column=2, value=datetime.now().strftime("%d/%m/%Y %H:%M"))
-        row += 1
-        
         stats = data['statistics']
-        ws.cell(row=row, column=1, value='Total des équipements surveillés')
-        ws.cell(row=row, column=2, value=stats['total_devices'])
-        row += 1
-        
-        ws.cell(row=row, column=1, value='Équipements opérationnels')
-        ws.cell(row=row, column=2, value=stats['online_devices'])
-        row += 1
-        
-        ws.cell(row=row, column=1, value='Équipements en panne')
-        ws.cell(row=row, column=2, value=stats['offline_devices'])
-        row += 1
+        items = [
+            ('Informations générales',),
+            None,
+            ('Date du rapport', data['date']),
+            ('Heure de génération', datetime.now().strftime("%d/%m/%Y %H:%M")),
+            ('Total des équipements surveillés', stats['total_devices']),
+            ('Équipements opérationnels', stats['online_devices']),
+            ('Équipements en panne', stats['offline_devices'])
+        ]
         
         if stats['total_devices'] > 0:
             uptime_percentage = (stats['online_devices'] / stats['total_devices']) * 100
-            ws.cell(row=row, column=1, value='Taux de disponibilité')
-            ws.cell(row=row, column=2, value=f"{uptime_percentage:.1f}%")
+            items.append(('Taux de disponibilité', f"{uptime_percentage:.1f}%"))
             
             # Évaluation de la santé du réseau
-            row += 2
-            ws.cell(row=row, column=1, value='Évaluation de la santé du réseau')
-            ws.cell(row=row, column=1).font = Font(size=12, bold=True)
-            row += 1
-            
             if uptime_percentage >= 95:
-                status = "Excellent"
-                color = "90EE90"
+                status, style = "Excellent", 'excellent'
             elif uptime_percentage >= 85:
-                status = "Bon"
-                color = "FFFF99"
+                status, style = "Bon", 'good'
             elif uptime_percentage >= 70:
-                status = "Moyen"
-                color = "FFB366"
+                status, style = "Moyen", 'average'
             else:
-                status = "Critique"
-                color = "FF6666"
+                status, style = "Critique", 'critical'
             
-            ws.cell(row=row, column=1, value='Statut global')
-            ws.cell(row=row, column=2, value=status)
-            ws.cell(row=row, column=2).fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+            items.extend([None, ('Évaluation de la santé du réseau',), ('Statut global', status, style)])
         
-        # Ajuster la largeur des colonnes
-        ws.column_dimensions['A'].width = 30
-        ws.column_dimensions['B'].width = 20
+        writer.add_key_values("Résumé", items, heading='RÉSUMÉ EXÉCUTIF')
     
     def generate_custom_report(self, data, report_type, filename):
         """
@@ -335,25 +265,26 @@ class ReportGenerator:
     
     def list_reports(self):
         """
-        Liste tous les rapports disponibles
+        Liste les fichiers de rapports présents sur le disque
+        (les listes de l'application sont servies par le catalogue en base, voir report_catalog)
         
         Returns:
             list: Liste des fichiers de rapports
         """
         try:
-            files = os.listdir(self.reports_dir)
             reports = []
-            
-            for file in files:
-                if file.endswith(('.pdf', '.xlsx')):
-                    filepath = os.path.join(self.reports_dir, file)
-                    file_info = {
-                        'filename': file,
-                        'path': filepath,
-                        'size': os.path.getsize(filepath),
-                        'created': datetime.fromtimestamp(os.path.getctime(filepath))
-                    }
-                    reports.append(file_info)
+            extensions = tuple(REPORTS_ADVANCED_CONFIG['report_catalog']['extensions'])
+            
+            with os.scandir(self.reports_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(extensions):
+                        stat = entry.stat()
+                        reports.append({
+                            'filename': entry.name,
+                            'path': entry.path,
+                            'size': stat.st_size,
+                            'created': datetime.fromtimestamp(stat.st_ctime)
+                        })
             
             # Trier par date de création (plus récent en premier)
             reports.sort(key=lambda x: x['created'], reverse=True)
@@ -426,6 +357,7 @@ class ReportGenerator:
             date_to (str): Date de fin (optionnel)
             description (str): Description du rapport
             models (dict): Dictionnaire contenant les modèles (Device, ScanHistory, Alert, db)
+                et optionnellement 'count_scans' (comptage depuis une date via les agrégats)
             
         Returns:
             str: Chemin du fichier généré ou None si erreur
@@ -440,6 +372,7 @@ class ReportGenerator:
             ScanHistory = models.get('ScanHistory')
             Alert = models.get('Alert')
             db = models.get('db')
+            count_scans = models.get('count_scans')
             
             if not all([Device, ScanHistory, Alert, db]):
                 print("❌ Erreur: Modèles incomplets pour la génération du rapport")
@@ -450,25 +383,34 @@ class ReportGenerator:
                 # Rapport quotidien
                 devices = Device.query.all()
                 today = datetime.now().date()
-                scans_today = ScanHistory.query.filter(
-                    db.func.date(ScanHistory.timestamp) == today
-                ).count()
+                if count_scans:
+                    scans_today = count_scans(datetime.combine(today, datetime.min.time()))
+                else:
+                    scans_today = ScanHistory.query.filter(
+                        db.func.date(ScanHistory.timestamp) == today
+                    ).count()
                 
             elif report_type == 'weekly':
                 # Rapport hebdomadaire
                 devices = Device.query.all()
                 week_ago = datetime.now().date() - timedelta(days=7)
-                scans_this_week = ScanHistory.query.filter(
-                    ScanHistory.timestamp >= week_ago
-                ).count()
+                if count_scans:
+                    scans_this_week = count_scans(datetime.combine(week_ago, datetime.min.time()))
+                else:
+                    scans_this_week = ScanHistory.query.filter(
+                        ScanHistory.timestamp >= week_ago
+                    ).count()
                 
             elif report_type == 'monthly':
                 # Rapport mensuel
                 devices = Device.query.all()
                 month_ago = datetime.now().date() - timedelta(days=30)
-                scans_this_month = ScanHistory.query.filter(
-                    ScanHistory.timestamp >= month_ago
-                ).count()
+                if count_scans:
+                    scans_this_month = count_scans(datetime.combine(month_ago, datetime.min.time()))
+                else:
+                    scans_this_month = ScanHistory.query.filter(
+                        ScanHistory.timestamp >= month_ago
+                    ).count()
                 
             else:
                 # Rapport personnalisé
@@ -511,7 +453,7 @@ class ReportGenerator:
             
             # Générer le fichier selon le format
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"rapport_{report_type}_{timestamp}.{format}"
+            filename = f"rapport_{report_type}_{timestamp}.{FILE_EXTENSIONS.get(format.lower(), format.lower())}"
             
             if format.lower() == 'pdf':
                 self.generate_pdf_report(report_data, filename)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Génération des rapports en tâche de fond
+Les rapports sont produits par un pool de workers ; la requête HTTP retourne immédiatement
+et la progression de chaque tâche reste consultable par identifiant de rapport
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from config_advanced import REPORTS_ADVANCED_CONFIG
+
+
+class ReportJobPool:
+    """Pool de workers et suivi de progression des rapports en cours"""
+
+    def __init__(self, max_workers: int = None, keep_finished: int = None):
+        config = REPORTS_ADVANCED_CONFIG['report_jobs']
+        self.max_workers = max_workers or config['max_workers']
+        self.keep_finished = keep_finished or config['keep_finished']
+        self._executor = None
+        self._jobs = OrderedDict()  # report_id -> état de la tâche
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='report-job')
+        return self._executor
+
+    def _update(self, report_id: int, **fields):
+        with self._lock:
+            job = self._jobs.get(report_id)
+            if job is not None:
+                job.update(fields)
+
+    def _prune(self):
+        finished = [rid for rid, job in self._jobs.items() if job['status'] in ('completed', 'failed')]
+        for report_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[report_id]
+
+    def submit(self, report_id: int, func: Callable, *args, **kwargs):
+        """
+        Planifie la génération d'un rapport
+
+        Args:
+            report_id (int): Identifiant du rapport (clé de suivi)
+            func (callable): Appelée comme func(report_id, progress, *args, **kwargs) ;
+                progress(pourcentage, étape) publie l'avancement
+        """
+        with self._lock:
+            self._jobs[report_id] = {
+                'status': 'queued', 'progress': 0, 'stage': 'En attente',
+                'queued_at': time.time(), 'started_at': None, 'finished_at': None, 'error': None
+            }
+            self._prune()
+
+        def progress(percent: int, stage: str = None):
+            fields = {'progress': max(0, min(int(percent), 100))}
+            if stage:
+                fields['stage'] = stage
+            self._update(report_id, **fields)
+
+        def run():
+            self._update(report_id, status='processing', started_at=time.time(), stage='Démarrage')
+            try:
+                func(report_id, progress, *args, **kwargs)
+                self._update(report_id, status='completed', progress=100, stage='Terminé', finished_at=time.time())
+            except Exception as e:
+                self._update(report_id, status='failed', stage='Échec', error=str(e), finished_at=time.time())
+                print(f"❌ Erreur génération rapport {report_id}: {e}")
+
+        return self._get_executor().submit(run)
+
+    def get(self, report_id: int) -> Optional[Dict]:
+        """État de la tâche (None si inconnue : rapport ancien ou processus redémarré)"""
+        with self._lock:
+            job = self._jobs.get(report_id)
+            return dict(job) if job else None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            statuses = [job['status'] for job in self._jobs.values()]
+        return {status: statuses.count(status) for status in ('queued', 'processing', 'completed', 'failed')}
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
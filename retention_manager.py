@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Rétention et compactage des données historiques
+Purge par lots des lignes expirées selon des politiques par table, puis
+incremental_vacuum / VACUUM et ANALYZE des bases SQLite concernées
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import storage
+from config_advanced import PERFORMANCE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+RETENTION_CONFIG = PERFORMANCE_CONFIG['retention_config']
+
+# Valeur de PRAGMA auto_vacuum en mode incrémental
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class RetentionManager:
+    """Applique les politiques de rétention sur un ensemble de bases SQLite"""
+
+    def __init__(self, databases: Dict[str, str], config: Optional[Dict] = None):
+        """
+        Args:
+            databases (dict): nom logique de la base -> chemin du fichier SQLite
+            config (dict): configuration de rétention (RETENTION_CONFIG par défaut)
+        """
+        self.databases = databases
+        self.config = config or RETENTION_CONFIG
+        self.report_file = self.config['report_file']
+        self._lock = threading.Lock()
+
+    def _connect(self, path: str) -> sqlite3.Connection:
+        # Autocommit : chaque lot de suppression est sa propre transaction
+        return storage.connect(path, isolation_level=None)
+
+    @staticmethod
+    def _table_columns(conn: sqlite3.Connection, table: str) -> List[str]:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+    @staticmethod
+    def _page_stats(conn: sqlite3.Connection) -> Dict:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return {
+            'page_size': page_size,
+            'page_count': conn.execute("PRAGMA page_count").fetchone()[0],
+            'freelist_count': conn.execute("PRAGMA freelist_count").fetchone()[0]
+        }
+
+    def purge_table(self, conn: sqlite3.Connection, policy: Dict, now: datetime) -> Optional[int]:
+        """
+        Supprime par lots les lignes plus anciennes que la politique
+
+        Returns:
+            int: nombre de lignes supprimées, ou None si la table n'existe pas
+        """
+        table, column = policy['table'], policy['column']
+        columns = self._table_columns(conn, table)
+        if column not in columns:
+            return None
+
+        if self.config['create_indexes']:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+
+        cutoff = (now - timedelta(days=policy['days'])).strftime('%Y-%m-%d %H:%M:%S')
+        condition = f"{column} < ?"
+        if policy.get('where'):
+            condition += f" AND ({policy['where']})"
+        statement = (f"DELETE FROM {table} WHERE rowid IN "
+                     f"(SELECT rowid FROM {table} WHERE {condition} LIMIT ?)")
+
+        batch_size = self.config['batch_size']
+        deleted = 0
+        while True:
+            cursor = conn.execute(statement, (cutoff, batch_size))
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                return deleted
+            # Laisse passer les écrivains entre deux lots
+            time.sleep(self.config['batch_pause'])
+
+    def compact(self, conn: sqlite3.Connection, full: bool) -> str:
+        """Récupère l'espace libre (VACUUM complet ou incrémental) et met à jour les statistiques"""
+        mode = 'none'
+        if full:
+            # VACUUM complet : bascule aussi la base en auto_vacuum incrémental
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            mode = 'full'
+        elif conn.execute("PRAGMA auto_vacuum").fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+            conn.execute(f"PRAGMA incremental_vacuum({self.config['incremental_vacuum_pages']})").fetchall()
+            mode = 'incremental'
+        conn.execute(f"PRAGMA analysis_limit = {self.config['analysis_limit']}")
+        conn.execute("ANALYZE")
+        # Mode WAL : reporte les pages compactées dans le fichier principal et tronque le journal
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return mode
+
+    def _full_vacuum_due(self, name: str, conn: sqlite3.Connection, previous: Dict, now: datetime) -> bool:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            return True
+        last_full = previous.get('last_full_vacuum', {}).get(name)
+        if not last_full:
+            return True
+        return now - datetime.fromisoformat(last_full) >= timedelta(days=self.config['full_vacuum_days'])
+
+    def run(self, now: Optional[datetime] = None, full_vacuum: Optional[bool] = None) -> Dict:
+        """
+        Applique toutes les politiques puis compacte les bases
+
+        Args:
+            now (datetime): Date de référence (maintenant par défaut)
+            full_vacuum (bool): Forcer (True) ou interdire (False) le VACUUM complet, automatique si None
+
+        Returns:
+            dict: rapport de l'exécution (lignes supprimées, octets libérés et récupérés)
+        """
+        with self._lock:
+            now = now or datetime.now()
+            start_time = time.time()
+            previous = self.load_report()
+            last_full_vacuum = dict(previous.get('last_full_vacuum', {}))
+            report = {'started_at': now.isoformat(), 'tables': [], 'databases': {}}
+
+            for name, path in self.databases.items():
+                policies = [p for p in self.config['policies'] if p['database'] == name]
+                if not policies or not path or not os.path.exists(path):
+                    continue
+                conn = self._connect(path)
+                try:
+                    size_before = os.path.getsize(path)
+                    pages_before = self._page_stats(conn)
+                    deleted_total = 0
+                    for policy in policies:
+                        try:
+                            deleted = self.purge_table(conn, policy, now)
+                        except sqlite3.Error as e:
+                            logger.error(f"Erreur purge {name}.{policy['table']}: {e}")
+                            deleted = None
+                        if deleted is None:
+                            continue
+                        deleted_total += deleted
+                        report['tables'].append({
+                            'database': name,
+                            'table': policy['table'],
+                            'days': policy['days'],
+                            'filter': policy.get('where'),
+                            'deleted_rows': deleted
+                        })
+
+                    pages_after_purge = self._page_stats(conn)
+                    full = full_vacuum if full_vacuum is not None else self._full_vacuum_due(name, conn, previous, now)
+                    try:
+                        mode = self.compact(conn, full)
+                    except sqlite3.Error as e:
+                        # Base occupée : le compactage sera retenté au prochain passage
+                        logger.error(f"Erreur compactage {name}: {e}")
+                        mode = 'failed'
+                    if mode == 'full':
+                        last_full_vacuum[name] = now.isoformat()
+                    size_after = os.path.getsize(path)
+
+                    report['databases'][name] = {
+                        'path': path,
+                        'deleted_rows': deleted_total,
+                        'freed_bytes': max(pages_after_purge['freelist_count'] - pages_before['freelist_count'], 0)
+                                       * pages_after_purge['page_size'],
+                        'reclaimed_bytes': max(size_before - size_after, 0),
+                        'size_before': size_before,
+                        'size_after': size_after,
+                        'vacuum': mode
+                    }
+                finally:
+                    conn.close()
+
+            cumulative = previous.get('cumulative', {'runs': 0, 'deleted_rows': 0, 'reclaimed_bytes': 0})
+            report['totals'] = {
+                'deleted_rows': sum(db['deleted_rows'] for db in report['databases'].values()),
+                'reclaimed_bytes': sum(db['reclaimed_bytes'] for db in report['databases'].values())
+            }
+            report['cumulative'] = {
+                'runs': cumulative['runs'] + 1,
+                'deleted_rows': cumulative['deleted_rows'] + report['totals']['deleted_rows'],
+                'reclaimed_bytes': cumulative['reclaimed_bytes'] + report['totals']['reclaimed_bytes']
+            }
+            report['last_full_vacuum'] = last_full_vacuum
+            report['duration'] = round(time.time() - start_time, 3)
+            report['finished_at'] = datetime.now().isoformat()
+            self.save_report(report)
+
+            logger.info(f"Rétention: {report['totals']['deleted_rows']} lignes supprimées, "
+                        f"{report['totals']['reclaimed_bytes']} octets récupérés en {report['duration']}s")
+            return report
+
+    def save_report(self, report: Dict):
+        """Sauvegarde atomique du dernier rapport"""
+        directory = os.path.dirname(self.report_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.report_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.report_file)
+
+    def load_report(self) -> Dict:
+        """Dernier rapport de rétention (vide si aucune exécution)"""
+        return load_retention_report(self.report_file)
+
+
+def load_retention_report(report_file: str = RETENTION_CONFIG['report_file']) -> Dict:
+    """Lit le dernier rapport de rétention sans instancier le gestionnaire"""
+    try:
+        with open(report_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def retention_summary(report_file: str = RETENTION_CONFIG['report_file']) -> Dict:
+    """Politiques configurées et résultat de la dernière exécution (page des paramètres)"""
+    return {
+        'enabled': RETENTION_CONFIG['enabled'],
+        'run_at': RETENTION_CONFIG['run_at'],
+        'policies': RETENTION_CONFIG['policies'],
+        'last_run': load_retention_report(report_file) or None
+    }
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Agrégats temporels de l'historique des scans (1 minute, 1 heure, 1 jour)
+Chaque scan inséré met à jour les agrégats de son équipement et de tout le parc
+(nombre d'échantillons, disponibilité, temps de réponse moyen/min/max et histogramme pour le p95)
+"""
+
+import bisect
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# Résolutions disponibles et durée d'un intervalle
+RESOLUTIONS = {
+    '1m': timedelta(minutes=1),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1)
+}
+
+# Identifiant réservé aux agrégats de tout le parc
+FLEET_DEVICE_ID = 0
+
+# Bornes (ms) de l'histogramme des temps de réponse : hist_0 < 1 ms ... hist_10 >= 1000 ms
+RTT_EDGES = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+HIST_COLUMNS = [f'hist_{i}' for i in range(len(RTT_EDGES) + 1)]
+
+# Colonnes additionnées lors de la fusion de deux agrégats
+SUM_COLUMNS = ['sample_count', 'online_count', 'rtt_sum', 'rtt_count'] + HIST_COLUMNS
+
+
+def bucket_start(timestamp: datetime, resolution: str) -> datetime:
+    """Début de l'intervalle contenant l'horodatage"""
+    if resolution == '1m':
+        return timestamp.replace(second=0, microsecond=0)
+    if resolution == '1h':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if resolution == '1d':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Résolution inconnue: {resolution}")
+
+
+def choose_resolution(start: datetime, end: datetime) -> str:
+    """Résolution adaptée à la période demandée (quelques centaines de points au plus)"""
+    span = end - start
+    if span <= timedelta(hours=6):
+        return '1m'
+    if span <= timedelta(days=14):
+        return '1h'
+    return '1d'
+
+
+def _empty_bucket(device_id: int, resolution: str, start: datetime) -> Dict:
+    bucket = {name: 0 for name in SUM_COLUMNS}
+    bucket.update({
+        'device_id': device_id,
+        'resolution': resolution,
+        'bucket_start': start,
+        'rtt_sum': 0.0,
+        'rtt_min': None,
+        'rtt_max': None
+    })
+    return bucket
+
+
+def aggregate_scans(scans: Iterable[Tuple]) -> List[Dict]:
+    """
+    Agrège des scans par équipement, parc et intervalle
+
+    Args:
+        scans: tuples (device_id, timestamp, is_online, response_time)
+
+    Returns:
+        list: lignes d'agrégats prêtes pour upsert_buckets()
+    """
+    buckets = {}
+    for device_id, timestamp, is_online, response_time in scans:
+        if timestamp is None:
+            continue
+        for resolution in RESOLUTIONS:
+            start = bucket_start(timestamp, resolution)
+            for target in (device_id, FLEET_DEVICE_ID):
+                key = (target, resolution, start)
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = _empty_bucket(*key)
+                bucket['sample_count'] += 1
+                if is_online:
+                    bucket['online_count'] += 1
+                # Temps de réponse nul ou absent (hors ligne) : exclu des statistiques RTT
+                if response_time:
+                    rtt = float(response_time)
+                    bucket['rtt_sum'] += rtt
+                    bucket['rtt_count'] += 1
+                    bucket['rtt_min'] = rtt if bucket['rtt_min'] is None else min(bucket['rtt_min'], rtt)
+                    bucket['rtt_max'] = rtt if bucket['rtt_max'] is None else max(bucket['rtt_max'], rtt)
+                    bucket[HIST_COLUMNS[bisect.bisect_right(RTT_EDGES, rtt)]] += 1
+    return list(buckets.values())
+
+
+@lru_cache(maxsize=None)
+def _upsert_statement(table):
+    statement = sqlite_insert(table)
+    excluded = statement.excluded
+    values = {name: table.c[name] + excluded[name] for name in SUM_COLUMNS}
+    values['rtt_min'] = func.min(func.coalesce(table.c.rtt_min, excluded.rtt_min),
+                                 func.coalesce(excluded.rtt_min, table.c.rtt_min))
+    values['rtt_max'] = func.max(func.coalesce(table.c.rtt_max, excluded.rtt_max),
+                                 func.coalesce(excluded.rtt_max, table.c.rtt_max))
+    return statement.on_conflict_do_update(
+        index_elements=['device_id', 'resolution', 'bucket_start'],
+        set_=values
+    )
+
+
+def upsert_buckets(connection, table, buckets: List[Dict]):
+    """Fusionne des agrégats dans la table (INSERT ... ON CONFLICT DO UPDATE, une seule requête)"""
+    if buckets:
+        connection.execute(_upsert_statement(table), buckets)
+
+
+def apply_scans(connection, table, scans: Iterable[Tuple]) -> int:
+    """Met à jour les agrégats avec de nouveaux scans, retourne le nombre d'intervalles touchés"""
+    buckets = aggregate_scans(scans)
+    upsert_buckets(connection, table, buckets)
+    return len(buckets)
+
+
+def rebuild(connection, table, scan_table, batch_size: int = 5000) -> int:
+    """Reconstruit tous les agrégats depuis l'historique brut (pagination par identifiant)"""
+    connection.execute(table.delete())
+    last_id = 0
+    total = 0
+    while True:
+        rows = connection.execute(
+            select(scan_table.c.id, scan_table.c.device_id, scan_table.c.timestamp,
+                   scan_table.c.is_online, scan_table.c.response_time)
+            .where(scan_table.c.id > last_id)
+            .order_by(scan_table.c.id)
+            .limit(batch_size)
+        ).fetchall()
+        if not rows:
+            return total
+        apply_scans(connection, table, [tuple(row[1:]) for row in rows])
+        last_id = rows[-1][0]
+        total += len(rows)
+
+
+def percentile(histogram: List[int], q: float, rtt_min: Optional[float], rtt_max: Optional[float]) -> Optional[float]:
+    """Estime un percentile par interpolation linéaire dans l'histogramme"""
+    total = sum(histogram)
+    if total == 0 or rtt_min is None or rtt_max is None:
+        return None
+    rank = q * total
+    cumulative = 0
+    for index, count in enumerate(histogram):
+        if count and cumulative + count >= rank:
+            lower = RTT_EDGES[index - 1] if index > 0 else rtt_min
+            upper = RTT_EDGES[index] if index < len(RTT_EDGES) else rtt_max
+            lower, upper = max(lower, rtt_min), min(upper, rtt_max)
+            value = lower + (upper - lower) * (rank - cumulative) / count
+            return min(max(value, rtt_min), rtt_max)
+        cumulative += count
+    return rtt_max
+
+
+def bucket_stats(bucket: Dict) -> Dict:
+    """Statistiques lisibles d'un agrégat (ou d'une fusion d'agrégats)"""
+    samples = int(bucket.get('sample_count') or 0)
+    rtt_count = int(bucket.get('rtt_count') or 0)
+    histogram = [int(bucket.get(name) or 0) for name in HIST_COLUMNS]
+    return {
+        'samples': samples,
+        'online_samples': int(bucket.get('online_count') or 0),
+        'availability': (bucket.get('online_count') or 0) / samples * 100 if samples else None,
+        'avg_response_time': bucket['rtt_sum'] / rtt_count if rtt_count else None,
+        'min_response_time': bucket.get('rtt_min'),
+        'max_response_time': bucket.get('rtt_max'),
+        'p95_response_time': percentile(histogram, 0.95, bucket.get('rtt_min'), bucket.get('rtt_max'))
+    }
+
+
+def summarize(connection, table, start: datetime, end: Optional[datetime] = None,
+              device_id: int = FLEET_DEVICE_ID, resolution: Optional[str] = None) -> Dict:
+    """
+    Statistiques fusionnées sur une période
+
+    Args:
+        start (datetime): Début de la période (arrondi au début de l'intervalle)
+        end (datetime): Fin de la période (exclue), maintenant par défaut
+        device_id (int): Équipement, ou FLEET_DEVICE_ID pour tout le parc
+        resolution (str): Résolution lue, choisie selon la période par défaut
+    """
+    end = end or datetime.now()
+    resolution = resolution or choose_resolution(start, end)
+    columns = [func.sum(table.c[name]).label(name) for name in SUM_COLUMNS]
+    columns += [func.min(table.c.rtt_min).label('rtt_min'), func.max(table.c.rtt_max).label('rtt_max')]
+    row = connection.execute(
+        select(*columns).where(
+            table.c.device_id == device_id,
+            table.c.resolution == resolution,
+            table.c.bucket_start >= bucket_start(start, resolution),
+            table.c.bucket_start < end
+        )
+    ).mappings().first()
+    stats = bucket_stats(dict(row) if row else {})
+    stats.update({'resolution': resolution, 'start': start.isoformat(), 'end': end.isoformat()})
+    return stats
+
+
+def summarize_devices(connection, table, start: datetime, end: Optional[datetime] = None,
+                      resolution: Optional[str] = None) -> Dict[int, Dict]:
+    """Statistiques de la période pour chaque équipement, en une seule requête groupée"""
+    end = end or datetime.now()
+    resolution = resolution or choose_resolution(start, end)
+    columns = [func.sum(table.c[name]).label(name) for name in SUM_COLUMNS]
+    columns += [func.min(table.c.rtt_min).label('rtt_min'), func.max(table.c.rtt_max).label('rtt_max')]
+    rows = connection.execute(
+        select(table.c.device_id, *columns).where(
+            table.c.device_id != FLEET_DEVICE_ID,
+            table.c.resolution == resolution,
+            table.c.bucket_start >= bucket_start(start, resolution),
+            table.c.bucket_start < end
+        ).group_by(table.c.device_id)
+    ).mappings().all()
+    return {row['device_id']: bucket_stats(dict(row)) for row in rows}
+
+
+def series(connection, table, start: datetime, end: Optional[datetime] = None,
+           device_id: int = FLEET_DEVICE_ID, resolution: Optional[str] = None) -> List[Dict]:
+    """Points de la série temporelle (un par intervalle non vide) pour les graphiques"""
+    end = end or datetime.now()
+    resolution = resolution or choose_resolution(start, end)
+    rows = connection.execute(
+        select(table).where(
+            table.c.device_id == device_id,
+            table.c.resolution == resolution,
+            table.c.bucket_start >= bucket_start(start, resolution),
+            table.c.bucket_start < end
+        ).order_by(table.c.bucket_start)
+    ).mappings().all()
+    points = []
+    for row in rows:
+        point = bucket_stats(dict(row))
+        point['timestamp'] = row['bucket_start'].isoformat()
+        points.append(point)
+    return points
+
+
+def total_samples(connection, table, start: Optional[datetime] = None, device_id: int = FLEET_DEVICE_ID) -> int:
+    """Nombre de scans enregistrés (depuis une date), lu dans les agrégats journaliers"""
+    # Journalier si la date est alignée sur un jour, sinon résolution plus fine
+    resolution = '1d'
+    if start is not None and start != bucket_start(start, '1d'):
+        resolution = choose_resolution(start, datetime.now())
+    conditions = [table.c.device_id == device_id, table.c.resolution == resolution]
+    if start is not None:
+        conditions.append(table.c.bucket_start >= bucket_start(start, resolution))
+    query = select(func.coalesce(func.sum(table.c.sample_count), 0)).where(*conditions)
+    return int(connection.execute(query).scalar() or 0)
+
@@ -8,6 +8,7 @@ import json
 import os
 from datetime import datetime
 from network_scanner_production import ProductionNetworkScanner
+from retention_manager import retention_summary
 
 class ProductionSettingsManager:
     """Gestionnaire de paramètres production avec détection réelle"""
@@ -94,7 +95,8 @@ class ProductionSettingsManager:
             'detected_networks': self.get_detected_networks(),
             'network_statistics': self.get_network_statistics(),
             'scan_status': self.get_scan_status(),
-            'system_info': self.get_system_info()
+            'system_info': self.get_system_info(),
+            'data_retention': self.get_retention_status()
         })
         
         return self.settings
@@ -177,6 +179,14 @@ class ProductionSettingsManager:
             ]
         }
     
+    def get_retention_status(self):
+        """Politiques de rétention et résultat de la dernière purge"""
+        try:
+            return retention_summary()
+        except Exception as e:
+            print(f"⚠️ Erreur lecture rapport de rétention: {e}")
+            return {}
+    
     def update_network_settings(self, network_settings):
         """Met à jour les paramètres réseau"""
         try:
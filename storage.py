@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Couche de stockage SQLite partagée
+Profil de réglage commun (WAL, synchronous=NORMAL, délai d'attente sur verrou, E/S mappées
+en mémoire) et pool de connexions borné par fichier de base de données
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config_advanced import PERFORMANCE_CONFIG
+
+DATABASE_CONFIG = PERFORMANCE_CONFIG['database_config']
+
+
+def sqlite_pragmas(config: Optional[Dict] = None) -> Dict[str, object]:
+    """PRAGMA appliqués à chaque nouvelle connexion"""
+    config = config or DATABASE_CONFIG
+    return {
+        'journal_mode': config['journal_mode'],
+        'synchronous': config['synchronous'],
+        'busy_timeout': int(config['query_timeout'] * 1000),
+        'mmap_size': config['mmap_size'],
+        'cache_size': config['cache_size'],
+        'temp_store': config['temp_store']
+    }
+
+
+def apply_pragmas(conn, config: Optional[Dict] = None):
+    """Applique le profil de réglage à une connexion DB-API sqlite3"""
+    cursor = conn.cursor()
+    try:
+        for name, value in sqlite_pragmas(config).items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+
+def connect(path: str, isolation_level: Optional[str] = '', config: Optional[Dict] = None) -> sqlite3.Connection:
+    """Ouvre une connexion sqlite3 réglée (utilisable depuis plusieurs threads, un à la fois)"""
+    config = config or DATABASE_CONFIG
+    conn = sqlite3.connect(path, timeout=config['query_timeout'], check_same_thread=False,
+                           isolation_level=isolation_level)
+    apply_pragmas(conn, config)
+    return conn
+
+
+class ConnectionPool:
+    """Pool borné de connexions sqlite3 vers un même fichier"""
+
+    def __init__(self, path: str, size: int = DATABASE_CONFIG['connection_pool_size'],
+                 timeout: float = DATABASE_CONFIG['query_timeout']):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return connect(self.path)
+                except Exception:
+                    self._created -= 1
+                    raise
+        try:
+            # Pool plein : attendre qu'une connexion soit rendue (contre-pression)
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"Pool de connexions épuisé pour {self.path}")
+
+    def _discard(self, conn: sqlite3.Connection):
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """
+        Emprunte une connexion : commit en sortie normale, rollback sur exception
+        (même sémantique que `with sqlite3.connect(...) as conn`)
+        """
+        conn = self._acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                self._discard(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put_nowait(conn)
+
+    def close(self):
+        """Ferme les connexions inactives"""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def stats(self) -> Dict:
+        return {'path': self.path, 'size': self.size, 'created': self._created, 'idle': self._idle.qsize()}
+
+
+# Instances globales (un pool par fichier)
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str) -> ConnectionPool:
+    """Retourne le pool partagé du fichier de base de données"""
+    key = os.path.abspath(path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key)
+        return pool
+
+
+def sqlalchemy_engine_options(config: Optional[Dict] = None) -> Dict:
+    """Options de moteur SQLAlchemy (SQLALCHEMY_ENGINE_OPTIONS) pour un fichier SQLite"""
+    from sqlalchemy.pool import QueuePool
+
+    config = config or DATABASE_CONFIG
+    return {
+        # SQLAlchemy 1.4 utilise NullPool (une connexion par session) pour les fichiers SQLite
+        'poolclass': QueuePool,
+        'pool_size': config['connection_pool_size'],
+        'max_overflow': config['pool_max_overflow'],
+        'pool_timeout': config['query_timeout'],
+        'connect_args': {'timeout': config['query_timeout'], 'check_same_thread': False}
+    }
+
+
+def configure_engine(engine, config: Optional[Dict] = None):
+    """Applique le profil de réglage à chaque connexion ouverte par un moteur SQLAlchemy"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, config)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Exports en flux
+Les lignes sont lues par lots (pagination par identifiant) et encodées au fil de l'eau en CSV
+ou NDJSON, éventuellement compressées en gzip : la mémoire utilisée ne dépend pas du volume exporté
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson')
+}
+
+
+def iter_chunks(fetch_chunk: Callable, chunk_size: int, last_id: int = 0) -> Iterator[List[Tuple]]:
+    """
+    Parcourt une table par lots
+
+    Args:
+        fetch_chunk: fetch_chunk(last_id, chunk_size) -> lignes d'id > last_id triées par id (id en première colonne)
+    """
+    while True:
+        chunk = fetch_chunk(last_id, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+def format_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def csv_stream(columns: Sequence[str], chunks: Iterable[List[Tuple]]) -> Iterator[str]:
+    """En-tête puis un bloc de texte CSV par lot"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([format_value(v) for v in row] for row in chunk)
+        yield buffer.getvalue()
+
+
+def ndjson_stream(columns: Sequence[str], chunks: Iterable[List[Tuple]]) -> Iterator[str]:
+    """Un objet JSON par ligne, un bloc de texte par lot"""
+    for chunk in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(columns, (format_value(v) for v in row))), ensure_ascii=False) + '\n'
+            for row in chunk
+        )
+
+
+def gzip_stream(blocks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compression gzip incrémentale (un membre gzip unique, lisible par gunzip)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(columns: Sequence[str], chunks: Iterable[List[Tuple]], fmt: str = 'csv',
+                  compress: bool = False, level: int = 6) -> Tuple[Iterator[bytes], str, str]:
+    """
+    Construit le flux d'export
+
+    Returns:
+        tuple: (générateur d'octets, type MIME, extension du fichier)
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format d'export non supporté: {fmt}")
+    mimetype, extension = FORMATS[fmt]
+    encoder = csv_stream if fmt == 'csv' else ndjson_stream
+    blocks = (text.encode('utf-8') for text in encoder(columns, chunks))
+    if compress:
+        return gzip_stream(blocks, level), 'application/gzip', f"{extension}.gz"
+    return blocks, mimetype, extension
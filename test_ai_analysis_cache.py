@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test du cache des analyses IA par équipement (dernier scan, version des modèles)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Base temporaire : l'application ne touche pas à la base de production
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TMP_DIR, 'test_ai_cache.db')
+
+from sqlalchemy import event
+import app as dashboard
+
+def test_ai_analysis_cache():
+    print("🧪 TEST CACHE DES ANALYSES IA")
+    print("=" * 40)
+
+    app, db = dashboard.app, dashboard.db
+    commits = []
+    with app.app_context():
+        db.create_all()
+        device = dashboard.Device(ip='10.0.0.10', hostname='automate-ligne1', mac_vendor='Siemens')
+        db.session.add(device)
+        db.session.commit()
+        for i in range(5):
+            db.session.add(dashboard.ScanHistory(device_id=device.id, is_online=True, response_time=10.0 + i))
+        db.session.commit()
+
+        event.listen(db.session, 'after_commit', lambda session: commits.append(session))
+        first = dashboard.analyze_device_with_ai(device)
+        assert first is not None and len(commits) >= 1
+        print("✅ Première analyse calculée et enregistrée")
+
+        # Même dernier scan, même version des modèles : analyse en cache, aucune écriture
+        commits.clear()
+        for _ in range(10):
+            assert dashboard.analyze_device_with_ai(device) is first
+        assert commits == []
+        print("✅ 10 appels suivants servis par le cache, sans validation en base")
+
+        # Nouveau scan : empreinte modifiée, analyse recalculée
+        db.session.add(dashboard.ScanHistory(device_id=device.id, is_online=False, response_time=None))
+        db.session.commit()
+        commits.clear()
+        second = dashboard.analyze_device_with_ai(device)
+        assert second is not first and len(commits) >= 1
+        assert dashboard.analyze_device_with_ai(device) is second
+        print("✅ Nouveau ScanHistory : cache invalidé")
+
+        # Modèles réentraînés ou rechargés : version incrémentée, analyse recalculée
+        dashboard.ai_system.model_version += 1
+        commits.clear()
+        third = dashboard.analyze_device_with_ai(device)
+        assert third is not second and len(commits) >= 1
+        assert dashboard.AI_ANALYSIS_CACHE[device.id][0] == dashboard.get_analysis_fingerprint(device)
+        print("✅ Nouvelle version des modèles : cache invalidé")
+
+        # Analyse forcée : recalculée même si l'empreinte n'a pas changé
+        assert dashboard.analyze_device_with_ai(device, use_cache=False) is not third
+        print("✅ use_cache=False : analyse recalculée")
+    return True
+
+if __name__ == "__main__":
+    test_ai_analysis_cache()
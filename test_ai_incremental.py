@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test de l'entraînement incrémental (buffer glissant, dérive, ré-entraînement)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+
+from ai_incremental import TrainingBuffer, IncrementalTrainer
+from ai_enhancement import AIEnhancement
+
+def scans(first_id, count, devices=2, response_time=None, rng=None):
+    """Scans (scan_id, device_id, response_time, packet_loss, is_online, scan_duration, error_count)"""
+    records = []
+    for scan_id in range(first_id, first_id + count):
+        rtt = scan_id if response_time is None else response_time + rng.normal(0, 2)
+        records.append((scan_id, scan_id % devices, rtt, 0.0, scan_id % 7 != 0, 1.5, 0))
+    return records
+
+def check_training_buffer(tmp):
+    path = os.path.join(tmp, 'buffer.npz')
+    buffer = TrainingBuffer(path, max_rows=10, window_per_device=3)
+    buffer.append(scans(1, 7))
+    assert buffer.row_count == 7 and buffer.anomaly_rows()[:, 0].tolist() == list(range(1, 8))
+
+    # Anneau plein : les plus anciens sont remplacés, ordre chronologique conservé
+    buffer.append(scans(8, 6))
+    assert buffer.row_count == 10 and buffer.write_pos == 3
+    assert buffer.anomaly_rows()[:, 0].tolist() == list(range(4, 14))
+    buffer.append(scans(14, 25))  # lot plus grand que l'anneau
+    assert buffer.anomaly_rows()[:, 0].tolist() == list(range(29, 39)) and buffer.last_scan_id == 38
+    print("✅ Anneau : remplacement des plus anciens scans, lot plus grand que le buffer")
+
+    # Fenêtre par équipement : derniers scans de chacun
+    assert sorted(buffer.device_windows) == [0, 1]
+    assert buffer.device_windows[0][:, 0].tolist() == [34, 36, 38]
+    assert buffer.device_windows[1][:, 0].tolist() == [33, 35, 37]
+    histories = buffer.device_histories()
+    assert len(histories) == 2 and all(len(h['history']) == 3 for h in histories)
+    assert all(isinstance(r['is_online'], bool) for h in histories for r in h['history'])
+    print("✅ Fenêtres par équipement bornées, historiques au format de la maintenance prédictive")
+
+    # Sauvegarde / rechargement à l'identique
+    buffer.save()
+    reloaded = TrainingBuffer(path, max_rows=10, window_per_device=3)
+    assert reloaded.load()
+    assert np.array_equal(reloaded.anomaly_rows(), buffer.anomaly_rows())
+    assert (reloaded.row_count, reloaded.write_pos, reloaded.last_scan_id) == (10, buffer.write_pos, 38)
+    assert all(np.array_equal(reloaded.device_windows[d], buffer.device_windows[d]) for d in (0, 1))
+    reloaded.append(scans(39, 1))
+    assert reloaded.anomaly_rows()[:, 0].tolist() == list(range(30, 40))
+    assert not TrainingBuffer(os.path.join(tmp, 'absent.npz')).load()
+    print("✅ Buffer sauvegardé et rechargé (position d'écriture comprise)")
+
+    # Taille réduite dans la configuration : seuls les scans les plus récents sont gardés
+    smaller = TrainingBuffer(path, max_rows=4, window_per_device=2)
+    assert smaller.load()
+    assert smaller.row_count == 4 and smaller.anomaly_rows()[:, 0].tolist() == [35, 36, 37, 38]
+    assert smaller.device_windows[0][:, 0].tolist() == [36, 38]
+    smaller.append(scans(39, 1))
+    assert smaller.anomaly_rows()[:, 0].tolist() == [36, 37, 38, 39]
+    larger = TrainingBuffer(path, max_rows=50, window_per_device=3)
+    assert larger.load() and larger.anomaly_rows()[:, 0].tolist() == list(range(29, 39))
+    print("✅ Buffer redimensionné au chargement (réduit ou agrandi)")
+
+def check_incremental_trainer(tmp):
+    rng = np.random.RandomState(0)
+    config = {'models_dir': os.path.join(tmp, 'models'), 'buffer_max_rows': 1000, 'window_per_device': 100,
+              'min_rows': 11, 'retrain_rows_threshold': 500, 'drift_min_rows': 50, 'drift_threshold': 0.5}
+    trainer = IncrementalTrainer(AIEnhancement(), config)
+    trainer.ingest(scans(1, 5, response_time=20.0, rng=rng))
+    assert trainer.retrain_reason() is None and trainer.retrain_reason(force=True) is None
+    trainer.ingest(scans(6, 95, response_time=20.0, rng=rng))
+    assert trainer.retrain_reason() == 'initial' and trainer.drift_score() == 0.0
+
+    assert trainer.maybe_retrain() == 'initial' and trainer.ai_system.models_trained
+    assert trainer.rows_since_fit == 0 and trainer.reference_mean is not None
+    assert trainer.retrain_reason() is None and trainer.retrain_reason(force=True) == 'manual'
+    print("✅ Premier entraînement après min_rows scans, puis modèles considérés à jour")
+
+    # Scans semblables : pas de dérive
+    trainer.ingest(scans(101, 60, response_time=20.0, rng=rng))
+    assert trainer.drift_score() < 0.5 and trainer.retrain_reason() is None
+
+    # Temps de réponse décalés : dérive détectée une fois drift_min_rows atteint
+    trainer.mark_fitted()
+    trainer.ingest(scans(161, 40, response_time=80.0, rng=rng))
+    assert trainer.drift_score() >= 0.5 and trainer.retrain_reason() is None
+    trainer.ingest(scans(201, 10, response_time=80.0, rng=rng))
+    assert trainer.retrain_reason() == 'drift'
+    print(f"✅ Dérive détectée ({trainer.drift_score():.1f} écarts-types) après {trainer.rows_since_fit} scans")
+
+    # Volume suffisant : ré-entraînement même sans dérive
+    trainer.mark_fitted()
+    trainer.ingest(scans(211, 500, response_time=trainer.reference_mean[0], rng=rng))
+    assert trainer.drift_score() < 0.5 and trainer.retrain_reason() == 'buffer'
+    print("✅ Ré-entraînement après retrain_rows_threshold nouveaux scans")
+
+    # Scans arrivés pendant un entraînement hors processus : conservés après mark_fitted
+    snapshot = trainer.training_snapshot()
+    assert snapshot['rows'] == 710 and snapshot['rows_since_fit'] == 500
+    trainer.ingest(scans(711, 30, response_time=200.0, rng=rng))
+    trainer.mark_fitted(snapshot)
+    assert trainer.rows_since_fit == 30 and trainer.recent_scaler.n_samples_seen_ == 30
+    assert np.allclose(trainer.reference_mean, snapshot['anomaly_scaler'].mean_)
+    assert trainer.drift_score() > 0.5
+    trainer.ingest(scans(741, 20, response_time=200.0, rng=rng))
+    assert trainer.retrain_reason() == 'drift'
+    print("✅ Scans ingérés pendant l'entraînement comptés pour la dérive suivante")
+
+    # État persisté : buffer et statistiques rechargés au redémarrage
+    trainer.save()
+    restarted = IncrementalTrainer(AIEnhancement(), config)
+    assert restarted.last_scan_id == 760 and restarted.buffer.row_count == 760
+    assert restarted.rows_since_fit == 50 and np.allclose(restarted.reference_mean, trainer.reference_mean)
+    assert abs(restarted.drift_score() - trainer.drift_score()) < 1e-9
+    print("✅ Buffer et statistiques de dérive rechargés au redémarrage")
+
+def test_ai_incremental():
+    print("🧪 TEST ENTRAÎNEMENT INCRÉMENTAL")
+    print("=" * 40)
+    with tempfile.TemporaryDirectory() as tmp:
+        check_training_buffer(tmp)
+        check_incremental_trainer(tmp)
+    return True
+
+if __name__ == "__main__":
+    test_ai_incremental()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test du vérificateur de services asyncio (serveurs locaux simulés)
+"""
+
+import sys
+import os
+import socket
+import socketserver
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from async_service_checker import AsyncServiceChecker, snmp_get_request
+
+class BannerHandler(socketserver.BaseRequestHandler):
+    banner = b''
+
+    def handle(self):
+        if self.banner:
+            self.request.sendall(self.banner)
+        else:
+            data = self.request.recv(1024)
+            if data.startswith(b'HEAD'):
+                self.request.sendall(b'HTTP/1.0 200 OK\r\nContent-Length: 0\r\n\r\n')
+            elif data:
+                self.request.sendall(b'\x00\x02ok')
+
+class ThreadedServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def start_server(banner=b''):
+    handler = type('Handler', (BannerHandler,), {'banner': banner})
+    server = ThreadedServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def start_snmp_agent():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+
+    def serve():
+        while True:
+            data, addr = sock.recvfrom(1024)
+            sock.sendto(b'\x30\x00', addr)
+
+    threading.Thread(target=serve, daemon=True).start()
+    return sock
+
+def start_blackhole():
+    """Accepte les connexions sans jamais répondre (sonde bloquée jusqu'au délai)"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(100)
+    return server
+
+def closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+def test_async_service_checker():
+    print("🧪 TEST VÉRIFICATION ASYNCHRONE DES SERVICES")
+    print("=" * 40)
+
+    request = snmp_get_request('public')
+    assert request[0] == 0x30 and request[1] == len(request) - 2 and b'public' in request
+    print("✅ GetRequest SNMP encodé")
+
+    http, ssh, ftp, bad_ftp, dns = (start_server(), start_server(b'SSH-2.0-OpenSSH_9.6\r\n'),
+                                    start_server(b'220 FTP ready\r\n'), start_server(b'500 nope\r\n'), start_server())
+    snmp = start_snmp_agent()
+    blackhole = start_blackhole()
+    refused = closed_port()
+
+    checker = AsyncServiceChecker({'max_concurrency': 500, 'per_host_limit': 50, 'cycle_deadline': 10})
+    targets = [
+        ('127.0.0.1', 'http', http.server_address[1], 2),
+        ('127.0.0.1', 'ssh', ssh.server_address[1], 2),
+        ('127.0.0.1', 'ftp', ftp.server_address[1], 2),
+        ('127.0.0.1', 'ftp', bad_ftp.server_address[1], 2),
+        ('127.0.0.1', 'dns', dns.server_address[1], 2),
+        ('127.0.0.1', 'snmp', snmp.getsockname()[1], 2),
+        ('127.0.0.1', 'smtp', refused, 2),
+        ('127.0.0.1', 'ssh', blackhole.getsockname()[1], 1),
+    ]
+    results = checker.check_all(targets)
+    statuses = [r['status'] for r in results]
+    assert statuses == ['up', 'up', 'up', 'down', 'up', 'up', 'down', 'down'], statuses
+    assert results[6]['error_message'].startswith('Connexion échouée')
+    assert all(r['host'] == '127.0.0.1' for r in results)
+    for result in results:
+        print(f"✅ {result['service_name']:<5} port {result['port']:<6} -> {result['status']}")
+
+    # Beaucoup de sondes bloquées : le cycle respecte le délai global
+    checker = AsyncServiceChecker({'max_concurrency': 200, 'per_host_limit': 200, 'cycle_deadline': 1.5})
+    start = time.time()
+    results = checker.check_all([('127.0.0.1', 'ssh', blackhole.getsockname()[1], 5)] * 300)
+    elapsed = time.time() - start
+    assert elapsed < 4, elapsed
+    assert all(r['status'] in ('timeout', 'down') for r in results)
+    assert sum(1 for r in results if r['error_message'] == 'Délai global du cycle dépassé') > 0
+    print(f"✅ 300 sondes bloquées arrêtées par le délai global en {elapsed:.1f}s")
+
+    # Limite par hôte : 2 connexions simultanées au plus
+    checker = AsyncServiceChecker({'max_concurrency': 100, 'per_host_limit': 2, 'cycle_deadline': 1.2})
+    results = checker.check_all([('127.0.0.1', 'ssh', blackhole.getsockname()[1], 0.5)] * 10)
+    finished = sum(1 for r in results if r['error_message'] != 'Délai global du cycle dépassé')
+    assert finished <= 6, finished
+    print(f"✅ Limite par hôte respectée ({finished}/10 sondes terminées dans le délai)")
+
+    for server in (http, ssh, ftp, bad_ftp, dns):
+        server.shutdown()
+    snmp.close()
+    blackhole.close()
+    return True
+
+if __name__ == "__main__":
+    test_async_service_checker()
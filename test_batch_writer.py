@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test de l'écriture groupée des résultats de vérification
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from batch_writer import BatchedWriter
+from storage import ConnectionPool
+
+def test_batch_writer():
+    print("🧪 TEST ÉCRITURE GROUPÉE")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ConnectionPool(os.path.join(tmp, 'monitoring.db'), size=2)
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE service_monitoring (device_ip TEXT, service_name TEXT, port INTEGER, status TEXT)")
+        statement = "INSERT INTO service_monitoring (device_ip, service_name, port, status) VALUES (?, ?, ?, ?)"
+
+        writer = BatchedWriter(pool, statement, batch_size=200, flush_interval=0.2, max_queue=1000)
+        start = time.time()
+
+        def producer(index):
+            for device in range(50):
+                for port in (21, 22, 25, 53, 80, 161, 443):
+                    writer.write((f"10.{index}.0.{device}", 'http', port, 'up'))
+
+        threads = [threading.Thread(target=producer, args=(i,)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.flush()
+        elapsed = time.time() - start
+
+        with pool.connection() as conn:
+            count = conn.execute("SELECT COUNT(*) FROM service_monitoring").fetchone()[0]
+        stats = writer.get_stats()
+        assert count == 10 * 50 * 7 == stats['rows_written'], (count, stats)
+        assert stats['batches'] <= count // 200 + 10, stats
+        assert stats['pending'] == 0 and stats['rows_failed'] == 0
+        print(f"✅ {count} lignes en {stats['batches']} transactions ({elapsed:.2f}s)")
+
+        # Fenêtre de temps : un lot incomplet est écrit sans attendre batch_size
+        writer.write(('10.9.9.9', 'ssh', 22, 'down'))
+        time.sleep(0.6)
+        with pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM service_monitoring WHERE device_ip = '10.9.9.9'").fetchone()[0] == 1
+        print("✅ Lot incomplet écrit après la fenêtre de temps")
+
+        # Contre-pression : file pleine et base verrouillée -> write() bloque puis expire
+        small = BatchedWriter(pool, statement, batch_size=1, flush_interval=0.05, max_queue=2)
+        with pool.connection() as conn:
+            conn.execute("BEGIN EXCLUSIVE")
+            try:
+                blocked = False
+                try:
+                    for i in range(10):
+                        small.write(('10.8.8.8', 'dns', 53, 'up'), timeout=0.2)
+                except Exception:
+                    blocked = True
+                assert blocked
+            finally:
+                conn.rollback()
+        small.close()
+        writer.close()
+        print("✅ Contre-pression quand la file est pleine")
+
+        pool.close()
+
+    return True
+
+if __name__ == "__main__":
+    test_batch_writer()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test du contexte réseau du chatbot (résumé incrémental et budget de tokens)
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, MetaData, String, Table, Text, create_engine, event
+from chat_context import NetworkContextService, CHAT_CONTEXT_CONFIG, estimate_tokens
+
+def make_tables():
+    metadata = MetaData()
+    tables = {
+        'device': Table(
+            'device', metadata,
+            Column('id', Integer, primary_key=True), Column('ip', String(15)), Column('hostname', String(100)),
+            Column('device_type', String(50)), Column('is_online', Boolean), Column('health_score', Float),
+            Column('maintenance_urgency', String(20)), Column('last_seen', DateTime)
+        ),
+        'alert': Table(
+            'alert', metadata,
+            Column('id', Integer, primary_key=True), Column('device_id', Integer), Column('alert_type', String(50)),
+            Column('message', Text), Column('priority', String(20)), Column('is_resolved', Boolean),
+            Column('created_at', DateTime)
+        )
+    }
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    return engine, tables
+
+def test_chat_context():
+    print("🧪 TEST CONTEXTE RÉSEAU DU CHATBOT")
+    print("=" * 40)
+
+    engine, tables = make_tables()
+    now = datetime.now().replace(microsecond=0)
+    devices = [{'id': i, 'ip': f"10.0.{i // 250}.{i % 250}", 'hostname': f"automate-{i}", 'device_type': 'plc',
+                'is_online': i % 50 != 0, 'health_score': 40.0 if i % 100 == 7 else 90.0,
+                'maintenance_urgency': 'critical' if i % 100 == 7 else 'low', 'last_seen': now}
+               for i in range(1, 2001)]
+    alerts = [{'id': i, 'device_id': i, 'alert_type': 'anomaly' if i % 3 == 0 else 'offline',
+               'message': f"Équipement {i} : perte de paquets " + 'x' * 300, 'priority': ('low', 'high')[i % 2],
+               'is_resolved': i > 60, 'created_at': now - timedelta(minutes=i)} for i in range(1, 101)]
+    with engine.begin() as conn:
+        conn.execute(tables['device'].insert(), devices)
+        conn.execute(tables['alert'].insert(), alerts)
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    service = NetworkContextService(tables)
+    with engine.connect() as conn:
+        summary = service.summary(conn)
+        assert summary['total_devices'] == 2000 and summary['offline_devices'] == 40
+        assert summary['critical_devices'] == 20 and summary['active_alerts'] == 60
+        assert summary['security_alerts'] == 20 and summary['alerts_by_priority'] == {'low': 30, 'high': 30}
+        assert len(summary['attention_devices']) == CHAT_CONTEXT_CONFIG['top_devices']
+        assert all(d['maintenance_urgency'] == 'critical' for d in summary['attention_devices'])
+        assert [a['id'] for a in summary['recent_alerts'][:3]] == [1, 2, 3]
+        assert len(statements) == 2
+        print("✅ Résumé chargé en 2 requêtes (compteurs, top équipements, alertes récentes)")
+
+        # Messages suivants : aucune requête
+        statements.clear()
+        for _ in range(50):
+            context, _ = service.build_context(conn, 'Tu es un assistant.', 'État du réseau ?')
+        assert statements == [] and service.stats['hits'] == 50
+        assert estimate_tokens(context) <= CHAT_CONTEXT_CONFIG['token_budget']
+        assert 'Équipements surveillés : 2000' in context and 'ALERTES RÉCENTES' in context and 'autres)' in context
+        print(f"✅ 50 messages sans requête, contexte de ~{estimate_tokens(context)} tokens")
+
+        # Budget réduit : compteurs toujours présents, listes tronquées
+        small = service.render(summary, 150)
+        assert estimate_tokens(small) <= 150 and 'Alertes actives : 60' in small
+        assert small.count('  * ') < context.count('  * ')
+        header = service.render(summary, 10)
+        assert '  * ' not in header and 'Score de santé moyen' in header
+        print("✅ Budget de tokens respecté (listes tronquées, compteurs conservés)")
+
+    # Validation d'un scan : changements appliqués sans relecture
+    statements.clear()
+    changed = dict(devices[0], is_online=False, health_score=10.0, maintenance_urgency='critical')
+    service.apply_changes(
+        devices={1: changed, 2: None, 5000: dict(devices[2], id=5000, ip='10.9.9.9')},
+        alerts={1: dict(alerts[0], is_resolved=True),
+                500: {'id': 500, 'device_id': 1, 'alert_type': 'security', 'message': 'Intrusion détectée',
+                      'priority': 'critical', 'is_resolved': False, 'created_at': now}}
+    )
+    with engine.connect() as conn:
+        summary = service.summary(conn)
+    assert statements == []
+    assert summary['total_devices'] == 2000 and summary['offline_devices'] == 41 and summary['critical_devices'] == 21
+    assert summary['attention_devices'][0]['id'] == 1  # critique, hors ligne, santé la plus basse
+    assert summary['active_alerts'] == 60 and summary['recent_alerts'][0]['id'] == 500
+    assert summary['security_alerts'] == 21 and summary['alerts_by_priority']['critical'] == 1
+    print("✅ Équipements et alertes validés appliqués au résumé sans relecture")
+
+    # Mise à jour en masse : relecture complète au prochain accès
+    service.invalidate()
+    with engine.connect() as conn:
+        summary = service.summary(conn)
+    assert summary['total_devices'] == 2000 and summary['active_alerts'] == 60 and service.stats['reloads'] == 2
+    print("✅ Relecture complète après invalidation")
+    return True
+
+if __name__ == "__main__":
+    test_chat_context()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test de l'inventaire partagé des équipements (cache de la table device)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+from device_inventory import DeviceInventory
+from storage import get_pool
+
+def test_device_inventory():
+    print("🧪 TEST INVENTAIRE PARTAGÉ DES ÉQUIPEMENTS")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'network_monitor_production.db')
+        pool = get_pool(path)
+        with pool.connection() as conn:
+            conn.execute('''CREATE TABLE device (id INTEGER PRIMARY KEY, ip TEXT UNIQUE, mac TEXT, hostname TEXT,
+                            device_type TEXT, is_online BOOLEAN, maintenance_urgency TEXT, last_seen DATETIME,
+                            updated_at DATETIME)''')
+            conn.executemany("INSERT INTO device (ip, hostname, device_type, is_online, updated_at) VALUES (?, ?, ?, 1, ?)",
+                             [('10.0.0.1', 'sw-core', 'switch', '2026-01-01'), ('10.0.0.10', 'plc1', 'plc', '2026-01-01')])
+
+        inventory = DeviceInventory(path, ttl=3600)
+        notifications = []
+        inventory.subscribe(lambda changes, devices: notifications.append((changes, len(devices))))
+
+        devices = inventory.get_devices()
+        assert [d['ip'] for d in devices] == ['10.0.0.1', '10.0.0.10']
+        assert devices[1]['device_type'] == 'plc'
+        assert len(notifications) == 1 and len(notifications[0][0]['added']) == 2
+        print("✅ Équipements lus depuis la table device")
+
+        # Lecture en cache : pas de requête tant que le TTL n'a pas expiré
+        for _ in range(100):
+            inventory.get_devices()
+        stats = inventory.get_stats()
+        assert stats['hits'] == 100 and stats['reloads'] == 1 and stats['signature_checks'] == 1
+        print("✅ 100 lectures servies par le cache")
+
+        # Écriture puis invalidation : ajout, retrait et modification notifiés
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO device (ip, hostname, device_type, is_online, updated_at) VALUES ('10.0.0.50', 'imp', 'printer', 1, '2026-01-02')")
+            conn.execute("DELETE FROM device WHERE ip = '10.0.0.1'")
+            conn.execute("UPDATE device SET maintenance_urgency = 'high', updated_at = '2026-01-02' WHERE ip = '10.0.0.10'")
+        assert len(inventory.get_devices()) == 2  # encore le cache
+        inventory.invalidate()
+        devices = inventory.get_devices()
+        changes = notifications[-1][0]
+        assert [d['ip'] for d in changes['added']] == ['10.0.0.50']
+        assert [d['ip'] for d in changes['removed']] == ['10.0.0.1']
+        assert [d['ip'] for d in changes['updated']] == ['10.0.0.10']
+        assert inventory.get_device('10.0.0.10')['maintenance_urgency'] == 'high'
+        assert inventory.version == 2
+        print("✅ Changements notifiés après invalidation")
+
+        # TTL expiré sans changement : simple vérification de signature, pas de notification
+        inventory.ttl = 0
+        inventory.get_devices()
+        assert len(notifications) == 2 and inventory.get_stats()['reloads'] == 2
+        print("✅ Table inchangée : pas de relecture complète")
+
+        # Résultats de découverte du scanner principal
+        inventory.record_discovery([{'ip': '10.0.0.99', 'type': 'camera', 'is_online': True},
+                                    {'ip': '10.0.0.98', 'is_online': False}])
+        discoveries = inventory.get_discoveries()
+        assert [d['ip'] for d in discoveries] == ['10.0.0.99']
+        assert inventory.get_discoveries(since=discoveries[0]['discovered_at']) == []
+        print("✅ Découvertes du scanner principal disponibles")
+
+        # Base absente : liste vide, sans créer de fichier
+        missing = DeviceInventory(os.path.join(tmp, 'absente.db'))
+        assert missing.get_devices() == [] and not os.path.exists(os.path.join(tmp, 'absente.db'))
+        print("✅ Base principale absente gérée")
+
+        pool.close()
+
+    return True
+
+if __name__ == "__main__":
+    test_device_inventory()
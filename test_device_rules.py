@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test du moteur de règles de classification des équipements
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from device_rules import CLASSIFIER_RULES, DEVICE_SIGNATURES, DeviceRuleEngine, KeywordAutomaton
+
+def reference_classify(hostname, mac_vendor, ip):
+    """Implémentation de référence (recherches de sous-chaînes successives)"""
+    hostname_lower, mac_lower = hostname.lower(), mac_vendor.lower()
+    for rule in CLASSIFIER_RULES:
+        if any(w in hostname_lower for w in rule['hostnames']) or any(w in mac_lower for w in rule['vendors']):
+            return rule['type'], rule['confidence']
+    if ip.endswith('.1') or ip.endswith('.254'):
+        return 'router', 0.80
+    return 'unknown', 0.60
+
+def reference_signatures(hostname, mac_vendor, ports):
+    scores = {}
+    for device_type, signature in DEVICE_SIGNATURES.items():
+        score = 0
+        if any(p in hostname.lower() for p in signature['hostnames']):
+            score += 30
+        if any(v in mac_vendor.lower() for v in signature['vendors']):
+            score += 25
+        score += len(set(ports) & set(signature['ports'])) * 15
+        scores[device_type] = score
+    best = max(scores, key=lambda k: scores[k])
+    return (best, min(scores[best], 100)) if min(scores[best], 100) > 20 else ('Unknown', 0)
+
+def test_device_rules():
+    print("🧪 TEST MOTEUR DE RÈGLES")
+    print("=" * 40)
+
+    automaton = KeywordAutomaton(['he', 'she', 'his', 'hers'])
+    found = {automaton.keywords[i] for i in automaton.find('ushers')}
+    assert found == {'he', 'she', 'hers'}, found
+    print("✅ Automate Aho-Corasick")
+
+    engine = DeviceRuleEngine()
+    cases = [
+        ('SW-CORE-01', 'Cisco Systems', '10.0.0.2', [22, 161]),
+        ('printer-rdc', 'Hewlett Packard', '10.0.0.30', [9100, 631]),
+        ('plc-ligne3', 'Siemens AG', '10.0.1.15', [102, 502]),
+        ('device-1', '', '192.168.1.1', []),
+        ('device-45', 'Unknown', '192.168.1.45', [3389, 445]),
+        ('nas-backup', 'Synology', '10.0.0.9', [5000, 5001, 445]),
+        ('cam-parking', 'Hikvision', '10.0.2.3', [554]),
+        ('Galaxy-TV', 'Samsung Electronics', '10.0.0.80', [8080]),
+    ]
+    for hostname, vendor, ip, ports in cases:
+        assert engine.classify(hostname, vendor, ip) == reference_classify(hostname, vendor, ip), hostname
+        assert engine.score_signatures(hostname, vendor, ports) == reference_signatures(hostname, vendor, ports), hostname
+        print(f"✅ {hostname:<15} -> {engine.classify(hostname, vendor, ip)[0]:<12} {engine.score_signatures(hostname, vendor, ports)}")
+
+    assert engine.vendor_override('oneplus-8', 'OnePlus Technology') == 'smartphone'
+    assert engine.vendor_override('Galaxy-TV', 'Samsung Electronics') == 'smart_tv'
+    assert engine.vendor_override('galaxy-s21', 'Samsung Electronics') == 'smartphone'
+    assert engine.vendor_override('pc-01', 'Dell') is None
+    print("✅ Corrections vendor")
+
+    engine.score_signatures('SW-CORE-01', 'Cisco Systems', [161, 22])
+    assert engine.cache_info()['signatures']['hits'] >= 1
+    print("✅ Mémoïsation par (hostname, vendor, ports)")
+    return True
+
+if __name__ == "__main__":
+    test_device_rules()
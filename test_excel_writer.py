@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test de l'écriture Excel en flux (mode write_only, styles nommés, feuilles de continuation)
+"""
+
+import sys
+import os
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+import openpyxl
+from excel_writer import StreamingExcelWriter, iter_rows
+
+def test_excel_writer():
+    print("🧪 TEST ÉCRITURE EXCEL EN FLUX")
+    print("=" * 40)
+
+    start = datetime(2025, 5, 1)
+    total = 20000
+
+    def scan_chunks(chunk_size):
+        # Simule la lecture par lots depuis la base
+        for first in range(1, total + 1, chunk_size):
+            yield [(i, i % 300, i % 7 != 0, 1.5, start + timedelta(seconds=60 * i))
+                   for i in range(first, min(first + chunk_size, total + 1))]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rapport.xlsx')
+        tracemalloc.start()
+        writer = StreamingExcelWriter(path)
+        writer.add_key_values('Résumé', [('Total équipements', 300), None, ('Santé',),
+                                         ('Statut global', 'Excellent', 'excellent')], heading='RÉSUMÉ')
+        writer.add_table('Équipements', ['IP', 'Statut'], ((f"10.0.0.{i}", 'online' if i % 2 else 'offline')
+                                                           for i in range(1, 11)),
+                         widths=(15, 12), row_style=lambda row: row[1])
+        written = writer.add_table('Historique des scans', ['id', 'device_id', 'is_online', 'response_time', 'timestamp'],
+                                   iter_rows(scan_chunks(2000)))
+        writer.save()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert written == total
+        assert not os.path.exists(path + '.tmp')
+        print(f"✅ {total} lignes écrites, pic mémoire {peak // 1024} Ko")
+        assert peak < 16 * 1024 * 1024, peak
+
+        wb = openpyxl.load_workbook(path, read_only=True)
+        assert wb.sheetnames == ['Résumé', 'Équipements', 'Historique des scans']
+        assert {'header', 'online', 'offline', 'datetime'} <= set(wb.named_styles)
+        scans = wb['Historique des scans']
+        rows = scans.iter_rows(values_only=True)
+        assert next(rows) == ('id', 'device_id', 'is_online', 'response_time', 'timestamp')
+        assert next(rows) == (1, 1, True, 1.5, start + timedelta(seconds=60))
+        assert sum(1 for _ in rows) == total - 1
+        wb.close()
+
+        # Styles nommés appliqués aux cellules (lecture complète d'un petit classeur)
+        wb = openpyxl.load_workbook(path)
+        devices = wb['Équipements']
+        assert devices['A1'].style == 'header'
+        assert devices['A2'].style == 'online' and devices['B3'].style == 'offline'
+        assert devices.column_dimensions['B'].width == 12
+        assert wb['Résumé']['B6'].style == 'excellent'
+        print("✅ Styles nommés (en-têtes, statut, évaluation) et largeurs de colonnes")
+
+        # Feuilles de continuation au-delà de la limite de lignes
+        path = os.path.join(tmp, 'continuation.xlsx')
+        writer = StreamingExcelWriter(path, max_sheet_rows=1001)
+        assert writer.add_table('Scans', ['id'], ((i,) for i in range(2500))) == 2500
+        writer.save()
+        assert writer.rows_written == {'Scans': 1000, 'Scans (2)': 1000, 'Scans (3)': 500}
+        wb = openpyxl.load_workbook(path, read_only=True)
+        assert wb.sheetnames == ['Scans', 'Scans (2)', 'Scans (3)']
+        assert [row[0] for row in wb['Scans (2)'].iter_rows(min_row=2, max_row=2, values_only=True)] == [1000]
+        wb.close()
+        print("✅ Feuilles de continuation au-delà de la limite Excel")
+    return True
+
+if __name__ == "__main__":
+    test_excel_writer()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'inférence par arbres aplatis face à scikit-learn
+Vérifie que les scores correspondent et compare les latences (1 ligne / lot)
+"""
+
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+from sklearn.ensemble import IsolationForest, RandomForestClassifier, GradientBoostingRegressor
+
+from ai_fast_inference import FlatIsolationForest, FlatForestClassifier, FlatGradientBoostingRegressor
+
+TOLERANCE = 1e-9
+
+def measure(func, X, repeat):
+    """Latence moyenne d'un appel (ms)"""
+    func(X)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(X)
+    return (time.perf_counter() - start) / repeat * 1000
+
+def compare(name, sklearn_func, flat_func, X_single, X_batch):
+    assert np.allclose(sklearn_func(X_batch), flat_func(X_batch), atol=TOLERANCE), name
+    single = (measure(sklearn_func, X_single, 200), measure(flat_func, X_single, 200))
+    batch = (measure(sklearn_func, X_batch, 20), measure(flat_func, X_batch, 20))
+    print(f"{name:<28} {single[0]:>9.3f} {single[1]:>9.3f} {single[0] / single[1]:>6.1f}x"
+          f" {batch[0]:>10.3f} {batch[1]:>9.3f} {batch[0] / batch[1]:>6.1f}x")
+
+def test_fast_inference():
+    print("🧪 BENCHMARK INFÉRENCE RAPIDE")
+    print("=" * 40)
+    rng = np.random.RandomState(0)
+
+    # Caractéristiques d'anomalies : temps de réponse, perte, en ligne, durée, erreurs
+    X_anomaly = np.column_stack([
+        rng.gamma(2.0, 10.0, 5000), rng.rand(5000) * 0.1, rng.rand(5000) > 0.1,
+        rng.rand(5000), rng.poisson(0.2, 5000)
+    ]).astype(np.float64)
+    isolation_forest = IsolationForest(contamination=0.1, random_state=42, n_estimators=100).fit(X_anomaly)
+    # Variante avec sous-échantillonnage des caractéristiques (remappage par arbre)
+    isolation_forest_sub = IsolationForest(random_state=42, n_estimators=50, max_features=3).fit(X_anomaly)
+
+    # Caractéristiques de maintenance (7) et label de panne
+    X_maintenance = rng.randn(300, 7)
+    y = (X_maintenance[:, 0] + rng.randn(300) * 0.5 > 0.3).astype(int)
+    random_forest = RandomForestClassifier(n_estimators=100, random_state=42).fit(X_maintenance, y)
+    gradient_boosting = GradientBoostingRegressor(n_estimators=100, random_state=42).fit(X_maintenance, 1 - y)
+
+    print(f"{'Modèle':<28} {'sk 1 (ms)':>9} {'flat 1':>9} {'gain':>7} {'sk lot (ms)':>10} {'flat lot':>9} {'gain':>7}")
+    flat_if = FlatIsolationForest(isolation_forest)
+    compare('IsolationForest.decision', isolation_forest.decision_function, flat_if.decision_function,
+            X_anomaly[:1], X_anomaly[:1000])
+    assert np.array_equal(isolation_forest.predict(X_anomaly[:1000]), flat_if.predict(X_anomaly[:1000]))
+
+    flat_if_sub = FlatIsolationForest(isolation_forest_sub)
+    compare('IsolationForest (3 feat.)', isolation_forest_sub.decision_function, flat_if_sub.decision_function,
+            X_anomaly[:1], X_anomaly[:1000])
+
+    flat_rf = FlatForestClassifier(random_forest)
+    compare('RandomForest.predict_proba', lambda X: random_forest.predict_proba(X)[:, 1], flat_rf.predict_proba,
+            X_maintenance[:1], X_maintenance)
+
+    flat_gb = FlatGradientBoostingRegressor(gradient_boosting)
+    compare('GradientBoosting.predict', gradient_boosting.predict, flat_gb.predict,
+            X_maintenance[:1], X_maintenance)
+
+    print(f"\n✅ Résultats identiques à {TOLERANCE} près")
+    return True
+
+if __name__ == "__main__":
+    test_fast_inference()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test de la géolocalisation IP (fournisseur simulé par un serveur HTTP local)
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(__file__))
+
+from geolocation import IPGeolocator, RateLimiter, is_local_address
+
+class StubBatchHandler(BaseHTTPRequestHandler):
+    """Imite le point d'accès batch d'ip-api (POST d'une liste d'adresses)"""
+    requests_received = []
+    remaining = None
+
+    def do_POST(self):
+        batch = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.requests_received.append(batch)
+        results = []
+        for ip in batch:
+            if ip.startswith('5.5.5.'):
+                results.append({'status': 'fail', 'message': 'reserved range', 'query': ip})
+            else:
+                results.append({'status': 'success', 'query': ip, 'country': 'France', 'regionName': 'Île-de-France',
+                                'city': 'Paris', 'lat': 48.85, 'lon': 2.35, 'isp': 'Stub ISP', 'timezone': 'Europe/Paris'})
+        body = json.dumps(results).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.remaining is not None:
+            self.send_header('X-Rl', str(self.remaining))
+            self.send_header('X-Ttl', '1')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_geolocation():
+    print("🧪 TEST GÉOLOCALISATION IP")
+    print("=" * 40)
+
+    assert is_local_address('192.168.1.10') and is_local_address('10.0.0.1') and is_local_address('172.16.5.4')
+    assert is_local_address('127.0.0.1') and is_local_address('169.254.1.1') and is_local_address('pas-une-ip')
+    assert not is_local_address('8.8.8.8')
+    print("✅ Plages privées et réservées reconnues")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubBatchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = {
+        'provider_url': f"http://127.0.0.1:{server.server_address[1]}/batch",
+        'fields': 'status,query,country,city', 'batch_size': 100, 'rate_limit': 15, 'rate_period': 60,
+        'timeout': 5, 'cache_ttl': 3600, 'negative_ttl': 60, 'local_db_path': None, 'use_provider': True
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'monitoring.db')
+        geolocator = IPGeolocator(db_path, config)
+
+        public = [f"8.{i // 250}.{i % 250}.1" for i in range(250)]
+        private = [f"192.168.1.{i}" for i in range(1, 200)]
+        results = geolocator.lookup_many(private + public + ['5.5.5.5'] + public[:10])
+        assert all(results[ip] is None for ip in private)
+        assert all(results[ip]['city'] == 'Paris' for ip in public)
+        assert results['5.5.5.5'] is None
+        # 251 adresses publiques distinctes -> 3 requêtes de 100 au plus, aucune adresse privée envoyée
+        sizes = [len(batch) for batch in StubBatchHandler.requests_received]
+        assert sizes == [100, 100, 51], sizes
+        assert not any(ip.startswith('192.168.') for batch in StubBatchHandler.requests_received for ip in batch)
+        print(f"✅ 450 adresses -> {len(sizes)} requêtes groupées, {geolocator.stats['local']} privées résolues localement")
+
+        # Cache persistant : une nouvelle instance ne rappelle pas le fournisseur (y compris pour l'échec)
+        StubBatchHandler.requests_received.clear()
+        geolocator = IPGeolocator(db_path, config)
+        assert geolocator.lookup(public[0])['isp'] == 'Stub ISP'
+        assert geolocator.lookup('5.5.5.5') is None
+        assert StubBatchHandler.requests_received == []
+        assert geolocator.stats['cache_hits'] == 2
+        print("✅ Résultats relus depuis le cache SQLite après redémarrage")
+
+        # TTL expiré : nouvelle demande au fournisseur
+        config_expired = dict(config, cache_ttl=-1)
+        geolocator = IPGeolocator(db_path, config_expired)
+        geolocator.lookup('9.9.9.9')
+        geolocator.lookup('9.9.9.9')
+        assert len(StubBatchHandler.requests_received) == 2
+        print("✅ Entrée expirée redemandée")
+
+        # Fournisseur injoignable : pas d'exception, pas de cache négatif
+        offline = IPGeolocator(db_path, dict(config, provider_url='http://127.0.0.1:9/batch', timeout=1))
+        assert offline.lookup('1.1.1.1') is None and offline.stats['errors'] == 1
+        print("✅ Fournisseur indisponible géré")
+
+        # Quota épuisé signalé par X-Rl=0 : la requête suivante attend X-Ttl
+        StubBatchHandler.remaining = 0
+        geolocator = IPGeolocator(db_path, config)
+        geolocator.lookup('4.4.4.4')
+        StubBatchHandler.remaining = None
+        start = time.time()
+        geolocator.lookup('4.4.4.5')
+        assert time.time() - start >= 0.9
+        print("✅ Pause imposée par l'en-tête X-Rl/X-Ttl")
+
+    # Seau à jetons : 5 jetons puis 10 par seconde
+    limiter = RateLimiter(5, 0.5)
+    start = time.time()
+    for _ in range(10):
+        limiter.acquire()
+    elapsed = time.time() - start
+    assert 0.4 <= elapsed < 1.5, elapsed
+    print(f"✅ Limite de débit respectée (10 acquisitions en {elapsed:.2f}s)")
+
+    server.shutdown()
+    return True
+
+if __name__ == "__main__":
+    test_geolocation()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test du client HTTP des chatbots contre un serveur local simulant l'API (format OpenAI)
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(__file__))
+
+from llm_client import LLMClient, LLM_CLIENT_CONFIG, cache_key, normalize_question
+
+class MockAPI(BaseHTTPRequestHandler):
+    """Réponses selon le chemin : /ok, /flaky (503 puis 200), /limited (429 avec Retry-After), /slow, /bad"""
+    protocol_version = 'HTTP/1.1'  # keep-alive
+    state = {'calls': {}, 'ports': set(), 'in_flight': 0, 'max_in_flight': 0, 'lock': threading.Lock()}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        state = self.state
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with state['lock']:
+            calls = state['calls'][self.path] = state['calls'].get(self.path, 0) + 1
+            state['ports'].add(self.client_address[1])
+            state['in_flight'] += 1
+            state['max_in_flight'] = max(state['max_in_flight'], state['in_flight'])
+        try:
+            if self.path == '/slow':
+                time.sleep(0.2)
+            if self.path == '/flaky' and calls <= 2:
+                return self._send(503, {'error': 'surcharge'})
+            if self.path == '/limited' and calls == 1:
+                return self._send(429, {'error': 'quota'}, {'Retry-After': '0'})
+            if self.path == '/bad':
+                return self._send(401, {'error': 'clé invalide'})
+            question = payload['messages'][-1]['content']
+            self._send(200, {'choices': [{'message': {'content': f"Réponse à : {question}"}}],
+                             'usage': {'prompt_tokens': 40, 'completion_tokens': 10, 'total_tokens': 50}})
+        finally:
+            with state['lock']:
+                state['in_flight'] -= 1
+
+def test_llm_client():
+    print("🧪 TEST CLIENT HTTP DES CHATBOTS")
+    print("=" * 40)
+
+    assert normalize_question("  État du  RÉSEAU ? ") == normalize_question("état du réseau")
+    assert cache_key('m', 'Bonjour', 'ctx1') != cache_key('m', 'Bonjour', 'ctx2')
+    print("✅ Clé de cache : question normalisée + empreinte du contexte")
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    delays = []
+    client = LLMClient(dict(LLM_CLIENT_CONFIG, max_concurrency=2, backoff_base=0.01), sleep=delays.append)
+
+    def ask(path, question, context='contexte', key=True):
+        payload = {'model': 'test', 'messages': [{'role': 'system', 'content': context},
+                                                 {'role': 'user', 'content': question}]}
+        return client.chat_completion(base + path, 'cle', payload, timeout=5,
+                                      key=cache_key('test', question, context) if key else None)
+
+    try:
+        # Connexions conservées entre les appels
+        for i in range(10):
+            result = ask('/ok', f"question {i}")
+            assert result['success'] and result['content'] == f"Réponse à : question {i}" and not result['cached']
+        assert len(MockAPI.state['ports']) == 1
+        print("✅ 10 appels sur une seule connexion (keep-alive)")
+
+        # Même question (normalisée), même contexte : pas de nouvel appel
+        calls = MockAPI.state['calls']['/ok']
+        assert ask('/ok', "  QUESTION 3 ?")['cached'] and MockAPI.state['calls']['/ok'] == calls
+        assert not ask('/ok', "question 3", context='contexte modifié')['cached']
+        assert not ask('/ok', "question 3", key=False)['cached']
+        print("✅ Réponse en cache pour une question identique, nouveau contexte : nouvel appel")
+
+        # 503 puis succès ; 429 avec Retry-After ; 401 sans nouvelle tentative
+        result = ask('/flaky', 'instable')
+        assert result['success'] and result['attempts'] == 3 and MockAPI.state['calls']['/flaky'] == 3
+        assert all(0 <= d <= 0.01 * 2 ** i for i, d in enumerate(delays[:2]))
+        result = ask('/limited', 'quota')
+        assert result['success'] and result['attempts'] == 2 and delays[-1] == 0.0
+        result = ask('/bad', 'refus')
+        assert not result['success'] and result['attempts'] == 1 and '401' in result['error']
+        assert not ask('/bad', 'refus')['cached']  # erreurs jamais mises en cache
+        print("✅ Nouvelles tentatives sur 503 / 429 (attente aléatoire, Retry-After), pas sur 401")
+
+        # Concurrence bornée et questions identiques simultanées regroupées
+        results = []
+        threads = [threading.Thread(target=lambda i=i: results.append(ask('/slow', f"lente {i % 3}")))
+                   for i in range(9)]
+        [t.start() for t in threads]
+        [t.join() for t in threads]
+        assert all(r['success'] for r in results)
+        assert MockAPI.state['calls']['/slow'] == 3 and MockAPI.state['max_in_flight'] <= 2
+        print("✅ 9 questions simultanées (3 distinctes) : 3 appels, 2 en parallèle au plus")
+
+        # Serveur injoignable
+        client.config = dict(client.config, max_retries=1)
+        result = client.chat_completion('http://127.0.0.1:9/v1', 'cle', {}, timeout=1)
+        assert not result['success'] and 'connexion' in result['error']
+
+        stats = client.get_stats()
+        assert stats['cache_hits'] == 7 and stats['total_tokens'] == 50 * 17 and stats['p95_latency'] is not None
+        print(f"✅ Métriques : {stats['api_calls']} appels, {stats['cache_hits']} réponses en cache, "
+              f"{stats['retries']} nouvelles tentatives, p95 {stats['p95_latency']}s")
+    finally:
+        server.shutdown()
+        server.server_close()
+    return True
+
+if __name__ == "__main__":
+    test_llm_client()
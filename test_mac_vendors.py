@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test de l'index des constructeurs MAC (préfixes 24/28/36 bits)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+from mac_vendors import OUIVendorDatabase, build_index, parse_ieee_csv
+
+IEEE_SAMPLE = """Registry,Assignment,Organization Name,Organization Address
+MA-L,B827EB,Raspberry Pi Foundation,Mitchell Wood House Caldecote GB
+MA-L,70B3D5,IEEE Registration Authority,445 Hoes Lane Piscataway NJ US
+MA-M,70B3D51,Exemple MA-M SARL,1 rue du Test Paris FR
+MA-S,70B3D5123,"Exemple MA-S, Inc.",2 rue du Test Lyon FR
+"""
+
+def test_mac_vendors():
+    print("🧪 TEST INDEX VENDORS MAC")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'oui.csv')
+        index_path = os.path.join(tmp, 'oui_vendors.idx')
+        with open(csv_path, 'w', encoding='utf-8') as f:
+            f.write(IEEE_SAMPLE)
+
+        count = build_index(parse_ieee_csv(csv_path), index_path)
+        assert count == 4, count
+        print(f"✅ {count} préfixes compilés")
+
+        database = OUIVendorDatabase(index_path=index_path, csv_files=[csv_path])
+        cases = {
+            'b8:27:eb:12:34:56': 'Raspberry Pi Foundation',   # 24 bits
+            '70-B3-D5-1F-FF-FF': 'Exemple MA-M SARL',         # 28 bits
+            '70B3.D512.3456': 'Exemple MA-S, Inc.',           # 36 bits
+            '70:B3:D5:99:00:00': 'IEEE Registration Authority',
+            '00:11:22:33:44:55': None,
+        }
+        for mac, expected in cases.items():
+            vendor = database.lookup(mac)
+            assert vendor == expected, (mac, vendor)
+            print(f"✅ {mac:<20} -> {vendor}")
+
+        assert database.get('', 'Unknown') == 'Unknown'
+        assert len(database) == 4
+
+    print("\n🎉 Index vendors MAC opérationnel")
+    return True
+
+if __name__ == "__main__":
+    test_mac_vendors()
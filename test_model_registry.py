@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test du registre versionné des modèles IA (publication, pointeur actif, retour arrière, nettoyage)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+
+from ai_enhancement import AIEnhancement
+from ai_incremental import TrainingBuffer
+from model_registry import ModelRegistry
+
+def trained_models(seed):
+    """Modèles entraînés sur des scans aléatoires (format de AIEnhancement.export_models())"""
+    rng = np.random.RandomState(seed)
+    buffer = TrainingBuffer(os.devnull, max_rows=300)
+    buffer.append([(i, i % 3, 20 + rng.normal(0, 3), rng.uniform(0, 5), i % 11 != 0, 1.5, int(i % 17 == 0))
+                   for i in range(1, 301)])
+    ai = AIEnhancement()
+    ai.train_from_snapshot({'anomaly_rows': buffer.anomaly_rows(), 'device_histories': buffer.device_histories()})
+    assert ai.models_trained and ai.anomaly_detector.is_fitted
+    return ai
+
+def test_model_registry():
+    print("🧪 TEST REGISTRE DES MODÈLES IA")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ModelRegistry(os.path.join(tmp, 'registry'))
+        first_ai, second_ai = trained_models(0), trained_models(1)
+
+        # Contenu identique : même version, pas de doublon
+        first = registry.publish(first_ai.export_models(), metrics={'failure_accuracy': 0.9}, training_rows=300)
+        again = registry.publish(first_ai.export_models())
+        assert again['version'] == first['version'] and again['metrics'] == {'failure_accuracy': 0.9}
+        second = registry.publish(second_ai.export_models())
+        assert second['version'] != first['version']
+        assert [m['version'] for m in registry.list_versions()] == [second['version'], first['version']]
+        assert not [name for name in os.listdir(registry.root) if name.startswith('.tmp-')]
+        print(f"✅ Publication adressée par contenu ({first['version']}, {second['version']})")
+
+        # Pointeur actif et retour arrière
+        assert registry.active_version() is None and registry.rollback() is None
+        registry.activate(second['version'])
+        assert registry.active_version() == second['version'] and registry.previous_version() == first['version']
+        assert registry.rollback() == first['version'] and registry.active_version() == first['version']
+        assert registry.previous_version() is None and registry.rollback() is None
+        assert registry.active_version() == first['version']
+        print("✅ Bascule et retour arrière du pointeur actif")
+
+        # Rechargement : mêmes prédictions que les modèles publiés
+        X = np.random.RandomState(2).normal(20, 5, size=(50, 5))
+        models_data = registry.load()
+        assert models_data['version'] == first['version'] and models_data['anomaly_detector']['is_fitted']
+        loaded = AIEnhancement()
+        loaded.apply_models(models_data)
+        expected = first_ai.anomaly_detector.isolation_forest.decision_function(X)
+        assert np.allclose(loaded.anomaly_detector.isolation_forest.decision_function(X), expected)
+        assert np.allclose(models_data['anomaly_detector']['scaler'].mean_, first_ai.anomaly_detector.scaler.mean_)
+        assert registry.load(second['version'], mmap_mode=None)['version'] == second['version']
+        print("✅ Version rechargée : prédictions identiques")
+
+        # Nettoyage : la version active est conservée même hors des versions récentes
+        third = registry.publish(trained_models(3).export_models())
+        registry.prune(keep=1)
+        assert [m['version'] for m in registry.list_versions()] == [third['version'], first['version']]
+        assert registry.active_version() == first['version'] and registry.load() is not None
+        print("✅ Nettoyage des anciennes versions, version active conservée")
+
+        # Version inconnue ou nom hors du registre : refusés
+        outside = os.path.join(tmp, 'x')
+        os.makedirs(outside)
+        with open(os.path.join(outside, 'manifest.json'), 'w') as f:
+            f.write('{"version": "x"}')
+        for version in (second['version'], '0123456789abcdef', '../x', '', None):
+            try:
+                registry.activate(version)
+                assert False, version
+            except ValueError:
+                pass
+            assert registry.manifest(version) is None and registry.load(version or '../x') is None
+        assert registry.active_version() == first['version']
+        print("✅ Version inconnue ou chemin hors du registre refusés")
+    return True
+
+if __name__ == "__main__":
+    test_model_registry()
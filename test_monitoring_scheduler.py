@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Test de l'ordonnancement adaptatif des vérifications de monitoring
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+from monitoring_scheduler import AdaptiveScheduler, get_base_interval, get_priority_level
+
+def test_monitoring_scheduler():
+    print("🧪 TEST ORDONNANCEMENT ADAPTATIF")
+    print("=" * 40)
+
+    plc = {'ip': '10.0.0.10', 'device_type': 'plc', 'hostname': 'plc-ligne1'}
+    core = {'ip': '10.0.0.1', 'device_type': 'switch', 'hostname': 'sw-core-01'}
+    printer = {'ip': '10.0.0.50', 'device_type': 'printer', 'hostname': 'imp-atelier'}
+    urgent = {'ip': '10.0.0.60', 'device_type': 'camera', 'hostname': 'cam', 'maintenance_urgency': 'high'}
+
+    assert get_priority_level(plc) == 'critical'
+    assert get_priority_level(core) == 'high'
+    assert get_priority_level(printer) == 'medium'
+    assert get_priority_level(urgent) == 'medium'
+    assert get_priority_level({'type': 'automation'}) == 'critical'
+    assert get_base_interval(plc) < get_base_interval(core) < get_base_interval(printer)
+    print("✅ Priorités : automate > switch de cœur > imprimante, urgence prise en compte")
+
+    scheduler = AdaptiveScheduler()
+    now = 1000.0
+    scheduler.sync([plc, core, printer], ['http', 'ports'], now)
+    due = scheduler.pop_due(now)
+    assert len(due) == 6 and scheduler.pop_due(now) == []
+    for key in due:
+        scheduler.record(key, 'up', now)
+
+    # Sur 1 heure, l'automate est vérifié bien plus souvent que l'imprimante
+    counts = {}
+    t = now
+    while t < now + 3600:
+        t += 10
+        for key in scheduler.pop_due(t):
+            counts[key[0]] = counts.get(key[0], 0) + 1
+            scheduler.record(key, 'up', t)
+    assert counts[plc['ip']] > counts[core['ip']] > counts.get(printer['ip'], 0), counts
+    print(f"✅ Vérifications sur 1h : {counts}")
+
+    # Stabilité : l'intervalle s'allonge, sans dépasser max_stretch x la base
+    entry = scheduler.entries[(plc['ip'], 'http')]
+    assert entry['base'] < entry['interval'] <= entry['base'] * scheduler.config['max_stretch']
+    print(f"✅ Équipement stable : intervalle {entry['base']}s -> {entry['interval']:.0f}s")
+
+    # Échec : l'intervalle est divisé à chaque échec, avec un plancher
+    key = (plc['ip'], 'http')
+    intervals = [scheduler.record(key, 'down', t) for _ in range(10)]
+    assert intervals[0] < entry['base'] * scheduler.config['max_stretch']
+    assert intervals == sorted(intervals, reverse=True)
+    assert intervals[-1] == scheduler.config['min_interval']
+    assert scheduler.get_stats(t)['shortened'] >= 1
+    print(f"✅ Échecs : intervalle raccourci jusqu'à {intervals[-1]}s")
+
+    # Rétablissement : retour progressif vers la base
+    recovered = [scheduler.record(key, 'up', t) for _ in range(3)]
+    assert recovered[0] > intervals[-1] and recovered[-1] <= entry['base'] * scheduler.config['max_stretch']
+    print("✅ Rétablissement progressif")
+
+    # Un service jamais actif (non installé) n'est pas un échec : l'intervalle s'allonge
+    scheduler.sync([printer], ['ssh'], t)
+    key = (printer['ip'], 'ssh')
+    for _ in range(5):
+        interval = scheduler.record(key, 'down', t)
+    assert interval > scheduler.entries[key]['base']
+    assert set(k[0] for k in scheduler.entries) == {printer['ip']}
+    print("✅ Service absent ralenti, équipements retirés de la file")
+
+    # Les entrées périmées du tas sont ignorées
+    assert all(k == key for k in scheduler.pop_due(t + 10 ** 6))
+    assert scheduler.seconds_until_next(t) is None
+    return True
+
+if __name__ == "__main__":
+    test_monitoring_scheduler()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test de l'export Parquet incrémental (partitions jour / réseau, filigranes)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+from parquet_export import ParquetExporter, PARQUET_CONFIG, network_partition, parse_timestamp
+
+def test_parquet_export():
+    print("🧪 TEST EXPORT PARQUET INCRÉMENTAL")
+    print("=" * 40)
+
+    assert network_partition('10.0.1.25') == '10.0.1.0_24'
+    assert network_partition('10.0.1.25', 16) == '10.0.0.0_16'
+    assert network_partition('localhost') == 'other' and network_partition(None) == 'other'
+    assert parse_timestamp('2025-05-01 08:30:00.123456') == datetime(2025, 5, 1, 8, 30, 0, 123456)
+    print("✅ Partition réseau et dates SQLite")
+
+    if not ParquetExporter.available():
+        print("⚠️ pyarrow non installé : export non testé")
+        return True
+    import pyarrow.dataset as ds
+
+    with tempfile.TemporaryDirectory() as tmp:
+        main_db = os.path.join(tmp, 'main.db')
+        monitoring_db = os.path.join(tmp, 'monitoring.db')
+        conn = sqlite3.connect(main_db)
+        conn.execute("CREATE TABLE device (id INTEGER PRIMARY KEY, ip TEXT)")
+        conn.execute("CREATE TABLE scan_history (id INTEGER PRIMARY KEY, device_id INTEGER, is_online BOOLEAN, "
+                     "response_time FLOAT, packet_loss FLOAT, scan_duration FLOAT, error_count INTEGER, timestamp DATETIME)")
+        conn.executemany("INSERT INTO device VALUES (?, ?)", [(1, '10.0.1.5'), (2, '10.0.2.7'), (3, '192.168.1.9')])
+        start = datetime(2025, 5, 1)
+
+        def add_scans(first, count):
+            conn.executemany("INSERT INTO scan_history VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+                (i, i % 3 + 1, i % 5 != 0, None if i % 5 == 0 else 2.5, 0.0, 0.1, 0,
+                 (start + timedelta(minutes=10 * i)).strftime('%Y-%m-%d %H:%M:%S.%f'))
+                for i in range(first, first + count)
+            ])
+            conn.commit()
+
+        add_scans(1, 1000)  # ~7 jours, 3 réseaux
+        mon = sqlite3.connect(monitoring_db)
+        mon.execute("CREATE TABLE service_monitoring (id INTEGER PRIMARY KEY AUTOINCREMENT, device_ip TEXT, "
+                    "service_name TEXT, port INTEGER, status TEXT, response_time REAL, last_check TIMESTAMP, error_message TEXT)")
+        mon.executemany("INSERT INTO service_monitoring (device_ip, service_name, port, status, response_time, last_check) "
+                        "VALUES (?, 'ssh', 22, 'up', 0.01, ?)", [('10.0.1.5', str(start))] * 50)
+        mon.commit()
+
+        config = dict(PARQUET_CONFIG, output_dir=os.path.join(tmp, 'parquet'), chunk_size=300)
+        exporter = ParquetExporter({'main': main_db, 'monitoring': monitoring_db}, config)
+        report = exporter.run()
+        assert report['success'], report
+        assert report['datasets']['scan_history']['rows'] == 1000
+        assert report['datasets']['service_monitoring']['rows'] == 50
+        assert report['datasets']['bandwidth_usage']['rows'] == 0  # table absente
+        assert exporter.load_watermarks() == {'scan_history': 1000, 'service_monitoring': 50}
+        print(f"✅ Premier export : {report['datasets']['scan_history']['files']} fichiers scan_history")
+
+        scans = ds.dataset(os.path.join(config['output_dir'], 'scan_history'), format='parquet', partitioning='hive')
+        table = scans.to_table()
+        assert table.num_rows == 1000
+        assert str(table.schema.field('timestamp').type) == 'timestamp[us]'
+        assert str(table.schema.field('is_online').type) == 'bool'
+        assert sorted(set(table.column('network').to_pylist())) == ['10.0.1.0_24', '10.0.2.0_24', '192.168.1.0_24']
+        day = scans.to_table(filter=ds.field('day') == '2025-05-02')
+        assert day.num_rows == 144
+        assert all(ts.date() == datetime(2025, 5, 2).date() for ts in day.column('timestamp').to_pylist())
+        print("✅ Colonnes typées, partitions day=/network= lisibles en Hive")
+
+        # Deuxième passage : seules les nouvelles lignes sont exportées
+        assert exporter.run()['datasets']['scan_history']['rows'] == 0
+        add_scans(1001, 200)
+        report = exporter.run()
+        assert report['datasets']['scan_history']['rows'] == 200
+        assert ds.dataset(os.path.join(config['output_dir'], 'scan_history'), format='parquet',
+                          partitioning='hive').count_rows() == 1200
+        print("✅ Export incrémental depuis le filigrane")
+
+        # Reprise après interruption : filigrane revenu en arrière, les fichiers sont réécrits sans doublon
+        exporter._save_watermarks({'scan_history': 1000, 'service_monitoring': 50})
+        exporter.run()
+        ids = ds.dataset(os.path.join(config['output_dir'], 'scan_history'), format='parquet',
+                         partitioning='hive').to_table(columns=['id']).column('id').to_pylist()
+        assert len(ids) == len(set(ids)) == 1200
+        print("✅ Reprise idempotente")
+
+        conn.close()
+        mon.close()
+    return True
+
+if __name__ == "__main__":
+    test_parquet_export()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test du rendu PDF des rapports (tableaux paginés, graphiques et documents en cache)
+"""
+
+import sys
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+from pdf_report import PDFReportEngine, PDF_CONFIG, data_hash
+from report_data import parts_for_sections
+
+def build_data(device_count, alert_count=40):
+    start = datetime(2025, 5, 1)
+    return {
+        'metadata': {'type': 'daily', 'generated_at': datetime.now(), 'period': '2025-05-01 à 2025-05-02'},
+        'summary': {'total_devices': device_count, 'online_devices': device_count - device_count // 10,
+                    'offline_devices': device_count // 10, 'active_alerts': alert_count, 'health_score_avg': 87.5,
+                    'scans_count': 288 * device_count, 'availability': 96.2, 'avg_response_time': 4.1,
+                    'p95_response_time': 12.0},
+        'devices': [{'ip': f"10.0.{i // 250}.{i % 250 + 1}", 'hostname': f"automate-ligne-{i}-conditionnement-yaourts",
+                     'type': ('plc', 'switch', 'camera')[i % 3], 'status': 'Hors ligne' if i % 10 == 0 else 'En ligne',
+                     'health_score': 80 + i % 20, 'last_seen': '2025-05-02 08:00', 'response_time': 3.2}
+                    for i in range(device_count)],
+        'alerts': [{'device_ip': f"10.0.0.{i + 1}", 'type': 'offline', 'message': 'Équipement hors ligne depuis 15 min',
+                    'priority': ('low', 'high', 'critical')[i % 3], 'created_at': '2025-05-02 07:45',
+                    'resolved_at': '2025-05-02 08:10' if i % 4 == 0 else None}
+                   for i in range(alert_count)],
+        'trends': [{'timestamp': (start + timedelta(hours=h)).isoformat(), 'samples': 500,
+                    'availability': 95 + h % 5, 'avg_response_time': 4 + h % 3, 'p95_response_time': 10 + h % 4}
+                   for h in range(24)]
+    }
+
+def test_pdf_report():
+    print("🧪 TEST RENDU PDF DES RAPPORTS")
+    print("=" * 40)
+
+    assert data_hash({'b': 1, 'a': datetime(2025, 5, 1)}) == data_hash({'a': datetime(2025, 5, 1), 'b': 1})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = PDFReportEngine(os.path.join(tmp, 'cache'), dict(PDF_CONFIG, max_cache_entries=3))
+        data = build_data(600)
+
+        # Premier rendu : tous les équipements et alertes, sur plusieurs pages
+        path = os.path.join(tmp, 'rapport.pdf')
+        start_time = time.time()
+        result = engine.render(path, data, 'daily')
+        first_duration = time.time() - start_time
+        with open(path, 'rb') as f:
+            content = f.read()
+        assert content.startswith(b'%PDF-') and not result['cached']
+        assert result['pages'] > 10, result
+        print(f"✅ 600 équipements et 40 alertes sur {result['pages']} pages en {first_duration:.2f}s")
+
+        charts_dir = os.path.join(tmp, 'cache', 'charts')
+        if engine.charts_available():
+            assert len(os.listdir(charts_dir)) == 2
+            print("✅ Graphiques de tendance et par type rendus")
+        else:
+            print("⚠️ matplotlib non installé : rapport sans graphiques")
+
+        # Mêmes données (seule l'heure de génération change) : document repris du cache
+        data['metadata']['generated_at'] = datetime.now() + timedelta(hours=1)
+        start_time = time.time()
+        result = engine.render(os.path.join(tmp, 'rapport2.pdf'), data, 'daily')
+        assert result['cached'] and result['pages'] is None
+        with open(os.path.join(tmp, 'rapport2.pdf'), 'rb') as f:
+            assert f.read() == content
+        print(f"✅ Données inchangées : document repris du cache en {time.time() - start_time:.3f}s")
+
+        # Équipements modifiés mais tendances identiques : graphique de tendance réutilisé
+        data['devices'][1]['status'] = 'Hors ligne'
+        hits = engine.cache.hits
+        result = engine.render(os.path.join(tmp, 'rapport3.pdf'), data, 'daily')
+        assert not result['cached']
+        if engine.charts_available():
+            assert engine.cache.hits == hits + 1  # tendance en cache, répartition par type recalculée
+            assert len(os.listdir(charts_dir)) == 3
+        print("✅ Graphique inchangé réutilisé, document régénéré")
+
+        # Purge : nombre de fichiers par type borné
+        for count in (10, 20, 30):
+            engine.render(os.path.join(tmp, f'rapport_{count}.pdf'), build_data(count, 0), 'daily')
+        assert len(os.listdir(os.path.join(tmp, 'cache', 'documents'))) == 3
+        print("✅ Cache borné")
+
+        # Textes hors latin-1 et rapport vide
+        data = build_data(0, 0)
+        data['metadata']['period'] = 'Données actuelles → maintenant'
+        result = engine.render(os.path.join(tmp, 'vide.pdf'), data, 'custom')
+        assert result['pages'] == 1
+        print("✅ Rapport vide et caractères spéciaux")
+
+        # Sections IA : équipements et alertes non construits, donc absents du document
+        titles = []
+        section_title = engine._section_title
+        engine._section_title = lambda pdf, title: (titles.append(title), section_title(pdf, title))
+        data = build_data(0, 0)
+        data['metadata']['parts'] = sorted(parts_for_sections(['ai-insights', 'recommendations', 'trends-forecast']))
+        engine.render(os.path.join(tmp, 'ia.pdf'), data, 'ai')
+        assert titles and not [t for t in titles if t.startswith(('ÉQUIPEMENTS', 'ALERTES'))], titles
+        titles.clear()
+        engine.render(os.path.join(tmp, 'periode.pdf'), build_data(3, 4), 'daily')
+        assert 'ÉQUIPEMENTS (3)' in titles and 'ALERTES DE LA PÉRIODE (4)' in titles, titles
+        print("✅ Parties non construites omises, alertes de la période avec date de résolution")
+    return True
+
+if __name__ == "__main__":
+    test_pdf_report()
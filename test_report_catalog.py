@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test du catalogue des rapports (pagination, rapprochement avec le disque, dédoublonnage, rétention)
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, String, Table, Text, create_engine, select
+from report_catalog import ReportCatalog, CATALOG_CONFIG, describe_file
+
+def make_table():
+    metadata = MetaData()
+    table = Table(
+        'report', metadata,
+        Column('id', Integer, primary_key=True), Column('name', String(200)), Column('filename', String(200), unique=True),
+        Column('type', String(50)), Column('format', String(10)), Column('status', String(20)),
+        Column('description', Text), Column('file_path', String(500)), Column('file_size', Integer),
+        Column('download_count', Integer), Column('content_hash', String(64)), Column('generated_by', Integer),
+        Column('is_scheduled', Boolean, default=False), Column('created_at', DateTime),
+        Column('generated_at', DateTime), Column('updated_at', DateTime)
+    )
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    return engine, table
+
+def write_file(directory, filename, content):
+    path = os.path.join(directory, filename)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+def test_report_catalog():
+    print("🧪 TEST CATALOGUE DES RAPPORTS")
+    print("=" * 40)
+
+    assert describe_file('rapport_weekly_20250501_080000.xlsx') == ('weekly', 'excel')
+    assert describe_file('ai_report_20250501_080000.json') == ('ai', 'json')
+    assert describe_file('inventaire.pdf') == ('custom', 'pdf')
+    print("✅ Type et format déduits du nom de fichier")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, table = make_table()
+        catalog = ReportCatalog(table, dict(CATALOG_CONFIG, reports_dir=tmp, per_page=10))
+        now = datetime.now().replace(microsecond=0)
+
+        # 45 rapports sur 45 jours
+        with engine.begin() as conn:
+            for i in range(45):
+                filename = f"rapport_{('daily', 'weekly')[i % 2]}_{i:08d}_000000.{('pdf', 'csv', 'html')[i % 3]}"
+                path = write_file(tmp, filename, f"rapport {i}".encode())
+                conn.execute(table.insert().values(
+                    name=f"Rapport {i}", filename=filename, type=('daily', 'weekly')[i % 2],
+                    format=('pdf', 'csv', 'html')[i % 3], status='completed', file_path=path,
+                    file_size=os.path.getsize(path), generated_by=1, is_scheduled=False,
+                    created_at=now - timedelta(days=i)
+                ))
+
+        with engine.connect() as conn:
+            rows, pagination = catalog.list(conn)
+            assert len(rows) == 10 and pagination == {'page': 1, 'per_page': 10, 'total': 45, 'pages': 5}
+            assert rows[0]['name'] == 'Rapport 0'
+            rows, pagination = catalog.list(conn, {'type': 'weekly', 'format': 'pdf'}, page=2, per_page=5)
+            assert pagination['total'] == 7 and [r['name'] for r in rows] == ['Rapport 33', 'Rapport 39']
+            rows, pagination = catalog.list(conn, {'date_from': now - timedelta(days=2, hours=1), 'q': 'rapport 1'})
+            assert [r['name'] for r in rows] == ['Rapport 1']
+            _, pagination = catalog.list(conn, per_page=1000)
+            assert pagination['per_page'] == CATALOG_CONFIG['max_per_page']
+            stats = catalog.stats(conn, now)
+            assert stats['total_reports'] == 45 and stats['by_format'] == {'pdf': 15, 'csv': 15, 'html': 15}
+        print("✅ Pagination, filtres et statistiques servis par la table")
+
+        # Rapprochement : fichier supprimé, fichier orphelin, taille modifiée, génération interrompue
+        os.remove(os.path.join(tmp, 'rapport_daily_00000000_000000.pdf'))
+        write_file(tmp, 'rapport_weekly_00000001_000000.csv', b'contenu modifie')
+        write_file(tmp, 'ai_report_20250501_080000.json', b'{}')
+        write_file(tmp, 'rapport.tmp', b'en cours')
+        with engine.begin() as conn:
+            conn.execute(table.insert().values(
+                name='Interrompu', filename='rapport_daily_99999999_000000.pdf', type='daily', format='pdf',
+                status='processing', generated_by=1, created_at=now - timedelta(hours=12)
+            ))
+            result = catalog.reconcile(conn, owner_id=1, now=now)
+        assert result == {'missing': 1, 'restored': 0, 'updated': 44, 'stale': 1, 'added': 1}, result
+        with engine.begin() as conn:
+            result = catalog.reconcile(conn, owner_id=1, now=now)
+            assert not any(result.values()), result
+            added = conn.execute(select(table).where(table.c.filename == 'ai_report_20250501_080000.json')).mappings().first()
+            assert added['type'] == 'ai' and added['format'] == 'json' and added['content_hash']
+            write_file(tmp, 'rapport_daily_00000000_000000.pdf', b'rapport 0')
+            assert catalog.reconcile(conn, owner_id=1, now=now)['restored'] == 1
+        print("✅ Rapprochement : fichiers manquants, orphelins, tailles et générations interrompues")
+
+        # Dédoublonnage : contenu identique à un rapport existant
+        with engine.begin() as conn:
+            new_id = conn.execute(table.insert().values(
+                name='Doublon', filename='rapport_daily_20250601_000000.pdf', type='daily', format='pdf',
+                status='processing', generated_by=1, created_at=now
+            )).inserted_primary_key[0]
+            duplicate = write_file(tmp, 'rapport_daily_20250601_000000.pdf', b'rapport 3')
+            path, digest = catalog.deduplicate(conn, new_id, duplicate)
+            assert path == os.path.join(tmp, 'rapport_weekly_00000003_000000.pdf') and not os.path.exists(duplicate)
+            conn.execute(table.update().where(table.c.id == new_id).values(
+                status='completed', file_path=path, content_hash=digest, file_size=9))
+            assert catalog.stats(conn, now)['total_size_mb'] * 1024 * 1024 < 48 * 20
+            unique = write_file(tmp, 'unique.pdf', b'contenu unique')
+            assert catalog.deduplicate(conn, new_id, unique)[0] == unique
+            os.remove(unique)
+
+            # Suppression d'un rapport partagé : fichier conservé pour l'autre rapport
+            original_id = conn.execute(select(table.c.id).where(table.c.name == 'Rapport 3')).scalar()
+            assert catalog.delete(conn, original_id) and os.path.exists(path)
+            assert catalog.delete(conn, new_id) and not os.path.exists(path)
+        print("✅ Contenu identique stocké une fois, fichier partagé conservé à la suppression")
+
+        # Rétention : rapports de plus de 30 jours supprimés, programmés conservés, 0 = désactivée
+        with engine.begin() as conn:
+            conn.execute(table.update().where(table.c.name == 'Rapport 40').values(is_scheduled=True))
+            assert catalog.cleanup(conn, 0, now) == {'deleted': 0, 'files_removed': 0}
+            result = catalog.cleanup(conn, 30, now)
+            assert result['deleted'] == 13 and result['files_removed'] == 13, result
+            remaining = conn.execute(select(table.c.name).where(table.c.created_at < now - timedelta(days=30))).all()
+            assert [name for (name,) in remaining] == ['Rapport 40']
+        assert not os.path.exists(os.path.join(tmp, 'rapport_weekly_00000041_000000.csv'))
+        print("✅ Rétention appliquée (rapports programmés conservés)")
+    return True
+
+if __name__ == "__main__":
+    test_report_catalog()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test des instantanés de données des rapports (période, sections, mémorisation)
+"""
+
+import sys
+import os
+import dataclasses
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import (Boolean, Column, DateTime, Float, Integer, MetaData, String, Table, Text,
+                        UniqueConstraint, create_engine, event)
+import scan_rollups
+from report_data import ReportDataBuilder, REPORT_DATA_CONFIG, ALL_PARTS, built_parts, parts_for_sections
+
+def make_tables():
+    metadata = MetaData()
+    tables = {
+        'device': Table(
+            'device', metadata,
+            Column('id', Integer, primary_key=True), Column('ip', String(15)), Column('hostname', String(100)),
+            Column('device_type', String(50)), Column('is_online', Boolean), Column('health_score', Float),
+            Column('last_seen', DateTime), Column('response_time', Float), Column('failure_probability', Float),
+            Column('anomaly_score', Float), Column('maintenance_urgency', String(20)), Column('ai_confidence', Float),
+            Column('updated_at', DateTime)
+        ),
+        'alert': Table(
+            'alert', metadata,
+            Column('id', Integer, primary_key=True), Column('device_id', Integer), Column('alert_type', String(50)),
+            Column('message', Text), Column('priority', String(20)), Column('is_resolved', Boolean),
+            Column('created_at', DateTime), Column('resolved_at', DateTime)
+        ),
+        'scan_history': Table(
+            'scan_history', metadata,
+            Column('id', Integer, primary_key=True), Column('device_id', Integer), Column('is_online', Boolean),
+            Column('response_time', Float), Column('timestamp', DateTime)
+        ),
+        'scan_rollup': Table(
+            'scan_rollup', metadata,
+            Column('id', Integer, primary_key=True), Column('device_id', Integer, nullable=False),
+            Column('resolution', String(4), nullable=False), Column('bucket_start', DateTime, nullable=False),
+            Column('rtt_min', Float), Column('rtt_max', Float),
+            *[Column(name, Float if name == 'rtt_sum' else Integer, default=0) for name in scan_rollups.SUM_COLUMNS],
+            UniqueConstraint('device_id', 'resolution', 'bucket_start')
+        )
+    }
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    return engine, tables
+
+def test_report_data():
+    print("🧪 TEST INSTANTANÉS DE DONNÉES DES RAPPORTS")
+    print("=" * 40)
+
+    assert parts_for_sections([]) == parts_for_sections(None) == frozenset({'summary', 'devices', 'alerts', 'trends', 'ai'})
+    assert parts_for_sections(['executive-summary', 'alerts-analysis']) == {'summary', 'alerts'}
+    print("✅ Sections -> parties de l'instantané")
+
+    engine, tables = make_tables()
+    now = datetime.now().replace(microsecond=0)
+    with engine.begin() as conn:
+        conn.execute(tables['device'].insert(), [
+            {'id': i, 'ip': f"10.0.0.{i}", 'hostname': f"dev{i}", 'device_type': 'plc', 'is_online': i != 3,
+             'health_score': 80.0 + i, 'last_seen': now, 'response_time': 2.0, 'failure_probability': 0.7 if i == 2 else 0.1,
+             'anomaly_score': 0.0, 'maintenance_urgency': 'critical' if i == 3 else 'low', 'ai_confidence': 0.9,
+             'updated_at': now}
+            for i in (1, 2, 3)
+        ])
+        conn.execute(tables['alert'].insert(), [
+            {'device_id': 3, 'alert_type': 'offline', 'message': 'hors ligne', 'priority': 'high', 'is_resolved': False,
+             'created_at': now - timedelta(hours=2), 'resolved_at': None},
+            {'device_id': 1, 'alert_type': 'offline', 'message': 'ancienne', 'priority': 'low', 'is_resolved': True,
+             'created_at': now - timedelta(days=5), 'resolved_at': now - timedelta(days=4)}
+        ])
+        scans = [(1 + i % 3, now - timedelta(minutes=10 * i), i % 3 != 2, 5.0) for i in range(1, 100)]
+        conn.execute(tables['scan_history'].insert(), [
+            {'device_id': d, 'timestamp': t, 'is_online': o, 'response_time': r} for d, t, o, r in scans
+        ])
+        scan_rollups.apply_scans(conn, tables['scan_rollup'], scans)
+
+    # Compteur de requêtes pour vérifier qu'une seule construction est faite
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    builder = ReportDataBuilder(tables, config=dict(REPORT_DATA_CONFIG, cache_size=2))
+    with engine.connect() as conn:
+        snapshot = builder.get_snapshot(conn, 'daily')
+        assert snapshot.summary.total_devices == 3 and snapshot.summary.online_devices == 2
+        assert snapshot.summary.active_alerts == 1 and snapshot.summary.scans_count == 99
+        assert [d.ip for d in snapshot.devices] == ['10.0.0.1', '10.0.0.2', '10.0.0.3']
+        assert snapshot.devices[2].availability == 0.0 and snapshot.devices[0].availability == 100.0
+        assert [a.message for a in snapshot.alerts] == ['hors ligne']  # résolue avant la période : exclue
+        assert snapshot.ai.critical_devices == 1 and snapshot.ai.high_risk_devices == 1
+        assert len(snapshot.trends) >= 2
+        try:
+            snapshot.summary.total_devices = 0
+            raise AssertionError("instantané modifiable")
+        except dataclasses.FrozenInstanceError:
+            pass
+        print(f"✅ Instantané complet en {len(statements)} requêtes, immuable")
+
+        # Même rapport dans quatre formats : une seule construction
+        statements.clear()
+        for _ in range(4):
+            assert builder.get_snapshot(conn, 'daily') is snapshot
+        assert builder.stats == {'hits': 4, 'builds': 1}
+        assert len(statements) == 4 * 3  # signature de version uniquement
+        data = snapshot.to_dict()
+        assert data['summary']['total_devices'] == 3 and data['devices'][2]['status'] == 'Hors ligne'
+        data['devices'].clear()
+        assert len(snapshot.to_dict()['devices']) == 3
+        print("✅ Quatre formats : une construction, la version des données seule est relue")
+
+        # Sections : parties inutiles non lues
+        summary_only = builder.get_snapshot(conn, 'daily', sections=['executive-summary'])
+        assert summary_only.devices == () and summary_only.alerts == () and summary_only.ai is None
+        assert summary_only.summary == snapshot.summary
+        assert summary_only.to_dict()['metadata']['parts'] == ['summary']
+        assert built_parts(summary_only.to_dict()) == {'summary'} and built_parts({'metadata': {}}) == ALL_PARTS
+        print("✅ Sections respectées (résumé seul)")
+
+        # Période demandée : alertes de la semaine passée incluses, fin de période incluse
+        week = builder.get_snapshot(conn, 'custom', (now - timedelta(days=6)).date().isoformat(), now.date().isoformat(),
+                                    ['alerts-analysis'])
+        assert week.period_end == datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        assert len(week.alerts) == 2
+        weekly = builder.get_snapshot(conn, 'weekly', sections=['executive-summary'])
+        assert weekly.period_end - weekly.period_start == timedelta(days=7)
+        print("✅ Période (dates demandées ou durée du type de rapport)")
+
+    # Nouvelle donnée : version changée, instantané reconstruit
+    with engine.begin() as conn:
+        conn.execute(tables['scan_history'].insert(), {'device_id': 1, 'timestamp': now, 'is_online': True})
+    with engine.connect() as conn:
+        rebuilt = builder.get_snapshot(conn, 'daily')
+        assert rebuilt is not snapshot and rebuilt.data_version != snapshot.data_version
+        assert builder.get_stats()['cached'] == 2  # taille du cache bornée
+    print("✅ Reconstruction après modification des données")
+    return True
+
+if __name__ == "__main__":
+    test_report_data()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test des variantes pré-compressées des rapports téléchargés
+"""
+
+import sys
+import os
+import gzip
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Base temporaire : l'application ne touche pas à la base de production
+TMP_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(TMP_DIR, 'test_report_delivery.db')
+
+import report_delivery
+from report_delivery import DOWNLOAD_CONFIG, choose_variant, precompress, remove_variants, variant_paths
+from report_catalog import file_digest
+import app as dashboard
+
+def check_http_downloads(tmp):
+    """Routes de téléchargement : 304, Range (206), variante gzip et compteur de téléchargements"""
+    app, db = dashboard.app, dashboard.db
+    filename = 'rapport_weekly_20250501_080000.csv'
+    csv_path = os.path.join(tmp, filename)
+    content = ''.join(f"10.0.1.{i % 250},capteur-{i},Hors ligne,42.0\n" for i in range(3000)).encode()
+    with open(csv_path, 'wb') as f:
+        f.write(content)
+    precompress(csv_path)
+
+    with app.app_context():
+        db.create_all()
+        user = dashboard.User(username='technicien', email='technicien@danone.local', role='technician')
+        user.set_password('technicien')
+        db.session.add(user)
+        db.session.commit()
+        report = dashboard.Report(name='Rapport hebdomadaire', filename=filename, type='weekly', format='csv',
+                                  status='completed', file_path=csv_path, file_size=len(content),
+                                  content_hash=file_digest(csv_path), generated_by=user.id)
+        db.session.add(report)
+        db.session.commit()
+        report_id, user_id, content_hash = report.id, user.id, report.content_hash
+
+    def downloads():
+        with app.app_context():
+            return db.session.get(dashboard.Report, report_id).download_count
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    url = f'/api/reports/download/{filename}'
+
+    # Téléchargement complet : ETag = empreinte du fichier, compteur incrémenté
+    response = client.get(url)
+    assert response.status_code == 200 and response.data == content
+    assert response.get_etag()[0] == content_hash and 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary and response.cache_control.private
+    assert downloads() == 1
+    print("✅ Téléchargement complet : ETag = empreinte du rapport, compteur incrémenté")
+
+    # Revalidation : 304 sans corps, compteur inchangé
+    response = client.get(url, headers={'If-None-Match': f'"{content_hash}"'})
+    assert response.status_code == 304 and response.data == b'' and downloads() == 1
+    print("✅ If-None-Match : 304, compteur inchangé")
+
+    # Téléchargement par parties : seul le premier segment compte
+    response = client.get(url, headers={'Range': 'bytes=0-99'})
+    assert response.status_code == 206 and response.data == content[:100] and downloads() == 2
+    response = client.get(url, headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206 and response.data == content[100:200] and downloads() == 2
+    response = client.get(url, headers={'Range': f'bytes=200-{len(content) - 1}'})
+    assert response.status_code == 206 and response.data == content[200:] and downloads() == 2
+    print("✅ Range : 206 avec le segment demandé, un seul téléchargement compté")
+
+    # Variante gzip : ETag distinct, Content-Encoding, contenu identique une fois décompressé
+    response = client.get(url, headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.status_code == 200 and response.headers['Content-Encoding'] == 'gzip'
+    assert response.get_etag()[0] == f"{content_hash}-gzip" and gzip.decompress(response.data) == content
+    compressed_size = len(response.data)
+    assert compressed_size < len(content) / 5 and downloads() == 3
+    response = client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': f'"{content_hash}-gzip"'})
+    assert response.status_code == 304 and downloads() == 3
+    print(f"✅ Accept-Encoding gzip : variante servie ({compressed_size} octets), ETag -gzip")
+
+    # Route de compatibilité : même traitement
+    response = client.get(f'/download/{filename}', headers={'If-None-Match': f'"{content_hash}"'})
+    assert response.status_code == 304 and downloads() == 3
+    assert client.get('/api/reports/download/inconnu.csv').status_code == 404
+    print("✅ Route /download/<fichier> identique, rapport inconnu : 404")
+
+def test_report_delivery():
+    print("🧪 TEST TÉLÉCHARGEMENT DES RAPPORTS")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'rapport_daily_20250501_080000.csv')
+        content = ''.join(f"10.0.0.{i % 250},automate-{i},En ligne,98.5\n" for i in range(5000)).encode()
+        with open(csv_path, 'wb') as f:
+            f.write(content)
+
+        # Variantes créées à la génération, contenu identique une fois décompressé
+        created = precompress(csv_path)
+        assert created == (['gzip', 'br'] if report_delivery.brotli else ['gzip'])
+        with gzip.open(csv_path + '.gz', 'rb') as f:
+            assert f.read() == content
+        ratio = os.path.getsize(csv_path + '.gz') / len(content)
+        assert ratio < 0.2
+        first = open(csv_path + '.gz', 'rb').read()
+        precompress(csv_path)
+        assert open(csv_path + '.gz', 'rb').read() == first  # variante stable (ETag inchangé)
+        print(f"✅ Variante gzip créée ({ratio:.1%} de la taille d'origine), reproductible")
+        if not report_delivery.brotli:
+            print("⚠️ brotli non installé : variante gzip seule")
+
+        # PDF / petits fichiers : pas de variante
+        pdf_path = os.path.join(tmp, 'rapport.pdf')
+        small_path = os.path.join(tmp, 'petit.json')
+        for path, size in ((pdf_path, 50000), (small_path, DOWNLOAD_CONFIG['min_size'] - 1)):
+            with open(path, 'wb') as f:
+                f.write(b'x' * size)
+            assert precompress(path) == [] and variant_paths(path) == []
+        print("✅ PDF et petits fichiers servis sans variante")
+
+        # Négociation selon Accept-Encoding
+        assert choose_variant(csv_path, None) == (csv_path, None)
+        assert choose_variant(csv_path, 'identity') == (csv_path, None)
+        assert choose_variant(csv_path, 'gzip, deflate') == (csv_path + '.gz', 'gzip')
+        assert choose_variant(csv_path, 'gzip;q=0') == (csv_path, None)
+        assert choose_variant(pdf_path, 'gzip, br') == (pdf_path, None)
+        expected = (csv_path + '.br', 'br') if report_delivery.brotli else (csv_path + '.gz', 'gzip')
+        assert choose_variant(csv_path, 'gzip, deflate, br') == expected
+        assert choose_variant(csv_path, 'br;q=0.5, gzip') == (csv_path + '.gz', 'gzip')
+        print("✅ Variante choisie selon Accept-Encoding")
+
+        # Fichier d'origine remplacé après la compression : variante périmée ignorée
+        os.utime(csv_path, (os.path.getmtime(csv_path) + 10,) * 2)
+        assert choose_variant(csv_path, 'gzip') == (csv_path, None)
+        assert remove_variants(csv_path) == len(created) and variant_paths(csv_path) == []
+        print("✅ Variante périmée ignorée, variantes supprimées avec le rapport")
+
+        check_http_downloads(tmp)
+    return True
+
+if __name__ == "__main__":
+    test_report_delivery()
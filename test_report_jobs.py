@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test de la génération des rapports en tâche de fond
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.insert(0, os.path.dirname(__file__))
+
+from report_jobs import ReportJobPool
+
+def test_report_jobs():
+    print("🧪 TEST TÂCHES DE GÉNÉRATION DE RAPPORTS")
+    print("=" * 40)
+
+    pool = ReportJobPool(max_workers=2, keep_finished=3)
+    release = threading.Event()
+    seen = []
+
+    def slow_report(report_id, progress, pages):
+        progress(10, 'Collecte des données')
+        release.wait(5)
+        for page in range(pages):
+            progress(10 + 90 * (page + 1) // pages, f"Page {page + 1}/{pages}")
+            seen.append((report_id, page))
+
+    def broken_report(report_id, progress):
+        progress(30, 'Rendu du fichier')
+        raise ValueError("format inconnu")
+
+    start = time.time()
+    futures = [pool.submit(1, slow_report, 4), pool.submit(2, slow_report, 2), pool.submit(3, slow_report, 1)]
+    assert time.time() - start < 0.5  # submit ne bloque pas
+    time.sleep(0.2)
+    assert pool.get(1)['status'] == 'processing' and pool.get(1)['progress'] == 10
+    assert pool.get(1)['stage'] == 'Collecte des données'
+    assert pool.get(3)['status'] == 'queued'  # 2 workers seulement
+    print("✅ Soumission immédiate, tâches en file au-delà du nombre de workers")
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    assert pool.get(1)['status'] == 'completed' and pool.get(1)['progress'] == 100
+    assert pool.get(1)['finished_at'] >= pool.get(1)['started_at']
+    assert len(seen) == 7
+    print("✅ Progression publiée jusqu'à 100 %")
+
+    pool.submit(4, broken_report).result(timeout=5)
+    job = pool.get(4)
+    assert job['status'] == 'failed' and job['error'] == 'format inconnu' and job['progress'] == 30
+    print("✅ Échec enregistré avec son message")
+
+    # Historique borné : au-delà de keep_finished, les plus anciennes tâches terminées sont oubliées
+    pool.submit(5, slow_report, 1).result(timeout=5)
+    assert pool.get(1) is None and pool.get(4) is not None
+    assert pool.get_stats() == {'queued': 0, 'processing': 0, 'completed': 3, 'failed': 1}
+    print("✅ Suivi des tâches terminées borné")
+
+    pool.shutdown()
+    return True
+
+if __name__ == "__main__":
+    test_report_jobs()
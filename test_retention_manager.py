@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test de la rétention et du compactage des historiques SQLite
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+from datetime import datetime, timedelta
+
+from retention_manager import RetentionManager, RETENTION_CONFIG
+
+def make_database(path, now):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE scan_history (id INTEGER PRIMARY KEY, device_id INTEGER, payload TEXT, timestamp DATETIME)")
+    conn.execute("CREATE TABLE scan_rollup (id INTEGER PRIMARY KEY, resolution TEXT, bucket_start DATETIME)")
+    rows = [(i % 10, 'x' * 500, (now - timedelta(hours=i)).strftime('%Y-%m-%d %H:%M:%S.%f')) for i in range(24 * 30)]
+    conn.executemany("INSERT INTO scan_history (device_id, payload, timestamp) VALUES (?, ?, ?)", rows)
+    conn.executemany("INSERT INTO scan_rollup (resolution, bucket_start) VALUES (?, ?)", [
+        (resolution, now - timedelta(days=day)) for day in range(10) for resolution in ('1m', '1h')
+    ])
+    conn.commit()
+    conn.close()
+
+def test_retention_manager():
+    print("🧪 TEST RÉTENTION DES DONNÉES")
+    print("=" * 40)
+
+    now = datetime(2026, 1, 31, 12, 0, 0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'main.db')
+        make_database(path, now)
+
+        config = dict(RETENTION_CONFIG)
+        config.update({
+            'batch_size': 50,
+            'batch_pause': 0,
+            'report_file': os.path.join(tmp, 'retention_report.json'),
+            'policies': [
+                {'database': 'main', 'table': 'scan_history', 'column': 'timestamp', 'days': 14},
+                {'database': 'main', 'table': 'scan_rollup', 'column': 'bucket_start', 'days': 2,
+                 'where': "resolution = '1m'"},
+                {'database': 'main', 'table': 'missing_table', 'column': 'timestamp', 'days': 1},
+                {'database': 'absent', 'table': 'scan_history', 'column': 'timestamp', 'days': 1}
+            ]
+        })
+        manager = RetentionManager({'main': path, 'absent': os.path.join(tmp, 'absent.db')}, config)
+
+        report = manager.run(now=now)
+        conn = sqlite3.connect(path)
+        remaining = conn.execute("SELECT COUNT(*) FROM scan_history").fetchone()[0]
+        oldest = conn.execute("SELECT MIN(timestamp) FROM scan_history").fetchone()[0]
+        rollups = dict(conn.execute("SELECT resolution, COUNT(*) FROM scan_rollup GROUP BY resolution").fetchall())
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        indexes = [row[1] for row in conn.execute("PRAGMA index_list(scan_history)")]
+        conn.close()
+
+        assert remaining == 14 * 24 + 1, remaining
+        assert oldest >= (now - timedelta(days=14)).strftime('%Y-%m-%d %H:%M:%S')
+        assert report['tables'][0]['deleted_rows'] == 24 * 30 - remaining
+        print(f"✅ scan_history : {report['tables'][0]['deleted_rows']} lignes supprimées par lots de 50")
+
+        assert rollups == {'1m': 3, '1h': 10}, rollups
+        assert len(report['tables']) == 2 and 'absent' not in report['databases']
+        print("✅ Filtre par résolution, tables et bases absentes ignorées")
+
+        database = report['databases']['main']
+        assert database['vacuum'] == 'full' and auto_vacuum == 2
+        assert database['reclaimed_bytes'] > 0 and database['size_after'] < database['size_before']
+        assert 'idx_scan_history_timestamp' in indexes
+        print(f"✅ VACUUM complet : {database['reclaimed_bytes']} octets récupérés, auto_vacuum incrémental")
+
+        report = manager.run(now=now + timedelta(days=1))
+        assert report['databases']['main']['vacuum'] == 'incremental'
+        assert report['tables'][0]['deleted_rows'] == 24
+        assert report['cumulative']['runs'] == 2
+        assert manager.load_report()['finished_at'] == report['finished_at']
+        print(f"✅ Passage suivant : vacuum incrémental, cumul {report['cumulative']['deleted_rows']} lignes")
+
+    return True
+
+if __name__ == "__main__":
+    test_retention_manager()
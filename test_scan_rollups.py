@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test des agrégats temporels de l'historique des scans
+"""
+
+import sys
+import os
+import random
+sys.path.insert(0, os.path.dirname(__file__))
+
+from datetime import datetime, timedelta
+from sqlalchemy import (Column, DateTime, Float, Integer, MetaData, String, Table, UniqueConstraint,
+                        create_engine)
+
+import scan_rollups
+
+def make_tables():
+    metadata = MetaData()
+    rollup_table = Table(
+        'scan_rollup', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('device_id', Integer, nullable=False),
+        Column('resolution', String(4), nullable=False),
+        Column('bucket_start', DateTime, nullable=False),
+        Column('rtt_min', Float),
+        Column('rtt_max', Float),
+        *[Column(name, Float if name == 'rtt_sum' else Integer, default=0) for name in scan_rollups.SUM_COLUMNS],
+        UniqueConstraint('device_id', 'resolution', 'bucket_start')
+    )
+    scan_table = Table(
+        'scan_history', metadata,
+        Column('id', Integer, primary_key=True),
+        Column('device_id', Integer),
+        Column('is_online', Integer),
+        Column('response_time', Float),
+        Column('timestamp', DateTime)
+    )
+    engine = create_engine('sqlite://')
+    metadata.create_all(engine)
+    return engine, rollup_table, scan_table
+
+def test_scan_rollups():
+    print("🧪 TEST AGRÉGATS DE SCANS")
+    print("=" * 40)
+
+    assert scan_rollups.percentile([0, 0, 0, 0, 10, 0, 0, 0, 0, 0, 0], 0.95, 12.0, 18.0) <= 18.0
+    assert scan_rollups.percentile([0] * 11, 0.95, None, None) is None
+    print("✅ Percentile par histogramme")
+
+    random.seed(3)
+    engine, rollup_table, scan_table = make_tables()
+    now = datetime.now()
+    scans = []
+    for _ in range(2000):
+        online = random.random() > 0.1
+        scans.append((random.choice([1, 2]), now - timedelta(minutes=random.randint(0, 3 * 24 * 60)),
+                      online, random.lognormvariate(3, 1) if online else None))
+
+    with engine.begin() as connection:
+        # Insertion scan par scan, comme le listener after_insert
+        for scan in scans:
+            scan_rollups.apply_scans(connection, rollup_table, [scan])
+        connection.execute(scan_table.insert(), [
+            {'device_id': d, 'timestamp': t, 'is_online': o, 'response_time': r} for d, t, o, r in scans
+        ])
+
+    start = now - timedelta(days=1)
+    selected = [s for s in scans if s[1] >= scan_rollups.bucket_start(start, '1h')]
+    rtts = sorted(s[3] for s in selected if s[3])
+    with engine.connect() as connection:
+        stats = scan_rollups.summarize(connection, rollup_table, start, now + timedelta(minutes=1))
+        assert stats['resolution'] == '1h'
+        assert stats['samples'] == len(selected)
+        assert abs(stats['avg_response_time'] - sum(rtts) / len(rtts)) < 1e-6
+        assert stats['min_response_time'] == rtts[0] and stats['max_response_time'] == rtts[-1]
+        assert abs(stats['availability'] - 100 * sum(1 for s in selected if s[2]) / len(selected)) < 1e-9
+        assert rtts[0] <= stats['p95_response_time'] <= rtts[-1]
+        print(f"✅ Synthèse 24h : {stats['samples']} scans, moyenne {stats['avg_response_time']:.1f} ms, "
+              f"p95 ≈ {stats['p95_response_time']:.1f} ms (exact {rtts[int(0.95 * len(rtts))]:.1f} ms)")
+
+        assert scan_rollups.total_samples(connection, rollup_table) == len(scans)
+        device_total = scan_rollups.total_samples(connection, rollup_table, device_id=1)
+        assert device_total == sum(1 for s in scans if s[0] == 1)
+        points = scan_rollups.series(connection, rollup_table, now - timedelta(hours=2), device_id=2)
+        assert all(p['samples'] > 0 for p in points)
+        print(f"✅ Totaux et série par minute ({len(points)} points)")
+
+    with engine.begin() as connection:
+        before = connection.execute(rollup_table.select().order_by(rollup_table.c.id)).mappings().all()
+        scan_rollups.rebuild(connection, rollup_table, scan_table, batch_size=300)
+        after = connection.execute(rollup_table.select()).mappings().all()
+    key = lambda row: (row['device_id'], row['resolution'], row['bucket_start'])
+    after_by_key = {key(row): row for row in after}
+    assert len(before) == len(after)
+    for row in before:
+        other = after_by_key[key(row)]
+        assert row['sample_count'] == other['sample_count'] and row['hist_4'] == other['hist_4']
+        assert abs(row['rtt_sum'] - other['rtt_sum']) < 1e-6
+    print("✅ Reconstruction identique à la mise à jour incrémentale")
+
+    return True
+
+if __name__ == "__main__":
+    test_scan_rollups()
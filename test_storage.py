@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test de la couche de stockage SQLite (profil de réglage et pool de connexions)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+sys.path.insert(0, os.path.dirname(__file__))
+
+from storage import ConnectionPool, get_pool
+
+def test_storage():
+    print("🧪 TEST COUCHE DE STOCKAGE")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'monitoring.db')
+        pool = get_pool(path)
+        assert get_pool(os.path.join(tmp, '.', 'monitoring.db')) is pool
+
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE service_monitoring (id INTEGER PRIMARY KEY, device_ip TEXT, status TEXT)")
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] > 0
+        print("✅ WAL, synchronous=NORMAL, busy_timeout")
+
+        # Rollback sur exception, commit sinon
+        try:
+            with pool.connection() as conn:
+                conn.execute("INSERT INTO service_monitoring (device_ip, status) VALUES ('10.0.0.1', 'up')")
+                raise ValueError("échec simulé")
+        except ValueError:
+            pass
+        with pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM service_monitoring").fetchone()[0] == 0
+        print("✅ Rollback sur exception")
+
+        # Écritures concurrentes : pas de "database is locked", pool borné
+        errors = []
+
+        def writer(index):
+            try:
+                for i in range(50):
+                    with pool.connection() as conn:
+                        conn.execute("INSERT INTO service_monitoring (device_ip, status) VALUES (?, 'up')",
+                                     (f"10.0.{index}.{i}",))
+            except sqlite3.Error as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+        with pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM service_monitoring").fetchone()[0] == 20 * 50
+        stats = pool.stats()
+        assert stats['created'] <= pool.size
+        print(f"✅ 20 threads × 50 écritures, {stats['created']} connexions ouvertes (max {pool.size})")
+
+        # Pool épuisé : attente bornée puis erreur explicite
+        small = ConnectionPool(path, size=1, timeout=0.1)
+        with small.connection():
+            try:
+                with small.connection():
+                    pass
+                raise AssertionError("le pool aurait dû être épuisé")
+            except sqlite3.OperationalError:
+                pass
+        print("✅ Contre-pression sur pool épuisé")
+
+        small.close()
+        pool.close()
+
+    return True
+
+if __name__ == "__main__":
+    test_storage()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test des exports en flux (CSV / NDJSON / gzip)
+"""
+
+import sys
+import os
+import csv
+import gzip
+import io
+import json
+import sqlite3
+import tracemalloc
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(__file__))
+
+from streaming_export import export_stream, iter_chunks
+
+def test_streaming_export():
+    print("🧪 TEST EXPORTS EN FLUX")
+    print("=" * 40)
+
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE scan_history (id INTEGER PRIMARY KEY, device_id INTEGER, is_online BOOLEAN, "
+                 "response_time REAL, timestamp TEXT)")
+    start = datetime(2025, 1, 1)
+    total = 100000
+    conn.executemany("INSERT INTO scan_history VALUES (?, ?, ?, ?, ?)", (
+        (i, i % 1000, i % 7 != 0, None if i % 7 == 0 else 1.5, (start + timedelta(seconds=300 * i)).isoformat())
+        for i in range(1, total + 1)
+    ))
+    columns = ['id', 'device_id', 'is_online', 'response_time', 'timestamp']
+    queries = []
+
+    def fetch_chunk(last_id, chunk_size, since='2025-03-01'):
+        queries.append(last_id)
+        return conn.execute("SELECT * FROM scan_history WHERE id > ? AND timestamp >= ? ORDER BY id LIMIT ?",
+                            (last_id, since, chunk_size)).fetchall()
+
+    # Pagination par identifiant : lots successifs sans doublon ni trou
+    ids = [row[0] for chunk in iter_chunks(fetch_chunk, 7000) for row in chunk]
+    expected = conn.execute("SELECT COUNT(*) FROM scan_history WHERE timestamp >= '2025-03-01'").fetchone()[0]
+    assert len(ids) == expected == len(set(ids)) and ids == sorted(ids)
+    assert len(queries) == expected // 7000 + 1
+    print(f"✅ {expected} lignes en {len(queries)} lots")
+
+    # CSV : mémoire constante pendant tout le flux (on ne garde que la taille produite)
+    tracemalloc.start()
+    body, mimetype, extension = export_stream(columns, iter_chunks(lambda l, n: fetch_chunk(l, n, ''), 5000), 'csv')
+    size = 0
+    first = None
+    for block in body:
+        first = first or block
+        size += len(block)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert mimetype == 'text/csv' and extension == 'csv'
+    assert first.decode().startswith('id,device_id,is_online,response_time,timestamp\r\n')
+    assert peak < 8 * 1024 * 1024, peak
+    print(f"✅ CSV de {total} lignes ({size // 1024} Ko) avec un pic mémoire de {peak // 1024} Ko")
+
+    # CSV gzip : décompressable et identique au CSV non compressé
+    plain = b''.join(export_stream(columns, iter_chunks(fetch_chunk, 5000), 'csv')[0])
+    body, mimetype, extension = export_stream(columns, iter_chunks(fetch_chunk, 5000), 'csv', compress=True)
+    compressed = b''.join(body)
+    assert mimetype == 'application/gzip' and extension == 'csv.gz'
+    assert gzip.decompress(compressed) == plain and len(compressed) < len(plain) / 3
+    rows = list(csv.reader(io.StringIO(plain.decode())))
+    assert len(rows) == expected + 1 and rows[1][3] in ('', '1.5')
+    print(f"✅ gzip : {len(plain) // 1024} Ko -> {len(compressed) // 1024} Ko")
+
+    # NDJSON : un objet JSON par ligne, dates ISO
+    chunks = [[(1, 'Équipement hors ligne', datetime(2025, 5, 1, 8, 30))]]
+    lines = b''.join(export_stream(['id', 'message', 'created_at'], chunks, 'ndjson')[0]).decode().splitlines()
+    assert json.loads(lines[0]) == {'id': 1, 'message': 'Équipement hors ligne', 'created_at': '2025-05-01T08:30:00'}
+    print("✅ NDJSON (UTF-8, dates ISO)")
+
+    try:
+        export_stream(columns, [], 'xml')
+        raise AssertionError("format xml accepté")
+    except ValueError:
+        pass
+    print("✅ Format inconnu refusé")
+    return True
+
+if __name__ == "__main__":
+    test_streaming_export()
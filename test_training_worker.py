@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test du worker d'entraînement hors processus (instantané en entrée, manifeste JSON sur la dernière ligne de stdout)
+"""
+
+import sys
+import os
+import json
+import subprocess
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import joblib
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from ai_incremental import TrainingBuffer
+from ai_training_worker import TrainingWorkerLauncher
+from model_registry import ModelRegistry
+
+WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_training_worker.py')
+
+def make_snapshot(rows=200, devices=4):
+    """Petit instantané au format de IncrementalTrainer.training_snapshot()"""
+    rng = np.random.RandomState(0)
+    buffer = TrainingBuffer(os.devnull, max_rows=rows)
+    buffer.append([(i, i % devices, 20 + rng.normal(0, 3), 0.0, i % 9 != 0, 1.5, int(i % 13 == 0))
+                   for i in range(1, rows + 1)])
+    anomaly_rows = buffer.anomaly_rows()
+    return {'anomaly_rows': anomaly_rows, 'device_histories': buffer.device_histories(),
+            'anomaly_scaler': StandardScaler().fit(anomaly_rows), 'rows': buffer.row_count, 'rows_since_fit': rows}
+
+def run_worker(cwd, snapshot_path, *args):
+    return subprocess.run([sys.executable, WORKER, '--snapshot', snapshot_path, *args],
+                          cwd=cwd, capture_output=True, text=True, timeout=300)
+
+def test_training_worker():
+    print("🧪 TEST WORKER D'ENTRAÎNEMENT")
+    print("=" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ModelRegistry(os.path.join(tmp, 'ai_models', 'registry'))
+        snapshot_path = os.path.join(tmp, 'snapshot.pkl')
+        joblib.dump(make_snapshot(), snapshot_path)
+
+        # Publication seule : manifeste sur la dernière ligne de stdout, pointeur actif inchangé
+        process = run_worker(tmp, snapshot_path, '--no-activate')
+        assert process.returncode == 0, process.stderr[-500:]
+        manifest = json.loads(process.stdout.strip().splitlines()[-1])
+        assert manifest['training_rows'] == 200 and manifest['is_fitted']['anomaly_detector']
+        assert registry.manifest(manifest['version']) == manifest and registry.active_version() is None
+        print(f"✅ --no-activate : version {manifest['version']} publiée, pointeur actif inchangé")
+
+        # Lancement manuel (CLI, cron) : même contenu, même version, pointeur basculé
+        process = run_worker(tmp, snapshot_path)
+        assert process.returncode == 0, process.stderr[-500:]
+        assert json.loads(process.stdout.strip().splitlines()[-1])['version'] == manifest['version']
+        assert registry.active_version() == manifest['version']
+        print("✅ Sans option : version identique (adressée par contenu) et activée")
+
+        # Instantané inutilisable : code de sortie non nul, rien sur stdout
+        joblib.dump({'anomaly_rows': np.zeros((0, 5)), 'device_histories': [], 'rows': 0}, snapshot_path)
+        process = run_worker(tmp, snapshot_path, '--no-activate')
+        assert process.returncode == 1 and '"version"' not in process.stdout
+        assert len(registry.list_versions()) == 1
+        print("✅ Échec d'entraînement : code de sortie 1, aucune version publiée")
+
+        # Lanceur du processus web : un seul worker à la fois, résultat transmis avec l'instantané
+        previous_cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            results, done = [], threading.Event()
+            launcher = TrainingWorkerLauncher(on_complete=lambda result, snapshot: (results.append((result, snapshot)),
+                                                                                    done.set()))
+            snapshot = make_snapshot(rows=300)
+            assert launcher.launch(snapshot) and launcher.is_running()
+            assert not launcher.launch(snapshot)
+            assert done.wait(300)
+            result, received = results[0]
+            assert received is snapshot and result['training_rows'] == 300
+            assert result['version'] != manifest['version'] and registry.manifest(result['version'])
+            # Le processus web charge la version avant de basculer le pointeur
+            assert registry.active_version() == manifest['version']
+            # Instantané supprimé juste après la notification
+            snapshot_dir = os.path.join(tmp, launcher.snapshot_dir)
+            for _ in range(50):
+                if not os.listdir(snapshot_dir):
+                    break
+                time.sleep(0.1)
+            assert os.listdir(snapshot_dir) == []
+        finally:
+            os.chdir(previous_cwd)
+        print("✅ Lanceur : un worker à la fois, manifeste transmis, instantané supprimé, pointeur laissé au web")
+    return True
+
+if __name__ == "__main__":
+    test_training_worker()